@@ -44,8 +44,23 @@ class Config:
         # Replace localhost/127.0.0.1 with 'db' service name for Docker
         DATABASE_URL = DATABASE_URL.replace('127.0.0.1', 'db').replace('localhost', 'db')
     
+    # Optional read-only replica for reporting queries; empty means reads use the primary
+    DATABASE_READ_REPLICA_URL: str = os.getenv("DATABASE_READ_REPLICA_URL", "")
+
     DATABASE_POOL_SIZE: int = int(os.getenv("DATABASE_POOL_SIZE", "10"))
-    
+    DATABASE_MAX_OVERFLOW: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    DATABASE_POOL_TIMEOUT: int = int(os.getenv("DATABASE_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+    DATABASE_POOL_RECYCLE: int = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))  # Seconds before a connection is replaced
+    # "queue" keeps a per-worker pool; "null" opens a connection per checkout (use behind PgBouncer)
+    DATABASE_POOL_MODE: str = os.getenv("DATABASE_POOL_MODE", "queue").lower()
+    DATABASE_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DATABASE_STATEMENT_TIMEOUT_MS", "0"))  # 0 disables the timeout
+    # Keep loaded attributes after commit so responses can be built without another SELECT
+    DATABASE_EXPIRE_ON_COMMIT: bool = os.getenv("DATABASE_EXPIRE_ON_COMMIT", "False").lower() == "true"
+
+    # SQLite settings (local profile)
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "True").lower() == "true"
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
     # Security settings
     SECRET_KEY: str = SECRET_KEY  # Use the validated module-level SECRET_KEY
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
@@ -55,6 +70,77 @@ class Config:
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "*").split(",")
     
+    # Run Base.metadata.create_all at startup; production schemas come from Alembic migrations
+    DATABASE_CREATE_ALL_ON_STARTUP: bool = os.getenv("DATABASE_CREATE_ALL_ON_STARTUP", "False").lower() == "true"
+    # Comma-separated optional features whose routers are not loaded (e.g. "analytics,stock")
+    DISABLED_FEATURES: list = [f.strip() for f in os.getenv("DISABLED_FEATURES", "").split(",") if f.strip()]
+
+    # Order idempotency keys and offline sync
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))  # Keys cached per worker
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "3600"))  # Expired keys deleted this often
+    ORDER_SYNC_MAX_BATCH: int = int(os.getenv("ORDER_SYNC_MAX_BATCH", "200"))
+
+    # Order event change feed (GET /api/events)
+    EVENTS_LONG_POLL_TIMEOUT: float = float(os.getenv("EVENTS_LONG_POLL_TIMEOUT", "25"))  # Default and max wait, seconds
+    # How often a waiting request re-checks for events committed by other workers
+    EVENTS_POLL_INTERVAL: float = float(os.getenv("EVENTS_POLL_INTERVAL", "1.0"))
+    EVENTS_MAX_BATCH: int = int(os.getenv("EVENTS_MAX_BATCH", "500"))
+
+    # Archival of closed orders into the *_archive tables
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "True").lower() == "true"
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))  # Paid/cancelled orders older than this move out
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))  # Orders moved per transaction
+    ARCHIVE_INTERVAL_SECONDS: int = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+    # In-memory floor plan (GET /api/tables/floor-plan)
+    # Reload from the database at most this often to pick up other workers' changes
+    FLOOR_PLAN_REFRESH_SECONDS: float = float(os.getenv("FLOOR_PLAN_REFRESH_SECONDS", "2.0"))
+    FLOOR_PLAN_HISTORY_SIZE: int = int(os.getenv("FLOOR_PLAN_HISTORY_SIZE", "1000"))  # Changes kept for ?since= deltas
+    FLOOR_PLAN_HEARTBEAT_SECONDS: float = float(os.getenv("FLOOR_PLAN_HEARTBEAT_SECONDS", "15"))
+
+    # Attempts for writes that lose an optimistic version check (table seating, merges) before 409 Conflict
+    OPTIMISTIC_LOCK_RETRIES: int = int(os.getenv("OPTIMISTIC_LOCK_RETRIES", "3"))
+
+    # Reservations: the in-memory availability index reloads from the database at most this often when read
+    RESERVATION_INDEX_REFRESH_SECONDS: float = float(os.getenv("RESERVATION_INDEX_REFRESH_SECONDS", "10"))
+    RESERVATION_DEFAULT_DURATION_MINUTES: int = int(os.getenv("RESERVATION_DEFAULT_DURATION_MINUTES", "90"))
+
+    # Kitchen scheduler: the in-memory station queues reload at most this often when read; items each
+    # station cooks at once; prep time of items with no ticket history
+    KITCHEN_SCHEDULER_REFRESH_SECONDS: float = float(os.getenv("KITCHEN_SCHEDULER_REFRESH_SECONDS", "15"))
+    KITCHEN_STATION_CAPACITY: int = int(os.getenv("KITCHEN_STATION_CAPACITY", "4"))
+    KITCHEN_DEFAULT_PREP_SECONDS: float = float(os.getenv("KITCHEN_DEFAULT_PREP_SECONDS", "600"))
+
+    # Payment gateway: "simulated" approves every payment locally; "http" calls PAYMENT_GATEWAY_URL
+    PAYMENT_GATEWAY: str = os.getenv("PAYMENT_GATEWAY", "simulated").lower()
+    PAYMENT_GATEWAY_URL: str = os.getenv("PAYMENT_GATEWAY_URL", "")
+    PAYMENT_GATEWAY_API_KEY: str = os.getenv("PAYMENT_GATEWAY_API_KEY", "")
+    PAYMENT_GATEWAY_TIMEOUT_SECONDS: float = float(os.getenv("PAYMENT_GATEWAY_TIMEOUT_SECONDS", "5"))
+    PAYMENT_GATEWAY_MAX_CONNECTIONS: int = int(os.getenv("PAYMENT_GATEWAY_MAX_CONNECTIONS", "20"))  # Per worker
+    PAYMENT_GATEWAY_RETRIES: int = int(os.getenv("PAYMENT_GATEWAY_RETRIES", "2"))  # Same idempotency key each time
+    PAYMENT_GATEWAY_BREAKER_FAILURES: int = int(os.getenv("PAYMENT_GATEWAY_BREAKER_FAILURES", "5"))
+    PAYMENT_GATEWAY_BREAKER_RESET_SECONDS: float = float(os.getenv("PAYMENT_GATEWAY_BREAKER_RESET_SECONDS", "30"))
+    PAYMENT_GATEWAY_SIMULATED_LATENCY_MS: int = int(os.getenv("PAYMENT_GATEWAY_SIMULATED_LATENCY_MS", "0"))
+
+    # Settings are cached per worker; other workers' changes are picked up within this delay
+    SETTINGS_CHECK_SECONDS: float = float(os.getenv("SETTINGS_CHECK_SECONDS", "2.0"))
+
+    # Sales reports: days of columnar order snapshots, and report results, kept per worker
+    ANALYTICS_CACHE_DAYS: int = int(os.getenv("ANALYTICS_CACHE_DAYS", "400"))
+    ANALYTICS_RESULT_CACHE_SIZE: int = int(os.getenv("ANALYTICS_RESULT_CACHE_SIZE", "256"))  # 0 disables
+    # Live dashboard counters: items tracked per hour, and how often each worker saves its counters
+    LIVE_ANALYTICS_CAPACITY: int = int(os.getenv("LIVE_ANALYTICS_CAPACITY", "200"))
+    LIVE_ANALYTICS_PERSIST_SECONDS: float = float(os.getenv("LIVE_ANALYTICS_PERSIST_SECONDS", "60"))
+    # Speed-of-service reports: how often each worker folds new kitchen/bar status changes into the day sketches
+    KITCHEN_TIMING_FOLD_SECONDS: float = float(os.getenv("KITCHEN_TIMING_FOLD_SECONDS", "30"))
+
+    # Request metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_SERVER_TIMING: bool = os.getenv("METRICS_SERVER_TIMING", "True").lower() == "true"
+    # Warn when one statement runs this many times in a single request (0 disables)
+    METRICS_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "10"))
+
     # Learning path settings
     DEFAULT_LEARNING_PATH: str = os.getenv("DEFAULT_LEARNING_PATH", "beginner")
     
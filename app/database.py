@@ -1,9 +1,22 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.exc import SQLAlchemyError   
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+from typing import Any, Dict, List, Optional
+import threading
 import logging
+import time
 import os
 
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.config (local development)
+    from app.config import Config
+except ImportError:
+    # Try importing from config directly (Docker container)
+    from config import Config
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,15 +56,264 @@ if is_running_in_docker() and DATABASE_URL:
 
 logger.info(f"Connecting to database: {DATABASE_URL}")
 
+
+class PoolMetrics:
+    """Checkout wait and saturation counters for one engine's connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.in_use = 0
+        self.in_use_peak = 0
+        self.pool_size = 0
+        self.max_overflow = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+                return
+            self.checkouts += 1
+            self.checkout_wait_total += seconds
+            if seconds > self.checkout_wait_max:
+                self.checkout_wait_max = seconds
+
+    def record_checkout(self):
+        with self._lock:
+            self.in_use += 1
+            if self.in_use > self.in_use_peak:
+                self.in_use_peak = self.in_use
+
+    def record_checkin(self):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            capacity = self.pool_size + self.max_overflow
+            return {
+                "name": self.name,
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "in_use": self.in_use,
+                "in_use_peak": self.in_use_peak,
+                "saturation": round(self.in_use / capacity, 4) if capacity else 0.0,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+            }
+
+
+# Metrics for every engine built by create_db_engine, keyed by engine name
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+class _TimedCheckoutMixin:
+    """Pool mixin that measures how long callers wait for a connection"""
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.metrics:
+                self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        if self.metrics:
+            self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def _instrumented_pool_class(base_class, metrics: PoolMetrics):
+    # A subclass per engine keeps the metrics attached when the pool is recreated on dispose()
+    return type(f"Instrumented{base_class.__name__}", (_TimedCheckoutMixin, base_class), {"metrics": metrics})
+
+
+def _configure_sqlite(engine, config: Config, in_memory: bool):
+    """Apply WAL journaling and a busy timeout to every new SQLite connection"""
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}")
+        if config.SQLITE_WAL and not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+def _is_in_memory_sqlite(database_url: str) -> bool:
+    return ":memory:" in database_url or database_url.split("?")[0].rstrip("/").endswith(":")
+
+
+def _engine_options(database_url: str, config: Config, metrics: PoolMetrics, is_async: bool) -> Dict[str, Any]:
+    """Translate Config pool settings into create_engine keyword arguments"""
+    queue_pool = AsyncAdaptedQueuePool if is_async else QueuePool
+    engine_kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    connect_args: Dict[str, Any] = {}
+    is_sqlite = database_url.startswith("sqlite")
+
+    if is_sqlite:
+        # FastAPI hands sessions to worker threads, so connections must not be pinned to one thread
+        connect_args["check_same_thread"] = False
+        use_queue_pool = not _is_in_memory_sqlite(database_url)
+    elif config.DATABASE_POOL_MODE == "null":
+        # PgBouncer owns pooling; holding idle connections here would only pin server slots
+        engine_kwargs["poolclass"] = _instrumented_pool_class(NullPool, metrics)
+        engine_kwargs["pool_pre_ping"] = False
+        use_queue_pool = False
+    else:
+        engine_kwargs["pool_recycle"] = config.DATABASE_POOL_RECYCLE
+        use_queue_pool = True
+
+    if use_queue_pool:
+        engine_kwargs["poolclass"] = _instrumented_pool_class(queue_pool, metrics)
+        engine_kwargs["pool_size"] = config.DATABASE_POOL_SIZE
+        engine_kwargs["max_overflow"] = config.DATABASE_MAX_OVERFLOW
+        engine_kwargs["pool_timeout"] = config.DATABASE_POOL_TIMEOUT
+        metrics.pool_size = config.DATABASE_POOL_SIZE
+        metrics.max_overflow = config.DATABASE_MAX_OVERFLOW
+
+    if not is_sqlite and config.DATABASE_STATEMENT_TIMEOUT_MS > 0:
+        timeout_ms = str(int(config.DATABASE_STATEMENT_TIMEOUT_MS))
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": timeout_ms}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+
+    if connect_args:
+        engine_kwargs["connect_args"] = connect_args
+    return engine_kwargs
+
+
+def _instrument_engine(sync_engine, database_url: str, name: str, config: Config, metrics: PoolMetrics):
+    if database_url.startswith("sqlite"):
+        _configure_sqlite(sync_engine, config, _is_in_memory_sqlite(database_url))
+    event.listen(sync_engine, "checkout", lambda *args: metrics.record_checkout())
+    event.listen(sync_engine, "checkin", lambda *args: metrics.record_checkin())
+    pool_metrics[name] = metrics
+
+
+def create_db_engine(database_url: str, name: str = "primary", config: Optional[Config] = None, **overrides):
+    """
+    Build an engine whose pool settings come from Config.
+
+    Postgres engines get a sized QueuePool (or a NullPool when DATABASE_POOL_MODE is
+    "null", for use behind PgBouncer) and an optional server-side statement timeout.
+    SQLite engines get WAL mode and a busy timeout instead of pool sizing.
+    """
+    if config is None:
+        config = Config()
+
+    metrics = PoolMetrics(name)
+    engine_kwargs = _engine_options(database_url, config, metrics, is_async=False)
+    engine_kwargs.update(overrides)
+
+    db_engine = create_engine(database_url, **engine_kwargs)
+    _instrument_engine(db_engine, database_url, name, config, metrics)
+    return db_engine
+
+
+def to_async_url(database_url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (asyncpg / aiosqlite)"""
+    scheme, separator, rest = database_url.partition("://")
+    base_scheme = scheme.split("+")[0]
+    if base_scheme in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{separator}{rest}"
+    if base_scheme == "sqlite":
+        return f"sqlite+aiosqlite{separator}{rest}"
+    return database_url
+
+
+def create_async_db_engine(database_url: str, name: str = "primary-async", config: Optional[Config] = None, **overrides):
+    """Async counterpart of create_db_engine, sharing the same pool settings"""
+    if config is None:
+        config = Config()
+
+    async_url = to_async_url(database_url)
+    metrics = PoolMetrics(name)
+    engine_kwargs = _engine_options(async_url, config, metrics, is_async=True)
+    engine_kwargs.update(overrides)
+
+    db_engine = create_async_engine(async_url, **engine_kwargs)
+    _instrument_engine(db_engine.sync_engine, async_url, name, config, metrics)
+    return db_engine
+
+
+def create_read_engine(replica_url: Optional[str], primary_engine, config: Optional[Config] = None):
+    """
+    Build the engine used for reporting reads.
+
+    Returns the primary engine itself when no replica URL is configured, so callers can
+    always use the read session without caring whether a replica exists.
+    """
+    if not replica_url:
+        return primary_engine
+    return create_db_engine(replica_url, name="replica", config=config)
+
+
+def get_pool_metrics() -> List[Dict[str, Any]]:
+    """Return a snapshot of pool usage for every configured engine"""
+    return [metrics.snapshot() for metrics in pool_metrics.values()]
+
+
 try:
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    _config = Config()
+    engine = create_db_engine(DATABASE_URL, name="primary", config=_config)
+    SessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=_config.DATABASE_EXPIRE_ON_COMMIT,
+        bind=engine
+    )
     Base = declarative_base()
+
+    # Long reporting scans go to the read replica when one is configured, otherwise to the primary
+    read_engine = create_read_engine(_config.DATABASE_READ_REPLICA_URL, engine, config=_config)
+    ReadSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=_config.DATABASE_EXPIRE_ON_COMMIT,
+        bind=read_engine
+    )
+    if read_engine is not engine:
+        logger.info("Read replica configured for reporting queries")
+
+    # Async engine for the request path; the sync engine stays for scripts and migrations
+    async_engine = create_async_db_engine(os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL, name="primary-async", config=_config)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        # Attributes must stay loaded after commit; lazy loads are not possible on AsyncSession
+        expire_on_commit=False
+    )
     logger.info("Database engine created successfully")
 except Exception as e:
     logger.error(f"Failed to create database engine: {str(e)}")
     raise
 
+async def warm_connection_pools():
+    """Open one connection per engine at startup so the first requests skip the connect cost"""
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    for db_engine in {engine, read_engine}:
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+
+async def dispose_engines():
+    """Close pooled connections on shutdown"""
+    await async_engine.dispose()
+    for db_engine in {engine, read_engine}:
+        db_engine.dispose()
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -65,4 +327,34 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Session for read-only reporting queries, bound to the replica when configured"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {str(e)}")
+        db.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in database session: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def get_async_db():
+    """Async counterpart of get_db for `async def` routes"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except SQLAlchemyError as e:
+            logger.error(f"Database error: {str(e)}")
+            await db.rollback()
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in database session: {str(e)}")
+            await db.rollback()
+            raise
@@ -1,29 +1,33 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Handle imports for both local development and Docker container environments
 try:
     # Try importing from app.module (local development)
-    from app.database import get_db
+    from app.database import get_async_db
     from app.models.user import User, UserRole
     from app.security import decode_access_token
 except ImportError:
     # Try importing directly (Docker container)
-    from database import get_db
+    from database import get_async_db
     from models.user import User, UserRole
     from security import decode_access_token
 
 # OAuth2 scheme for JWT token - Updated to match the actual login endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
     """
     Get the current user from the JWT token.
     
+    Runs on the async session so authenticated routes do not occupy a
+    threadpool slot just to resolve the user.
+    
     Args:
         token (str): JWT token from the Authorization header
-        db (Session): Database session
+        db (AsyncSession): Database session
         
     Returns:
         User: The authenticated user
@@ -48,7 +52,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
     
     # Get user from database
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    result = await db.execute(select(User).where(User.id == int(user_id)))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
         
@@ -64,7 +69,7 @@ def require_role(required_role: UserRole):
     Returns:
         function: A dependency function that validates the user's role
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
         # Compare role values as strings
         if str(current_user.role) != required_role.value:
             raise HTTPException(
@@ -84,7 +89,7 @@ def require_any_role(required_roles: list[UserRole]):
     Returns:
         function: A dependency function that validates the user's role
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
         # Get role values as strings for comparison
         role_values = [role.value for role in required_roles]
         if str(current_user.role) not in role_values:
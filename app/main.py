@@ -1,6 +1,10 @@
-import uvicorn
-from fastapi import FastAPI, Form
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI, Form, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi.middleware.cors import CORSMiddleware
+import logging
 import os
 import sys
 
@@ -23,12 +27,18 @@ try:
     from app.routes.invoice_routes import router as invoice_router
     from app.routes.kitchen_routes_db import router as kitchen_router
     from app.routes.bar_routes import router as bar_router
-    from app.routes.stock_routes import router as stock_router
-    from app.routes.analytics_routes import router as analytics_router  # Add analytics router
     from app.routes.payment_routes import router as payment_router  # Add payment router
     from app.routes.settings_routes import router as settings_router  # Add settings router
-    from app.database import Base, engine
+    from app.routes.event_routes import router as event_router
+    from app.routes.reservation_routes import router as reservation_router
+    from app.database import Base, engine, read_engine, async_engine, SessionLocal, get_pool_metrics, warm_connection_pools, dispose_engines
+    from app.services.availability_service import availability_index
+    from app.services.idempotency_store import run_idempotency_purge_periodically
+    from app.services.payment_gateway import close_payment_gateway
     from app.config import Config
+    from app.utils.metrics import MetricsMiddleware, instrument_engine, metrics_registry
+    from app.utils.imports import LazyRouters, import_app_module
+    from app.utils.concurrency import ConflictError
 except ImportError:
     # Try importing directly (Docker container)
     try:
@@ -41,23 +51,97 @@ except ImportError:
         from routes.invoice_routes import router as invoice_router
         from routes.kitchen_routes_db import router as kitchen_router
         from routes.bar_routes import router as bar_router
-        from routes.stock_routes import router as stock_router
-        from routes.analytics_routes import router as analytics_router  # Add analytics router
         from routes.payment_routes import router as payment_router  # Add payment router
         from routes.settings_routes import router as settings_router  # Add settings router
-        from database import Base, engine
+        from routes.event_routes import router as event_router
+        from routes.reservation_routes import router as reservation_router
+        from database import Base, engine, read_engine, async_engine, SessionLocal, get_pool_metrics, warm_connection_pools, dispose_engines
+        from services.availability_service import availability_index
+        from services.idempotency_store import run_idempotency_purge_periodically
+        from services.payment_gateway import close_payment_gateway
         from config import Config
+        from utils.metrics import MetricsMiddleware, instrument_engine, metrics_registry
+        from utils.imports import LazyRouters, import_app_module
+        from utils.concurrency import ConflictError
     except ImportError:
         # This should not happen, but let's have a clear error message
         raise ImportError("Could not import required modules. Please check your installation.")
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+config = Config()
+
+# Optional feature routers: (path prefix, module), imported on the first request for
+# the prefix (see LazyRouters) unless the feature is disabled
+OPTIONAL_ROUTERS = {
+    "analytics": ("/api/analytics", "routes.analytics_routes"),
+    "stock": ("/api/stock", "routes.stock_routes"),
+}
+
+
+def _load_availability_index():
+    with SessionLocal() as db:
+        availability_index.load(db)
+
+
+def _persist_live_analytics(counters):
+    with SessionLocal() as db:
+        counters.persist(db)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown work; the schema itself is managed by Alembic migrations"""
+    if config.DATABASE_CREATE_ALL_ON_STARTUP:
+        # Convenience for throwaway local databases only
+        Base.metadata.create_all(bind=engine)
+    try:
+        await warm_connection_pools()
+    except Exception as e:
+        # The app can still serve requests; the pool will connect on first use
+        logger.warning(f"Could not warm database connection pools: {str(e)}")
+    try:
+        await asyncio.to_thread(_load_availability_index)
+    except Exception as e:
+        # Reservation reads reload the index themselves once it is stale
+        logger.warning(f"Could not load the reservation availability index: {str(e)}")
 
-app = FastAPI(title="FastAPI Backend Skeleton")
+    idempotency_purge = asyncio.create_task(run_idempotency_purge_periodically(
+        SessionLocal, config.IDEMPOTENCY_PURGE_INTERVAL_SECONDS
+    ))
+    archival = None
+    if config.ARCHIVE_ENABLED:
+        archival = asyncio.create_task(import_app_module("services.archive_service").run_archival_periodically(
+            SessionLocal, config.ARCHIVE_INTERVAL_SECONDS, config.ARCHIVE_AFTER_DAYS, config.ARCHIVE_BATCH_SIZE
+        ))
+    live_analytics = None
+    if "analytics" not in config.DISABLED_FEATURES:
+        # Not deferred with the analytics router: the live counters must see every order
+        # placed from startup on
+        live_analytics = import_app_module("services.live_analytics")
+        live_persistence = asyncio.create_task(live_analytics.run_live_analytics_persistence(
+            SessionLocal, config.LIVE_ANALYTICS_PERSIST_SECONDS
+        ))
+        kitchen_timing = asyncio.create_task(import_app_module("services.kitchen_timing_service").run_kitchen_timing_fold(
+            SessionLocal, config.KITCHEN_TIMING_FOLD_SECONDS
+        ))
+    yield
+    idempotency_purge.cancel()
+    if archival is not None:
+        archival.cancel()
+    if live_analytics is not None:
+        live_persistence.cancel()
+        kitchen_timing.cancel()
+        try:
+            await asyncio.to_thread(_persist_live_analytics, live_analytics.live_analytics)
+        except Exception as e:
+            logger.warning(f"Could not save live analytics counters: {str(e)}")
+    await close_payment_gateway()
+    await dispose_engines()
+
+
+app = FastAPI(title="FastAPI Backend Skeleton", lifespan=lifespan)
 
 # Add CORS middleware
-config = Config()
 app.add_middleware(
     CORSMiddleware,
     allow_origins=config.ALLOWED_ORIGINS,
@@ -66,6 +150,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Optional routers are imported on first use
+lazy_routers = {}
+for feature, (prefix, module_name) in OPTIONAL_ROUTERS.items():
+    if feature in config.DISABLED_FEATURES:
+        logger.info(f"Feature '{feature}' disabled; skipping {module_name}")
+        continue
+    lazy_routers[prefix] = module_name
+app.add_middleware(LazyRouters, target=app, routers=lazy_routers)
+
+# Per-route latency, SQL counts and Server-Timing headers
+if config.METRICS_ENABLED:
+    for db_engine in {engine, read_engine, async_engine.sync_engine}:
+        instrument_engine(db_engine)
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry, server_timing=config.METRICS_SERVER_TIMING)
+
+# Stale optimistic-lock writes (versioned Table/Order rows) are conflicts, not server errors
+@app.exception_handler(ConflictError)
+@app.exception_handler(StaleDataError)
+async def conflict_handler(request: Request, exc: Exception):
+    detail = str(exc) if isinstance(exc, ConflictError) else "The record was changed by another request; please retry"
+    return JSONResponse(status_code=409, content={"detail": detail})
+
 # Include routers - the routers already have their prefixes defined
 app.include_router(user_router)
 app.include_router(menu_router)
@@ -74,10 +180,10 @@ app.include_router(kitchen_router)
 app.include_router(bar_router)
 app.include_router(table_router)
 app.include_router(invoice_router)
-app.include_router(stock_router)
-app.include_router(analytics_router)  # Include analytics router
 app.include_router(payment_router)  # Include payment router
 app.include_router(settings_router)  # Include settings router
+app.include_router(event_router)
+app.include_router(reservation_router)
 
 # Test endpoint to verify the app is working
 @app.get("/test")
@@ -97,7 +203,22 @@ def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/pool")
+def pool_health():
+    """Connection pool checkout wait and saturation for each database engine"""
+    return {"pools": get_pool_metrics()}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Request, query and pool metrics in Prometheus text format"""
+    return Response(
+        content=metrics_registry.render_prometheus(get_pool_metrics()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 if __name__ == "__main__":
+    import uvicorn
+
     # Get port from environment variable or default to 8088
     port = int(os.getenv("PORT", 8088))
     host = os.getenv("HOST", "0.0.0.0")
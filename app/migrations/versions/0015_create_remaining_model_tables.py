@@ -0,0 +1,122 @@
+"""Create model tables that were previously only created by create_all
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Existing databases already have these tables from the old import-time create_all,
+    # so each one is only created when missing
+    if not _has_table('kitchen_orders'):
+        op.create_table('kitchen_orders',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('table_number', sa.Integer(), nullable=True),
+            sa.Column('order_type', sa.String(), nullable=True),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_kitchen_orders_id'), 'kitchen_orders', ['id'], unique=False)
+
+    if not _has_table('settings'):
+        op.create_table('settings',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('key', sa.String(), nullable=True),
+            sa.Column('value', sa.String(), nullable=True),
+            sa.Column('description', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_settings_id'), 'settings', ['id'], unique=False)
+        op.create_index(op.f('ix_settings_key'), 'settings', ['key'], unique=True)
+
+    if not _has_table('invoices'):
+        op.create_table('invoices',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('invoice_number', sa.String(), nullable=True),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('customer_name', sa.String(), nullable=True),
+            sa.Column('customer_phone', sa.String(), nullable=True),
+            sa.Column('customer_address', sa.String(), nullable=True),
+            sa.Column('order_type', sa.String(), nullable=True),
+            sa.Column('table_number', sa.String(), nullable=True),
+            sa.Column('subtotal', sa.Float(), nullable=True),
+            sa.Column('tax', sa.Float(), nullable=True),
+            sa.Column('total', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('invoice_data', sa.Text(), nullable=True),
+            sa.Column('payment_type', sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_invoices_id'), 'invoices', ['id'], unique=False)
+        op.create_index(op.f('ix_invoices_invoice_number'), 'invoices', ['invoice_number'], unique=True)
+
+    if not _has_table('ingredients'):
+        op.create_table('ingredients',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('category', sa.String(), nullable=True),
+            sa.Column('unit', sa.String(), nullable=True),
+            sa.Column('current_stock', sa.Float(), nullable=True),
+            sa.Column('minimum_stock', sa.Float(), nullable=True),
+            sa.Column('cost_per_unit', sa.Float(), nullable=True),
+            sa.Column('supplier', sa.String(), nullable=True),
+            sa.Column('last_updated', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_ingredients_id'), 'ingredients', ['id'], unique=False)
+        op.create_index(op.f('ix_ingredients_name'), 'ingredients', ['name'], unique=True)
+
+    if not _has_table('item_ingredients'):
+        op.create_table('item_ingredients',
+            sa.Column('menu_item_id', sa.Integer(), nullable=True),
+            sa.Column('ingredient_id', sa.Integer(), nullable=True),
+            sa.Column('quantity', sa.Float(), nullable=True),
+            sa.Column('unit', sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id']),
+            sa.ForeignKeyConstraint(['menu_item_id'], ['menu_items.id'])
+        )
+
+    if not _has_table('stock_transactions'):
+        op.create_table('stock_transactions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('ingredient_id', sa.Integer(), nullable=True),
+            sa.Column('transaction_type', sa.String(), nullable=True),
+            sa.Column('quantity', sa.Float(), nullable=True),
+            sa.Column('unit', sa.String(), nullable=True),
+            sa.Column('cost', sa.Float(), nullable=True),
+            sa.Column('notes', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_stock_transactions_id'), 'stock_transactions', ['id'], unique=False)
+
+
+def downgrade():
+    # Dropping a table also drops its indexes
+    op.drop_table('stock_transactions')
+    op.drop_table('item_ingredients')
+    op.drop_table('ingredients')
+    op.drop_table('invoices')
+    op.drop_table('settings')
+    op.drop_table('kitchen_orders')
@@ -0,0 +1,34 @@
+"""Create order_events outbox table
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_events',
+        sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_type', sa.String(length=64), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index(op.f('ix_order_events_event_type'), 'order_events', ['event_type'], unique=False)
+    op.create_index(op.f('ix_order_events_order_id'), 'order_events', ['order_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_order_events_order_id'), table_name='order_events')
+    op.drop_index(op.f('ix_order_events_event_type'), table_name='order_events')
+    op.drop_table('order_events')
@@ -0,0 +1,102 @@
+"""Create orders, kitchen_orders and invoices archive tables
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+# On PostgreSQL the archive tables are partitioned by month; the archival job creates
+# each month's partition before moving rows into it
+PARTITION_BY_MONTH = {'postgresql_partition_by': 'RANGE (created_at)'}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Reuse the type created for orders.payment_type so the archive can be UNIONed with it
+        payment_type = postgresql.ENUM('cash', 'card', 'qr', 'e_wallet', 'gift_card', name='paymenttype', create_type=False)
+    else:
+        payment_type = sa.String()
+
+    op.create_table('orders_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('table_number', sa.Integer(), nullable=True),
+        sa.Column('order_type', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('special_requests', sa.String(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('total', sa.Float(), nullable=True),
+        sa.Column('order_data', sa.JSON(), nullable=True),
+        sa.Column('table_id', sa.Integer(), nullable=True),
+        sa.Column('customer_count', sa.Integer(), nullable=True),
+        sa.Column('assigned_seats', sa.JSON(), nullable=True),
+        sa.Column('customer_name', sa.String(), nullable=True),
+        sa.Column('customer_phone', sa.String(), nullable=True),
+        sa.Column('delivery_address', sa.String(), nullable=True),
+        sa.Column('modifiers', sa.JSON(), nullable=True),
+        sa.Column('payment_type', payment_type, nullable=True),
+        sa.Column('payment_status', sa.String(), nullable=True),
+        sa.Column('paid_at', sa.DateTime(), nullable=True),
+        sa.Column('payment_reference', sa.String(), nullable=True),
+        sa.Column('refund_status', sa.String(), nullable=True),
+        sa.Column('refunded_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        **PARTITION_BY_MONTH
+    )
+    op.create_index('ix_orders_archive_created_by', 'orders_archive', ['created_by'], unique=False)
+
+    op.create_table('kitchen_orders_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('table_number', sa.Integer(), nullable=True),
+        sa.Column('order_type', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        **PARTITION_BY_MONTH
+    )
+    op.create_index('ix_kitchen_orders_archive_order_id', 'kitchen_orders_archive', ['order_id'], unique=False)
+
+    op.create_table('invoices_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('invoice_number', sa.String(), nullable=True),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('customer_name', sa.String(), nullable=True),
+        sa.Column('customer_phone', sa.String(), nullable=True),
+        sa.Column('customer_address', sa.String(), nullable=True),
+        sa.Column('order_type', sa.String(), nullable=True),
+        sa.Column('table_number', sa.String(), nullable=True),
+        sa.Column('subtotal', sa.Float(), nullable=True),
+        sa.Column('tax', sa.Float(), nullable=True),
+        sa.Column('total', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('invoice_data', sa.Text(), nullable=True),
+        sa.Column('payment_type', sa.String(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        **PARTITION_BY_MONTH
+    )
+    op.create_index('ix_invoices_archive_order_id', 'invoices_archive', ['order_id'], unique=False)
+    op.create_index('ix_invoices_archive_invoice_number', 'invoices_archive', ['invoice_number'], unique=False)
+
+
+def downgrade():
+    # Dropping a partitioned parent also drops its monthly partitions
+    op.drop_table('invoices_archive')
+    op.drop_table('kitchen_orders_archive')
+    op.drop_table('orders_archive')
@@ -0,0 +1,86 @@
+"""Move table seats from the tables.seats JSON column into a seats table
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+# revision identifiers, used by Alembic.
+revision = '0019'
+down_revision = '0018'
+branch_labels = None
+depends_on = None
+
+
+def _load_json(value):
+    if isinstance(value, (str, bytes)):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def upgrade():
+    seats = op.create_table('seats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('seat_number', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('customer_name', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['table_id'], ['tables.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('table_id', 'seat_number', name='uq_seats_table_seat')
+    )
+    op.create_index(op.f('ix_seats_id'), 'seats', ['id'], unique=False)
+    op.create_index(op.f('ix_seats_status'), 'seats', ['status'], unique=False)
+
+    # Copy the JSON seats; tables without any get one available seat per capacity
+    bind = op.get_bind()
+    rows = []
+    for table_id, capacity, value in bind.execute(sa.text("SELECT id, capacity, seats FROM tables")):
+        numbered = {}
+        for seat in _load_json(value) or []:
+            if isinstance(seat, dict) and seat.get("seat_number") is not None:
+                numbered.setdefault(int(seat["seat_number"]), seat)
+        if not numbered:
+            numbered = {number: {} for number in range(1, (capacity or 0) + 1)}
+        rows.extend(
+            {
+                "table_id": table_id,
+                "seat_number": number,
+                "status": seat.get("status") or "available",
+                "customer_name": seat.get("customer_name"),
+            }
+            for number, seat in sorted(numbered.items())
+        )
+    if rows:
+        op.bulk_insert(seats, rows)
+
+    with op.batch_alter_table('tables') as batch_op:
+        batch_op.drop_column('seats')
+
+
+def downgrade():
+    with op.batch_alter_table('tables') as batch_op:
+        batch_op.add_column(sa.Column('seats', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    by_table = {}
+    for table_id, seat_number, status, customer_name in bind.execute(sa.text(
+        "SELECT table_id, seat_number, status, customer_name FROM seats ORDER BY table_id, seat_number"
+    )):
+        by_table.setdefault(table_id, []).append(
+            {"seat_number": seat_number, "status": status, "customer_name": customer_name}
+        )
+    tables = sa.table('tables', sa.column('id', sa.Integer()), sa.column('seats', sa.JSON()))
+    for table_id, seat_list in by_table.items():
+        bind.execute(tables.update().where(tables.c.id == table_id).values(seats=seat_list))
+
+    op.drop_index(op.f('ix_seats_status'), table_name='seats')
+    op.drop_index(op.f('ix_seats_id'), table_name='seats')
+    op.drop_table('seats')
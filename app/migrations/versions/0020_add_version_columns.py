@@ -0,0 +1,28 @@
+"""Add optimistic concurrency version columns to tables and orders
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0020'
+down_revision = '0019'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('tables', 'orders', 'orders_archive')
+
+
+def upgrade():
+    for table_name in VERSIONED_TABLES:
+        op.add_column(table_name, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table_name in reversed(VERSIONED_TABLES):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,32 @@
+"""Link orders created by a bill split to the order they were split from
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0021'
+down_revision = '0020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.add_column(sa.Column('parent_order_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_orders_parent_order_id', 'orders', ['parent_order_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_orders_parent_order_id'), ['parent_order_id'], unique=False)
+    op.add_column('orders_archive', sa.Column('parent_order_id', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('orders_archive') as batch_op:
+        batch_op.drop_column('parent_order_id')
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_orders_parent_order_id'))
+        batch_op.drop_constraint('fk_orders_parent_order_id', type_='foreignkey')
+        batch_op.drop_column('parent_order_id')
@@ -0,0 +1,43 @@
+"""Create reservations table
+
+Revision ID: 0022
+Revises: 0021
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0022'
+down_revision = '0021'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('customer_name', sa.String(), nullable=False),
+        sa.Column('customer_phone', sa.String(), nullable=True),
+        sa.Column('party_size', sa.Integer(), nullable=False),
+        sa.Column('starts_at', sa.DateTime(), nullable=False),
+        sa.Column('ends_at', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['table_id'], ['tables.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reservations_id'), 'reservations', ['id'], unique=False)
+    op.create_index(op.f('ix_reservations_starts_at'), 'reservations', ['starts_at'], unique=False)
+    op.create_index('ix_reservations_table_starts_at', 'reservations', ['table_id', 'starts_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reservations_table_starts_at', table_name='reservations')
+    op.drop_index(op.f('ix_reservations_starts_at'), table_name='reservations')
+    op.drop_index(op.f('ix_reservations_id'), table_name='reservations')
+    op.drop_table('reservations')
@@ -0,0 +1,30 @@
+"""Index paid orders for payment summaries and record the paying terminal
+
+Revision ID: 0023
+Revises: 0022
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0023'
+down_revision = '0022'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('orders', 'orders_archive'):
+        op.add_column(table, sa.Column('terminal_id', sa.String(length=64), nullable=True))
+        op.create_index(
+            f'ix_{table}_payment_summary', table, ['payment_status', 'paid_at', 'payment_type', 'total'], unique=False
+        )
+
+
+def downgrade():
+    for table in ('orders_archive', 'orders'):
+        op.drop_index(f'ix_{table}_payment_summary', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('terminal_id')
@@ -0,0 +1,45 @@
+"""Create tax ledger table
+
+Revision ID: 0024
+Revises: 0023
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0024'
+down_revision = '0023'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tax_ledger',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('entry_type', sa.String(length=10), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.Column('item_name', sa.String(), nullable=True),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.Column('taxable_amount', sa.Float(), nullable=False),
+        sa.Column('tax_rate', sa.Float(), nullable=False),
+        sa.Column('tax_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tax_ledger_id'), 'tax_ledger', ['id'], unique=False)
+    op.create_index(op.f('ix_tax_ledger_order_id'), 'tax_ledger', ['order_id'], unique=False)
+    op.create_index(
+        'ix_tax_ledger_recorded_at_category', 'tax_ledger',
+        ['recorded_at', 'category', 'tax_rate', 'taxable_amount', 'tax_amount'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_tax_ledger_recorded_at_category', table_name='tax_ledger')
+    op.drop_index(op.f('ix_tax_ledger_order_id'), table_name='tax_ledger')
+    op.drop_index(op.f('ix_tax_ledger_id'), table_name='tax_ledger')
+    op.drop_table('tax_ledger')
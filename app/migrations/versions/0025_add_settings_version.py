@@ -0,0 +1,35 @@
+"""Version settings so workers can cache them
+
+Revision ID: 0025
+Revises: 0024
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0025'
+down_revision = '0024'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('settings', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+    settings = sa.table(
+        'settings',
+        sa.column('key', sa.String),
+        sa.column('value', sa.String),
+        sa.column('description', sa.String),
+        sa.column('version', sa.Integer)
+    )
+    op.bulk_insert(settings, [
+        {'key': '_settings_version', 'value': '', 'description': 'Bumped by every settings change', 'version': 0}
+    ])
+
+
+def downgrade():
+    op.execute("DELETE FROM settings WHERE key = '_settings_version'")
+    with op.batch_alter_table('settings') as batch_op:
+        batch_op.drop_column('version')
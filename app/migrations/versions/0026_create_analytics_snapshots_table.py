@@ -0,0 +1,37 @@
+"""Create analytics snapshots table
+
+Revision ID: 0026
+Revises: 0025
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0026'
+down_revision = '0025'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analytics_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('worker_id', sa.String(length=64), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('item_counts', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('worker_id', 'bucket_start', name='uq_analytics_snapshots_worker_bucket')
+    )
+    op.create_index(op.f('ix_analytics_snapshots_id'), 'analytics_snapshots', ['id'], unique=False)
+    op.create_index(op.f('ix_analytics_snapshots_bucket_start'), 'analytics_snapshots', ['bucket_start'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_analytics_snapshots_bucket_start'), table_name='analytics_snapshots')
+    op.drop_index(op.f('ix_analytics_snapshots_id'), table_name='analytics_snapshots')
+    op.drop_table('analytics_snapshots')
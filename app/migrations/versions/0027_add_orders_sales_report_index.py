@@ -0,0 +1,22 @@
+"""Index orders by creation time and total for the sales reports
+
+Revision ID: 0027
+Revises: 0026
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0027'
+down_revision = '0026'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_orders_sales_report', 'orders', ['created_at', 'total'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_orders_sales_report', table_name='orders')
@@ -0,0 +1,58 @@
+"""Create kitchen order transitions and service time sketches tables
+
+Revision ID: 0028
+Revises: 0027
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0028'
+down_revision = '0027'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('kitchen_order_transitions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kitchen_order_id', sa.Integer(), nullable=True),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('station', sa.String(length=16), nullable=False),
+        sa.Column('from_status', sa.String(length=16), nullable=True),
+        sa.Column('to_status', sa.String(length=16), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.Column('ticket_seconds', sa.Float(), nullable=True),
+        sa.Column('step_seconds', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_kitchen_order_transitions_id'), 'kitchen_order_transitions', ['id'], unique=False)
+    op.create_index(op.f('ix_kitchen_order_transitions_kitchen_order_id'), 'kitchen_order_transitions', ['kitchen_order_id'], unique=False)
+    op.create_index(op.f('ix_kitchen_order_transitions_order_id'), 'kitchen_order_transitions', ['order_id'], unique=False)
+
+    op.create_table('service_time_sketches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('station', sa.String(length=16), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=16), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('sketch', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'station', 'employee_id', 'metric', name='uq_service_time_sketches_key')
+    )
+    op.create_index(op.f('ix_service_time_sketches_id'), 'service_time_sketches', ['id'], unique=False)
+    op.create_index(op.f('ix_service_time_sketches_day'), 'service_time_sketches', ['day'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_service_time_sketches_day'), table_name='service_time_sketches')
+    op.drop_index(op.f('ix_service_time_sketches_id'), table_name='service_time_sketches')
+    op.drop_table('service_time_sketches')
+    op.drop_index(op.f('ix_kitchen_order_transitions_order_id'), table_name='kitchen_order_transitions')
+    op.drop_index(op.f('ix_kitchen_order_transitions_kitchen_order_id'), table_name='kitchen_order_transitions')
+    op.drop_index(op.f('ix_kitchen_order_transitions_id'), table_name='kitchen_order_transitions')
+    op.drop_table('kitchen_order_transitions')
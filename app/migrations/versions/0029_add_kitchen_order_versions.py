@@ -0,0 +1,53 @@
+"""Add kitchen order sync versions and tombstones
+
+Revision ID: 0029
+Revises: 0028
+Create Date: 2026-10-20 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+# revision identifiers, used by Alembic.
+revision = '0029'
+down_revision = '0028'
+branch_labels = None
+depends_on = None
+
+KITCHEN_VERSION_ROW = 0
+
+
+def upgrade():
+    # Existing tickets start at version 1, so a display syncing from 0 receives them all
+    op.add_column('kitchen_orders', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+    op.execute("UPDATE kitchen_orders SET version = 1")
+    op.create_index(op.f('ix_kitchen_orders_version'), 'kitchen_orders', ['version'], unique=False)
+    op.add_column('kitchen_orders_archive', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+    tombstones = op.create_table('kitchen_order_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kitchen_order_id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('removed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kitchen_order_id')
+    )
+    op.create_index(op.f('ix_kitchen_order_tombstones_id'), 'kitchen_order_tombstones', ['id'], unique=False)
+    op.create_index(op.f('ix_kitchen_order_tombstones_version'), 'kitchen_order_tombstones', ['version'], unique=False)
+    # The version counter, created here so concurrent first writes never race to insert it
+    op.bulk_insert(tombstones, [
+        {'kitchen_order_id': KITCHEN_VERSION_ROW, 'order_id': 0, 'version': 1, 'removed_at': datetime.utcnow()}
+    ])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_kitchen_order_tombstones_version'), table_name='kitchen_order_tombstones')
+    op.drop_index(op.f('ix_kitchen_order_tombstones_id'), table_name='kitchen_order_tombstones')
+    op.drop_table('kitchen_order_tombstones')
+    with op.batch_alter_table('kitchen_orders_archive') as batch_op:
+        batch_op.drop_column('version')
+    op.drop_index(op.f('ix_kitchen_orders_version'), table_name='kitchen_orders')
+    with op.batch_alter_table('kitchen_orders') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,22 @@
+"""Index archived orders by creation time and total for the sales reports
+
+Revision ID: 0030
+Revises: 0029
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0030'
+down_revision = '0029'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_orders_archive_sales_report', 'orders_archive', ['created_at', 'total'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_orders_archive_sales_report', table_name='orders_archive')
@@ -0,0 +1,41 @@
+"""Create payment attempts table
+
+Revision ID: 0031
+Revises: 0030
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0031'
+down_revision = '0030'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payment_attempts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=200), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('payment_type', sa.String(length=32), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('reference', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index(op.f('ix_payment_attempts_id'), 'payment_attempts', ['id'], unique=False)
+    op.create_index(op.f('ix_payment_attempts_order_id'), 'payment_attempts', ['order_id'], unique=False)
+    op.create_index(op.f('ix_payment_attempts_status'), 'payment_attempts', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_payment_attempts_status'), table_name='payment_attempts')
+    op.drop_index(op.f('ix_payment_attempts_order_id'), table_name='payment_attempts')
+    op.drop_index(op.f('ix_payment_attempts_id'), table_name='payment_attempts')
+    op.drop_table('payment_attempts')
@@ -4,8 +4,17 @@ from .menu import MenuItem
 from .order import Order
 from .order_item import OrderItem
 from .invoice import Invoice
-from .kitchen import KitchenOrder
+from .kitchen import KitchenOrder, KitchenOrderTransition, KitchenOrderTombstone
 from .table import Table
+from .seat import Seat
 from .stock import Ingredient, StockTransaction
+from .idempotency import IdempotencyKey
+from .order_event import OrderEvent
+from .archive import OrderArchive, KitchenOrderArchive, InvoiceArchive
+from .reservation import Reservation
+from .tax_ledger import TaxLedgerEntry
+from .analytics_snapshot import AnalyticsSnapshot
+from .service_time import ServiceTimeSketch
+from .payment_attempt import PaymentAttempt
 
-__all__ = ['User', 'MenuItem', 'Order', 'OrderItem', 'Invoice', 'KitchenOrder', 'Table', 'Ingredient', 'StockTransaction']
\ No newline at end of file
+__all__ = ['User', 'MenuItem', 'Order', 'OrderItem', 'Invoice', 'KitchenOrder', 'KitchenOrderTransition', 'KitchenOrderTombstone', 'Table', 'Seat', 'Ingredient', 'StockTransaction', 'IdempotencyKey', 'OrderEvent', 'OrderArchive', 'KitchenOrderArchive', 'InvoiceArchive', 'Reservation', 'TaxLedgerEntry', 'AnalyticsSnapshot', 'ServiceTimeSketch', 'PaymentAttempt']
\ No newline at end of file
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, UniqueConstraint
+from datetime import datetime
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+
+
+class AnalyticsSnapshot(Base):
+    """
+    One worker process's live counters for one hour
+
+    Each worker overwrites only its own rows (worker_id is unique per process start),
+    so the live reports add up the rows of every worker and of processes that have
+    since restarted. Rows older than two days are deleted by the workers.
+    """
+    __tablename__ = "analytics_snapshots"
+    __table_args__ = (
+        UniqueConstraint("worker_id", "bucket_start", name="uq_analytics_snapshots_worker_bucket"),
+        {'extend_existing': True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    worker_id = Column(String(64), nullable=False)
+    bucket_start = Column(DateTime, nullable=False, index=True)  # Start of the hour
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    item_counts = Column(Text, nullable=True)  # JSON: SpaceSaving.to_list()
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,103 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, JSON, Index
+from datetime import datetime
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+    from app.models.order import OrderType, OrderStatus, PaymentType
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+    from models.order import OrderType, OrderStatus, PaymentType
+
+# Archive tables mirror the hot tables column for column (plus archived_at) so rows can be
+# copied with INSERT ... SELECT and read back through a UNION ALL. They carry no foreign
+# keys, and on PostgreSQL they are range-partitioned by month on created_at, which is
+# why created_at is part of the primary key.
+PARTITION_BY_MONTH = {"postgresql_partition_by": "RANGE (created_at)"}
+
+
+class OrderArchive(Base):
+    """Closed orders moved out of `orders` by the archival job"""
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_created_by", "created_by"),
+        Index("ix_orders_archive_payment_summary", "payment_status", "paid_at", "payment_type", "total"),
+        Index("ix_orders_archive_sales_report", "created_at", "total"),
+        PARTITION_BY_MONTH,
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime, primary_key=True)
+    table_number = Column(Integer)
+    order_type = Column(Enum(OrderType))
+    status = Column(Enum(OrderStatus))
+    updated_at = Column(DateTime)
+    special_requests = Column(String, nullable=True)
+    created_by = Column(Integer)
+    total = Column(Float)
+    order_data = Column(JSON)
+    table_id = Column(Integer)
+    customer_count = Column(Integer)
+    assigned_seats = Column(JSON)
+    customer_name = Column(String)
+    customer_phone = Column(String)
+    delivery_address = Column(String)
+    modifiers = Column(JSON)
+    payment_type = Column(Enum(PaymentType))
+    payment_status = Column(String)
+    paid_at = Column(DateTime, nullable=True)
+    payment_reference = Column(String, nullable=True)
+    refund_status = Column(String, nullable=True)
+    refunded_at = Column(DateTime, nullable=True)
+    terminal_id = Column(String(64), nullable=True)
+    parent_order_id = Column(Integer, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class KitchenOrderArchive(Base):
+    """Kitchen tickets of archived orders"""
+    __tablename__ = "kitchen_orders_archive"
+    __table_args__ = (
+        Index("ix_kitchen_orders_archive_order_id", "order_id"),
+        PARTITION_BY_MONTH,
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime, primary_key=True)
+    order_id = Column(Integer)
+    table_number = Column(Integer)
+    order_type = Column(String)
+    status = Column(String)
+    updated_at = Column(DateTime)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class InvoiceArchive(Base):
+    """Invoices of archived orders"""
+    __tablename__ = "invoices_archive"
+    __table_args__ = (
+        Index("ix_invoices_archive_order_id", "order_id"),
+        Index("ix_invoices_archive_invoice_number", "invoice_number"),
+        PARTITION_BY_MONTH,
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime, primary_key=True)
+    invoice_number = Column(String)
+    order_id = Column(Integer)
+    customer_name = Column(String)
+    customer_phone = Column(String, nullable=True)
+    customer_address = Column(String, nullable=True)
+    order_type = Column(String)
+    table_number = Column(String, nullable=True)
+    subtotal = Column(Float)
+    tax = Column(Float, default=0.0)
+    total = Column(Float)
+    updated_at = Column(DateTime)
+    invoice_data = Column(Text)
+    payment_type = Column(String, default="cash")
+    archived_at = Column(DateTime, default=datetime.utcnow)
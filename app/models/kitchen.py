@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from typing import List
@@ -21,6 +21,10 @@ except ImportError:
     from schemas.menu_schema import MenuItemBase
 
 
+# Reserved kitchen_order_tombstones row holding, in `version`, the last version handed out
+KITCHEN_VERSION_ROW = 0
+
+
 class KitchenOrderStatus(str, enum.Enum):
     PENDING = "pending"
     PREPARING = "preparing"
@@ -37,7 +41,51 @@ class KitchenOrder(Base):
     status = Column(String, default=KitchenOrderStatus.PENDING.value)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Display sync: stamped from the kitchen version counter by every change to the ticket
+    # or its order, in commit order (see kitchen_sync_service)
+    version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+
+    order = relationship("Order", back_populates="kitchen_order", lazy="select")
     
     # Store order items as JSON (since they're Pydantic models, not SQLAlchemy models)
     # This is a simplified approach for demonstration
-    # In a real application, you might want to create a separate table for order items
\ No newline at end of file
+    # In a real application, you might want to create a separate table for order items
+
+
+class KitchenOrderTransition(Base):
+    """
+    One status change of a kitchen ticket (pending -> preparing -> ready -> served)
+
+    Append-only: rows are written by the kitchen and bar routes in the transaction that
+    changes the ticket and never updated. They carry the seconds since the ticket was
+    created and since its previous change, so timing reports need no other row.
+    kitchen_order_id and order_id are not foreign keys: tickets are deleted and orders
+    archived while their history stays.
+    """
+    __tablename__ = "kitchen_order_transitions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kitchen_order_id = Column(Integer, nullable=True, index=True)
+    order_id = Column(Integer, nullable=False, index=True)
+    station = Column(String(16), nullable=False)  # kitchen or bar: the display that made the change
+    from_status = Column(String(16), nullable=True)  # None when the ticket was created
+    to_status = Column(String(16), nullable=False)  # A KitchenOrderStatus, served or removed
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    ticket_seconds = Column(Float, nullable=True)  # Since the ticket was created
+    step_seconds = Column(Float, nullable=True)  # Since the ticket's previous change
+
+
+class KitchenOrderTombstone(Base):
+    """
+    A kitchen ticket deleted from the displays, at the version it was deleted
+
+    Lets displays polling for changes since a version drop tickets that no longer exist.
+    The row with kitchen_order_id KITCHEN_VERSION_ROW is the version counter.
+    """
+    __tablename__ = "kitchen_order_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kitchen_order_id = Column(Integer, nullable=False, unique=True)
+    order_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, index=True)
+    removed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
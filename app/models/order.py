@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Table, Float, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Table, Float, JSON, Index
+from sqlalchemy.orm import backref, relationship
 from datetime import datetime
 import enum
 
@@ -46,6 +46,13 @@ order_staff_association = Table(
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Payment summaries filter on status and paid_at, group by payment_type and sum
+        # total, all from this index without reading the rows
+        Index("ix_orders_payment_summary", "payment_status", "paid_at", "payment_type", "total"),
+        # Sales reports filter on created_at and sum total; peak hours read only this index
+        Index("ix_orders_sales_report", "created_at", "total"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     # Existing attributes
@@ -79,10 +86,22 @@ class Order(Base):
     payment_reference = Column(String, nullable=True)
     refund_status = Column(String, nullable=True)
     refunded_at = Column(DateTime, nullable=True)
+    # Till or card reader that took the payment, for per-terminal reconciliation
+    terminal_id = Column(String(64), nullable=True)
+
+    # Set on the orders created by splitting a bill; points at the order that was split
+    parent_order_id = Column(Integer, ForeignKey("orders.id"), nullable=True, index=True)
+
+    # Optimistic concurrency: every ORM UPDATE is "... WHERE id = ? AND version = ?"
+    # and raises StaleDataError when another request changed the order first
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships (using string references to avoid circular imports)
     order_items = relationship("OrderItem", back_populates="order", lazy="select")
     created_by_user = relationship("User", back_populates="orders", lazy="select")
+    kitchen_order = relationship("KitchenOrder", back_populates="order", uselist=False, lazy="select")
+    split_orders = relationship("Order", backref=backref("parent_order", remote_side=[id]), lazy="select")
     
     # Many-to-many relationship with staff users
     staff_users = relationship("User", secondary=order_staff_association, back_populates="assigned_orders", lazy="select")
\ No newline at end of file
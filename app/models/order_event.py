@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+
+
+class OrderEvent(Base):
+    """
+    Outbox row for one order, kitchen or payment change
+
+    Rows are written in the same transaction as the change they describe and are
+    read in seq order by the change feed (GET /api/events).
+    """
+    __tablename__ = "order_events"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String(64), nullable=False, index=True)
+    # No foreign key: events must outlive the orders they describe (order.deleted)
+    order_id = Column(Integer, nullable=False, index=True)
+    payload = Column(Text, nullable=True)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Lets an event be added before its order is flushed; the unit of work fills in order_id
+    order = relationship("Order", primaryjoin="foreign(OrderEvent.order_id) == Order.id", lazy="select")
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float
+from datetime import datetime
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+
+# Attempt statuses
+ATTEMPT_PENDING = "pending"  # Sent, or about to be sent, to the gateway; outcome not recorded
+ATTEMPT_DECLINED = "declined"
+ATTEMPT_RECORDED = "recorded"  # Charged (or refunded) and recorded on the order; retries replay it
+ATTEMPT_VOIDED = "voided"  # Charged but not recordable (order already paid or gone); refunded
+ATTEMPT_UNRECORDED = "unrecorded"  # Charged or refunded, not recordable, and not voided: needs reconciling
+
+
+class PaymentAttempt(Base):
+    """
+    A gateway charge or refund, written before the gateway is called
+
+    The key's prefix tells charges ("payment-") from refunds ("refund-"). Attempts
+    left pending (the gateway or the database failed mid-payment) or unrecorded are
+    the ones to reconcile with the processor. A voided attempt's key is not sent
+    again: the gateway would replay the charge it refunded.
+    """
+    __tablename__ = "payment_attempts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # The key sent to the gateway, which includes the order id
+    idempotency_key = Column(String(200), unique=True, nullable=False)
+    # No foreign key: attempts must outlive archived and deleted orders
+    order_id = Column(Integer, nullable=False, index=True)
+    payment_type = Column(String(32), nullable=False)
+    amount = Column(Float, nullable=False)
+    status = Column(String(16), nullable=False, default=ATTEMPT_PENDING, index=True)
+    reference = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
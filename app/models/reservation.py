@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+
+RESERVATION_BOOKED = "booked"
+RESERVATION_SEATED = "seated"
+RESERVATION_CANCELLED = "cancelled"
+RESERVATION_COMPLETED = "completed"
+RESERVATION_NO_SHOW = "no_show"
+
+# Reservations in these states hold their table for [starts_at, ends_at)
+ACTIVE_RESERVATION_STATUSES = (RESERVATION_BOOKED, RESERVATION_SEATED)
+
+
+class Reservation(Base):
+    """A booking of a table for a party over [starts_at, ends_at)"""
+    __tablename__ = "reservations"
+    __table_args__ = (
+        Index("ix_reservations_table_starts_at", "table_id", "starts_at"),
+        {'extend_existing': True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_id = Column(Integer, ForeignKey("tables.id", ondelete="CASCADE"), nullable=False)
+    customer_name = Column(String, nullable=False)
+    customer_phone = Column(String, nullable=True)
+    party_size = Column(Integer, nullable=False)
+    starts_at = Column(DateTime, nullable=False, index=True)
+    ends_at = Column(DateTime, nullable=False)
+    status = Column(String(20), nullable=False, default=RESERVATION_BOOKED)  # booked, seated, cancelled, completed, no_show
+    notes = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    table = relationship("Table", lazy="select")
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+
+SEAT_AVAILABLE = "available"
+SEAT_OCCUPIED = "occupied"
+
+
+class Seat(Base):
+    __tablename__ = "seats"
+    __table_args__ = (
+        UniqueConstraint("table_id", "seat_number", name="uq_seats_table_seat"),
+        {'extend_existing': True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_id = Column(Integer, ForeignKey("tables.id", ondelete="CASCADE"), nullable=False)
+    seat_number = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default=SEAT_AVAILABLE, index=True)  # available, occupied
+    customer_name = Column(String, nullable=True)
+
+    table = relationship("Table", back_populates="seats")
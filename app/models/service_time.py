@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String, Text, UniqueConstraint
+from datetime import date, datetime
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+
+# Reserved row holding, in `count`, the id of the last kitchen_order_transitions row folded in
+FOLDED_METRIC = "_folded"
+FOLDED_DAY = date(1970, 1, 1)
+
+
+class ServiceTimeSketch(Base):
+    """
+    Speed-of-service durations for one day, station, employee and metric
+
+    A QuantileSketch of the seconds each ticket took, folded in from
+    kitchen_order_transitions. Sketches merge, so a report over any range of days,
+    stations or employees adds up rows instead of reading the transitions.
+    employee_id is the waiter who took the order (0 when unknown).
+    """
+    __tablename__ = "service_time_sketches"
+    __table_args__ = (
+        UniqueConstraint("day", "station", "employee_id", "metric", name="uq_service_time_sketches_key"),
+        {'extend_existing': True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)  # Restaurant day of the change
+    station = Column(String(16), nullable=False)
+    employee_id = Column(Integer, nullable=False, default=0)
+    metric = Column(String(16), nullable=False)  # wait, prep, serve or ticket
+    count = Column(Integer, nullable=False, default=0)
+    sketch = Column(Text, nullable=True)  # JSON: QuantileSketch.to_list()
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -10,6 +10,10 @@ except ImportError:
     # Try importing from database directly (Docker container)
     from database import Base
 
+# Reserved row whose version is bumped by every settings change; workers compare it with
+# the version they cached
+SETTINGS_VERSION_KEY = "_settings_version"
+
 class Setting(Base):
     __tablename__ = "settings"
 
@@ -17,6 +21,8 @@ class Setting(Base):
     key = Column(String, unique=True, index=True)
     value = Column(String)
     description = Column(String, nullable=True)
+    # Settings version at which this row last changed
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
 # Pydantic models for API validation
 class SettingBase(BaseModel):
@@ -32,6 +38,7 @@ class SettingUpdate(BaseModel):
 
 class SettingResponse(SettingBase):
     id: int
+    version: int = 0
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy.orm import relationship
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -20,7 +21,16 @@ class Table(Base):
     is_occupied = Column(Boolean, default=False)
     current_order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
     status = Column(String, default="available")  # available, occupied, reserved, cleaning
-    seats = Column(JSON, default=lambda: [])  # Track individual seats and their status
+    # Optimistic concurrency: a stale write (two hosts seating the table at once) raises StaleDataError
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+
+    # Individual seats and their status, one row each in the seats table
+    seats = relationship("Seat", back_populates="table", order_by="Seat.seat_number",
+                         cascade="all, delete-orphan", lazy="selectin")
+
+    # Lets a new order and the table that it occupies be written in the same flush
+    current_order = relationship("Order", foreign_keys=[current_order_id], lazy="select")
 
 # Pydantic models for API validation
 class TableBase(BaseModel):
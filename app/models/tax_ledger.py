@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index
+from datetime import datetime
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.database (local development)
+    from app.database import Base
+except ImportError:
+    # Try importing from database directly (Docker container)
+    from database import Base
+
+TAX_ENTRY_SALE = "sale"
+TAX_ENTRY_REFUND = "refund"
+
+
+class TaxLedgerEntry(Base):
+    """
+    Tax on one line of a paid order, at the rate in force when it was paid
+
+    Written with the payment and never updated; a refund adds negated copies of the
+    order's sale entries. order_id is deliberately not a foreign key so the ledger
+    outlives the archival of its orders. Lines with no item_name balance the entries
+    to the order total (modifiers, rounding, orders without item data).
+    """
+    __tablename__ = "tax_ledger"
+    __table_args__ = (
+        # Tax reports filter on recorded_at and group by category and rate
+        Index("ix_tax_ledger_recorded_at_category", "recorded_at", "category", "tax_rate", "taxable_amount", "tax_amount"),
+        {'extend_existing': True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, nullable=False, index=True)
+    entry_type = Column(String(10), nullable=False, default=TAX_ENTRY_SALE)  # sale, refund
+    recorded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    item_name = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+    quantity = Column(Integer, nullable=False, default=1)
+    unit_price = Column(Float, nullable=False, default=0.0)
+    taxable_amount = Column(Float, nullable=False)
+    tax_rate = Column(Float, nullable=False)
+    tax_amount = Column(Float, nullable=False)
@@ -8,6 +8,8 @@ try:
     from app.routes.bar_routes import router as bar_router
     from app.routes.table_routes import router as table_router
     from app.routes.invoice_routes import router as invoice_router
+    from app.routes.event_routes import router as event_router
+    from app.routes.reservation_routes import router as reservation_router
 except ImportError:
     # Try importing directly (Docker container)
     from routes.user_routes import router as user_router
@@ -16,4 +18,6 @@ except ImportError:
     from routes.kitchen_routes_db import router as kitchen_router
     from routes.bar_routes import router as bar_router
     from routes.table_routes import router as table_router
-    from routes.invoice_routes import router as invoice_router
\ No newline at end of file
+    from routes.invoice_routes import router as invoice_router
+    from routes.event_routes import router as event_router
+    from routes.reservation_routes import router as reservation_router
\ No newline at end of file
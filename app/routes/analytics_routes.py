@@ -1,23 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, case, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import List, Literal, NamedTuple, Optional
+from datetime import datetime, timedelta, timezone, tzinfo
 from collections import defaultdict
 import json
 
 # Handle imports for both local development and Docker container environments
 try:
     # Try importing from app.module (local development)
-    from app.database import get_db
+    from app.database import get_db, get_read_db
     from app.models.order import Order
+    from app.services.archive_service import ArchiveService
     from app.services.settings_service import SettingsService
+    from app.services.tax_ledger_service import TaxLedgerService
+    from app.services.analytics_engine import analytics_engine
+    from app.services.live_analytics import live_analytics
+    from app.services.analytics_cache import analytics_cache, cached_report
+    from app.services.kitchen_timing_service import KitchenTimingService
+    from app.utils.time_buckets import bucket_start, hour_of_day, local_now, time_bucket, to_utc
 except ImportError:
     # Try importing directly (Docker container)
     try:
-        from database import get_db
+        from database import get_db, get_read_db
         from models.order import Order
+        from services.archive_service import ArchiveService
         from services.settings_service import SettingsService
+        from services.tax_ledger_service import TaxLedgerService
+        from services.analytics_engine import analytics_engine
+        from services.live_analytics import live_analytics
+        from services.analytics_cache import analytics_cache, cached_report
+        from services.kitchen_timing_service import KitchenTimingService
+        from utils.time_buckets import bucket_start, hour_of_day, local_now, time_bucket, to_utc
     except ImportError:
+        ArchiveService = None
+        analytics_engine = None
+        live_analytics = None
+        analytics_cache = None
+        KitchenTimingService = None
+
+        def cached_report(report):
+            return lambda function: function
         # Fallback for testing environment - create a mock Order class
         class Order:
             def __init__(self, id=1, created_at=datetime.now(), total=0.0):
@@ -28,42 +52,146 @@ except ImportError:
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 
-def get_date_range(start_date: Optional[datetime], end_date: Optional[datetime]):
-    """Helper function to determine date range"""
+def get_date_range(start_date: Optional[datetime], end_date: Optional[datetime], tz: Optional[tzinfo] = None):
+    """Helper function to determine date range, as naive times in `tz` (UTC when None)"""
+    # Dates given with an offset are converted; naive ones are already local
+    if start_date and start_date.tzinfo:
+        start_date = start_date.astimezone(tz or timezone.utc).replace(tzinfo=None)
+    if end_date and end_date.tzinfo:
+        end_date = end_date.astimezone(tz or timezone.utc).replace(tzinfo=None)
     if not end_date:
-        end_date = datetime.utcnow()
+        end_date = local_now(tz)
     if not start_date:
         # Default to 30 days ago
         start_date = end_date - timedelta(days=30)
     return start_date, end_date
 
+class ReportWindow(NamedTuple):
+    tz: Optional[tzinfo]  # The restaurant time zone
+    start: datetime  # The window in restaurant time, as reported
+    end: datetime
+    start_utc: datetime  # The window in UTC, as orders are stored
+    end_utc: datetime
+
+def report_window(db: Session, start_date: Optional[datetime], end_date: Optional[datetime]) -> ReportWindow:
+    """A report's date range: request dates are restaurant time (the restaurant_timezone setting)"""
+    tz = SettingsService.get_timezone(db) if db is not None else None
+    start_date, end_date = get_date_range(start_date, end_date, tz)
+    return ReportWindow(tz, start_date, end_date, to_utc(start_date, tz), to_utc(end_date, tz))
+
+def vectorized(db) -> bool:
+    """Whether the top-items report can run on the columnar engine (numpy installed)"""
+    return db is not None and analytics_engine is not None and analytics_engine.available
+
+def period_fields(start_date: datetime, end_date: datetime):
+    """The period keys shared by the report responses"""
+    return {
+        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
+        "start_date": start_date.date().isoformat(),
+        "end_date": end_date.date().isoformat()
+    }
+
+def order_item_count(db: Session, orders):
+    """SQL expression for the number of lines in the order_data list of `orders` (an Order entity), 0 when it is not a list"""
+    if db.get_bind().dialect.name == "sqlite":
+        # order_data holds the list JSON-encoded a second time; '$' unwraps either form
+        lines = func.json_extract(orders.order_data, "$")
+        is_list = and_(func.json_valid(lines) == 1, func.json_type(lines) == "array")
+        return case((is_list, func.json_array_length(lines)), else_=0)
+    # PostgreSQL cannot test text for valid JSON before casting: strings are trusted to
+    # be the encoded lists the API stores when they look like one
+    text = orders.order_data.op("#>>")(literal_column("'{}'"))
+    return case(
+        (func.json_typeof(orders.order_data) == "array", func.json_array_length(orders.order_data)),
+        (and_(func.json_typeof(orders.order_data) == "string", text.like("[%]")), func.json_array_length(cast(text, JSON))),
+        else_=0
+    )
+
+def sales_by_bucket(db: Session, orders, bucket, window: ReportWindow, items: bool = True):
+    """
+    Sales, orders and (unless `items` is False) items per bucket of the window, grouped
+    in the database, in bucket order; orders without a total are left out. `orders` is
+    ArchiveService.order_history(), and `bucket` an expression over its created_at.
+    Without items, each half of the union reads only its (created_at, total) index.
+    """
+    bucket = bucket.label("bucket")
+    return db.execute(
+        select(
+            bucket,
+            func.sum(orders.total).label("total_sales"),
+            func.count(orders.id).label("order_count"),
+            (func.sum(order_item_count(db, orders)) if items else literal_column("0")).label("total_items")
+        )
+        .where(orders.created_at >= window.start_utc, orders.created_at <= window.end_utc, orders.total.isnot(None))
+        .group_by(bucket)
+        .order_by(bucket)
+    ).all()
+
+def sales_entry(key: str, row=None):
+    """A sales_data (or hours) entry for a sales_by_bucket row; zeros without one"""
+    total_sales = float(row.total_sales) if row else 0.0
+    order_count = int(row.order_count) if row else 0
+    return {
+        "date": key,
+        "total_sales": round(total_sales, 2),
+        "order_count": order_count,
+        "total_items": int(row.total_items or 0) if row else 0,
+        "average_order_value": round(total_sales / order_count, 2) if order_count else 0
+    }
+
+def sales_summary(window: ReportWindow, sales_data: list, average_key: str):
+    total_sales = sum(entry["total_sales"] for entry in sales_data)
+    return {
+        **period_fields(window.start, window.end),
+        "total_sales": round(total_sales, 2),
+        "total_orders": sum(entry["order_count"] for entry in sales_data),
+        average_key: round(total_sales / len(sales_data) if sales_data else 0, 2),
+        "sales_data": sales_data
+    }
+
+def period_sales(db: Session, window: ReportWindow, granularity: str) -> list:
+    """Sales per day, week or month of the window (restaurant time), without empty periods"""
+    try:
+        orders = ArchiveService.order_history()  # Hot and archived orders
+        bucket = time_bucket(db, orders.created_at, granularity, window.tz, window.start_utc, window.end_utc)
+        rows = sales_by_bucket(db, orders, bucket, window) if db else []
+    except Exception as e:
+        # Fallback for testing environment
+        rows = []
+    return [sales_entry(bucket_start(row.bucket).date().isoformat(), row) for row in rows]
+
 @router.get("/reports/top-items")
+@cached_report("top-items")
 def get_top_selling_items(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get top selling menu items"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Get all orders within the date range
+    window = report_window(db, start_date, end_date)
+    if vectorized(db):
+        return analytics_engine.top_items(db, window.start_utc, window.end_utc, limit)
+
+    # Get all orders within the date range, hot and archived, in id order (which decides
+    # ties and categories)
     try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
+        history = ArchiveService.order_history()
+        orders = db.query(history).filter(
+            history.created_at >= window.start_utc,
+            history.created_at <= window.end_utc
+        ).order_by(history.id).all() if db else []
     except Exception as e:
         # Fallback for testing environment
         orders = []
-    
+
     # Aggregate items across all orders
     item_data = defaultdict(lambda: {
         "quantity": 0,
         "revenue": 0.0,
         "total_price": 0.0
     })
-    
+
     # Process each order and its items
     for order in orders:
         try:
@@ -74,13 +202,13 @@ def get_top_selling_items(
                     order_items = json.loads(order.order_data)
                 elif isinstance(order.order_data, list):
                     order_items = order.order_data
-            
+
             if isinstance(order_items, list):
                 for item in order_items:
                     item_name = item.get('name', 'Unknown Item')
                     item_category = item.get('category', 'Unknown')
                     item_price = float(item.get('price', 0))
-                    
+
                     item_data[item_name]["quantity"] += 1
                     item_data[item_name]["revenue"] += item_price
                     item_data[item_name]["total_price"] += item_price
@@ -88,7 +216,7 @@ def get_top_selling_items(
         except Exception as e:
             # Skip orders with invalid data
             continue
-    
+
     # Convert to list format and calculate averages
     items_list = []
     for name, data in item_data.items():
@@ -100,435 +228,164 @@ def get_top_selling_items(
             "revenue": round(data["revenue"], 2),
             "average_price": round(average_price, 2)
         })
-    
+
     # Sort by quantity (descending) and limit results
     items_list.sort(key=lambda x: x["quantity"], reverse=True)
     items_list = items_list[:limit]
-    
+
     return {
         "items": items_list
     }
 
 @router.get("/reports/peak-hours")
+@cached_report("peak-hours")
 def get_peak_hours(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get peak business hours"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Get all orders within the date range
+    """Get peak business hours (hours of the day in restaurant time)"""
+    window = report_window(db, start_date, end_date)
     try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
+        orders = ArchiveService.order_history()  # Hot and archived orders
+        bucket = hour_of_day(db, orders.created_at, window.tz, window.start_utc, window.end_utc)
+        rows = sales_by_bucket(db, orders, bucket, window, items=False) if db else []
     except Exception as e:
         # Fallback for testing environment
-        orders = []
-    
-    # Group orders by hour
-    hourly_data = defaultdict(lambda: {
-        "order_count": 0,
-        "total_revenue": 0.0
-    })
-    
-    for order in orders:
-        try:
-            # Extract hour from created_at
-            order_hour = order.created_at.hour
-            order_total = float(order.total)
-            
-            hourly_data[order_hour]["order_count"] += 1
-            hourly_data[order_hour]["total_revenue"] += order_total
-        except Exception as e:
-            # Skip orders with invalid data
-            continue
-    
-    # Convert to list format and calculate averages
+        rows = []
+    by_hour = {row.bucket: row for row in rows}
+
     hours_list = []
     for hour in range(24):  # 0-23 hours
-        data = hourly_data.get(hour, {
-            "order_count": 0,
-            "total_revenue": 0.0
-        })
-        
-        average_order_value = data["total_revenue"] / data["order_count"] if data["order_count"] > 0 else 0
-        
+        entry = sales_entry(None, by_hour.get(hour))
         hours_list.append({
             "hour": hour,
-            "order_count": data["order_count"],
-            "total_revenue": round(data["total_revenue"], 2),
-            "average_order_value": round(average_order_value, 2)
+            "order_count": entry["order_count"],
+            "total_revenue": entry["total_sales"],
+            "average_order_value": entry["average_order_value"]
         })
-    
-    # Sort by hour for chronological display
-    hours_list.sort(key=lambda x: x["hour"])
-    
+
     return {
         "hours": hours_list
     }
 
 @router.get("/reports/daily")
+@cached_report("daily")
 def get_daily_sales_report(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get daily sales report"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Get all orders within the date range
-    try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
-    except Exception as e:
-        # Fallback for testing environment
-        orders = []
-    
-    # Group orders by day
-    daily_data = defaultdict(lambda: {
-        "total_sales": 0.0,
-        "order_count": 0,
-        "total_items": 0
-    })
-    
-    for order in orders:
-        # Group by date (without time)
-        try:
-            order_date = order.created_at.date()
-            daily_data[order_date]["total_sales"] += float(order.total)
-            daily_data[order_date]["order_count"] += 1
-            # Count items in order
-            # Parse order data if stored as JSON string
-            order_items = []
-            if hasattr(order, 'order_data'):
-                if isinstance(order.order_data, str):
-                    order_items = json.loads(order.order_data)
-                elif isinstance(order.order_data, list):
-                    order_items = order.order_data
-            
-            if isinstance(order_items, list):
-                daily_data[order_date]["total_items"] += len(order_items)
-        except Exception as e:
-            # Skip orders with invalid data
-            continue
-    
-    # Convert to list format
+    """Get daily sales report (days in restaurant time, including days without orders)"""
+    window = report_window(db, start_date, end_date)
+    by_day = {entry["date"]: entry for entry in period_sales(db, window, "day")}
+
+    # Fill in the days without orders
     sales_data = []
-    current_date = start_date.date()
-    end_date_date = end_date.date()
-    
-    while current_date <= end_date_date:
-        data = daily_data.get(current_date, {
-            "total_sales": 0.0,
-            "order_count": 0,
-            "total_items": 0
-        })
-        
-        # Calculate average order value
-        avg_order_value = data["total_sales"] / data["order_count"] if data["order_count"] > 0 else 0
-        
-        sales_data.append({
-            "date": current_date.isoformat(),
-            "total_sales": round(data["total_sales"], 2),
-            "order_count": data["order_count"],
-            "total_items": data["total_items"],
-            "average_order_value": round(avg_order_value, 2)
-        })
-        
+    current_date = window.start.date()
+    while current_date <= window.end.date():
+        sales_data.append(by_day.get(current_date.isoformat()) or sales_entry(current_date.isoformat()))
         current_date += timedelta(days=1)
-    
-    # Calculate summary statistics
-    total_sales = sum(day["total_sales"] for day in sales_data)
-    total_orders = sum(day["order_count"] for day in sales_data)
-    avg_daily_sales = total_sales / len(sales_data) if sales_data else 0
-    
-    return {
-        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
-        "start_date": start_date.date().isoformat(),
-        "end_date": end_date.date().isoformat(),
-        "total_sales": round(total_sales, 2),
-        "total_orders": total_orders,
-        "average_daily_sales": round(avg_daily_sales, 2),
-        "sales_data": sales_data
-    }
+
+    return sales_summary(window, sales_data, "average_daily_sales")
 
 @router.get("/reports/weekly")
+@cached_report("weekly")
 def get_weekly_sales_report(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get weekly sales report"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Get all orders within the date range
-    try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
-    except Exception as e:
-        # Fallback for testing environment
-        orders = []
-    
-    # Group orders by week
-    weekly_data = defaultdict(lambda: {
-        "total_sales": 0.0,
-        "order_count": 0,
-        "total_items": 0
-    })
-    
-    for order in orders:
-        try:
-            # Group by week
-            order_date = order.created_at.date()
-            # Calculate week number (ISO week)
-            week_start = order_date - timedelta(days=order_date.weekday())
-            weekly_data[week_start]["total_sales"] += float(order.total)
-            weekly_data[week_start]["order_count"] += 1
-            # Count items in order
-            # Parse order data if stored as JSON string
-            order_items = []
-            if hasattr(order, 'order_data'):
-                if isinstance(order.order_data, str):
-                    order_items = json.loads(order.order_data)
-                elif isinstance(order.order_data, list):
-                    order_items = order.order_data
-            
-            if isinstance(order_items, list):
-                weekly_data[week_start]["total_items"] += len(order_items)
-        except Exception as e:
-            # Skip orders with invalid data
-            continue
-    
-    # Convert to list format
-    sales_data = []
-    for week_start, data in weekly_data.items():
-        # Calculate average order value
-        avg_order_value = data["total_sales"] / data["order_count"] if data["order_count"] > 0 else 0
-        
-        sales_data.append({
-            "date": week_start.isoformat(),
-            "total_sales": round(data["total_sales"], 2),
-            "order_count": data["order_count"],
-            "total_items": data["total_items"],
-            "average_order_value": round(avg_order_value, 2)
-        })
-    
-    # Sort by date
-    sales_data.sort(key=lambda x: x["date"])
-    
-    # Calculate summary statistics
-    total_sales = sum(week["total_sales"] for week in sales_data)
-    total_orders = sum(week["order_count"] for week in sales_data)
-    avg_weekly_sales = total_sales / len(sales_data) if sales_data else 0
-    
-    return {
-        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
-        "start_date": start_date.date().isoformat(),
-        "end_date": end_date.date().isoformat(),
-        "total_sales": round(total_sales, 2),
-        "total_orders": total_orders,
-        "average_weekly_sales": round(avg_weekly_sales, 2),
-        "sales_data": sales_data
-    }
+    """Get weekly sales report (weeks from Monday, in restaurant time)"""
+    window = report_window(db, start_date, end_date)
+    return sales_summary(window, period_sales(db, window, "week"), "average_weekly_sales")
 
 @router.get("/reports/monthly")
+@cached_report("monthly")
 def get_monthly_sales_report(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get monthly sales report"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Get all orders within the date range
-    try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
-    except Exception as e:
-        # Fallback for testing environment
-        orders = []
-    
-    # Group orders by month
-    monthly_data = defaultdict(lambda: {
-        "total_sales": 0.0,
-        "order_count": 0,
-        "total_items": 0
-    })
-    
-    for order in orders:
-        try:
-            # Group by month
-            order_month = order.created_at.replace(day=1).date()
-            monthly_data[order_month]["total_sales"] += float(order.total)
-            monthly_data[order_month]["order_count"] += 1
-            # Count items in order
-            # Parse order data if stored as JSON string
-            order_items = []
-            if hasattr(order, 'order_data'):
-                if isinstance(order.order_data, str):
-                    order_items = json.loads(order.order_data)
-                elif isinstance(order.order_data, list):
-                    order_items = order.order_data
-            
-            if isinstance(order_items, list):
-                monthly_data[order_month]["total_items"] += len(order_items)
-        except Exception as e:
-            # Skip orders with invalid data
-            continue
-    
-    # Convert to list format
-    sales_data = []
-    for month_start, data in monthly_data.items():
-        # Calculate average order value
-        avg_order_value = data["total_sales"] / data["order_count"] if data["order_count"] > 0 else 0
-        
-        sales_data.append({
-            "date": month_start.isoformat(),
-            "total_sales": round(data["total_sales"], 2),
-            "order_count": data["order_count"],
-            "total_items": data["total_items"],
-            "average_order_value": round(avg_order_value, 2)
-        })
-    
-    # Sort by date
-    sales_data.sort(key=lambda x: x["date"])
-    
-    # Calculate summary statistics
-    total_sales = sum(month["total_sales"] for month in sales_data)
-    total_orders = sum(month["order_count"] for month in sales_data)
-    avg_monthly_sales = total_sales / len(sales_data) if sales_data else 0
-    
-    return {
-        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
-        "start_date": start_date.date().isoformat(),
-        "end_date": end_date.date().isoformat(),
-        "total_sales": round(total_sales, 2),
-        "total_orders": total_orders,
-        "average_monthly_sales": round(avg_monthly_sales, 2),
-        "sales_data": sales_data
-    }
+    """Get monthly sales report (months in restaurant time)"""
+    window = report_window(db, start_date, end_date)
+    return sales_summary(window, period_sales(db, window, "month"), "average_monthly_sales")
+
+@router.get("/live/top-items")
+def get_live_top_items(
+    window: Literal["day", "hour"] = Query("day", description="today (restaurant time) or the current hour"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Top selling items today or this hour, from the streaming counters (no order scan)"""
+    return live_analytics.top_items(db, window, limit)
+
+@router.get("/live/orders-per-hour")
+def get_live_orders_per_hour(db: Session = Depends(get_read_db)):
+    """Orders and revenue per hour today (restaurant time), from the streaming counters"""
+    return live_analytics.orders_per_hour(db)
+
+@router.get("/reports/service-times")
+def get_service_times(
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    group_by: Literal["station", "employee"] = Query("station"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Speed-of-service percentiles (p50/p95/mean seconds) per station or per employee
+
+    wait is ticket created to preparing, prep created to ready, serve ready to served and
+    ticket created to served. Merged from the per-day sketches of the kitchen and bar
+    status log, so the newest transitions appear once folded (KITCHEN_TIMING_FOLD_SECONDS).
+    """
+    window = report_window(db, start_date, end_date)
+    return KitchenTimingService.service_times(db, window.start.date(), window.end.date(), group_by)
+
+@router.get("/cache")
+def get_cache_stats():
+    """Entries, hits, misses and hit rate of this worker's report result cache"""
+    return analytics_cache.stats()
 
 @router.get("/reports/tax-summary")
 def get_tax_summary(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    tax_rate: Optional[float] = Query(None),  # Allow custom tax rate
-    db: Session = Depends(get_db)
+    tax_rate: Optional[float] = Query(None),  # Recompute at a custom tax rate
+    db: Session = Depends(get_read_db)
 ):
-    """Get tax summary report"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Use provided tax rate, or get from settings, or default
-    TAX_RATE = tax_rate if tax_rate is not None else SettingsService.get_tax_rate(db)
-    
-    # Get all orders within the date range
-    try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
-    except Exception as e:
-        # Fallback for testing environment
-        orders = []
-    
-    # Initialize summary data
-    total_sales = 0.0
-    taxable_sales = 0.0
-    total_tax_collected = 0.0
-    tax_by_category = defaultdict(lambda: {
-        "taxable_sales": 0.0,
-        "tax_collected": 0.0,
-        "tax_rate": TAX_RATE
-    })
-    
-    # Process all orders
-    for order in orders:
-        try:
-            order_total = float(order.total)
-            total_sales += order_total
-            
-            # For simplicity, we assume all sales are taxable
-            # In a real implementation, you might have tax-exempt items
-            taxable_amount = order_total
-            tax_amount = taxable_amount * TAX_RATE
-            
-            taxable_sales += taxable_amount
-            total_tax_collected += tax_amount
-            
-            # Process order items for category breakdown
-            order_items = []
-            if hasattr(order, 'order_data'):
-                if isinstance(order.order_data, str):
-                    order_items = json.loads(order.order_data)
-                elif isinstance(order.order_data, list):
-                    order_items = order.order_data
-            
-            # Group by category
-            category_totals = defaultdict(float)
-            for item in order_items:
-                category = item.get('category', 'Unknown')
-                item_price = item.get('price', 0)
-                item_quantity = item.get('quantity', 1)
-                item_total = item_price * item_quantity
-                category_totals[category] += item_total
-            
-            # Apply tax to each category
-            for category, category_total in category_totals.items():
-                tax_by_category[category]["taxable_sales"] += category_total
-                tax_by_category[category]["tax_collected"] += category_total * TAX_RATE
-                
-        except Exception as e:
-            # Skip orders with invalid data
-            continue
-    
-    # Convert tax_by_category to list format
-    tax_by_category_list = []
-    for category, data in tax_by_category.items():
-        tax_by_category_list.append({
-            "category": category,
-            "taxable_sales": round(data["taxable_sales"], 2),
-            "tax_collected": round(data["tax_collected"], 2),
-            "tax_rate": data["tax_rate"]
-        })
-    
-    return {
-        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
-        "start_date": start_date.date().isoformat(),
-        "end_date": end_date.date().isoformat(),
-        "total_sales": round(total_sales, 2),
-        "taxable_sales": round(taxable_sales, 2),
-        "total_tax_collected": round(total_tax_collected, 2),
-        "tax_rate": TAX_RATE,
-        "tax_by_category": tax_by_category_list
-    }
+    """
+    Get tax summary report
+
+    Summed from the tax ledger by payment time, at the rates in force when each order
+    was paid; a category appears once per rate it was taxed at.
+    """
+    window = report_window(db, start_date, end_date)
+    return {**period_fields(window.start, window.end),
+            **TaxLedgerService.tax_summary(db, window.start_utc, window.end_utc, tax_rate)}
 
 @router.get("/reports/compliance")
 def get_compliance_reports(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get compliance reports"""
-    start_date, end_date = get_date_range(start_date, end_date)
+    window = report_window(db, start_date, end_date)
     
-    # Get all orders within the date range
+    # Get all orders within the date range, hot and archived, only the columns checked
     try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
+        history = ArchiveService.order_history()
+        orders = db.query(history.id, history.created_at, history.total, history.order_data).filter(
+            history.created_at >= window.start_utc,
+            history.created_at <= window.end_utc
         ).all() if db else []
+        # Paid orders whose tax was never recorded in the ledger
+        missing_tax = {row.id for row in TaxLedgerService.orders_missing_entries(db, window.start_utc, window.end_utc)} if db else set()
     except Exception as e:
         # Fallback for testing environment
         orders = []
+        missing_tax = set()
     
     # Initialize compliance data
     total_transactions = len(orders)
@@ -575,6 +432,17 @@ def get_compliance_reports(
                     "status": "pending"
                 })
             
+            # Tax must have been recorded when the order was paid
+            if order_id in missing_tax:
+                is_compliant = False
+                compliance_issues.append({
+                    "date": order_timestamp.isoformat(),
+                    "issue_type": "Missing Tax Record",
+                    "description": f"Order #{order_id} was paid without a tax ledger entry",
+                    "amount": float(order.total),
+                    "status": "pending"
+                })
+            
             # Add audit trail entry
             audit_trail.append({
                 "timestamp": order_timestamp.isoformat(),
@@ -600,9 +468,7 @@ def get_compliance_reports(
     compliance_rate = compliant_transactions / total_transactions if total_transactions > 0 else 1.0
     
     return {
-        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
-        "start_date": start_date.date().isoformat(),
-        "end_date": end_date.date().isoformat(),
+        **period_fields(window.start, window.end),
         "total_transactions": total_transactions,
         "compliant_transactions": compliant_transactions,
         "compliance_rate": round(compliance_rate, 4),
@@ -611,192 +477,30 @@ def get_compliance_reports(
     }
 
 @router.get("/reports/sales-tax")
+@cached_report("sales-tax")
 def get_sales_tax_report(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    tax_rate: Optional[float] = Query(None),  # Allow custom tax rate
-    db: Session = Depends(get_db)
+    tax_rate: Optional[float] = Query(None),  # Recompute at a custom tax rate
+    db: Session = Depends(get_read_db)
 ):
-    """Get sales tax report"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Use provided tax rate, or get from settings, or default
-    TAX_RATE = tax_rate if tax_rate is not None else SettingsService.get_tax_rate(db)
-    
-    # Get all orders within the date range
-    try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
-    except Exception as e:
-        # Fallback for testing environment
-        orders = []
-    
-    # Initialize report data
-    total_sales = 0.0
-    taxable_sales = 0.0
-    exempt_sales = 0.0
-    total_tax_collected = 0.0
-    
-    # Group by period (weekly for this example)
-    period_data = defaultdict(lambda: {
-        "total_sales": 0.0,
-        "taxable_sales": 0.0,
-        "tax_collected": 0.0,
-        "tax_rate": TAX_RATE
-    })
-    
-    # Process all orders
-    for order in orders:
-        try:
-            order_total = float(order.total)
-            total_sales += order_total
-            
-            # For simplicity, we assume all sales are taxable
-            taxable_amount = order_total
-            tax_amount = taxable_amount * TAX_RATE
-            
-            taxable_sales += taxable_amount
-            total_tax_collected += tax_amount
-            exempt_sales += 0.0  # No exempt sales in this example
-            
-            # Group by week
-            order_date = order.created_at.date()
-            week_start = order_date - timedelta(days=order_date.weekday())
-            period_key = f"Week of {week_start.strftime('%Y-%m-%d')}"
-            
-            period_data[period_key]["total_sales"] += order_total
-            period_data[period_key]["taxable_sales"] += taxable_amount
-            period_data[period_key]["tax_collected"] += tax_amount
-                
-        except Exception as e:
-            # Skip orders with invalid data
-            continue
-    
-    # Convert period_data to list format
-    tax_by_period = []
-    for period, data in period_data.items():
-        tax_by_period.append({
-            "period": period,
-            "total_sales": round(data["total_sales"], 2),
-            "taxable_sales": round(data["taxable_sales"], 2),
-            "tax_collected": round(data["tax_collected"], 2),
-            "tax_rate": data["tax_rate"]
-        })
-    
-    # Sort by period
-    tax_by_period.sort(key=lambda x: x["period"])
-    
-    return {
-        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
-        "start_date": start_date.date().isoformat(),
-        "end_date": end_date.date().isoformat(),
-        "total_sales": round(total_sales, 2),
-        "taxable_sales": round(taxable_sales, 2),
-        "exempt_sales": round(exempt_sales, 2),
-        "total_tax_collected": round(total_tax_collected, 2),
-        "tax_by_period": tax_by_period
-    }
+    """Get sales tax report, by week, from the tax ledger"""
+    window = report_window(db, start_date, end_date)
+    return {**period_fields(window.start, window.end),
+            **TaxLedgerService.sales_tax_by_week(db, window.start_utc, window.end_utc, tax_rate, window.tz)}
 
 @router.get("/reports/itemized-tax")
+@cached_report("itemized-tax")
 def get_itemized_tax_report(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    tax_rate: Optional[float] = Query(None),  # Allow custom tax rate
-    db: Session = Depends(get_db)
+    tax_rate: Optional[float] = Query(None),  # Recompute at a custom tax rate
+    db: Session = Depends(get_read_db)
 ):
-    """Get itemized tax report"""
-    start_date, end_date = get_date_range(start_date, end_date)
-    
-    # Use provided tax rate, or get from settings, or default
-    TAX_RATE = tax_rate if tax_rate is not None else SettingsService.get_tax_rate(db)
-    
-    # Get all orders within the date range
-    try:
-        orders = db.query(Order).filter(
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        ).all() if db else []
-    except Exception as e:
-        # Fallback for testing environment
-        orders = []
-    
-    # Initialize report data
-    itemized_tax_data = []
-    total_items = 0
-    taxable_items = 0
-    total_tax_collected = 0.0
-    
-    # Process all orders
-    for order in orders:
-        try:
-            # Process order items
-            order_items = []
-            if hasattr(order, 'order_data'):
-                if isinstance(order.order_data, str):
-                    order_items = json.loads(order.order_data)
-                elif isinstance(order.order_data, list):
-                    order_items = order.order_data
-            
-            for item in order_items:
-                total_items += 1
-                taxable_items += 1  # Assume all items are taxable
-                
-                item_name = item.get('name', 'Unknown Item')
-                category = item.get('category', 'Unknown')
-                unit_price = item.get('price', 0)
-                quantity = item.get('quantity', 1)
-                total_sales = unit_price * quantity
-                tax_collected = total_sales * TAX_RATE
-                
-                total_tax_collected += tax_collected
-                
-                # Check if item already exists in our list
-                existing_item = None
-                for existing in itemized_tax_data:
-                    if (existing["item_name"] == item_name and 
-                        existing["category"] == category and
-                        existing["unit_price"] == unit_price):
-                        existing_item = existing
-                        break
-                
-                if existing_item:
-                    # Update existing item
-                    existing_item["quantity_sold"] += quantity
-                    existing_item["total_sales"] += total_sales
-                    existing_item["tax_collected"] += tax_collected
-                else:
-                    # Add new item
-                    itemized_tax_data.append({
-                        "item_name": item_name,
-                        "category": category,
-                        "quantity_sold": quantity,
-                        "unit_price": unit_price,
-                        "total_sales": total_sales,
-                        "tax_rate": TAX_RATE,
-                        "tax_collected": tax_collected
-                    })
-                
-        except Exception as e:
-            # Skip orders with invalid data
-            continue
-    
-    # Round all monetary values
-    for item in itemized_tax_data:
-        item["unit_price"] = round(item["unit_price"], 2)
-        item["total_sales"] = round(item["total_sales"], 2)
-        item["tax_collected"] = round(item["tax_collected"], 2)
-    
-    return {
-        "period": f"{start_date.date().isoformat()} to {end_date.date().isoformat()}",
-        "start_date": start_date.date().isoformat(),
-        "end_date": end_date.date().isoformat(),
-        "total_items": total_items,
-        "taxable_items": taxable_items,
-        "total_tax_collected": round(total_tax_collected, 2),
-        "itemized_tax_data": itemized_tax_data
-    }
+    """Get itemized tax report, per item, price and rate, from the tax ledger"""
+    window = report_window(db, start_date, end_date)
+    return {**period_fields(window.start, window.end),
+            **TaxLedgerService.itemized_tax(db, window.start_utc, window.end_utc, tax_rate)}
 
 @router.get("/tax-rate")
 def get_current_tax_rate(db: Session = Depends(get_db)):
@@ -1,27 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 from datetime import datetime
 import json
 
 # Handle imports for both local development and Docker container environments
 try:
     # Try importing from app.module (local development)
-    from app.database import get_db
+    from app.database import get_async_db
     from app.models.kitchen import KitchenOrder
     from app.models.order import Order
-    from app.schemas import BarOrderCreate, BarOrderUpdate, BarOrderResponse, BarOrderDetail, OrderItem
-    from app.services.kot_service_simple import kot_service
+    from app.schemas import BarOrderCreate, BarOrderUpdate, BarOrderResponse, BarOrderDetail, BarOrderDelta, OrderItem
+    from app.utils.imports import import_app_module
+    from app.services.outbox_service import OutboxService
+    from app.services.kitchen_timing_service import KitchenTimingService
+    from app.services.kitchen_sync_service import KitchenSyncService
+    from app.utils.events import KITCHEN_TICKET_CREATED, KITCHEN_STATUS_CHANGED
 except ImportError:
     # Try importing directly (Docker container)
-    from database import get_db
+    from database import get_async_db
     from models.kitchen import KitchenOrder
     from models.order import Order
-    from schemas import BarOrderCreate, BarOrderUpdate, BarOrderResponse, BarOrderDetail, OrderItem
-    from services.kot_service_simple import kot_service
+    from schemas import BarOrderCreate, BarOrderUpdate, BarOrderResponse, BarOrderDetail, BarOrderDelta, OrderItem
+    from utils.imports import import_app_module
+    from services.outbox_service import OutboxService
+    from services.kitchen_timing_service import KitchenTimingService
+    from services.kitchen_sync_service import KitchenSyncService
+    from utils.events import KITCHEN_TICKET_CREATED, KITCHEN_STATUS_CHANGED
 
 router = APIRouter(prefix="/api/bar", tags=["Bar"])
 
+def _kot_service():
+    """Printing is optional, so the KOT service is only imported when a print endpoint is used"""
+    return import_app_module("services.kot_service_simple").kot_service
+
 # Helper function to convert database models to response models
 def bar_order_to_detail(kitchen_order: KitchenOrder, db_order: Order) -> BarOrderDetail:
     """Convert database KitchenOrder and Order models to BarOrderDetail response model"""
@@ -106,40 +119,63 @@ def is_drink_item(item):
     
     return False
 
-@router.get("/orders", response_model=List[BarOrderDetail])
-def get_bar_orders(db: Session = Depends(get_db)):
-    """Get all orders for the bar display from database that contain drink items"""
-    # Get all kitchen orders from database
-    kitchen_orders = db.query(KitchenOrder).all()
+def has_drink_items(db_order: Order) -> bool:
+    """Whether an order contains drink items (the orders shown on the bar display)"""
+    # Parse order_data to check if it contains drink items
+    try:
+        # Access column value properly to avoid type checking issues
+        order_data_value = getattr(db_order, 'order_data', None)
+        order_data_str = str(order_data_value) if order_data_value is not None else "[]"
+        order_items_data = json.loads(order_data_str) if order_data_str else []
+    except (json.JSONDecodeError, TypeError):
+        order_items_data = []
+    
+    # Check if any item in the order is a drink
+    return any(is_drink_item(item) for item in order_items_data)
+
+@router.get("/orders", response_model=Union[BarOrderDelta, List[BarOrderDetail]])
+async def get_bar_orders(
+    since: Optional[int] = Query(None, ge=0, description="Version from the previous poll; only changes after it are returned"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all orders for the bar display from database that contain drink items
+
+    With `since`, returns only the tickets changed after that version and the order ids of
+    tickets removed, served or no longer holding drinks, with the version to poll from
+    next (start from 0).
+    """
+    if since is not None:
+        changes = await db.run_sync(lambda session: KitchenSyncService.changes_since(session, since))
+        orders, removed = [], changes["removed"]
+        for kitchen_order, db_order in changes["tickets"]:
+            if has_drink_items(db_order):
+                orders.append(bar_order_to_detail(kitchen_order, db_order))
+            else:
+                removed.append(kitchen_order.order_id)
+        return BarOrderDelta(version=changes["version"], full=changes["full"], orders=orders, removed=removed)
+
+    # Load each kitchen order together with its order in a single query
+    rows = await db.execute(
+        select(KitchenOrder, Order)
+        .join(Order, Order.id == KitchenOrder.order_id)
+        .order_by(KitchenOrder.id)
+    )
     
     # Convert to response format with order details, filtering for drink items
     result = []
-    for kitchen_order in kitchen_orders:
-        # Find the corresponding order
-        db_order = db.query(Order).filter(Order.id == kitchen_order.order_id).first()
-        if db_order:
-            # Parse order_data to check if it contains drink items
-            try:
-                # Access column value properly to avoid type checking issues
-                order_data_value = getattr(db_order, 'order_data', None)
-                order_data_str = str(order_data_value) if order_data_value is not None else "[]"
-                order_items_data = json.loads(order_data_str) if order_data_str else []
-            except (json.JSONDecodeError, TypeError):
-                order_items_data = []
-            
-            # Check if any item in the order is a drink
-            has_drink_items = any(is_drink_item(item) for item in order_items_data)
-            
-            if has_drink_items:
-                result.append(bar_order_to_detail(kitchen_order, db_order))
+    for kitchen_order, db_order in rows.all():
+        if db_order and has_drink_items(db_order):
+            result.append(bar_order_to_detail(kitchen_order, db_order))
     
     return result
 
 @router.post("/orders", response_model=BarOrderResponse)
-def create_bar_order(bar_order: BarOrderCreate, db: Session = Depends(get_db)):
+async def create_bar_order(bar_order: BarOrderCreate, db: AsyncSession = Depends(get_async_db)):
     """Add a new order to the bar display in database"""
     # Check if kitchen order already exists
-    existing_kitchen_order = db.query(KitchenOrder).filter(KitchenOrder.order_id == bar_order.order_id).first()
+    result = await db.execute(select(KitchenOrder).where(KitchenOrder.order_id == bar_order.order_id))
+    existing_kitchen_order = result.scalars().first()
     if existing_kitchen_order:
         return BarOrderResponse.from_orm(existing_kitchen_order)
     
@@ -150,8 +186,9 @@ def create_bar_order(bar_order: BarOrderCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_kitchen_order)
-    db.commit()
-    db.refresh(db_kitchen_order)
+    OutboxService.record(db.sync_session, KITCHEN_TICKET_CREATED, bar_order.order_id, {"status": db_kitchen_order.status})
+    await db.commit()
+    await db.refresh(db_kitchen_order)
     
     return BarOrderResponse.from_orm(db_kitchen_order)
 
@@ -159,7 +196,7 @@ def create_bar_order(bar_order: BarOrderCreate, db: Session = Depends(get_db)):
 def print_bar_order_ticket(order_id: int):
     """Generate and print Bar Order Ticket for a specific order"""
     try:
-        results = kot_service.print_kot_for_order(order_id)
+        results = _kot_service().print_kot_for_order(order_id)
         # Check if any station failed
         failed_stations = [station for station, result in results.items() if not result.get("success", False)]
         
@@ -181,15 +218,16 @@ def print_bar_order_ticket(order_id: int):
         raise HTTPException(status_code=500, detail=f"Error printing BOT: {str(e)}")
 
 @router.put("/orders/{order_id}", response_model=BarOrderResponse)
-def update_bar_order_status(order_id: int, bar_order_update: BarOrderUpdate, db: Session = Depends(get_db)):
+async def update_bar_order_status(order_id: int, bar_order_update: BarOrderUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update the status of an order in the bar"""
     # Find the kitchen order (Bar uses the same KitchenOrder model)
-    kitchen_order = db.query(KitchenOrder).filter(KitchenOrder.order_id == order_id).first()
+    result = await db.execute(select(KitchenOrder).where(KitchenOrder.order_id == order_id))
+    kitchen_order = result.scalars().first()
     
     # If kitchen order doesn't exist, create it
     if not kitchen_order:
         # Check if the order exists in the main orders table
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
@@ -199,37 +237,39 @@ def update_bar_order_status(order_id: int, bar_order_update: BarOrderUpdate, db:
             status="pending"
         )
         db.add(kitchen_order)
-        db.commit()
-        db.refresh(kitchen_order)
+        OutboxService.record(db.sync_session, KITCHEN_TICKET_CREATED, order_id, {"status": kitchen_order.status})
+        await db.commit()
+        await db.refresh(kitchen_order)
     
     # Validate status - only allow valid statuses
     valid_statuses = ["pending", "preparing", "ready", "served"]
     if bar_order_update.status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
     
-    # Update the status (this works in kitchen routes, so it should work here too)
-    kitchen_order.status = bar_order_update.status
-    kitchen_order.updated_at = datetime.utcnow()
+    # Update the status, logging the transition for the service-time reports
+    KitchenTimingService.change_status(db.sync_session, kitchen_order, bar_order_update.status, "bar")
+    OutboxService.record(db.sync_session, KITCHEN_STATUS_CHANGED, order_id, {"status": kitchen_order.status, "station": "bar"})
     
-    db.commit()
-    db.refresh(kitchen_order)
+    await db.commit()
+    await db.refresh(kitchen_order)
     
     # Return BarOrderResponse (convert from KitchenOrder)
     return BarOrderResponse.from_orm(kitchen_order)
 
 @router.post("/orders/{order_id}/mark-served")
-def mark_order_as_served(order_id: int, db: Session = Depends(get_db)):
+async def mark_order_as_served(order_id: int, db: AsyncSession = Depends(get_async_db)):
     """Mark an order as served and remove it from the bar display"""
     # Find the kitchen order
-    kitchen_order = db.query(KitchenOrder).filter(KitchenOrder.order_id == order_id).first()
+    result = await db.execute(select(KitchenOrder).where(KitchenOrder.order_id == order_id))
+    kitchen_order = result.scalars().first()
     if not kitchen_order:
         raise HTTPException(status_code=404, detail="Bar order not found")
     
     # Update the status to served
-    kitchen_order.status = "served"
-    kitchen_order.updated_at = datetime.utcnow()
+    KitchenTimingService.change_status(db.sync_session, kitchen_order, "served", "bar")
+    OutboxService.record(db.sync_session, KITCHEN_STATUS_CHANGED, order_id, {"status": "served", "station": "bar"})
     
-    db.commit()
-    db.refresh(kitchen_order)
+    await db.commit()
+    await db.refresh(kitchen_order)
     
     return {"message": "Order marked as served", "order_id": order_id, "status": "served"}
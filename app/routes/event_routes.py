@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import asyncio
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.database import get_async_db
+    from app.dependencies import get_current_user
+    from app.models.user import User
+    from app.schemas.event_schema import EventFeedResponse
+    from app.services.outbox_service import OutboxService, change_notifier
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from database import get_async_db
+    from dependencies import get_current_user
+    from models.user import User
+    from schemas.event_schema import EventFeedResponse
+    from services.outbox_service import OutboxService, change_notifier
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+config = Config()
+
+@router.get("", response_model=EventFeedResponse)
+async def get_events(
+    after: int = Query(0, ge=0, description="Return events with a seq greater than this"),
+    limit: int = Query(100, ge=1, description="Maximum events to return (capped by EVENTS_MAX_BATCH)"),
+    wait: Optional[float] = Query(None, ge=0, description="Seconds to wait for new events (defaults to and is capped by EVENTS_LONG_POLL_TIMEOUT)"),
+    types: Optional[str] = Query(None, description="Comma-separated event types to include"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Change feed of order, kitchen and payment events in commit order.
+
+    Returns immediately when events after `after` exist; otherwise holds the request
+    until one is committed or `wait` seconds pass and returns an empty page. Clients
+    pass the returned last_seq as `after` on their next call.
+    """
+    limit = min(limit, config.EVENTS_MAX_BATCH)
+    timeout = config.EVENTS_LONG_POLL_TIMEOUT if wait is None else min(wait, config.EVENTS_LONG_POLL_TIMEOUT)
+    event_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        seen_version = change_notifier.version
+        events = await db.run_sync(lambda session: OutboxService.fetch(session, after, limit, event_types))
+        # End the read transaction so no pooled connection is held while waiting
+        await db.commit()
+        if events:
+            return EventFeedResponse(
+                events=[OutboxService.to_dict(e) for e in events],
+                last_seq=events[-1].seq
+            )
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return EventFeedResponse(events=[], last_seq=after)
+        # Wake on a local commit, or re-check after the poll interval for other workers' commits
+        await change_notifier.wait(min(remaining, config.EVENTS_POLL_INTERVAL), seen_version)
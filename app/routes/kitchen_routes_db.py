@@ -1,27 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 from datetime import datetime
 import json
 
 # Handle imports for both local development and Docker container environments
 try:
     # Try importing from app.module (local development)
-    from app.database import get_db
+    from app.database import get_async_db
     from app.models.kitchen import KitchenOrder
     from app.models.order import Order
-    from app.schemas import KitchenOrderCreate, KitchenOrderUpdate, KitchenOrderResponse, KitchenOrderDetail, OrderItem
-    from app.services.kot_service_simple import kot_service
+    from app.schemas import KitchenOrderCreate, KitchenOrderUpdate, KitchenOrderResponse, KitchenOrderDetail, KitchenOrderDelta, KitchenQueueResponse, OrderItem
+    from app.utils.imports import import_app_module
+    from app.services.outbox_service import OutboxService
+    from app.services.kitchen_timing_service import KitchenTimingService
+    from app.services.kitchen_scheduler import kitchen_scheduler
+    from app.services.kitchen_sync_service import KitchenSyncService
+    from app.utils.events import KITCHEN_TICKET_CREATED, KITCHEN_STATUS_CHANGED, KITCHEN_TICKET_REMOVED
 except ImportError:
     # Try importing directly (Docker container)
-    from database import get_db
+    from database import get_async_db
     from models.kitchen import KitchenOrder
     from models.order import Order
-    from schemas import KitchenOrderCreate, KitchenOrderUpdate, KitchenOrderResponse, KitchenOrderDetail, OrderItem
-    from services.kot_service_simple import kot_service
+    from schemas import KitchenOrderCreate, KitchenOrderUpdate, KitchenOrderResponse, KitchenOrderDetail, KitchenOrderDelta, KitchenQueueResponse, OrderItem
+    from utils.imports import import_app_module
+    from services.outbox_service import OutboxService
+    from services.kitchen_timing_service import KitchenTimingService
+    from services.kitchen_scheduler import kitchen_scheduler
+    from services.kitchen_sync_service import KitchenSyncService
+    from utils.events import KITCHEN_TICKET_CREATED, KITCHEN_STATUS_CHANGED, KITCHEN_TICKET_REMOVED
 
 router = APIRouter(prefix="/api/kitchen", tags=["Kitchen"])
 
+def _kot_service():
+    """Printing is optional, so the KOT service is only imported when a print endpoint is used"""
+    return import_app_module("services.kot_service_simple").kot_service
+
 # Helper function to convert database models to response models
 def kitchen_order_to_detail(kitchen_order: KitchenOrder, db_order: Order) -> KitchenOrderDetail:
     """Convert database KitchenOrder and Order models to KitchenOrderDetail response model"""
@@ -66,27 +81,52 @@ def kitchen_order_to_detail(kitchen_order: KitchenOrder, db_order: Order) -> Kit
         customer_name=db_order.customer_name
     )
 
-@router.get("/orders", response_model=List[KitchenOrderDetail])
-def get_kitchen_orders(db: Session = Depends(get_db)):
-    """Get all orders for the kitchen display from database"""
-    # Get all kitchen orders from database
-    kitchen_orders = db.query(KitchenOrder).all()
+@router.get("/orders", response_model=Union[KitchenOrderDelta, List[KitchenOrderDetail]])
+async def get_kitchen_orders(
+    since: Optional[int] = Query(None, ge=0, description="Version from the previous poll; only changes after it are returned"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all orders for the kitchen display from database
+
+    With `since`, returns only the tickets changed after that version and the order ids of
+    tickets removed or served, with the version to poll from next (start from 0).
+    """
+    if since is not None:
+        changes = await db.run_sync(lambda session: KitchenSyncService.changes_since(session, since))
+        return KitchenOrderDelta(
+            version=changes["version"],
+            full=changes["full"],
+            orders=[kitchen_order_to_detail(kitchen_order, db_order) for kitchen_order, db_order in changes["tickets"]],
+            removed=changes["removed"]
+        )
+
+    # Load each kitchen order together with its order in a single query
+    rows = await db.execute(
+        select(KitchenOrder, Order)
+        .join(Order, Order.id == KitchenOrder.order_id)
+        .order_by(KitchenOrder.id)
+    )
     
     # Convert to response format with order details
-    result = []
-    for kitchen_order in kitchen_orders:
-        # Find the corresponding order
-        db_order = db.query(Order).filter(Order.id == kitchen_order.order_id).first()
-        if db_order:
-            result.append(kitchen_order_to_detail(kitchen_order, db_order))
-    
-    return result
+    return [kitchen_order_to_detail(kitchen_order, db_order) for kitchen_order, db_order in rows.all()]
+
+@router.get("/queue", response_model=KitchenQueueResponse)
+async def get_kitchen_queue(db: AsyncSession = Depends(get_async_db)):
+    """
+    Pending and preparing items per station in the order they will be cooked, with
+    ready-time estimates from learned prep times (served from memory)
+    """
+    if kitchen_scheduler.is_stale():
+        await db.run_sync(kitchen_scheduler.load)
+    return kitchen_scheduler.queue()
 
 @router.post("/orders", response_model=KitchenOrderResponse)
-def create_kitchen_order(kitchen_order: KitchenOrderCreate, db: Session = Depends(get_db)):
+async def create_kitchen_order(kitchen_order: KitchenOrderCreate, db: AsyncSession = Depends(get_async_db)):
     """Add a new order to the kitchen display in database"""
     # Check if kitchen order already exists
-    existing_kitchen_order = db.query(KitchenOrder).filter(KitchenOrder.order_id == kitchen_order.order_id).first()
+    result = await db.execute(select(KitchenOrder).where(KitchenOrder.order_id == kitchen_order.order_id))
+    existing_kitchen_order = result.scalars().first()
     if existing_kitchen_order:
         return KitchenOrderResponse.from_orm(existing_kitchen_order)
     
@@ -97,8 +137,9 @@ def create_kitchen_order(kitchen_order: KitchenOrderCreate, db: Session = Depend
     )
     
     db.add(db_kitchen_order)
-    db.commit()
-    db.refresh(db_kitchen_order)
+    OutboxService.record(db.sync_session, KITCHEN_TICKET_CREATED, kitchen_order.order_id, {"status": db_kitchen_order.status})
+    await db.commit()
+    await db.refresh(db_kitchen_order)
     
     return KitchenOrderResponse.from_orm(db_kitchen_order)
 
@@ -106,7 +147,7 @@ def create_kitchen_order(kitchen_order: KitchenOrderCreate, db: Session = Depend
 def print_kitchen_order_ticket(order_id: int):
     """Generate and print Kitchen Order Ticket for a specific order"""
     try:
-        results = kot_service.print_kot_for_order(order_id)
+        results = _kot_service().print_kot_for_order(order_id)
         # Check if any station failed
         failed_stations = [station for station, result in results.items() if not result.get("success", False)]
         
@@ -128,15 +169,16 @@ def print_kitchen_order_ticket(order_id: int):
         raise HTTPException(status_code=500, detail=f"Error printing KOT: {str(e)}")
 
 @router.put("/orders/{order_id}", response_model=KitchenOrderResponse)
-def update_kitchen_order_status(order_id: int, kitchen_order_update: KitchenOrderUpdate, db: Session = Depends(get_db)):
+async def update_kitchen_order_status(order_id: int, kitchen_order_update: KitchenOrderUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update the status of an order in the kitchen"""
     # Find the kitchen order
-    kitchen_order = db.query(KitchenOrder).filter(KitchenOrder.order_id == order_id).first()
+    result = await db.execute(select(KitchenOrder).where(KitchenOrder.order_id == order_id))
+    kitchen_order = result.scalars().first()
     
     # If kitchen order doesn't exist, create it
     if not kitchen_order:
         # Check if the order exists in the main orders table
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
@@ -146,47 +188,52 @@ def update_kitchen_order_status(order_id: int, kitchen_order_update: KitchenOrde
             status="pending"
         )
         db.add(kitchen_order)
-        db.commit()
-        db.refresh(kitchen_order)
+        OutboxService.record(db.sync_session, KITCHEN_TICKET_CREATED, order_id, {"status": kitchen_order.status})
+        await db.commit()
+        await db.refresh(kitchen_order)
     
     # Validate status - only allow valid statuses
     valid_statuses = ["pending", "preparing", "ready", "served"]
     if kitchen_order_update.status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
     
-    # Update the status
-    kitchen_order.status = kitchen_order_update.status
-    kitchen_order.updated_at = datetime.utcnow()
+    # Update the status, logging the transition for the service-time reports
+    KitchenTimingService.change_status(db.sync_session, kitchen_order, kitchen_order_update.status, "kitchen")
+    OutboxService.record(db.sync_session, KITCHEN_STATUS_CHANGED, order_id, {"status": kitchen_order.status, "station": "kitchen"})
     
-    db.commit()
-    db.refresh(kitchen_order)
+    await db.commit()
+    await db.refresh(kitchen_order)
     
     return KitchenOrderResponse.from_orm(kitchen_order)
 
 @router.delete("/orders/{order_id}")
-def remove_kitchen_order(order_id: int, db: Session = Depends(get_db)):
+async def remove_kitchen_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
     """Remove an order from the kitchen display (when it's completed)"""
-    kitchen_order = db.query(KitchenOrder).filter(KitchenOrder.order_id == order_id).first()
+    result = await db.execute(select(KitchenOrder).where(KitchenOrder.order_id == order_id))
+    kitchen_order = result.scalars().first()
     if kitchen_order:
-        db.delete(kitchen_order)
-        db.commit()
+        OutboxService.record(db.sync_session, KITCHEN_TICKET_REMOVED, order_id)
+        KitchenTimingService.record_removed(db.sync_session, kitchen_order, "kitchen")
+        await db.delete(kitchen_order)
+        await db.commit()
     
     return {"message": "Order removed from kitchen display"}
 
 @router.post("/orders/{order_id}/mark-served")
-def mark_order_as_served(order_id: int, db: Session = Depends(get_db)):
+async def mark_order_as_served(order_id: int, db: AsyncSession = Depends(get_async_db)):
     """Mark an order as served and remove it from the kitchen display"""
     # Find the kitchen order
-    kitchen_order = db.query(KitchenOrder).filter(KitchenOrder.order_id == order_id).first()
+    result = await db.execute(select(KitchenOrder).where(KitchenOrder.order_id == order_id))
+    kitchen_order = result.scalars().first()
     if not kitchen_order:
         raise HTTPException(status_code=404, detail="Kitchen order not found")
     
     # Update the status to served
-    kitchen_order.status = "served"
-    kitchen_order.updated_at = datetime.utcnow()
+    KitchenTimingService.change_status(db.sync_session, kitchen_order, "served", "kitchen")
+    OutboxService.record(db.sync_session, KITCHEN_STATUS_CHANGED, order_id, {"status": "served", "station": "kitchen"})
     
-    db.commit()
-    db.refresh(kitchen_order)
+    await db.commit()
+    await db.refresh(kitchen_order)
     
     return {"message": "Order marked as served", "order_id": order_id, "status": "served"}
 
@@ -195,14 +242,14 @@ def get_kitchen_printers():
     """Get information about available kitchen printers and KDS systems"""
     return {
         "message": "Available kitchen printers and KDS systems",
-        "printers": kot_service.printers
+        "printers": _kot_service().printers
     }
 
 @router.get("/printers/{printer_id}/status")
 def get_printer_status(printer_id: str):
     """Get the status of a specific printer or KDS"""
     try:
-        status = kot_service.get_printer_status(printer_id)
+        status = _kot_service().get_printer_status(printer_id)
         if not status.get("success", False):
             raise HTTPException(status_code=404, detail=status.get("message", "Printer not found"))
         return status
@@ -213,7 +260,7 @@ def get_printer_status(printer_id: str):
 def test_kitchen_printer(printer_id: str):
     """Test connection to a specific kitchen printer or KDS"""
     try:
-        if printer_id not in kot_service.printers:
+        if printer_id not in _kot_service().printers:
             raise HTTPException(status_code=404, detail=f"Printer {printer_id} not found")
         
         # Create a simple test order for testing
@@ -239,7 +286,7 @@ def test_kitchen_printer(printer_id: str):
             customer_name='Printer Test'
         )
         
-        result = kot_service.send_to_printer(test_order, printer_id)
+        result = _kot_service().send_to_printer(test_order, printer_id)
         return {
             "message": f"Test print sent to {printer_id}",
             "result": result
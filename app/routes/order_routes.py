@@ -1,38 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import json
 from datetime import datetime
 
 # Handle imports for both local development and Docker container environments
 try:
     # Try importing from app.module (local development)
-    from app.database import get_db
+    from app.database import get_async_db
     from app.models.order import Order, OrderStatus, OrderType
     from app.models.order_item import OrderItem as OrderItemModel
     from app.models.table import Table
-    from app.schemas.order_schema import OrderCreate, OrderUpdate, OrderResponse, OrderItem
+    from app.schemas.order_schema import OrderCreate, OrderUpdate, OrderResponse, OrderItem, OrderSyncRequest, OrderSyncResponse
+    from app.config import Config
     from app.models.user import User
     from app.schemas.user_schema import UserResponse
     from app.dependencies import get_current_user
     from app.models.kitchen import KitchenOrder
     from app.schemas.kitchen_schema import KitchenOrderCreate, KitchenOrderResponse
     from app.schemas.table_schema import TableResponse
+    from app.services.order_service import OrderService
+    from app.services.kitchen_scheduler import kitchen_scheduler
+    from app.services.outbox_service import OutboxService
+    from app.utils.events import ORDER_UPDATED, ORDER_DELETED
 except ImportError:
     # Try importing directly (Docker container)
-    from database import get_db
+    from database import get_async_db
     from models.order import Order, OrderStatus, OrderType
     from models.order_item import OrderItem as OrderItemModel
     from models.table import Table
-    from schemas.order_schema import OrderCreate, OrderUpdate, OrderResponse, OrderItem
+    from schemas.order_schema import OrderCreate, OrderUpdate, OrderResponse, OrderItem, OrderSyncRequest, OrderSyncResponse
+    from config import Config
     from models.user import User
     from schemas.user_schema import UserResponse
     from dependencies import get_current_user
     from models.kitchen import KitchenOrder
     from schemas.kitchen_schema import KitchenOrderCreate, KitchenOrderResponse
     from schemas.table_schema import TableResponse
+    from services.order_service import OrderService
+    from services.kitchen_scheduler import kitchen_scheduler
+    from services.outbox_service import OutboxService
+    from utils.events import ORDER_UPDATED, ORDER_DELETED
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
+config = Config()
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 128
 
 # Helper function to convert Order model to OrderResponse
 def order_model_to_response(order: Order) -> OrderResponse:
@@ -90,144 +104,102 @@ def order_model_to_response(order: Order) -> OrderResponse:
         delivery_address=order.delivery_address,
         assigned_seats=assigned_seats,
         modifiers=modifiers,
-        payment_type=payment_type_value
+        payment_type=payment_type_value,
+        parent_order_id=order.parent_order_id
     )
 
 @router.post("/", response_model=OrderResponse)
-def create_order(
+async def create_order(
     order: OrderCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Create a new order.
+
+    The order, its kitchen ticket and the table occupancy are written in one transaction.
+    Retrying with the same Idempotency-Key header returns the original order.
+    The response carries estimated_ready_at, from the kitchen station queues.
     """
-    # Convert order items to JSON string
-    order_data_json = json.dumps([item.dict() for item in order.order])
-    
-    # Convert modifiers to JSON string if provided
-    modifiers_json = json.dumps(order.modifiers) if order.modifiers else None
-    
-    # Convert assigned_seats to JSON string if provided
-    assigned_seats_json = json.dumps(order.assigned_seats) if order.assigned_seats else None
-    
-    # Convert payment_type to enum if provided
-    payment_type = order.payment_type
-    if payment_type:
-        # Validate payment type
-        valid_payment_types = ["cash", "card", "qr", "e_wallet", "gift_card"]
-        if payment_type not in valid_payment_types:
-            payment_type = "cash"  # Default to cash if invalid
-    
-    # If table_number is provided, look up the corresponding table and set table_id
-    table_id = order.table_id
-    table = None
-    if order.table_number and not table_id:
-        # Look up table by table_number
-        table = db.query(Table).filter(Table.table_number == order.table_number).first()
-        if table:
-            table_id = table.id
-    
-    # Create new order
-    db_order = Order(
-        total=order.total,
-        order_data=order_data_json,
-        table_id=table_id,  # Use the looked up table_id if available
-        customer_count=order.customer_count,
-        special_requests=order.special_requests,
-        created_by=current_user.id,
-        order_type=order.order_type,
-        table_number=order.table_number,
-        customer_name=order.customer_name,
-        customer_phone=order.customer_phone,
-        delivery_address=order.delivery_address,
-        modifiers=modifiers_json,
-        assigned_seats=assigned_seats_json,
-        payment_type=payment_type
-    )
-    
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    
-    # Automatically create a kitchen order for this order
-    try:
-        from app.models.kitchen import KitchenOrder
-        kitchen_order = KitchenOrder(
-            order_id=db_order.id,
-            status="pending"
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters"
         )
-        db.add(kitchen_order)
-        db.commit()
-        db.refresh(kitchen_order)
-    except Exception as e:
-        # If kitchen order creation fails, log the error but don't fail the order creation
-        print(f"Warning: Failed to create kitchen order for order {db_order.id}: {str(e)}")
-        db.rollback()  # Rollback just the kitchen order creation
-    
-    # If this is a dine-in order with a table, automatically assign the table to this order
-    if (order.order_type == OrderType.DINE_IN or 
-        (isinstance(order.order_type, str) and order.order_type.lower() == 'dine_in')) and table:
-        try:
-            # Update table status to occupied
-            table.is_occupied = True
-            table.current_order_id = db_order.id
-            table.status = "occupied"
-            
-            # Mark all seats as occupied
-            if table.seats:
-                for seat in table.seats:
-                    seat["status"] = "occupied"
-                    # Get customer name from order if available
-                    if db_order.customer_name:
-                        seat["customer_name"] = db_order.customer_name
-            
-            db.commit()
-            db.refresh(table)
-        except Exception as e:
-            # If table assignment fails, log the error but don't fail the order creation
-            print(f"Warning: Failed to automatically assign table {table.id} to order {db_order.id}: {str(e)}")
-    
-    return order_model_to_response(db_order)
+    def place(session):
+        db_order = OrderService.place_order(session, order, current_user.id, idempotency_key=idempotency_key)
+        if kitchen_scheduler.is_stale():
+            kitchen_scheduler.load(session)
+        return db_order, kitchen_scheduler.ready_at(db_order.id)
+
+    db_order, ready_at = await db.run_sync(place)
+    response = order_model_to_response(db_order)
+    response.estimated_ready_at = ready_at
+    return response
+
+@router.post("/sync", response_model=OrderSyncResponse)
+async def sync_orders(
+    sync_request: OrderSyncRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload a batch of orders queued offline by a handheld.
+
+    Each order carries a client_id; orders already received are reported as duplicates
+    and the rest are inserted together. Returns the client_id to order_id mapping.
+    """
+    if len(sync_request.orders) > config.ORDER_SYNC_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {config.ORDER_SYNC_MAX_BATCH} orders can be synced per request"
+        )
+    results = await db.run_sync(
+        lambda session: OrderService.sync_orders(session, sync_request.orders, current_user.id)
+    )
+    created = sum(1 for result in results if result["status"] == "created")
+    return OrderSyncResponse(results=results, created=created, duplicates=len(results) - created)
 
 @router.get("/", response_model=List[OrderResponse])
-def get_orders(
+async def get_orders(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Retrieve all orders.
     """
-    orders = db.query(Order).offset(skip).limit(limit).all()
+    result = await db.execute(select(Order).offset(skip).limit(limit))
+    orders = result.scalars().all()
     return [order_model_to_response(order) for order in orders]
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(
+async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Retrieve a specific order by ID.
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order_model_to_response(order)
 
 @router.put("/{order_id}", response_model=OrderResponse)
-def update_order(
+async def update_order(
     order_id: int,
     order_update: OrderUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update an existing order.
     """
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+    db_order = await db.get(Order, order_id)
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -261,24 +233,26 @@ def update_order(
     for key, value in update_data.items():
         setattr(db_order, key, value)
     
-    db.commit()
-    db.refresh(db_order)
+    OutboxService.record(db.sync_session, ORDER_UPDATED, db_order, OutboxService.order_payload(db_order))
+    await db.commit()
+    await db.refresh(db_order)
     
     return order_model_to_response(db_order)
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_order(
+async def delete_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete an order.
     """
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+    db_order = await db.get(Order, order_id)
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    db.delete(db_order)
-    db.commit()
+    OutboxService.record(db.sync_session, ORDER_DELETED, db_order.id)
+    await db.delete(db_order)
+    await db.commit()
     return
\ No newline at end of file
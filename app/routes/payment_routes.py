@@ -1,26 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
 # Handle imports for both local development and Docker container environments
 try:
     # Try importing from app.module (local development)
-    from app.database import get_db
+    from app.config import Config
+    from app.database import get_db, get_read_db, get_async_db
     from app.models.order import Order
     from app.services.payment_service import payment_service
+    from app.services.payment_gateway import PaymentGatewayUnavailable
     from app.dependencies import get_current_user
     from app.models.user import User
 except ImportError:
     # Try importing directly (Docker container)
-    from database import get_db
+    from config import Config
+    from database import get_db, get_read_db, get_async_db
     from models.order import Order
     from services.payment_service import payment_service
+    from services.payment_gateway import PaymentGatewayUnavailable
     from dependencies import get_current_user
     from models.user import User
 
 router = APIRouter(prefix="/api/payments", tags=["Payments"])
+config = Config()
+MAX_IDEMPOTENCY_KEY_LENGTH = 128
+
+
+def _gateway_unavailable(e: PaymentGatewayUnavailable) -> HTTPException:
+    # The charge was not confirmed; retrying with the same Idempotency-Key is safe
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(int(config.PAYMENT_GATEWAY_BREAKER_RESET_SECONDS))}
+    )
+
+
+def _check_idempotency_key(idempotency_key: Optional[str]):
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+
 
 # Pydantic models for request/response validation
 class PaymentProcessRequest(BaseModel):
@@ -28,6 +53,7 @@ class PaymentProcessRequest(BaseModel):
     payment_type: str
     amount: float
     payment_details: Dict[str, Any] = {}
+    terminal_id: Optional[str] = None
 
 class PaymentProcessResponse(BaseModel):
     success: bool
@@ -36,6 +62,7 @@ class PaymentProcessResponse(BaseModel):
     amount: float
     timestamp: datetime
     invoice_id: Optional[int] = None
+    reference: Optional[str] = None
     error: Optional[str] = None
 
 class RefundProcessRequest(BaseModel):
@@ -55,68 +82,100 @@ class RefundProcessResponse(BaseModel):
 class PaymentSummaryRequest(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+    group_by: Optional[Literal["hour", "day"]] = None
+    by_terminal: bool = False
+    by_staff: bool = False
 
 class PaymentTypeBreakdown(BaseModel):
     count: int
     amount: float
 
+class PaymentPeriodBreakdown(PaymentTypeBreakdown):
+    period: datetime
+
+class PaymentTerminalBreakdown(PaymentTypeBreakdown):
+    terminal_id: Optional[str] = None
+
+class PaymentStaffBreakdown(PaymentTypeBreakdown):
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+
 class PaymentSummaryResponse(BaseModel):
     success: bool
     total_revenue: float
     total_transactions: int
     payment_type_breakdown: Dict[str, PaymentTypeBreakdown]
     period: Dict[str, Optional[str]]
+    time_breakdown: Optional[List[PaymentPeriodBreakdown]] = None
+    terminal_breakdown: Optional[List[PaymentTerminalBreakdown]] = None
+    staff_breakdown: Optional[List[PaymentStaffBreakdown]] = None
     error: Optional[str] = None
 
 @router.post("/process", response_model=PaymentProcessResponse)
-def process_payment(
+async def process_payment(
     payment_request: PaymentProcessRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Process a payment for an order
+
+    Card, QR, e-wallet and gift card payments are charged through the payment gateway.
+    Retrying with the same Idempotency-Key header never charges twice, and once the
+    charge is recorded returns the original result; a 503 means the gateway could not
+    confirm the charge and the request can be retried. Keys are scoped to the order. A
+    charge that cannot be recorded because the order was paid meanwhile is voided.
     """
-    # Verify the order exists
-    order = db.query(Order).filter(Order.id == payment_request.order_id).first()
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
-    
+    _check_idempotency_key(idempotency_key)
+
     # Prepare payment data
     payment_data = {
         "payment_type": payment_request.payment_type,
         "amount": payment_request.amount,
-        "details": payment_request.payment_details
+        "details": payment_request.payment_details,
+        "terminal_id": payment_request.terminal_id
     }
     
     # Process the payment
-    result = payment_service.process_payment(db, payment_request.order_id, payment_data)
+    try:
+        result = await payment_service.process_payment(
+            db, payment_request.order_id, payment_data, idempotency_key=idempotency_key
+        )
+    except PaymentGatewayUnavailable as e:
+        raise _gateway_unavailable(e)
     
     if not result["success"]:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_404_NOT_FOUND if result["error"] == "Order not found" else status.HTTP_400_BAD_REQUEST,
             detail=result["error"]
         )
     
     return PaymentProcessResponse(**result)
 
 @router.post("/refund", response_model=RefundProcessResponse)
-def refund_payment(
+async def refund_payment(
     refund_request: RefundProcessRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Process a refund for a paid order
+
+    Retrying with the same Idempotency-Key header never refunds twice, and once the
+    refund is recorded returns the original result.
     """
+    _check_idempotency_key(idempotency_key)
+
     # Process the refund
-    result = payment_service.refund_payment(db, refund_request.order_id, {
-        "reason": refund_request.reason,
-        "details": refund_request.refund_details
-    })
+    try:
+        result = await payment_service.refund_payment(db, refund_request.order_id, {
+            "reason": refund_request.reason,
+            "details": refund_request.refund_details
+        }, idempotency_key=idempotency_key)
+    except PaymentGatewayUnavailable as e:
+        raise _gateway_unavailable(e)
     
     if not result["success"]:
         raise HTTPException(
@@ -138,16 +197,19 @@ def get_payment_methods(
 @router.post("/summary", response_model=PaymentSummaryResponse)
 def get_payment_summary(
     summary_request: PaymentSummaryRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get payment summary statistics
+    Get payment summary statistics, optionally broken down by hour/day, terminal and staff
     """
     result = payment_service.get_payment_summary(
         db, 
         summary_request.start_date, 
-        summary_request.end_date
+        summary_request.end_date,
+        group_by=summary_request.group_by,
+        by_terminal=summary_request.by_terminal,
+        by_staff=summary_request.by_staff
     )
     
     if not result["success"]:
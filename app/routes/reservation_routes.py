@@ -0,0 +1,116 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, TypeVar
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.database import get_async_db
+    from app.schemas.reservation_schema import ReservationCreate, ReservationUpdate, ReservationResponse, TableAvailability, to_naive_utc
+    from app.services.availability_service import availability_index
+    from app.services.reservation_service import ReservationService
+    from app.utils.concurrency import retry_on_conflict
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from database import get_async_db
+    from schemas.reservation_schema import ReservationCreate, ReservationUpdate, ReservationResponse, TableAvailability, to_naive_utc
+    from services.availability_service import availability_index
+    from services.reservation_service import ReservationService
+    from utils.concurrency import retry_on_conflict
+
+router = APIRouter(prefix="/api/reservations", tags=["Reservations"])
+config = Config()
+
+T = TypeVar("T")
+
+async def _run_reservation_operation(db: AsyncSession, operation: Callable[[Session], T]) -> T:
+    """Run a ReservationService write and commit it; a double booking surfaces as ConflictError (409)"""
+    try:
+        return await db.run_sync(lambda session: retry_on_conflict(session, operation, config.OPTIMISTIC_LOCK_RETRIES))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _load_availability_index(db: AsyncSession):
+    """Reload the availability index when it may be missing other workers' bookings"""
+    if availability_index.is_stale():
+        await db.run_sync(availability_index.load)
+
+def _time_window(starts_at: datetime, ends_at: Optional[datetime]) -> tuple:
+    starts_at = to_naive_utc(starts_at)
+    ends_at = to_naive_utc(ends_at) or starts_at + timedelta(minutes=config.RESERVATION_DEFAULT_DURATION_MINUTES)
+    if ends_at <= starts_at:
+        raise HTTPException(status_code=400, detail="ends_at must be after starts_at")
+    return starts_at, ends_at
+
+# Availability routes must be declared before /{reservation_id}
+@router.get("/availability", response_model=List[TableAvailability])
+async def get_availability(
+    starts_at: datetime = Query(..., description="Start of the slot"),
+    ends_at: Optional[datetime] = Query(None, description="End of the slot; defaults to the standard booking length"),
+    party_size: int = Query(1, ge=1),
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Tables seating `party_size` that are free for the whole slot, best fit first (served from memory)"""
+    starts_at, ends_at = _time_window(starts_at, ends_at)
+    await _load_availability_index(db)
+    return availability_index.free_tables(starts_at, ends_at, party_size, limit)
+
+@router.get("/suggest", response_model=TableAvailability)
+async def suggest_table(
+    starts_at: datetime = Query(..., description="Start of the slot"),
+    ends_at: Optional[datetime] = Query(None, description="End of the slot; defaults to the standard booking length"),
+    party_size: int = Query(..., ge=1),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """The smallest free table that seats the party for the whole slot"""
+    starts_at, ends_at = _time_window(starts_at, ends_at)
+    await _load_availability_index(db)
+    suggestion = availability_index.suggest(starts_at, ends_at, party_size)
+    if suggestion is None:
+        raise HTTPException(status_code=404, detail=f"No table for {party_size} is free at that time")
+    return suggestion
+
+@router.get("/", response_model=List[ReservationResponse])
+async def get_reservations(
+    starts_at: Optional[datetime] = Query(None, description="Only reservations ending after this time"),
+    ends_at: Optional[datetime] = Query(None, description="Only reservations starting before this time"),
+    table_id: Optional[int] = None,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List reservations overlapping a time window"""
+    return await db.run_sync(lambda session: ReservationService.list(
+        session, to_naive_utc(starts_at), to_naive_utc(ends_at), table_id, status
+    ))
+
+@router.post("/", response_model=ReservationResponse)
+async def create_reservation(reservation: ReservationCreate, db: AsyncSession = Depends(get_async_db)):
+    """Book a table; without table_id the best-fitting free table is chosen"""
+    if reservation.table_id is None:
+        await _load_availability_index(db)
+    return await _run_reservation_operation(db, lambda session: ReservationService.create(session, reservation))
+
+@router.get("/{reservation_id}", response_model=ReservationResponse)
+async def get_reservation(reservation_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get a reservation by ID"""
+    try:
+        return await db.run_sync(lambda session: ReservationService.get(session, reservation_id))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.put("/{reservation_id}", response_model=ReservationResponse)
+async def update_reservation(reservation_id: int, changes: ReservationUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update a reservation; moving it is checked against the table's other bookings"""
+    return await _run_reservation_operation(db, lambda session: ReservationService.update(session, reservation_id, changes))
+
+@router.delete("/{reservation_id}", response_model=ReservationResponse)
+async def cancel_reservation(reservation_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Cancel a reservation (the row is kept with status "cancelled")"""
+    return await _run_reservation_operation(db, lambda session: ReservationService.cancel(session, reservation_id))
@@ -7,24 +7,54 @@ import json
 try:
     # Try importing from app.module (local development)
     from app.database import get_db
-    from app.models.settings import Setting, SettingCreate, SettingUpdate, SettingResponse
+    from app.models.settings import Setting, SettingCreate, SettingUpdate, SettingResponse, SETTINGS_VERSION_KEY
+    from app.services.settings_registry import settings_registry
+    from app.services.settings_service import SettingsService
 except ImportError:
     # Try importing directly (Docker container)
     from database import get_db
-    from models.settings import Setting, SettingCreate, SettingUpdate, SettingResponse
+    from models.settings import Setting, SettingCreate, SettingUpdate, SettingResponse, SETTINGS_VERSION_KEY
+    from services.settings_registry import settings_registry
+    from services.settings_service import SettingsService
 
 router = APIRouter(prefix="/api/settings", tags=["Settings"])
 
 @router.get("/", response_model=List[SettingResponse])
 def get_settings(db: Session = Depends(get_db)):
-    """Retrieve all settings"""
-    settings = db.query(Setting).all()
-    return settings
+    """Retrieve all settings (from this worker's settings cache)"""
+    return settings_registry.rows(db)
+
+# Tax rate and time zone endpoints (declared before /{key} so they are not shadowed by it)
+@router.get("/tax-rate", response_model=float)
+def get_tax_rate(db: Session = Depends(get_db)):
+    """Get the current tax rate"""
+    return SettingsService.get_tax_rate(db)
+
+@router.post("/tax-rate")
+def update_tax_rate(tax_rate: float, db: Session = Depends(get_db)):
+    """Update the tax rate"""
+    try:
+        return SettingsService.update_tax_rate(db, tax_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/timezone", response_model=str)
+def get_timezone(db: Session = Depends(get_db)):
+    """Get the restaurant time zone"""
+    return str(SettingsService.get_timezone(db))
+
+@router.post("/timezone")
+def update_timezone(timezone: str, db: Session = Depends(get_db)):
+    """Update the restaurant time zone (an IANA name such as Asia/Yangon)"""
+    try:
+        return SettingsService.update_timezone(db, timezone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{key}", response_model=SettingResponse)
 def get_setting(key: str, db: Session = Depends(get_db)):
     """Retrieve a specific setting by key"""
-    setting = db.query(Setting).filter(Setting.key == key).first()
+    setting = settings_registry.row(db, key)
     if not setting:
         raise HTTPException(status_code=404, detail="Setting not found")
     return setting
@@ -34,7 +64,7 @@ def create_setting(setting: SettingCreate, db: Session = Depends(get_db)):
     """Create a new setting"""
     # Check if setting already exists
     existing_setting = db.query(Setting).filter(Setting.key == setting.key).first()
-    if existing_setting:
+    if existing_setting or setting.key == SETTINGS_VERSION_KEY:
         raise HTTPException(status_code=400, detail="Setting already exists")
     
     # Create setting record
@@ -54,7 +84,7 @@ def create_setting(setting: SettingCreate, db: Session = Depends(get_db)):
 def update_setting(key: str, setting_update: SettingUpdate, db: Session = Depends(get_db)):
     """Update an existing setting"""
     db_setting = db.query(Setting).filter(Setting.key == key).first()
-    if not db_setting:
+    if not db_setting or key == SETTINGS_VERSION_KEY:
         raise HTTPException(status_code=404, detail="Setting not found")
     
     # Update setting value
@@ -69,50 +99,9 @@ def update_setting(key: str, setting_update: SettingUpdate, db: Session = Depend
 def delete_setting(key: str, db: Session = Depends(get_db)):
     """Delete a setting"""
     db_setting = db.query(Setting).filter(Setting.key == key).first()
-    if not db_setting:
+    if not db_setting or key == SETTINGS_VERSION_KEY:
         raise HTTPException(status_code=404, detail="Setting not found")
     
     db.delete(db_setting)
     db.commit()
     return {"message": "Setting deleted successfully"}
-
-# Tax rate specific endpoints
-@router.get("/tax-rate", response_model=float)
-def get_tax_rate(db: Session = Depends(get_db)):
-    """Get the current tax rate"""
-    setting = db.query(Setting).filter(Setting.key == "tax_rate").first()
-    if not setting:
-        # Return default tax rate of 8% if not set
-        return 0.08
-    try:
-        return float(setting.value)
-    except ValueError:
-        # Return default if value is not a valid float
-        return 0.08
-
-@router.post("/tax-rate")
-def update_tax_rate(tax_rate: float, db: Session = Depends(get_db)):
-    """Update the tax rate"""
-    # Validate tax rate
-    if tax_rate < 0 or tax_rate > 100:
-        raise HTTPException(status_code=400, detail="Tax rate must be between 0 and 100")
-    
-    # Check if setting already exists
-    db_setting = db.query(Setting).filter(Setting.key == "tax_rate").first()
-    if not db_setting:
-        # Create new setting
-        db_setting = Setting(
-            key="tax_rate",
-            value=str(tax_rate),
-            description="Tax rate percentage"
-        )
-        db.add(db_setting)
-    else:
-        # Update existing setting
-        db_setting.value = str(tax_rate)
-    
-    db.commit()
-    if db_setting.id:
-        db.refresh(db_setting)
-    
-    return {"message": f"Tax rate updated to {tax_rate}%", "tax_rate": tax_rate}
\ No newline at end of file
@@ -1,18 +1,24 @@
 # Import all schema classes for easier imports
 from .user_schema import UserCreate, UserResponse, UserLogin, Token
 from .menu_schema import MenuItemBase, MenuItemCreate, MenuItemResponse
-from .order_schema import OrderItem, OrderBase, OrderCreate, OrderUpdate, OrderResponse
-from .table_schema import TableBase, TableCreate, TableUpdate, TableResponse
+from .order_schema import OrderItem, OrderBase, OrderCreate, OrderUpdate, OrderResponse, OrderSyncItem, OrderSyncRequest, OrderSyncResult, OrderSyncResponse
+from .table_schema import TableBase, TableCreate, TableUpdate, TableResponse, SeatResponse, FreeSeatBlock, FloorPlanSnapshot, FloorPlanDelta
 from .invoice_schema import InvoiceItem, InvoiceBase, InvoiceCreate, InvoiceUpdate, InvoiceResponse
-from .kitchen_schema import KitchenOrderBase, KitchenOrderCreate, KitchenOrderUpdate, KitchenOrderResponse, KitchenOrderDetail
-from .bar_schema import BarOrderBase, BarOrderCreate, BarOrderUpdate, BarOrderResponse, BarOrderDetail
+from .kitchen_schema import KitchenOrderBase, KitchenOrderCreate, KitchenOrderUpdate, KitchenOrderResponse, KitchenOrderDetail, KitchenOrderDelta, KitchenQueueTicket, KitchenStationQueue, KitchenQueueResponse
+from .bar_schema import BarOrderBase, BarOrderCreate, BarOrderUpdate, BarOrderResponse, BarOrderDetail, BarOrderDelta
+from .event_schema import OrderEventResponse, EventFeedResponse
+from .reservation_schema import ReservationBase, ReservationCreate, ReservationUpdate, ReservationResponse, TableAvailability
 
 __all__ = [
     "UserCreate", "UserResponse", "UserLogin", "Token",
     "MenuItemBase", "MenuItemCreate", "MenuItemResponse",
     "OrderItem", "OrderBase", "OrderCreate", "OrderUpdate", "OrderResponse",
-    "TableBase", "TableCreate", "TableUpdate", "TableResponse",
+    "OrderSyncItem", "OrderSyncRequest", "OrderSyncResult", "OrderSyncResponse",
+    "TableBase", "TableCreate", "TableUpdate", "TableResponse", "SeatResponse", "FreeSeatBlock", "FloorPlanSnapshot", "FloorPlanDelta",
     "InvoiceItem", "InvoiceBase", "InvoiceCreate", "InvoiceUpdate", "InvoiceResponse",
-    "KitchenOrderBase", "KitchenOrderCreate", "KitchenOrderUpdate", "KitchenOrderResponse", "KitchenOrderDetail",
-    "BarOrderBase", "BarOrderCreate", "BarOrderUpdate", "BarOrderResponse", "BarOrderDetail"
+    "KitchenOrderBase", "KitchenOrderCreate", "KitchenOrderUpdate", "KitchenOrderResponse", "KitchenOrderDetail", "KitchenOrderDelta",
+    "KitchenQueueTicket", "KitchenStationQueue", "KitchenQueueResponse",
+    "BarOrderBase", "BarOrderCreate", "BarOrderUpdate", "BarOrderResponse", "BarOrderDetail", "BarOrderDelta",
+    "OrderEventResponse", "EventFeedResponse",
+    "ReservationBase", "ReservationCreate", "ReservationUpdate", "ReservationResponse", "TableAvailability"
 ]
\ No newline at end of file
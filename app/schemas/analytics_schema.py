@@ -46,6 +46,9 @@ class EmployeePerformanceResponse(BaseModel):
     average_order_value: float
     total_tips: float
     upsell_count: int
+    # Order ticket time (ticket created to served) percentiles in seconds, from the kitchen and bar logs
+    ticket_time_p50: Optional[float] = None
+    ticket_time_p95: Optional[float] = None
     
     class Config:
         from_attributes = True
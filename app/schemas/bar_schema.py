@@ -35,4 +35,11 @@ class BarOrderDetail(BaseModel):
     customer_name: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BarOrderDelta(BaseModel):
+    version: int  # Pass as `since` on the next poll
+    # True when `orders` is every open ticket rather than only the changed ones
+    full: bool
+    orders: List[BarOrderDetail]
+    removed: List[int] = []  # order_id of tickets removed, served, or left without drinks
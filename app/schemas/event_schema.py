@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List
+from datetime import datetime
+
+class OrderEventResponse(BaseModel):
+    seq: int
+    event_type: str
+    order_id: int
+    payload: Dict[str, Any] = {}
+    created_at: datetime
+
+class EventFeedResponse(BaseModel):
+    events: List[OrderEventResponse]
+    # Pass as ?after= on the next request
+    last_seq: int
@@ -35,4 +35,31 @@ class KitchenOrderDetail(BaseModel):
     customer_name: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class KitchenOrderDelta(BaseModel):
+    version: int  # Pass as `since` on the next poll
+    # True when `orders` is every open ticket rather than only the changed ones
+    full: bool
+    orders: List[KitchenOrderDetail]
+    removed: List[int] = []  # order_id of tickets removed or served
+
+class KitchenQueueTicket(BaseModel):
+    kitchen_order_id: int
+    order_id: int
+    status: str
+    created_at: datetime
+    items: List[str]  # The ticket's items cooked at this station
+    work_seconds: float  # Their learned prep times, summed
+    station_ready_at: datetime  # When this station is expected to finish them
+    estimated_ready_at: datetime  # When the whole ticket is expected ready (its last station)
+
+class KitchenStationQueue(BaseModel):
+    station: str
+    capacity: int  # Items cooked at once
+    backlog_seconds: float  # Work queued, less work already done
+    tickets: List[KitchenQueueTicket]  # In cooking order
+
+class KitchenQueueResponse(BaseModel):
+    generated_at: datetime
+    stations: List[KitchenStationQueue]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 from datetime import datetime
 from .menu_schema import MenuItemBase
@@ -23,6 +23,23 @@ class OrderCreate(OrderBase):
     delivery_address: Optional[str] = None
     modifiers: Optional[dict] = None
 
+class OrderSyncItem(OrderCreate):
+    # Client-generated id, used as the idempotency key for this order
+    client_id: str = Field(..., min_length=1, max_length=128)
+
+class OrderSyncRequest(BaseModel):
+    orders: List[OrderSyncItem]
+
+class OrderSyncResult(BaseModel):
+    client_id: str
+    order_id: int
+    status: str  # created, duplicate
+
+class OrderSyncResponse(BaseModel):
+    results: List[OrderSyncResult]
+    created: int
+    duplicates: int
+
 class OrderUpdate(BaseModel):
     table_id: Optional[int] = None
     customer_count: Optional[int] = None
@@ -48,6 +65,10 @@ class OrderResponse(OrderBase):
     delivery_address: Optional[str] = None
     assigned_seats: Optional[List[int]] = None
     modifiers: Optional[dict] = None
+    # The order this one was split from (bill splitting)
+    parent_order_id: Optional[int] = None
+    # When the kitchen is expected to have the order ready (UTC); only set when the order is placed
+    estimated_ready_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
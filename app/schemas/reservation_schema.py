@@ -0,0 +1,60 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional
+from datetime import datetime, timezone
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Reservation times are stored as naive UTC, like every other timestamp in the schema
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class ReservationBase(BaseModel):
+    customer_name: str = Field(..., min_length=1)
+    customer_phone: Optional[str] = None
+    party_size: int = Field(..., ge=1)
+    starts_at: datetime
+    # Defaults to starts_at + RESERVATION_DEFAULT_DURATION_MINUTES
+    ends_at: Optional[datetime] = None
+    notes: Optional[str] = None
+
+    @field_validator("starts_at", "ends_at")
+    @classmethod
+    def normalize_times(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return to_naive_utc(value)
+
+class ReservationCreate(ReservationBase):
+    # Left empty, the best-fitting free table is chosen
+    table_id: Optional[int] = None
+
+class ReservationUpdate(BaseModel):
+    table_id: Optional[int] = None
+    customer_name: Optional[str] = None
+    customer_phone: Optional[str] = None
+    party_size: Optional[int] = Field(default=None, ge=1)
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    status: Optional[str] = None  # booked, seated, cancelled, completed, no_show
+    notes: Optional[str] = None
+
+    @field_validator("starts_at", "ends_at")
+    @classmethod
+    def normalize_times(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return to_naive_utc(value)
+
+class ReservationResponse(ReservationBase):
+    id: int
+    table_id: int
+    ends_at: datetime
+    status: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class TableAvailability(BaseModel):
+    table_id: int
+    table_number: int
+    capacity: int
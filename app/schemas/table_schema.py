@@ -2,6 +2,22 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
+class SeatResponse(BaseModel):
+    seat_number: int
+    status: str
+    customer_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class FreeSeatBlock(BaseModel):
+    table_id: int
+    table_number: int
+    # The first `count` seats of a run of adjacent free seats
+    seat_numbers: List[int]
+    # Length of the whole run, so hosts can prefer the tightest fit
+    free_seats: int
+
 class TableBase(BaseModel):
     table_number: int
     capacity: int
@@ -22,11 +38,23 @@ class TableResponse(TableBase):
     is_occupied: bool
     current_order_id: Optional[int] = None
     status: str
-    seats: List[dict] = []
+    seats: List[SeatResponse] = []
+    # Optimistic concurrency version; pass it back as ?version= to make a write conditional
+    version: int = 1
 
     class Config:
         from_attributes = True
 
+class FloorPlanSnapshot(BaseModel):
+    epoch: str
+    version: int
+    tables: List[TableResponse]
+
+class FloorPlanDelta(FloorPlanSnapshot):
+    # True when `tables` is the whole floor plan rather than only the changed tables
+    full: bool
+    removed: List[int] = []
+
 class TableWithOrderDetails(TableResponse):
     order_details: Optional[dict] = None
 
@@ -0,0 +1,237 @@
+from sqlalchemy import distinct, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+import functools
+import inspect
+import logging
+import threading
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.models.order_event import OrderEvent
+    from app.services.archive_service import ArchiveService
+    from app.services.outbox_service import OutboxService
+    from app.services.settings_service import SettingsService
+    from app.utils.metrics import metrics_registry
+    from app.utils.time_buckets import local_now
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from models.order_event import OrderEvent
+    from services.archive_service import ArchiveService
+    from services.outbox_service import OutboxService
+    from services.settings_service import SettingsService
+    from utils.metrics import metrics_registry
+    from utils.time_buckets import local_now
+
+logger = logging.getLogger(__name__)
+
+# More changed orders than this between two watermarks count as a change to every day
+MAX_CHANGED_ORDERS = 500
+
+
+class _Entry(NamedTuple):
+    value: Any
+    watermark: int  # Checked against every write up to this watermark
+    days: Tuple[date, date]  # First and last day a change can affect the result in
+
+
+def write_watermark(db: Session) -> int:
+    """
+    The orders write-watermark: the last outbox seq
+
+    Every order and payment change adds an outbox event in its transaction, so reads
+    at the same watermark see the same orders.
+    """
+    return OutboxService.last_seq(db)
+
+
+def changed_days(db: Session, since: int, watermark: int, event_days: bool = False) -> Optional[Set[date]]:
+    """
+    The days changed by outbox events with since < seq <= watermark; None for every day
+
+    A change belongs to the day its order was created on (UTC), which is where the
+    order-based reports count it. With `event_days`, the days the events were written
+    count as well: payments and refunds post tax ledger rows at that time. Deleted
+    orders, whose day is not known, and more than MAX_CHANGED_ORDERS orders give None.
+    """
+    order_ids = db.execute(
+        select(distinct(OrderEvent.order_id))
+        .where(OrderEvent.seq > since, OrderEvent.seq <= watermark)
+        .limit(MAX_CHANGED_ORDERS + 1)
+    ).scalars().all()
+    if len(order_ids) > MAX_CHANGED_ORDERS:
+        return None
+    orders = ArchiveService.order_history()
+    created = db.execute(select(orders.id, orders.created_at).where(orders.id.in_(order_ids))).all() if order_ids else []
+    if len(created) < len(order_ids):
+        return None
+    days = {created_at.date() for _, created_at in created if created_at is not None}
+    if event_days and order_ids:
+        first, last = db.execute(
+            select(func.min(OrderEvent.created_at), func.max(OrderEvent.created_at))
+            .where(OrderEvent.seq > since, OrderEvent.seq <= watermark)
+        ).one()
+        days.update(first.date() + timedelta(days=n) for n in range((last.date() - first.date()).days + 1))
+    return days
+
+
+def _report_days(params: Dict[str, Any]) -> Tuple[date, date]:
+    """The days a report over params' start_date..end_date reads, a day wider for time zones"""
+    def day(value, default: date, pad: int) -> date:
+        if value is None:
+            return default
+        value = value.date() if isinstance(value, datetime) else value
+        try:
+            return value + timedelta(days=pad)
+        except OverflowError:
+            return default
+
+    return day(params.get("start_date"), date.min, -1), day(params.get("end_date"), date.max, 1)
+
+
+class AnalyticsCache:
+    """
+    LRU cache of analytics report results, keyed by (report, parameters)
+
+    A result is kept with the write watermark read before it was computed. Once the
+    watermark has moved, the writes since are checked against the days the report's
+    window reads (changed_days): a result whose days were not written is carried
+    forward, so closed windows survive writes to other days, while an edit, refund or
+    deletion in a past window recomputes it. Windows defaulting to "now" are keyed by
+    today's date as well, and every result by the restaurant time zone, which the
+    reports bucket in.
+
+    Results are shared between requests and must not be mutated. Entries are kept per
+    database engine, at most `max_entries` each; hits and misses per report are
+    exported as cache_requests_total{cache="analytics"}.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "WeakKeyDictionary[Any, OrderedDict[tuple, _Entry]]" = WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _engine(db: Session):
+        bind = db.get_bind()
+        return getattr(bind, "engine", bind)
+
+    def _count(self, report: str, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics_registry.record_cache("analytics", report, hit)
+
+    def _uncached(self, db: Session, report: str, compute: Callable[[], Any], error: Exception) -> Any:
+        # Also keeps the empty results reports return on database errors out of the cache
+        logger.warning(f"Could not read the time zone or write watermark; not caching {report}: {str(error)}")
+        db.rollback()
+        self._count(report, False)
+        return compute()
+
+    def get_or_compute(self, db: Session, report: str, params: Dict[str, Any], compute: Callable[[], Any]) -> Any:
+        if db is None or self.max_entries <= 0:
+            return compute()
+        try:
+            tz = SettingsService.get_timezone(db)
+        except Exception as e:
+            # Database errors, and sessions that are not one (test doubles)
+            return self._uncached(db, report, compute, e)
+        today = local_now(tz).date()
+        end_date = params.get("end_date")
+        key = (report, tuple(sorted(params.items())), str(tz), today if end_date is None else None)
+        engine = self._engine(db)
+
+        try:
+            watermark = write_watermark(db)
+        except SQLAlchemyError as e:
+            return self._uncached(db, report, compute, e)
+        with self._lock:
+            entries = self._entries.setdefault(engine, OrderedDict())
+            entry = entries.get(key)
+        if entry is not None and entry.watermark != watermark:
+            entry = self._carry_forward(db, entry, watermark)
+        if entry is not None:
+            with self._lock:
+                if key in entries:
+                    entries[key] = entry
+                    entries.move_to_end(key)
+            self._count(report, True)
+            return entry.value
+
+        self._count(report, False)
+        value = compute()
+        with self._lock:
+            entries[key] = _Entry(value, watermark, _report_days(params))
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        return value
+
+    @staticmethod
+    def _carry_forward(db: Session, entry: _Entry, watermark: int) -> Optional[_Entry]:
+        """The entry checked up to `watermark`, or None when a write since may have changed it"""
+        if entry.watermark > watermark:
+            # Read from a replica that is behind the write that entry saw
+            return None
+        try:
+            changed = changed_days(db, entry.watermark, watermark, event_days=True)
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not read the changed days; recomputing: {str(e)}")
+            db.rollback()
+            return None
+        first, last = entry.days
+        if changed is None or any(first <= day <= last for day in changed):
+            return None
+        return entry._replace(watermark=watermark)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": sum(len(entries) for entries in self._entries.values()),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0
+            }
+
+
+_config = Config()
+
+# Create a singleton instance
+analytics_cache = AnalyticsCache(max_entries=_config.ANALYTICS_RESULT_CACHE_SIZE)
+
+
+def cached_report(report: str):
+    """
+    Serve a report function's results from analytics_cache
+
+    The function takes the session as `db`; its other arguments, as passed, form the
+    cache key (with today's date when `end_date` is not given).
+    """
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            params = dict(signature.bind_partial(*args, **kwargs).arguments)
+            db = params.pop("db", None)
+            return analytics_cache.get_or_compute(db, report, params, lambda: function(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,293 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Hashable, List
+from weakref import WeakKeyDictionary
+import json
+import logging
+import threading
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.services.analytics_cache import changed_days, write_watermark
+    from app.services.archive_service import ArchiveService
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from services.analytics_cache import changed_days, write_watermark
+    from services.archive_service import ArchiveService
+
+logger = logging.getLogger(__name__)
+
+
+def _load_numpy():
+    """NumPy is optional; without it the top-items report falls back to a per-order loop"""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        logger.warning("numpy not installed. Vectorized analytics disabled.")
+        return None
+
+
+np = _load_numpy()
+
+
+class _Dictionary:
+    """Interns repeated strings (item names, categories, enum values) as small integer codes"""
+
+    def __init__(self):
+        self._codes: Dict[Hashable, int] = {}
+        self.values: List[Hashable] = []
+
+    def code(self, value: Hashable) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class OrderColumns:
+    """
+    Columnar snapshot of orders and their flattened order_data lines
+
+    Order columns are parallel arrays, in id order: order_id, created_at (datetime64[us]),
+    total (float64, NaN when missing), payment_type / order_type (label codes), created_by (-1 when missing)
+    and item_count (length of the order_data list). Line columns: line_order (index of
+    the line's order), line_name / line_category (codes) and line_price.
+    """
+    ORDER_FIELDS = ("order_id", "created_at", "total", "payment_type", "order_type", "created_by", "item_count")
+    LINE_FIELDS = ("line_order", "line_name", "line_category", "line_price")
+    __slots__ = ORDER_FIELDS + LINE_FIELDS
+
+    def __init__(self, **columns):
+        for field in self.__slots__:
+            setattr(self, field, columns[field])
+
+    def __len__(self) -> int:
+        return len(self.created_at)
+
+    @classmethod
+    def concat(cls, parts: List["OrderColumns"]) -> "OrderColumns":
+        if len(parts) == 1:
+            return parts[0]
+        offsets = np.cumsum([0] + [len(part) for part in parts[:-1]])
+        columns = {field: np.concatenate([getattr(part, field) for part in parts]) for field in cls.__slots__ if field != "line_order"}
+        columns["line_order"] = np.concatenate([part.line_order + offset for part, offset in zip(parts, offsets)])
+        return cls(**columns)
+
+    def take(self, index) -> "OrderColumns":
+        """The orders at positions `index`, in that order, with their lines (copies)"""
+        position = np.full(len(self), -1, dtype=np.int64)
+        position[index] = np.arange(len(index))
+        line_position = position[self.line_order]
+        kept = np.nonzero(line_position >= 0)[0]
+        lines = kept[np.argsort(line_position[kept], kind="stable")]
+        columns = {field: getattr(self, field)[index] for field in self.ORDER_FIELDS}
+        columns.update({field: getattr(self, field)[lines] for field in self.LINE_FIELDS})
+        columns["line_order"] = line_position[lines]
+        return OrderColumns(**columns)
+
+    def between(self, start: datetime, end: datetime) -> "OrderColumns":
+        """Orders with start <= created_at <= end"""
+        keep = (self.created_at >= np.datetime64(start, "us")) & (self.created_at <= np.datetime64(end, "us"))
+        return self if keep.all() else self.take(np.nonzero(keep)[0])
+
+    def in_id_order(self) -> "OrderColumns":
+        """
+        Orders sorted by id, the order the per-order loops saw them in: it decides ties
+        and the category reported for an item, and float sums depend on it
+        """
+        if len(self) < 2 or (np.diff(self.order_id) > 0).all():
+            return self
+        return self.take(np.argsort(self.order_id, kind="stable"))
+
+
+class AnalyticsEngine:
+    """
+    The top-items report computed with vectorized group-bys over cached columnar snapshots
+
+    Orders, hot and archived, are loaded one day at a time (the columns the reports
+    need, with order_data parsed and flattened once) and kept per database in an LRU
+    of `cache_days` days. When the write watermark has moved, the outbox events since
+    the last check name the orders that changed, and the days they were created on are
+    dropped (every day, when one was deleted or too many changed); so new orders
+    reload today only, while an edit, refund or deletion reloads the day it belongs to.
+    Group-bys use bincount, which adds in row order like the per-order loop it
+    replaces, so totals match to the cent.
+
+    Days are UTC days; callers pass UTC ranges. The output is that of
+    /api/analytics/reports/top-items, which calls this when numpy is installed (the
+    other sales reports group in SQL).
+    """
+
+    def __init__(self, cache_days: int):
+        self.cache_days = cache_days
+        self._lock = threading.Lock()
+        self._days: "WeakKeyDictionary[Any, OrderedDict[date, OrderColumns]]" = WeakKeyDictionary()
+        # The write watermark the cached days of each database were checked against
+        self._checked: "WeakKeyDictionary[Any, int]" = WeakKeyDictionary()
+        self._names = _Dictionary()
+        self._categories = _Dictionary()
+        self._labels = _Dictionary()
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    @staticmethod
+    def _engine(db: Session):
+        bind = db.get_bind()
+        return getattr(bind, "engine", bind)
+
+    def _build(self, rows) -> OrderColumns:
+        order_id, created_at, total, payment_type, order_type, created_by, item_count = [], [], [], [], [], [], []
+        line_order, line_name, line_category, line_price = [], [], [], []
+        label = self._labels.code
+        for index, row in enumerate(rows):
+            order_id.append(row.id)
+            created_at.append(row.created_at)
+            total.append(row.total if row.total is not None else float("nan"))
+            payment_type.append(label(getattr(row.payment_type, "value", row.payment_type)))
+            order_type.append(label(getattr(row.order_type, "value", row.order_type)))
+            created_by.append(row.created_by if row.created_by is not None else -1)
+
+            items = row.order_data
+            try:
+                if isinstance(items, str):
+                    items = json.loads(items)
+            except ValueError:
+                items = None
+            if not isinstance(items, list):
+                item_count.append(0)
+                continue
+            item_count.append(len(items))
+            # As in the per-order loops, a malformed line drops the rest of its order
+            try:
+                for item in items:
+                    name = self._names.code(item.get("name", "Unknown Item"))
+                    category = self._categories.code(item.get("category", "Unknown"))
+                    price = float(item.get("price", 0))
+                    line_order.append(index)
+                    line_name.append(name)
+                    line_category.append(category)
+                    line_price.append(price)
+            except (AttributeError, TypeError, ValueError):
+                continue
+
+        return OrderColumns(
+            order_id=np.array(order_id, dtype=np.int64),
+            created_at=np.array(created_at, dtype="datetime64[us]"),
+            total=np.array(total, dtype=np.float64),
+            payment_type=np.array(payment_type, dtype=np.int32),
+            order_type=np.array(order_type, dtype=np.int32),
+            created_by=np.array(created_by, dtype=np.int64),
+            item_count=np.array(item_count, dtype=np.int64),
+            line_order=np.array(line_order, dtype=np.int64),
+            line_name=np.array(line_name, dtype=np.int64),
+            line_category=np.array(line_category, dtype=np.int64),
+            line_price=np.array(line_price, dtype=np.float64)
+        )
+
+    def _load_days(self, db: Session, first: date, last: date) -> Dict[date, OrderColumns]:
+        """One query for the days [first, last], hot and archived orders, split into a snapshot per day"""
+        orders = ArchiveService.order_history()
+        rows = db.execute(
+            select(orders.id, orders.created_at, orders.total, orders.payment_type, orders.order_type, orders.created_by, orders.order_data)
+            .where(orders.created_at >= datetime.combine(first, datetime.min.time()),
+                   orders.created_at < datetime.combine(last + timedelta(days=1), datetime.min.time()))
+            .order_by(orders.id)
+        ).all()
+        with self._lock:
+            columns = self._build(rows)
+        day_of = (columns.created_at.astype("datetime64[D]") - np.datetime64(first, "D")).astype(np.int64)
+        by_day = np.argsort(day_of, kind="stable")
+        bounds = np.searchsorted(day_of[by_day], np.arange((last - first).days + 2))
+        return {
+            first + timedelta(days=n): columns.take(by_day[bounds[n]:bounds[n + 1]])
+            for n in range((last - first).days + 1)
+        }
+
+    def columns(self, db: Session, start: datetime, end: datetime) -> OrderColumns:
+        """Orders with start <= created_at <= end, from the per-day cache"""
+        engine = self._engine(db)
+        # Read before loading, so orders committed during the load move it past this value
+        watermark = write_watermark(db)
+        with self._lock:
+            cache = self._days.setdefault(engine, OrderedDict())
+            checked = self._checked.get(engine)
+        if checked is None or checked < watermark:
+            changed = changed_days(db, checked, watermark) if checked is not None else None
+            with self._lock:
+                if changed is None:
+                    cache.clear()
+                else:
+                    for day in changed:
+                        cache.pop(day, None)
+                self._checked[engine] = max(watermark, self._checked.get(engine, watermark))
+
+        wanted = [start.date() + timedelta(days=n) for n in range((end.date() - start.date()).days + 1)]
+        with self._lock:
+            parts = {day: cache[day] for day in wanted if day in cache}
+        missing = [day for day in wanted if day not in parts]
+        if missing:
+            loaded = self._load_days(db, missing[0], missing[-1])
+            for day in missing:
+                parts[day] = loaded[day]
+        with self._lock:
+            # Another request may have checked a later watermark meanwhile, and dropped
+            # days this load may predate
+            keep = self._checked.get(engine) == watermark
+            for day in wanted:
+                if day in missing and keep:
+                    cache[day] = parts[day]
+                if day in cache:
+                    cache.move_to_end(day)
+            while len(cache) > self.cache_days:
+                cache.popitem(last=False)
+        return OrderColumns.concat([parts[day] for day in wanted]).between(start, end).in_id_order()
+
+    def invalidate(self):
+        """Drop every cached day"""
+        with self._lock:
+            self._days.clear()
+            self._checked.clear()
+
+    def top_items(self, db: Session, start_date: datetime, end_date: datetime, limit: int) -> Dict[str, Any]:
+        columns = self.columns(db, start_date, end_date)
+        # Item names are codes, so they index the per-item arrays directly
+        names, lines = columns.line_name, np.arange(len(columns.line_name))
+        quantity = np.bincount(names, minlength=len(self._names.values))
+        revenue = np.bincount(names, weights=columns.line_price, minlength=len(quantity))
+        first_seen = np.full(len(quantity), len(lines))
+        np.minimum.at(first_seen, names, lines)
+        # An item reports the category of its last line
+        last_seen = np.zeros(len(quantity), dtype=np.int64)
+        np.maximum.at(last_seen, names, lines)
+        sold = np.nonzero(quantity)[0]
+        # Most sold first; ties in order of first sale, as the stable sort of the loop did
+        ranked = sold[np.lexsort((first_seen[sold], -quantity[sold]))][:limit]
+        # Only items sold in the window have a line to read; names seen on other days do not
+        category = columns.line_category[last_seen[ranked]]
+        return {
+            "items": [
+                {
+                    "name": self._names.values[n],
+                    "category": self._categories.values[c],
+                    "quantity": int(quantity[n]),
+                    "revenue": round(float(revenue[n]), 2),
+                    "average_price": round(float(revenue[n]) / int(quantity[n]), 2)
+                }
+                for n, c in zip(ranked, category)
+            ]
+        }
+
+
+_config = Config()
+
+# Create a singleton instance
+analytics_engine = AnalyticsEngine(cache_days=_config.ANALYTICS_CACHE_DAYS)
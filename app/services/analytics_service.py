@@ -11,6 +11,9 @@ try:
     from app.models.order_item import OrderItem
     from app.models.user import User, UserRole
     from app.models.menu import MenuItem
+    from app.services.archive_service import ArchiveService
+    from app.services.analytics_cache import cached_report
+    from app.services.kitchen_timing_service import KitchenTimingService
     from app.schemas.analytics_schema import (
         SalesByEmployeeResponse,
         TipsByEmployeeResponse,
@@ -27,6 +30,9 @@ except ImportError:
     from models.order_item import OrderItem
     from models.user import User, UserRole
     from models.menu import MenuItem
+    from services.archive_service import ArchiveService
+    from services.analytics_cache import cached_report
+    from services.kitchen_timing_service import KitchenTimingService
     from schemas.analytics_schema import (
         SalesByEmployeeResponse,
         TipsByEmployeeResponse,
@@ -40,31 +46,40 @@ except ImportError:
 
 
 class AnalyticsService:
+    """
+    Reporting queries; callers should pass a session from get_read_db so scans hit the replica
+
+    Orders are read through ArchiveService.order_history(), so reports include archived orders.
+    Results are cached by analytics_cache.
+    """
+
     @staticmethod
+    @cached_report("employee-sales")
     def get_sales_by_employee(db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[SalesByEmployeeResponse]:
         """
         Get sales data by employee including total sales, order count, and average order value
         """
         try:
+            orders = ArchiveService.order_history()  # Hot and archived orders
             # Build query with date filters if provided
             query = db.query(
                 User.id,
                 User.username,
                 User.full_name,
                 User.role,
-                func.count(Order.id).label('order_count'),
-                func.sum(Order.total).label('total_sales'),
-                func.avg(Order.total).label('average_order_value')
-            ).join(Order, Order.created_by == User.id, isouter=True)\
+                func.count(orders.id).label('order_count'),
+                func.sum(orders.total).label('total_sales'),
+                func.avg(orders.total).label('average_order_value')
+            ).join(orders, orders.created_by == User.id, isouter=True)\
              .filter(User.role.in_([UserRole.WAITER, UserRole.CASHIER, UserRole.BAR]))
             
             if start_date:
-                query = query.filter(Order.created_at >= start_date)
+                query = query.filter(orders.created_at >= start_date)
             if end_date:
-                query = query.filter(Order.created_at <= end_date)
+                query = query.filter(orders.created_at <= end_date)
                 
             results = query.group_by(User.id, User.username, User.full_name, User.role)\
-                          .order_by(func.sum(Order.total).desc())\
+                          .order_by(func.sum(orders.total).desc())\
                           .all()
             
             # Format results
@@ -93,6 +108,7 @@ class AnalyticsService:
             return []
 
     @staticmethod
+    @cached_report("employee-tips")
     def get_tips_by_employee(db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[TipsByEmployeeResponse]:
         """
         Get tip data by employee (placeholder - would need actual tip tracking implementation)
@@ -125,6 +141,7 @@ class AnalyticsService:
             return []
 
     @staticmethod
+    @cached_report("employee-upselling")
     def get_upselling_performance(db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[UpsellingPerformanceResponse]:
         """
         Get upselling performance by employee (placeholder - would need menu item category tracking)
@@ -157,26 +174,28 @@ class AnalyticsService:
             return []
 
     @staticmethod
+    @cached_report("employee-performance")
     def get_employee_performance_summary(db: Session, employee_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Optional[EmployeePerformanceResponse]:
         """
         Get comprehensive performance summary for a specific employee
         """
         try:
+            orders = ArchiveService.order_history()  # Hot and archived orders
             employee = db.query(User).filter(User.id == employee_id).first()
             if not employee:
                 return None
                 
             # Get basic sales data
             query = db.query(
-                func.count(Order.id).label('order_count'),
-                func.sum(Order.total).label('total_sales'),
-                func.avg(Order.total).label('average_order_value')
-            ).filter(Order.created_by == employee_id)
+                func.count(orders.id).label('order_count'),
+                func.sum(orders.total).label('total_sales'),
+                func.avg(orders.total).label('average_order_value')
+            ).filter(orders.created_by == employee_id)
             
             if start_date:
-                query = query.filter(Order.created_at >= start_date)
+                query = query.filter(orders.created_at >= start_date)
             if end_date:
-                query = query.filter(Order.created_at <= end_date)
+                query = query.filter(orders.created_at <= end_date)
                 
             result = query.first()
             
@@ -194,6 +213,15 @@ class AnalyticsService:
                     # Use default values if conversion fails
                     pass
             
+            # Ticket times of the employee's orders, from the folded day sketches
+            today = datetime.utcnow().date()
+            ticket_sketch = KitchenTimingService.merged_sketches(
+                db,
+                start_date.date() if start_date else today - timedelta(days=30),
+                end_date.date() if end_date else today,
+                employee_id=employee_id
+            ).get(None, {}).get("ticket")
+            
             try:
                 data_dict = {
                     'employee_id': int(employee.id) if employee.id is not None else 0,
@@ -204,7 +232,9 @@ class AnalyticsService:
                     'total_sales': total_sales,
                     'average_order_value': average_order_value,
                     'total_tips': 0,  # Placeholder
-                    'upsell_count': 0  # Placeholder
+                    'upsell_count': 0,  # Placeholder
+                    'ticket_time_p50': ticket_sketch.quantile(0.5) if ticket_sketch else None,
+                    'ticket_time_p95': ticket_sketch.quantile(0.95) if ticket_sketch else None
                 }
                 
                 return EmployeePerformanceResponse(**data_dict)
@@ -216,11 +246,13 @@ class AnalyticsService:
             return None
 
     @staticmethod
+    @cached_report("service-daily")
     def get_daily_sales_report(db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> DailySalesReportResponse:
         """
         Get daily sales report with sales data grouped by day
         """
         try:
+            orders = ArchiveService.order_history()  # Hot and archived orders
             # Set default date range to last 30 days if not provided
             if not start_date:
                 start_date = datetime.now() - timedelta(days=30)
@@ -229,15 +261,15 @@ class AnalyticsService:
                 
             # Query to get sales data grouped by day
             query = db.query(
-                func.date(Order.created_at).label('date'),
-                func.sum(Order.total).label('total_sales'),
-                func.count(Order.id).label('order_count'),
-                func.avg(Order.total).label('average_order_value')
+                func.date(orders.created_at).label('date'),
+                func.sum(orders.total).label('total_sales'),
+                func.count(orders.id).label('order_count'),
+                func.avg(orders.total).label('average_order_value')
             ).filter(
-                Order.created_at >= start_date,
-                Order.created_at <= end_date
-            ).group_by(func.date(Order.created_at))\
-             .order_by(func.date(Order.created_at))
+                orders.created_at >= start_date,
+                orders.created_at <= end_date
+            ).group_by(func.date(orders.created_at))\
+             .order_by(func.date(orders.created_at))
             
             results = query.all()
             
@@ -295,11 +327,13 @@ class AnalyticsService:
             return DailySalesReportResponse(**response_dict)
 
     @staticmethod
+    @cached_report("service-weekly")
     def get_weekly_sales_report(db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> WeeklySalesReportResponse:
         """
         Get weekly sales report with sales data grouped by week
         """
         try:
+            orders = ArchiveService.order_history()  # Hot and archived orders
             # Set default date range to last 12 weeks if not provided
             if not start_date:
                 start_date = datetime.now() - timedelta(weeks=12)
@@ -309,15 +343,15 @@ class AnalyticsService:
             # Query to get sales data grouped by week
             # Using PostgreSQL-compatible date functions
             query = db.query(
-                func.date_trunc('week', Order.created_at).label('week'),
-                func.sum(Order.total).label('total_sales'),
-                func.count(Order.id).label('order_count'),
-                func.avg(Order.total).label('average_order_value')
+                func.date_trunc('week', orders.created_at).label('week'),
+                func.sum(orders.total).label('total_sales'),
+                func.count(orders.id).label('order_count'),
+                func.avg(orders.total).label('average_order_value')
             ).filter(
-                Order.created_at >= start_date,
-                Order.created_at <= end_date
-            ).group_by(func.date_trunc('week', Order.created_at))\
-             .order_by(func.date_trunc('week', Order.created_at))
+                orders.created_at >= start_date,
+                orders.created_at <= end_date
+            ).group_by(func.date_trunc('week', orders.created_at))\
+             .order_by(func.date_trunc('week', orders.created_at))
             
             results = query.all()
             
@@ -375,11 +409,13 @@ class AnalyticsService:
             return WeeklySalesReportResponse(**response_dict)
 
     @staticmethod
+    @cached_report("service-monthly")
     def get_monthly_sales_report(db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> MonthlySalesReportResponse:
         """
         Get monthly sales report with sales data grouped by month
         """
         try:
+            orders = ArchiveService.order_history()  # Hot and archived orders
             # Set default date range to last 12 months if not provided
             if not start_date:
                 start_date = datetime.now() - timedelta(days=365)
@@ -389,15 +425,15 @@ class AnalyticsService:
             # Query to get sales data grouped by month
             # Using PostgreSQL-compatible date functions
             query = db.query(
-                func.date_trunc('month', Order.created_at).label('month'),
-                func.sum(Order.total).label('total_sales'),
-                func.count(Order.id).label('order_count'),
-                func.avg(Order.total).label('average_order_value')
+                func.date_trunc('month', orders.created_at).label('month'),
+                func.sum(orders.total).label('total_sales'),
+                func.count(orders.id).label('order_count'),
+                func.avg(orders.total).label('average_order_value')
             ).filter(
-                Order.created_at >= start_date,
-                Order.created_at <= end_date
-            ).group_by(func.date_trunc('month', Order.created_at))\
-             .order_by(func.date_trunc('month', Order.created_at))
+                orders.created_at >= start_date,
+                orders.created_at <= end_date
+            ).group_by(func.date_trunc('month', orders.created_at))\
+             .order_by(func.date_trunc('month', orders.created_at))
             
             results = query.all()
             
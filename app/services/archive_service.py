@@ -0,0 +1,206 @@
+from sqlalchemy import DateTime, delete, exists, func, insert, literal, or_, select, text, union_all
+from sqlalchemy.orm import Session, aliased
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.order import Order, OrderStatus, order_staff_association
+    from app.models.order_item import OrderItem
+    from app.models.kitchen import KitchenOrder, KitchenOrderTombstone
+    from app.models.invoice import Invoice
+    from app.models.table import Table
+    from app.models.idempotency import IdempotencyKey
+    from app.models.archive import OrderArchive, KitchenOrderArchive, InvoiceArchive
+    from app.services.kitchen_sync_service import CLOSED_STATUSES, KitchenSyncService
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.order import Order, OrderStatus, order_staff_association
+    from models.order_item import OrderItem
+    from models.kitchen import KitchenOrder, KitchenOrderTombstone
+    from models.invoice import Invoice
+    from models.table import Table
+    from models.idempotency import IdempotencyKey
+    from models.archive import OrderArchive, KitchenOrderArchive, InvoiceArchive
+    from services.kitchen_sync_service import CLOSED_STATUSES, KitchenSyncService
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Only one worker archives at a time on PostgreSQL
+ARCHIVE_LOCK_KEY = 0x61726368
+
+# (hot table, archive table, column holding the order id), copied in this order
+ARCHIVED_TABLES = (
+    (Order.__table__, OrderArchive.__table__, "id"),
+    (KitchenOrder.__table__, KitchenOrderArchive.__table__, "order_id"),
+    (Invoice.__table__, InvoiceArchive.__table__, "order_id"),
+)
+
+
+class ArchiveService:
+    """
+    Moves closed orders out of the hot tables
+
+    An order is archived once it is older than the cutoff, is paid or cancelled, and
+    nothing still points at it (a table's current order, order_items, staff
+    assignments or orders split from it). The order, its kitchen ticket and its
+    invoice are copied to the *_archive tables and deleted from the hot tables in one
+    transaction per batch, so the live screens only ever scan live orders. Reports read both through
+    order_history().
+    """
+
+    @staticmethod
+    def order_history():
+        """
+        Order entity over hot and archived orders (UNION ALL)
+
+        Use it in place of Order in reporting queries; filters on it are pushed down
+        into both halves of the union.
+        """
+        hot = Order.__table__
+        archive = OrderArchive.__table__
+        names = [column.name for column in hot.columns]
+        history = union_all(
+            select(*[hot.c[name] for name in names]),
+            select(*[archive.c[name] for name in names])
+        ).subquery("order_history")
+        return aliased(Order, history, adapt_on_names=True)
+
+    @staticmethod
+    def archivable_order_ids(db: Session, cutoff: datetime, limit: int) -> List[int]:
+        closed = or_(Order.payment_status == "completed", Order.status == OrderStatus.CANCELLED)
+        split_order = aliased(Order)
+        query = (
+            select(Order.id)
+            .where(
+                Order.created_at < cutoff,
+                closed,
+                ~exists().where(Table.current_order_id == Order.id),
+                ~exists().where(OrderItem.order_id == Order.id),
+                ~exists().where(order_staff_association.c.order_id == Order.id),
+                # Split children are archived first; their parent follows on a later run
+                ~exists().where(split_order.parent_order_id == Order.id),
+            )
+            .order_by(Order.id)
+            .limit(limit)
+        )
+        return list(db.execute(query).scalars())
+
+    @staticmethod
+    def archive_batch(db: Session, order_ids: List[int]) -> Dict[str, int]:
+        """Copy the orders and their kitchen tickets and invoices to the archive and delete them; does not commit"""
+        now = datetime.utcnow()
+        postgres = db.get_bind().dialect.name == "postgresql"
+        moved = {}
+        for hot, archive, key in ARCHIVED_TABLES:
+            where = hot.c[key].in_(order_ids)
+            # created_at is the partition key, so it cannot be NULL in the archive
+            created_at = func.coalesce(hot.c.created_at, literal(now, DateTime()))
+            if postgres:
+                first, last = db.execute(select(func.min(created_at), func.max(created_at)).where(where)).one()
+                if first is not None:
+                    ArchiveService.ensure_partitions(db, archive.name, first, last)
+
+            names = [column.name for column in hot.columns]
+            columns = [created_at if name == "created_at" else hot.c[name] for name in names]
+            result = db.execute(
+                insert(archive).from_select(
+                    names + ["archived_at"],
+                    select(*columns, literal(now, DateTime())).where(where)
+                )
+            )
+            moved[hot.name] = result.rowcount or 0
+
+        ArchiveService._tombstone_open_tickets(db, order_ids, now)
+        # Children first; idempotency keys for orders this old have long expired
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.order_id.in_(order_ids)))
+        db.execute(delete(KitchenOrder).where(KitchenOrder.order_id.in_(order_ids)))
+        db.execute(delete(Invoice).where(Invoice.order_id.in_(order_ids)))
+        db.execute(delete(Order).where(Order.id.in_(order_ids)))
+        return moved
+
+    @staticmethod
+    def _tombstone_open_tickets(db: Session, order_ids: List[int], now: datetime):
+        """Take the orders' tickets that are still on the displays off them; the bulk delete bypasses the session hooks"""
+        tickets = db.execute(
+            select(KitchenOrder.id, KitchenOrder.order_id)
+            .where(KitchenOrder.order_id.in_(order_ids), KitchenOrder.status.notin_(CLOSED_STATUSES))
+        ).all()
+        if not tickets:
+            return
+        version = KitchenSyncService.next_version(db.connection())
+        db.execute(insert(KitchenOrderTombstone), [
+            {"kitchen_order_id": ticket_id, "order_id": order_id, "version": version, "removed_at": now}
+            for ticket_id, order_id in tickets
+        ])
+
+    @staticmethod
+    def ensure_partitions(db: Session, table_name: str, first: datetime, last: datetime):
+        """Create the monthly PostgreSQL partitions of an archive table covering first..last"""
+        month = datetime(first.year, first.month, 1)
+        while month <= last:
+            next_month = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table_name}_{month:%Y_%m} PARTITION OF {table_name} "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+            ))
+            month = next_month
+
+    @staticmethod
+    def run(db: Session, older_than_days: int, batch_size: int, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """
+        Archive eligible orders in batches, committing after each one
+
+        Returns:
+            Rows moved per hot table plus the number of batches
+        """
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        postgres = db.get_bind().dialect.name == "postgresql"
+        totals = {hot.name: 0 for hot, _, _ in ARCHIVED_TABLES}
+        totals["batches"] = 0
+        while max_batches is None or totals["batches"] < max_batches:
+            if postgres and not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ARCHIVE_LOCK_KEY}).scalar():
+                logger.info("Order archival already running in another worker")
+                db.rollback()
+                break
+            order_ids = ArchiveService.archivable_order_ids(db, cutoff, batch_size)
+            if not order_ids:
+                db.rollback()
+                break
+            try:
+                moved = ArchiveService.archive_batch(db, order_ids)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            for table_name, count in moved.items():
+                totals[table_name] += count
+            totals["batches"] += 1
+            if len(order_ids) < batch_size:
+                break
+        return totals
+
+
+async def run_archival_periodically(session_factory: Callable[[], Session], interval_seconds: float,
+                                    older_than_days: int, batch_size: int):
+    """Background task started by the app lifespan; runs the archival job every interval"""
+    def archive_once():
+        with session_factory() as db:
+            return ArchiveService.run(db, older_than_days, batch_size)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            totals = await asyncio.to_thread(archive_once)
+            if totals["batches"]:
+                logger.info(f"Archived orders: {totals}")
+        except Exception as e:
+            logger.error(f"Order archival failed: {str(e)}")
+
+
+# Create a singleton instance
+archive_service = ArchiveService()
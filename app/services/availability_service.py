@@ -0,0 +1,215 @@
+from sqlalchemy import event, select
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import Session
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+import threading
+import time
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.database import engine
+    from app.models.reservation import Reservation, ACTIVE_RESERVATION_STATUSES
+    from app.models.table import Table
+    from app.services.floor_plan_service import database_key
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from database import engine
+    from models.reservation import Reservation, ACTIVE_RESERVATION_STATUSES
+    from models.table import Table
+    from services.floor_plan_service import database_key
+
+_PENDING = "availability_pending"
+
+Booking = Tuple[datetime, datetime, int]  # (starts_at, ends_at, reservation id)
+
+
+class AvailabilityIndex:
+    """
+    In-memory interval index of the active reservations of every table
+
+    Each table keeps its bookings sorted by start time, plus the length of its longest
+    booking: a booking overlapping [start, end) must start in [start - longest, end), so
+    an overlap test is two bisections and a scan of the few bookings in that window.
+    Tables are kept sorted by (capacity, table_number), so a search for a party starts at
+    the first table that fits and returns the tightest fits first.
+
+    Committed Reservation and Table changes on the application database are applied by
+    session hooks; the index is also reloaded at most every `refresh_seconds` when read,
+    which picks up other workers' bookings. It only answers searches: reservation writes
+    re-check overlaps in the database, so a lagging index can cost a 409, never a double
+    booking.
+    """
+
+    def __init__(self, database_url: Union[str, URL], refresh_seconds: float):
+        self.database_key = database_key(database_url)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._tables: Dict[int, Tuple[int, int]] = {}  # table_id -> (capacity, table_number)
+        self._by_capacity: List[Tuple[int, int, int]] = []  # (capacity, table_number, table_id)
+        self._bookings: Dict[int, List[Booking]] = {}
+        self._starts: Dict[int, List[datetime]] = {}  # Parallel to _bookings, for bisection
+        self._longest: Dict[int, timedelta] = {}
+        self._table_of: Dict[int, int] = {}  # reservation id -> table_id
+        self._loaded_at: Optional[float] = None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def _remove_booking(self, reservation_id: int):
+        table_id = self._table_of.pop(reservation_id, None)
+        if table_id is None:
+            return
+        bookings = self._bookings[table_id]
+        for i, booking in enumerate(bookings):
+            if booking[2] == reservation_id:
+                del bookings[i]
+                del self._starts[table_id][i]
+                break
+
+    def _add_booking(self, reservation_id: int, table_id: int, starts_at: datetime, ends_at: datetime):
+        booking = (starts_at, ends_at, reservation_id)
+        bookings = self._bookings.setdefault(table_id, [])
+        i = bisect_left(bookings, booking)
+        bookings.insert(i, booking)
+        self._starts.setdefault(table_id, []).insert(i, starts_at)
+        # Only ever grows until the next reload; a loose bound just widens the scan window
+        self._longest[table_id] = max(self._longest.get(table_id, timedelta(0)), ends_at - starts_at)
+        self._table_of[reservation_id] = table_id
+
+    def _set_table(self, table_id: int, state: Optional[Tuple[int, int]]):
+        previous = self._tables.pop(table_id, None)
+        if previous is not None:
+            self._by_capacity.remove((previous[0], previous[1], table_id))
+        if state is None:
+            # Reservations are deleted with their table
+            for booking in self._bookings.pop(table_id, []):
+                self._table_of.pop(booking[2], None)
+            self._starts.pop(table_id, None)
+            self._longest.pop(table_id, None)
+            return
+        self._tables[table_id] = state
+        insort(self._by_capacity, (state[0], state[1], table_id))
+
+    def apply(self, tables: Dict[int, Optional[Tuple[int, int]]],
+              reservations: Dict[int, Optional[Tuple[int, datetime, datetime]]]):
+        """
+        Apply committed changes
+
+        Args:
+            tables: table_id -> (capacity, table_number), or None for a deleted table
+            reservations: reservation id -> (table_id, starts_at, ends_at), or None for a
+                reservation that no longer holds its table (cancelled, deleted, ...)
+        """
+        with self._lock:
+            for table_id, state in tables.items():
+                self._set_table(table_id, state)
+            for reservation_id, booking in reservations.items():
+                self._remove_booking(reservation_id)
+                if booking is not None:
+                    self._add_booking(reservation_id, *booking)
+
+    def load(self, db: Session):
+        """Rebuild the index from every table and every active reservation that has not ended"""
+        tables = db.execute(select(Table.id, Table.capacity, Table.table_number)).all()
+        reservations = db.execute(
+            select(Reservation.id, Reservation.table_id, Reservation.starts_at, Reservation.ends_at)
+            .where(Reservation.status.in_(ACTIVE_RESERVATION_STATUSES), Reservation.ends_at > datetime.utcnow())
+        ).all()
+        with self._lock:
+            self._tables.clear()
+            self._by_capacity.clear()
+            self._bookings.clear()
+            self._starts.clear()
+            self._longest.clear()
+            self._table_of.clear()
+            for table_id, capacity, table_number in tables:
+                self._set_table(table_id, (capacity, table_number))
+            for reservation_id, table_id, starts_at, ends_at in reservations:
+                if table_id in self._tables:
+                    self._add_booking(reservation_id, table_id, starts_at, ends_at)
+        self._loaded_at = time.monotonic()
+
+    def _is_booked(self, table_id: int, starts_at: datetime, ends_at: datetime, ignore: Optional[int]) -> bool:
+        starts = self._starts.get(table_id)
+        if not starts:
+            return False
+        bookings = self._bookings[table_id]
+        first = bisect_left(starts, starts_at - self._longest[table_id])
+        last = bisect_left(starts, ends_at)
+        return any(
+            booking[1] > starts_at and booking[2] != ignore
+            for booking in bookings[first:last]
+        )
+
+    def is_free(self, table_id: int, starts_at: datetime, ends_at: datetime,
+                ignore_reservation: Optional[int] = None) -> bool:
+        with self._lock:
+            return table_id in self._tables and not self._is_booked(table_id, starts_at, ends_at, ignore_reservation)
+
+    def free_tables(self, starts_at: datetime, ends_at: datetime, party_size: int,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Tables seating at least `party_size` with no booking overlapping [starts_at, ends_at), best fit first"""
+        free = []
+        with self._lock:
+            for capacity, table_number, table_id in self._by_capacity[bisect_left(self._by_capacity, (party_size,)):]:
+                if self._is_booked(table_id, starts_at, ends_at, None):
+                    continue
+                free.append({"table_id": table_id, "table_number": table_number, "capacity": capacity})
+                if limit is not None and len(free) >= limit:
+                    break
+        return free
+
+    def suggest(self, starts_at: datetime, ends_at: datetime, party_size: int) -> Optional[Dict[str, Any]]:
+        """The smallest free table that seats the party, or None"""
+        free = self.free_tables(starts_at, ends_at, party_size, limit=1)
+        return free[0] if free else None
+
+    def invalidate(self):
+        """Force a reload from the database on the next read"""
+        self._loaded_at = None
+
+
+_config = Config()
+
+# Create a singleton instance tracking the application database
+availability_index = AvailabilityIndex(
+    database_url=engine.url,
+    refresh_seconds=_config.RESERVATION_INDEX_REFRESH_SECONDS
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    # Only the application database is tracked (not test or benchmark databases)
+    if database_key(session.get_bind().url) != availability_index.database_key:
+        return
+    tables, reservations = session.info.setdefault(_PENDING, ({}, {}))
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Reservation):
+            active = obj.status in ACTIVE_RESERVATION_STATUSES
+            reservations[obj.id] = (obj.table_id, obj.starts_at, obj.ends_at) if active else None
+        elif isinstance(obj, Table):
+            tables[obj.id] = (obj.capacity, obj.table_number)
+    for obj in session.deleted:
+        if isinstance(obj, Reservation):
+            reservations[obj.id] = None
+        elif isinstance(obj, Table):
+            tables[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        availability_index.apply(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_PENDING, None)
@@ -0,0 +1,228 @@
+from sqlalchemy import event, select
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+import threading
+import time
+import uuid
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.database import engine
+    from app.models.table import Table
+    from app.models.seat import Seat
+    from app.schemas.table_schema import TableResponse
+    from app.utils.events import ChangeNotifier
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from database import engine
+    from models.table import Table
+    from models.seat import Seat
+    from schemas.table_schema import TableResponse
+    from utils.events import ChangeNotifier
+
+_PENDING = "floor_plan_pending"
+_TOUCHED = "floor_plan_touched"
+
+
+def database_key(url: Union[str, URL]) -> tuple:
+    """Identify a database regardless of driver (sqlite vs sqlite+aiosqlite)"""
+    url = make_url(url)
+    return (url.get_backend_name(), url.host, url.port, url.database)
+
+
+class FloorPlanService:
+    """
+    In-memory table and seat state for host stands and waiter devices
+
+    Every committed change to a Table or its seats on the application database is applied here by
+    session hooks, whichever route or service made it, and bumps a version number. The
+    state is also reloaded from the database at most every `refresh_seconds` when read,
+    which picks up changes committed by other workers.
+
+    Versions are local to this process; the epoch identifies the process, and a client
+    presenting another epoch (or a version older than the change log) gets a full
+    snapshot instead of a delta.
+    """
+
+    def __init__(self, database_url: Union[str, URL], refresh_seconds: float, history_size: int):
+        self.database_key = database_key(database_url)
+        self.refresh_seconds = refresh_seconds
+        self.epoch = uuid.uuid4().hex[:12]
+        self.notifier = ChangeNotifier()
+        self._lock = threading.Lock()
+        self._tables: Dict[int, Dict[str, Any]] = {}
+        self._version = 0
+        self._changes = deque(maxlen=history_size)  # (version, table_id), oldest first
+        self._floor = 0  # Deltas can only be computed from this version onwards
+        self._loaded_at: Optional[float] = None
+
+    @staticmethod
+    def table_state(table: Table) -> Dict[str, Any]:
+        return TableResponse.model_validate(table).model_dump()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def apply(self, states: Dict[int, Optional[Dict[str, Any]]]) -> int:
+        """Apply new table states (None removes the table); returns the number of tables that changed"""
+        changed = 0
+        with self._lock:
+            for table_id, state in states.items():
+                if self._tables.get(table_id) == state:
+                    continue
+                if state is None:
+                    del self._tables[table_id]
+                else:
+                    self._tables[table_id] = state
+                self._version += 1
+                if len(self._changes) == self._changes.maxlen:
+                    self._floor = self._changes[0][0]
+                self._changes.append((self._version, table_id))
+                changed += 1
+        if changed:
+            self.notifier.notify()
+        return changed
+
+    def load(self, db: Session):
+        """Reload every table from the database, recording whatever differs from memory"""
+        states = {table.id: self.table_state(table) for table in db.execute(select(Table)).scalars()}
+        with self._lock:
+            removed = set(self._tables) - set(states)
+        states.update({table_id: None for table_id in removed})
+        self.apply(states)
+        self._loaded_at = time.monotonic()
+
+    def tables(self, predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            tables = [self._tables[table_id] for table_id in sorted(self._tables)]
+        return [table for table in tables if predicate is None or predicate(table)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            version = self._version
+            tables = [self._tables[table_id] for table_id in sorted(self._tables)]
+        return {"epoch": self.epoch, "version": version, "tables": tables}
+
+    def changes_since(self, since: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Tables changed or removed after version `since`
+
+        Falls back to a full snapshot (full=True) when `since` comes from another
+        process or is older than the retained change log.
+        """
+        with self._lock:
+            version = self._version
+            if (epoch is not None and epoch != self.epoch) or since < self._floor or since > version:
+                full = True
+                table_ids = sorted(self._tables)
+                removed = []
+            else:
+                full = False
+                changed_ids = sorted({table_id for v, table_id in self._changes if v > since})
+                table_ids = [table_id for table_id in changed_ids if table_id in self._tables]
+                removed = [table_id for table_id in changed_ids if table_id not in self._tables]
+            tables = [self._tables[table_id] for table_id in table_ids]
+        return {"epoch": self.epoch, "version": version, "full": full, "tables": tables, "removed": removed}
+
+    def invalidate(self):
+        """Force a reload from the database on the next read"""
+        self._loaded_at = None
+
+    def reset(self):
+        """Forget all state; the next read reloads from the database"""
+        with self._lock:
+            self._tables.clear()
+            self._changes.clear()
+            self._floor = self._version
+            self._loaded_at = None
+
+
+_config = Config()
+
+# Create a singleton instance tracking the application database
+floor_plan = FloorPlanService(
+    database_url=engine.url,
+    refresh_seconds=_config.FLOOR_PLAN_REFRESH_SECONDS,
+    history_size=_config.FLOOR_PLAN_HISTORY_SIZE
+)
+
+
+def _is_tracked(session: Session) -> bool:
+    # Only the application database is tracked (not test or benchmark databases)
+    return database_key(session.get_bind().url) == floor_plan.database_key
+
+
+def mark_tables_changed(session: Session, table_ids: Iterable[int]):
+    """
+    Record tables whose seats were changed with a bulk UPDATE
+
+    Bulk statements bypass the unit of work, so the flush hook never sees them; the
+    tables are re-read just before the commit instead.
+    """
+    if _is_tracked(session):
+        session.info.setdefault(_TOUCHED, set()).update(table_ids)
+
+
+def _pending_state(pending: dict, table: Optional[Table], table_id: int):
+    if table is None:
+        # Not loaded in this session; let the next read reload it
+        floor_plan.invalidate()
+        return
+    try:
+        pending[table_id] = FloorPlanService.table_state(table)
+    except ValueError:
+        # A row the response model cannot represent; let the next read reload it
+        floor_plan.invalidate()
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    if not _is_tracked(session):
+        return
+    pending = session.info.setdefault(_PENDING, {})
+    changed = session.new.union(session.dirty)
+    for obj in changed.union(session.deleted):
+        if isinstance(obj, Seat) and obj.table_id is not None:
+            table = session.identity_map.get(identity_key(Table, obj.table_id))
+            _pending_state(pending, table, obj.table_id)
+    for obj in changed:
+        if isinstance(obj, Table):
+            _pending_state(pending, obj, obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Table):
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    touched = session.info.pop(_TOUCHED, None)
+    if touched:
+        pending = session.info.setdefault(_PENDING, {})
+        for table_id in touched:
+            table = session.get(Table, table_id)
+            if table is not None:
+                _pending_state(pending, table, table_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        floor_plan.apply(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_PENDING, None)
+        session.info.pop(_TOUCHED, None)
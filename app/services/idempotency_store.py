@@ -0,0 +1,139 @@
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+import asyncio
+import logging
+import threading
+import time
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.models.idempotency import IdempotencyKey
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyStore:
+    """
+    Maps client idempotency keys to the orders they created
+
+    The idempotency_keys table is the source of truth and is written in the same
+    transaction as the order, so its unique constraint settles races between workers.
+    A bounded per-worker LRU cache answers repeated retries without a query.
+    Keys older than the TTL are treated as unknown and evicted from both; the app
+    lifespan deletes expired rows periodically (run_idempotency_purge_periodically).
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (order_id, cached_at monotonic)
+
+    def _cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+
+    def _cache_get(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            order_id, cached_at = entry
+            if time.monotonic() - cached_at > self.ttl_seconds:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return order_id
+
+    def remember(self, mapping: Dict[str, int]):
+        """Cache committed key -> order_id pairs; call only after the transaction commits"""
+        now = time.monotonic()
+        with self._lock:
+            for key, order_id in mapping.items():
+                self._cache[key] = (order_id, now)
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def lookup(self, db: Session, keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Return the order id already recorded for each known key
+
+        Expired rows for the requested keys are deleted in the caller's transaction so the
+        keys can be reused.
+        """
+        found: Dict[str, int] = {}
+        misses = []
+        for key in dict.fromkeys(keys):
+            order_id = self._cache_get(key)
+            if order_id is None:
+                misses.append(key)
+            else:
+                found[key] = order_id
+        if not misses:
+            return found
+
+        cutoff = self._cutoff()
+        rows = db.execute(
+            select(IdempotencyKey.key, IdempotencyKey.order_id, IdempotencyKey.created_at)
+            .where(IdempotencyKey.key.in_(misses))
+        ).all()
+        expired = [row.key for row in rows if row.created_at is not None and row.created_at < cutoff]
+        if expired:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired)))
+        fresh = {row.key: row.order_id for row in rows if row.key not in expired}
+        self.remember(fresh)
+        found.update(fresh)
+        return found
+
+    def record(self, db: Session, mapping: Dict[str, int]):
+        """Insert key -> order_id rows in the caller's transaction with one statement"""
+        if not mapping:
+            return
+        created_at = datetime.utcnow()
+        db.execute(insert(IdempotencyKey), [
+            {"key": key, "order_id": order_id, "created_at": created_at} for key, order_id in mapping.items()
+        ])
+
+    def purge_expired(self, db: Session) -> int:
+        """Delete every expired key; returns the number of rows removed"""
+        result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < self._cutoff()))
+        db.commit()
+        return result.rowcount or 0
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+async def run_idempotency_purge_periodically(session_factory: Callable[[], Session], interval_seconds: float):
+    """Background task started by the app lifespan; deletes expired keys every interval"""
+    def purge_once():
+        with session_factory() as db:
+            return idempotency_store.purge_expired(db)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            purged = await asyncio.to_thread(purge_once)
+            if purged:
+                logger.info(f"Purged {purged} expired idempotency keys")
+        except Exception as e:
+            logger.error(f"Purging idempotency keys failed: {str(e)}")
+
+
+_config = Config()
+
+# Create a singleton instance
+idempotency_store = IdempotencyStore(
+    ttl_seconds=_config.IDEMPOTENCY_KEY_TTL_SECONDS,
+    max_entries=_config.IDEMPOTENCY_CACHE_SIZE
+)
@@ -0,0 +1,430 @@
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import json
+import threading
+import time
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.database import engine
+    from app.models.kitchen import KitchenOrder, KitchenOrderStatus, KitchenOrderTransition
+    from app.models.order import Order
+    from app.services.floor_plan_service import database_key
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from database import engine
+    from models.kitchen import KitchenOrder, KitchenOrderStatus, KitchenOrderTransition
+    from models.order import Order
+    from services.floor_plan_service import database_key
+
+_PENDING = "kitchen_scheduler_pending"
+
+STATIONS = ("main_kitchen", "grill_station", "beverage_station", "dessert_station")
+ACTIVE_STATUSES = (KitchenOrderStatus.PENDING.value, KitchenOrderStatus.PREPARING.value)
+
+# Weight of each new observation in an item's learned prep time
+LEARNING_RATE = 0.2
+# Ready tickets read from kitchen_order_transitions to learn prep times on load
+HISTORY_SIZE = 2000
+
+Line = Tuple[str, str]  # (item name, station)
+
+
+def station_for(category: Optional[str]) -> str:
+    """The station that cooks items of a menu category"""
+    category = (category or "").lower()
+    if 'beverage' in category or 'drink' in category:
+        return "beverage_station"
+    if 'grill' in category or 'steak' in category or 'burger' in category:
+        return "grill_station"
+    if 'dessert' in category or 'sweet' in category:
+        return "dessert_station"
+    return "main_kitchen"
+
+
+def order_lines(order_data: Any) -> List[Line]:
+    """(name, station) of each line of an order's order_data; [] when it is not a list"""
+    if isinstance(order_data, str):
+        try:
+            order_data = json.loads(order_data)
+        except ValueError:
+            return []
+        # Stored JSON-encoded a second time by the API
+        if isinstance(order_data, str):
+            return order_lines(order_data)
+    if not isinstance(order_data, list):
+        return []
+    return [
+        (str(line.get("name") or "Unknown Item"), station_for(line.get("category")))
+        for line in order_data if isinstance(line, dict)
+    ]
+
+
+class _Fenwick:
+    """Prefix sums over slots 0..size-1 with O(log n) updates and queries"""
+    __slots__ = ("tree",)
+
+    def __init__(self, size: int):
+        self.tree = [0.0] * (size + 1)
+
+    def __len__(self) -> int:
+        return len(self.tree) - 1
+
+    def add(self, slot: int, delta: float):
+        i = slot + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, slot: int) -> float:
+        """Sum of slots 0..slot-1"""
+        total, i = 0.0, slot
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class _StationQueue:
+    """
+    One station's tickets in cooking order (oldest first) with the work each brings
+
+    Tickets take consecutive slots as they arrive; a Fenwick tree over the slots sums the
+    work ahead of any ticket in O(log n), and adding or removing a ticket is O(log n).
+    Slots are renumbered (O(n)) only when the tree fills up, so amortized O(log n).
+    """
+
+    def __init__(self, size: int = 64):
+        self._work = _Fenwick(size)
+        self._slots: Dict[int, int] = {}  # kitchen_order_id -> slot
+        self._entries: Dict[int, Tuple[int, float, float]] = {}  # slot -> (kitchen_order_id, work, longest item), in slot order
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, ticket_id: int) -> bool:
+        return ticket_id in self._slots
+
+    def _compact(self):
+        entries = list(self._entries.values())
+        self._work = _Fenwick(max(64, 2 * len(entries)))
+        self._slots.clear()
+        self._entries.clear()
+        self._next = 0
+        for entry in entries:
+            self.push(*entry)
+
+    def push(self, ticket_id: int, work: float, longest: float):
+        if self._next >= len(self._work):
+            self._compact()
+        slot = self._next
+        self._next += 1
+        self._slots[ticket_id] = slot
+        self._entries[slot] = (ticket_id, work, longest)
+        self._work.add(slot, work)
+
+    def remove(self, ticket_id: int):
+        slot = self._slots.pop(ticket_id, None)
+        if slot is not None:
+            self._work.add(slot, -self._entries.pop(slot)[1])
+
+    def entry(self, ticket_id: int) -> Tuple[float, float, float]:
+        """(work ahead of the ticket, its own work, its longest item)"""
+        slot = self._slots[ticket_id]
+        _, work, longest = self._entries[slot]
+        return self._work.prefix(slot), work, longest
+
+    def entries(self) -> Iterable[Tuple[int, float, float]]:
+        return self._entries.values()
+
+
+class _Ticket:
+    __slots__ = ("id", "order_id", "status", "created_at", "started_at", "lines")
+
+    def __init__(self, ticket_id: int, order_id: int, status: str, created_at: datetime,
+                 started_at: Optional[datetime], lines: List[Line]):
+        self.id = ticket_id
+        self.order_id = order_id
+        self.status = status
+        self.created_at = created_at
+        self.started_at = started_at
+        self.lines = lines
+
+
+class KitchenScheduler:
+    """
+    In-memory station queues of the active kitchen tickets, with ready-time estimates
+
+    Each pending or preparing ticket's lines are routed to stations by menu category
+    (the KOT routing) and queued there oldest ticket first. Each item is expected to
+    take its learned prep time: a moving average of the cook times (preparing to ready,
+    else ticket created to ready) of the tickets it was on. The items of a ticket are
+    cooked side by side, so a ticket's time is an observation of its slowest item:
+    that item's average moves towards it, and any item estimated slower than it moves
+    down to it. Items never seen take their station's average, else
+    `default_prep_seconds`.
+
+    A station works on `station_capacity` items at once, so a ticket is expected ready
+    at a station once the work queued ahead of it and its own work are done at that
+    rate, and not before its slowest item; work already spent on preparing tickets is
+    deducted. The order is ready when its last station is.
+
+    Committed ticket changes on the application database are applied by session hooks,
+    with new tickets learnt from when they are marked ready. The queues are reloaded from
+    the database at most every `refresh_seconds` when read, which picks up other
+    workers' tickets.
+    """
+
+    def __init__(self, database_url: Union[str, URL], refresh_seconds: float, station_capacity: int,
+                 default_prep_seconds: float):
+        self.database_key = database_key(database_url)
+        self.refresh_seconds = refresh_seconds
+        self.station_capacity = max(station_capacity, 1)
+        self.default_prep_seconds = default_prep_seconds
+        self._lock = threading.Lock()
+        self._tickets: Dict[int, _Ticket] = {}
+        self._by_order: Dict[int, int] = {}  # order_id -> kitchen_order_id
+        self._queues: Dict[str, _StationQueue] = {station: _StationQueue() for station in STATIONS}
+        self._prep: Dict[str, float] = {}  # item name -> learned seconds
+        self._item_station: Dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def invalidate(self):
+        """Force a reload from the database on the next read"""
+        self._loaded_at = None
+
+    def prep_seconds(self, name: str, station: str) -> float:
+        """The learned prep time of an item"""
+        learned = self._prep.get(name)
+        if learned is not None:
+            return learned
+        at_station = [seconds for item, seconds in self._prep.items() if self._item_station.get(item) == station]
+        return sum(at_station) / len(at_station) if at_station else self.default_prep_seconds
+
+    def _learn(self, lines: List[Line], seconds: Optional[float]):
+        if not lines or seconds is None:
+            return
+        for name, station in lines:
+            self._item_station[name] = station
+        names = {name for name, _ in lines}
+        slowest = max(names, key=lambda name: self._prep.get(name, self.default_prep_seconds))
+        for name in names:
+            learned = self._prep.get(name)
+            if learned is None:
+                # First sighting: only the slowest item is known to have taken this long
+                if name == slowest or len(names) == 1:
+                    self._prep[name] = seconds
+            elif name == slowest:
+                self._prep[name] = learned + LEARNING_RATE * (seconds - learned)
+            elif learned > seconds:
+                self._prep[name] = seconds
+
+    def _enqueue(self, ticket: _Ticket):
+        self._tickets[ticket.id] = ticket
+        self._by_order[ticket.order_id] = ticket.id
+        work: Dict[str, List[float]] = {}
+        for name, station in ticket.lines:
+            work.setdefault(station, []).append(self.prep_seconds(name, station))
+        for station, items in work.items():
+            self._queues[station].push(ticket.id, sum(items), max(items))
+
+    def _dequeue(self, ticket_id: int) -> Optional[_Ticket]:
+        ticket = self._tickets.pop(ticket_id, None)
+        if ticket is None:
+            return None
+        if self._by_order.get(ticket.order_id) == ticket_id:
+            del self._by_order[ticket.order_id]
+        for queue in self._queues.values():
+            queue.remove(ticket_id)
+        return ticket
+
+    def apply(self, tickets: Dict[int, Optional[Tuple[int, str, datetime, Optional[datetime], Optional[List[Line]]]]],
+              ready: List[Tuple[int, Optional[float]]], orders: Iterable[int] = ()):
+        """
+        Apply committed changes
+
+        Args:
+            tickets: kitchen_order_id -> (order_id, status, created_at, updated_at, lines),
+                or None for a deleted ticket; lines may be None when not known
+            ready: (kitchen_order_id, cook seconds) of tickets that were marked ready
+            orders: ids of orders whose lines changed
+        """
+        with self._lock:
+            for ticket_id, seconds in ready:
+                ticket = self._tickets.get(ticket_id)
+                if ticket is not None:
+                    self._learn(ticket.lines, seconds)
+            for ticket_id, state in tickets.items():
+                known = self._tickets.get(ticket_id)
+                if state is None or state[1] not in ACTIVE_STATUSES:
+                    self._dequeue(ticket_id)
+                    continue
+                order_id, status, created_at, updated_at, lines = state
+                if known is not None:
+                    if status == KitchenOrderStatus.PREPARING.value and known.status != status:
+                        known.started_at = updated_at
+                    known.status = status
+                elif lines is None:
+                    # A new ticket whose order was not loaded with it
+                    self._loaded_at = None
+                else:
+                    started_at = updated_at if status == KitchenOrderStatus.PREPARING.value else None
+                    self._enqueue(_Ticket(ticket_id, order_id, status, created_at, started_at, lines))
+            if any(order_id in self._by_order for order_id in orders):
+                # Edited lines change the ticket's place in its queues; reload in order
+                self._loaded_at = None
+
+    def load(self, db: Session):
+        """Rebuild the queues from the active tickets, learning prep times from recent ready tickets"""
+        history = db.execute(
+            select(KitchenOrderTransition.from_status, KitchenOrderTransition.ticket_seconds,
+                   KitchenOrderTransition.step_seconds, Order.order_data)
+            .join(Order, Order.id == KitchenOrderTransition.order_id)
+            .where(KitchenOrderTransition.to_status == KitchenOrderStatus.READY.value)
+            .order_by(KitchenOrderTransition.id.desc())
+            .limit(HISTORY_SIZE)
+        ).all()
+        active = db.execute(
+            select(KitchenOrder.id, KitchenOrder.order_id, KitchenOrder.status, KitchenOrder.created_at,
+                   KitchenOrder.updated_at, Order.order_data)
+            .join(Order, Order.id == KitchenOrder.order_id)
+            .where(KitchenOrder.status.in_(ACTIVE_STATUSES))
+            .order_by(KitchenOrder.created_at, KitchenOrder.id)
+        ).all()
+        with self._lock:
+            self._tickets.clear()
+            self._by_order.clear()
+            self._queues = {station: _StationQueue(max(64, 2 * len(active))) for station in STATIONS}
+            self._prep.clear()
+            self._item_station.clear()
+            for from_status, ticket_seconds, step_seconds, order_data in reversed(history):
+                cooked = step_seconds if from_status == KitchenOrderStatus.PREPARING.value else ticket_seconds
+                self._learn(order_lines(order_data), cooked)
+            for ticket_id, order_id, status, created_at, updated_at, order_data in active:
+                started_at = updated_at if status == KitchenOrderStatus.PREPARING.value else None
+                self._enqueue(_Ticket(ticket_id, order_id, status, created_at or datetime.utcnow(), started_at,
+                                      order_lines(order_data)))
+        self._loaded_at = time.monotonic()
+
+    def _spent(self, ticket: _Ticket, now: datetime) -> float:
+        if ticket.started_at is None:
+            return 0.0
+        return max((now - ticket.started_at).total_seconds(), 0.0)
+
+    def _ready_at(self, ticket: _Ticket, now: datetime) -> datetime:
+        """Caller holds the lock"""
+        finish = now
+        for station, queue in self._queues.items():
+            if ticket.id not in queue:
+                continue
+            ahead, work, longest = queue.entry(ticket.id)
+            # Preparing tickets are partly done: the oldest tickets, so few and at the front
+            for other_id, other_work, _ in queue.entries():
+                if other_id == ticket.id:
+                    break
+                other = self._tickets[other_id]
+                if other.started_at is None:
+                    break
+                ahead -= min(self._spent(other, now), other_work)
+            spent = self._spent(ticket, now)
+            remaining = max(work - spent, 0.0)
+            seconds = max((max(ahead, 0.0) + remaining) / self.station_capacity, longest - spent, 0.0)
+            finish = max(finish, now + timedelta(seconds=seconds))
+        return finish
+
+    def ready_at(self, order_id: int, now: Optional[datetime] = None) -> Optional[datetime]:
+        """When an order's kitchen ticket is expected ready (UTC), None when it is not queued"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            ticket_id = self._by_order.get(order_id)
+            if ticket_id is None or not self._tickets[ticket_id].lines:
+                return None
+            return self._ready_at(self._tickets[ticket_id], now)
+
+    def queue(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Every station's tickets in the order they will be cooked, with ready-time estimates"""
+        now = now or datetime.utcnow()
+        stations = []
+        with self._lock:
+            for station, queue in self._queues.items():
+                tickets, ahead = [], 0.0
+                for ticket_id, work, longest in queue.entries():
+                    ticket = self._tickets[ticket_id]
+                    spent = self._spent(ticket, now)
+                    remaining = max(work - spent, 0.0)
+                    seconds = max((ahead + remaining) / self.station_capacity, longest - spent, 0.0)
+                    ahead += remaining
+                    tickets.append({
+                        "kitchen_order_id": ticket_id,
+                        "order_id": ticket.order_id,
+                        "status": ticket.status,
+                        "created_at": ticket.created_at,
+                        "items": [name for name, line_station in ticket.lines if line_station == station],
+                        "work_seconds": round(work, 1),
+                        "station_ready_at": now + timedelta(seconds=seconds),
+                        "estimated_ready_at": self._ready_at(ticket, now)
+                    })
+                stations.append({
+                    "station": station,
+                    "capacity": self.station_capacity,
+                    "backlog_seconds": round(ahead, 1),
+                    "tickets": tickets
+                })
+        return {"generated_at": now, "stations": stations}
+
+
+_config = Config()
+
+# Create a singleton instance tracking the application database
+kitchen_scheduler = KitchenScheduler(
+    database_url=engine.url,
+    refresh_seconds=_config.KITCHEN_SCHEDULER_REFRESH_SECONDS,
+    station_capacity=_config.KITCHEN_STATION_CAPACITY,
+    default_prep_seconds=_config.KITCHEN_DEFAULT_PREP_SECONDS
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    # Only the application database is tracked (not test or benchmark databases)
+    if database_key(session.get_bind().url) != kitchen_scheduler.database_key:
+        return
+    tickets, ready, orders = session.info.setdefault(_PENDING, ({}, [], set()))
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, KitchenOrder):
+            # The order is only read when it was loaded with the ticket (no lazy load mid-flush)
+            order = obj.__dict__.get("order")
+            lines = order_lines(order.order_data) if order is not None else None
+            tickets[obj.id] = (obj.order_id, obj.status, obj.created_at, obj.updated_at, lines)
+        elif isinstance(obj, Order) and inspect(obj).attrs.order_data.history.has_changes():
+            orders.add(obj.id)
+    for obj in session.new:
+        if isinstance(obj, KitchenOrderTransition) and obj.to_status == KitchenOrderStatus.READY.value:
+            cooked = obj.step_seconds if obj.from_status == KitchenOrderStatus.PREPARING.value else obj.ticket_seconds
+            ready.append((obj.kitchen_order_id, cooked))
+    for obj in session.deleted:
+        if isinstance(obj, KitchenOrder):
+            tickets[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        kitchen_scheduler.apply(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_PENDING, None)
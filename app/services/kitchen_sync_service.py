@@ -0,0 +1,138 @@
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.kitchen import KitchenOrder, KitchenOrderTombstone, KITCHEN_VERSION_ROW
+    from app.models.order import Order
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.kitchen import KitchenOrder, KitchenOrderTombstone, KITCHEN_VERSION_ROW
+    from models.order import Order
+
+# Order columns shown on the kitchen and bar displays; changing one re-sends the ticket
+DISPLAYED_ORDER_COLUMNS = ("order_data", "total", "order_type", "table_number", "customer_name")
+# Ticket statuses that take a ticket off the displays
+CLOSED_STATUSES = ("served",)
+
+
+class KitchenSyncService:
+    """
+    Version stamps that let kitchen and bar displays poll for changes only
+
+    Every flush that adds, changes or deletes a kitchen ticket, or changes what its
+    order shows on the displays, bumps the counter in the reserved
+    kitchen_order_tombstones row (KITCHEN_VERSION_ROW) and stamps the new version on
+    those tickets; deleted tickets get a tombstone row at that version (see the
+    session hooks below). The counter row stays locked until the writing transaction
+    ends, so versions are committed in increasing order and a display that has seen
+    version v can ask for version > v without missing a later commit.
+    """
+
+    @staticmethod
+    def next_version(connection: Connection) -> int:
+        """Bump the counter in the caller's transaction and return the new version"""
+        table = KitchenOrderTombstone.__table__
+        bumped = connection.execute(
+            update(table).where(table.c.kitchen_order_id == KITCHEN_VERSION_ROW).values(version=table.c.version + 1)
+        )
+        if bumped.rowcount == 0:
+            # Databases created without the migrations
+            connection.execute(insert(table).values(
+                kitchen_order_id=KITCHEN_VERSION_ROW, order_id=0, version=1, removed_at=datetime.utcnow()
+            ))
+        return connection.execute(
+            select(table.c.version).where(table.c.kitchen_order_id == KITCHEN_VERSION_ROW)
+        ).scalar()
+
+    @staticmethod
+    def current_version(db: Session) -> int:
+        table = KitchenOrderTombstone.__table__
+        return db.execute(
+            select(table.c.version).where(table.c.kitchen_order_id == KITCHEN_VERSION_ROW)
+        ).scalar() or 0
+
+    @staticmethod
+    def changes_since(db: Session, since: int) -> Dict[str, Any]:
+        """
+        Tickets changed after version `since`, and the order ids of tickets removed or served
+
+        Returns {"version", "full", "tickets": [(KitchenOrder, Order)], "removed"}. With a
+        version newer than the database's (another database, or a client that kept its
+        state across a restore), every open ticket is returned with full=True instead.
+        """
+        # Read the version first: tickets committed meanwhile are sent now and again next time
+        version = KitchenSyncService.current_version(db)
+        full = since > version
+        query = select(KitchenOrder, Order).join(Order, Order.id == KitchenOrder.order_id)
+        if full:
+            query = query.where(KitchenOrder.status.notin_(CLOSED_STATUSES)).order_by(KitchenOrder.id)
+        else:
+            query = query.where(KitchenOrder.version > since).order_by(KitchenOrder.version, KitchenOrder.id)
+
+        tickets: List[Tuple[KitchenOrder, Order]] = []
+        removed: List[int] = []
+        for kitchen_order, order in db.execute(query).all():
+            if kitchen_order.status in CLOSED_STATUSES:
+                removed.append(kitchen_order.order_id)
+            else:
+                tickets.append((kitchen_order, order))
+            version = max(version, kitchen_order.version)
+
+        if not full and since > 0:
+            # A display syncing from 0 holds no tickets to remove
+            table = KitchenOrderTombstone.__table__
+            for order_id, tombstone_version in db.execute(
+                select(table.c.order_id, table.c.version)
+                .where(table.c.version > since, table.c.kitchen_order_id != KITCHEN_VERSION_ROW)
+                .order_by(table.c.version)
+            ).all():
+                removed.append(order_id)
+                version = max(version, tombstone_version)
+        return {"version": version, "full": full, "tickets": tickets, "removed": removed}
+
+
+def _displayed_change(order: Order) -> bool:
+    state = inspect(order)
+    return any(state.attrs[name].history.has_changes() for name in DISPLAYED_ORDER_COLUMNS)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    changed = [
+        obj for obj in session.new.union(session.dirty)
+        if isinstance(obj, KitchenOrder) and (obj in session.new or session.is_modified(obj, include_collections=False))
+    ]
+    orders = [obj.id for obj in session.dirty if isinstance(obj, Order) and _displayed_change(obj)]
+    tombstones = [
+        (obj.id, obj.order_id) for obj in session.deleted if isinstance(obj, KitchenOrder) and obj.order_id is not None
+    ]
+    for obj in changed:
+        if obj.order_id is None:
+            # Detached from a deleted order: gone from the displays
+            previous = inspect(obj).attrs.order_id.history.deleted
+            if previous and previous[0] is not None:
+                tombstones.append((obj.id, previous[0]))
+    if not (changed or orders or tombstones):
+        return
+
+    # Stamp in the writing transaction, so the version commits or rolls back with the change
+    connection = session.connection()
+    version = KitchenSyncService.next_version(connection)
+    table = KitchenOrder.__table__
+    if changed:
+        connection.execute(update(table).where(table.c.id.in_([obj.id for obj in changed])).values(version=version))
+        for obj in changed:
+            set_committed_value(obj, "version", version)
+    if orders:
+        connection.execute(update(table).where(table.c.order_id.in_(orders)).values(version=version))
+    if tombstones:
+        connection.execute(insert(KitchenOrderTombstone.__table__), [
+            {"kitchen_order_id": ticket_id, "order_id": order_id, "version": version, "removed_at": datetime.utcnow()}
+            for ticket_id, order_id in tombstones
+        ])
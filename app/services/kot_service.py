@@ -6,6 +6,7 @@ Handles sending orders to kitchen printers or display systems
 import json
 import logging
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional
 from app.models.order import Order, OrderItem
 from app.models.kitchen import KitchenOrder, KitchenOrderDetail
@@ -14,13 +15,19 @@ from app.models.kitchen import KitchenOrder, KitchenOrderDetail
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import escpos for physical printer support
-try:
-    from escpos.printer import Usb, Network
-    ESCPOS_AVAILABLE = True
-except ImportError:
-    ESCPOS_AVAILABLE = False
-    logger.warning("python-escpos not installed. Physical printer support disabled.")
+@lru_cache(maxsize=None)
+def _load_escpos_printer():
+    """
+    Import python-escpos on first print rather than at startup.
+
+    Returns the escpos.printer module, or None when physical printer support is unavailable.
+    """
+    try:
+        from escpos import printer
+        return printer
+    except ImportError:
+        logger.warning("python-escpos not installed. Physical printer support disabled.")
+        return None
 
 class KOTService:
     """Service for handling Kitchen Order Tickets"""
@@ -155,7 +162,8 @@ class KOTService:
             printer_info = self.printers[printer_id]
             
             # Check if escpos is available
-            if not ESCPOS_AVAILABLE:
+            escpos_printer = _load_escpos_printer()
+            if escpos_printer is None:
                 logger.info(f"[KOT SERVICE] Escpos not available, simulating print to {printer_id} ({printer_info['location']})")
                 logger.info(kot_content)
                 return {"success": True, "message": f"Simulated print to {printer_id}", "content": kot_content}
@@ -170,7 +178,7 @@ class KOTService:
                 out_ep = printer_info.get("out_ep", 0x03)
                 
                 # Connect to printer
-                printer = Usb(vendor_id, product_id, timeout, in_ep, out_ep)
+                printer = escpos_printer.Usb(vendor_id, product_id, timeout, in_ep, out_ep)
                 
                 # Print content
                 printer.text(kot_content)
@@ -189,7 +197,7 @@ class KOTService:
                 port = printer_info.get("port", 9100)
                 
                 # Connect to network printer
-                printer = Network(ip_address, port)
+                printer = escpos_printer.Network(ip_address, port)
                 
                 # Print content
                 printer.text(kot_content)
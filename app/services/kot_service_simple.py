@@ -15,12 +15,14 @@ try:
     from app.models.kitchen import KitchenOrder
     from app.schemas.order_schema import OrderItem
     from app.schemas.kitchen_schema import KitchenOrderDetail
+    from app.services.kitchen_scheduler import station_for
 except ImportError:
     # Try importing directly (Docker container)
     from models.order import Order
     from models.kitchen import KitchenOrder
     from schemas.order_schema import OrderItem
     from schemas.kitchen_schema import KitchenOrderDetail
+    from services.kitchen_scheduler import station_for
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -112,17 +114,9 @@ class KOTService:
             "dessert_station": []
         }
         
-        # Categorize items
+        # Categorize items (the kitchen scheduler queues them at the same stations)
         for item in kitchen_order.order_items:
-            category = getattr(item, 'category', '').lower()
-            if 'beverage' in category or 'drink' in category:
-                station_items["beverage_station"].append(item)
-            elif 'grill' in category or 'steak' in category or 'burger' in category:
-                station_items["grill_station"].append(item)
-            elif 'dessert' in category or 'sweet' in category:
-                station_items["dessert_station"].append(item)
-            else:
-                station_items["main_kitchen"].append(item)
+            station_items[station_for(getattr(item, 'category', ''))].append(item)
         
         # Send to appropriate stations
         for station_id, items in station_items.items():
@@ -0,0 +1,268 @@
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, tzinfo
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.models.analytics_snapshot import AnalyticsSnapshot
+    from app.services.settings_service import SettingsService
+    from app.utils.events import event_bus, ORDER_PLACED
+    from app.utils.sketches import SpaceSaving
+    from app.utils.time_buckets import to_local, to_utc
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from models.analytics_snapshot import AnalyticsSnapshot
+    from services.settings_service import SettingsService
+    from utils.events import event_bus, ORDER_PLACED
+    from utils.sketches import SpaceSaving
+    from utils.time_buckets import to_local, to_utc
+
+logger = logging.getLogger(__name__)
+
+# Hours kept in memory and in analytics_snapshots
+RETAIN = timedelta(days=2)
+
+
+class _Hour:
+    """Exact order count and revenue for one hour, and its item sketch"""
+    __slots__ = ("order_count", "revenue", "items")
+
+    def __init__(self, capacity: int):
+        self.order_count = 0
+        self.revenue = 0.0
+        self.items = SpaceSaving(capacity)
+
+    def merge(self, other: "_Hour") -> "_Hour":
+        self.order_count += other.order_count
+        self.revenue += other.revenue
+        self.items.merge(other.items)
+        return self
+
+
+def hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_ceiling(moment: datetime) -> datetime:
+    return hour_start(moment - timedelta(microseconds=1)) + timedelta(hours=1)
+
+
+class LiveAnalytics:
+    """
+    Streaming counters for today's dashboard
+
+    Every order placed in this worker is counted as it is committed (ORDER_PLACED on
+    the event bus): orders and revenue per hour exactly, items per hour in a
+    Space-Saving sketch of `capacity` items. Reads cost O(hours x capacity) whatever the
+    number of orders.
+
+    Each worker saves its hours to analytics_snapshots every `persist_seconds` and at
+    shutdown under its own worker_id. Reports add this worker's live counters to the
+    saved rows of every other worker, including earlier processes of a restarted
+    one, so other workers' orders show up within `persist_seconds` and a restart
+    loses at most that much of the day.
+
+    Hours are UTC hours; "today" is the restaurant's day (the restaurant_timezone
+    setting): the UTC hours starting in it, each reported as the local hour it starts
+    in. In zones offset from UTC by a fraction of an hour, those straddle local hours.
+    """
+
+    def __init__(self, capacity: int, persist_seconds: float, worker_id: Optional[str] = None):
+        self.capacity = capacity
+        self.persist_seconds = persist_seconds
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._hours: Dict[datetime, _Hour] = {}
+        self._dirty: set = set()
+        self._others: "WeakKeyDictionary[Any, Tuple[float, Dict[datetime, _Hour]]]" = WeakKeyDictionary()
+
+    def record_order(self, created_at: datetime, total: Optional[float], lines: List[Dict[str, Any]]):
+        hour = hour_start(created_at)
+        with self._lock:
+            bucket = self._hours.get(hour)
+            if bucket is None:
+                bucket = self._hours[hour] = _Hour(self.capacity)
+            bucket.order_count += 1
+            bucket.revenue += float(total or 0)
+            for line in lines:
+                try:
+                    bucket.items.add(line.get("name", "Unknown Item"), 1, float(line.get("price", 0) or 0),
+                                     line.get("category", "Unknown"))
+                except (AttributeError, TypeError, ValueError):
+                    continue
+            self._dirty.add(hour)
+
+    def on_order_placed(self, payload: Dict[str, Any]):
+        """ORDER_PLACED handler; the payload carries the committed order's created_at, total and order_data"""
+        created_at = payload.get("created_at")
+        if created_at is None:
+            return
+        lines = payload.get("order_data")
+        if isinstance(lines, str):
+            try:
+                lines = json.loads(lines)
+            except ValueError:
+                lines = []
+        self.record_order(created_at, payload.get("total"), lines if isinstance(lines, list) else [])
+
+    def persist(self, db: Session) -> int:
+        """Save the hours changed since the last call and drop expired ones; returns hours saved"""
+        now = datetime.utcnow()
+        cutoff = hour_start(now) - RETAIN
+        with self._lock:
+            for hour in [hour for hour in self._hours if hour < cutoff]:
+                del self._hours[hour]
+            dirty = {hour: self._hours[hour] for hour in self._dirty if hour in self._hours}
+            rows = {
+                hour: {"order_count": bucket.order_count, "revenue": bucket.revenue,
+                       "item_counts": json.dumps(bucket.items.to_list())}
+                for hour, bucket in dirty.items()
+            }
+            self._dirty.clear()
+
+        table = AnalyticsSnapshot.__table__
+        try:
+            existing = set(db.execute(
+                select(table.c.bucket_start).where(table.c.worker_id == self.worker_id, table.c.bucket_start.in_(rows))
+            ).scalars()) if rows else set()
+            for hour, values in rows.items():
+                if hour in existing:
+                    db.execute(update(table).where(table.c.worker_id == self.worker_id, table.c.bucket_start == hour)
+                               .values(updated_at=now, **values))
+                else:
+                    db.execute(table.insert().values(worker_id=self.worker_id, bucket_start=hour, updated_at=now, **values))
+            db.execute(delete(table).where(table.c.bucket_start < cutoff))
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._dirty.update(rows)  # Saved again next time
+            raise
+        return len(rows)
+
+    def _saved_by_others(self, db: Session) -> Dict[datetime, _Hour]:
+        """Other workers' saved hours, re-read at most every persist_seconds"""
+        bind = db.get_bind()
+        engine = getattr(bind, "engine", bind)
+        cached = self._others.get(engine)
+        if cached is not None and time.monotonic() - cached[0] < self.persist_seconds:
+            return cached[1]
+
+        table = AnalyticsSnapshot.__table__
+        rows = db.execute(
+            select(table.c.bucket_start, table.c.order_count, table.c.revenue, table.c.item_counts)
+            .where(table.c.worker_id != self.worker_id, table.c.bucket_start >= hour_start(datetime.utcnow()) - RETAIN)
+        ).all()
+        hours: Dict[datetime, _Hour] = {}
+        for row in rows:
+            saved = _Hour(self.capacity)
+            saved.order_count = row.order_count
+            saved.revenue = row.revenue
+            saved.items = SpaceSaving.from_list(self.capacity, json.loads(row.item_counts) if row.item_counts else None)
+            hours.setdefault(row.bucket_start, _Hour(self.capacity)).merge(saved)
+        with self._lock:
+            self._others[engine] = (time.monotonic(), hours)
+        return hours
+
+    def hours(self, db: Session, start: datetime, end: datetime) -> Dict[datetime, _Hour]:
+        """Hours in [start, end) with this worker's live counters and every other worker's saved ones"""
+        merged: Dict[datetime, _Hour] = {}
+        for hour, saved in self._saved_by_others(db).items():
+            if start <= hour < end:
+                merged[hour] = _Hour(self.capacity).merge(saved)
+        with self._lock:
+            for hour, bucket in self._hours.items():
+                if start <= hour < end:
+                    merged.setdefault(hour, _Hour(self.capacity)).merge(bucket)
+        return merged
+
+    @staticmethod
+    def window(window: str, now: Optional[datetime] = None, tz: Optional[tzinfo] = None) -> Tuple[datetime, datetime]:
+        """[start, end) in UTC of "day" (today in `tz`, default UTC) or "hour" (the current hour)"""
+        now = now or datetime.utcnow()
+        if window == "hour":
+            start = hour_start(now)
+            return start, start + timedelta(hours=1)
+        midnight = to_local(now, tz).replace(hour=0, minute=0, second=0, microsecond=0)
+        # The UTC hours starting in the day: 23 or 25 when daylight saving time starts or ends
+        return _hour_ceiling(to_utc(midnight, tz)), _hour_ceiling(to_utc(midnight + timedelta(days=1), tz))
+
+    def top_items(self, db: Session, window: str = "day", limit: int = 10) -> Dict[str, Any]:
+        tz = SettingsService.get_timezone(db)
+        start, end = self.window(window, tz=tz)
+        items = SpaceSaving(self.capacity)
+        for bucket in self.hours(db, start, end).values():
+            items.merge(bucket.items)
+        return {
+            "window": window,
+            "start": to_local(start, tz).isoformat(),
+            "items": [
+                {
+                    "name": name,
+                    "category": category,
+                    "quantity": count,
+                    "revenue": round(revenue, 2),
+                    "average_price": round(revenue / count, 2) if count else 0,
+                    # Counts are exact when error is 0; otherwise over by at most error
+                    "error": error
+                }
+                for name, count, error, revenue, category in items.top(limit)
+            ]
+        }
+
+    def orders_per_hour(self, db: Session) -> Dict[str, Any]:
+        """Orders and revenue per local hour of today; both UTC hours of a repeated hour add up"""
+        tz = SettingsService.get_timezone(db)
+        start, end = self.window("day", tz=tz)
+        counts, revenue = [0] * 24, [0.0] * 24
+        for hour, bucket in self.hours(db, start, end).items():
+            local_hour = to_local(hour, tz).hour
+            counts[local_hour] += bucket.order_count
+            revenue[local_hour] += bucket.revenue
+        return {
+            "date": to_local(start, tz).date().isoformat(),
+            "hours": [
+                {
+                    "hour": hour,
+                    "order_count": counts[hour],
+                    "total_revenue": round(revenue[hour], 2),
+                    "average_order_value": round(revenue[hour] / counts[hour], 2) if counts[hour] else 0
+                }
+                for hour in range(24)
+            ]
+        }
+
+
+async def run_live_analytics_persistence(session_factory: Callable[[], Session], interval_seconds: float):
+    """Background task started by the app lifespan; saves this worker's counters every interval"""
+    def persist_once():
+        with session_factory() as db:
+            return live_analytics.persist(db)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(persist_once)
+        except Exception as e:
+            logger.error(f"Saving live analytics counters failed: {str(e)}")
+
+
+_config = Config()
+
+# Create a singleton instance
+live_analytics = LiveAnalytics(
+    capacity=_config.LIVE_ANALYTICS_CAPACITY,
+    persist_seconds=_config.LIVE_ANALYTICS_PERSIST_SECONDS
+)
+event_bus.subscribe(ORDER_PLACED, live_analytics.on_order_placed)
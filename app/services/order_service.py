@@ -0,0 +1,275 @@
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import json
+import logging
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.order import Order, OrderType
+    from app.models.kitchen import KitchenOrder, KitchenOrderStatus
+    from app.models.table import Table
+    from app.models.idempotency import IdempotencyKey
+    from app.schemas.order_schema import OrderCreate, OrderSyncItem
+    from app.services.idempotency_store import idempotency_store
+    from app.services.kitchen_sync_service import KitchenSyncService
+    from app.services.outbox_service import OutboxService
+    from app.services.seat_service import SeatService
+    from app.utils.events import event_bus, ORDER_PLACED
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.order import Order, OrderType
+    from models.kitchen import KitchenOrder, KitchenOrderStatus
+    from models.table import Table
+    from models.idempotency import IdempotencyKey
+    from schemas.order_schema import OrderCreate, OrderSyncItem
+    from services.idempotency_store import idempotency_store
+    from services.kitchen_sync_service import KitchenSyncService
+    from services.outbox_service import OutboxService
+    from services.seat_service import SeatService
+    from utils.events import event_bus, ORDER_PLACED
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+VALID_PAYMENT_TYPES = ("cash", "card", "qr", "e_wallet", "gift_card")
+
+
+class OrderService:
+    """Service class for placing orders"""
+
+    @staticmethod
+    def table_number(order: OrderCreate) -> Optional[int]:
+        """Numeric table number from the payload (the schema carries it as a string)"""
+        try:
+            return int(order.table_number) if order.table_number not in (None, "") else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def resolve_table(db: Session, order: OrderCreate) -> Optional[Table]:
+        """Look up the table referenced by table_number when no table_id was given"""
+        table_number = OrderService.table_number(order)
+        if table_number is None or order.table_id:
+            return None
+        return db.execute(select(Table).where(Table.table_number == table_number)).scalars().first()
+
+    @staticmethod
+    def is_dine_in(order: OrderCreate) -> bool:
+        order_type = order.order_type
+        if isinstance(order_type, OrderType):
+            return order_type == OrderType.DINE_IN
+        return isinstance(order_type, str) and order_type.lower() == OrderType.DINE_IN.value
+
+    @staticmethod
+    def build_order(order: OrderCreate, created_by: int, table: Optional[Table]) -> Order:
+        """Create the (unsaved) Order row for a payload"""
+        payment_type = order.payment_type
+        if payment_type and payment_type not in VALID_PAYMENT_TYPES:
+            payment_type = "cash"  # Default to cash if invalid
+
+        return Order(
+            total=order.total,
+            order_data=json.dumps([item.dict() for item in order.order]),
+            table_id=table.id if table else order.table_id,
+            customer_count=order.customer_count,
+            special_requests=order.special_requests,
+            created_by=created_by,
+            order_type=order.order_type,
+            table_number=OrderService.table_number(order),
+            customer_name=order.customer_name,
+            customer_phone=order.customer_phone,
+            delivery_address=order.delivery_address,
+            modifiers=json.dumps(order.modifiers) if order.modifiers else None,
+            assigned_seats=json.dumps(order.assigned_seats) if order.assigned_seats else None,
+            payment_type=payment_type
+        )
+
+    @staticmethod
+    def occupy_table(table: Table, db_order: Order):
+        """
+        Mark a table occupied by an order that may not be flushed yet
+
+        Its seats are occupied separately with SeatService.occupy(), which must run
+        before the order is added to the session so its UPDATE does not autoflush it.
+        """
+        table.is_occupied = True
+        table.status = "occupied"
+        # The relationship lets the table UPDATE follow the order INSERT in the same flush
+        table.current_order = db_order
+
+    @staticmethod
+    def place_order(db: Session, order: OrderCreate, created_by: int, idempotency_key: Optional[str] = None) -> Order:
+        """
+        Place an order in a single transaction
+
+        The order, its kitchen ticket, the table occupancy, the idempotency key and
+        the outbox event are written in one flush, after one UPDATE occupying the table's
+        seats, and in one commit; the ORDER_PLACED event is emitted only after the commit. A repeated idempotency key returns the order it created.
+
+        Args:
+            db: Database session
+            order: Validated order payload
+            created_by: ID of the user placing the order
+            idempotency_key: Optional client-supplied key identifying this request
+
+        Returns:
+            The committed Order
+        """
+        if idempotency_key:
+            existing_id = idempotency_store.lookup(db, [idempotency_key]).get(idempotency_key)
+            if existing_id is not None:
+                existing = db.get(Order, existing_id)
+                if existing is not None:
+                    return existing
+
+        table = OrderService.resolve_table(db, order)
+        occupies_table = table is not None and OrderService.is_dine_in(order)
+        if occupies_table:
+            SeatService.occupy(db, {table.id: order.customer_name})
+
+        db_order = OrderService.build_order(order, created_by, table)
+        db_order.kitchen_order = KitchenOrder(status=KitchenOrderStatus.PENDING.value)
+        db.add(db_order)
+        if idempotency_key:
+            db.add(IdempotencyKey(key=idempotency_key, order=db_order))
+
+        if occupies_table:
+            OrderService.occupy_table(table, db_order)
+        OutboxService.record(db, ORDER_PLACED, db_order, OutboxService.order_payload(db_order))
+
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if not idempotency_key:
+                raise
+            # Another worker committed the same key first; return its order
+            existing_id = idempotency_store.lookup(db, [idempotency_key]).get(idempotency_key)
+            if existing_id is None:
+                raise
+            return db.get(Order, existing_id)
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to place order: {str(e)}")
+            raise
+
+        if idempotency_key:
+            idempotency_store.remember({idempotency_key: db_order.id})
+        event_bus.emit(ORDER_PLACED, {
+            "order_id": db_order.id,
+            "kitchen_order_id": db_order.kitchen_order.id,
+            "table_id": db_order.table_id,
+            "created_by": created_by,
+            "created_at": db_order.created_at,
+            "total": db_order.total,
+            "order_data": db_order.order_data,
+        })
+        return db_order
+
+    @staticmethod
+    def sync_orders(db: Session, items: List[OrderSyncItem], created_by: int, _retry: bool = True) -> List[Dict[str, Any]]:
+        """
+        Insert a batch of client-generated orders, skipping ones already received
+
+        Each item's client_id is its idempotency key. New orders are inserted in one
+        flush, their kitchen tickets, keys and outbox events with one bulk INSERT each,
+        and everything is committed together.
+
+        Returns:
+            One {"client_id", "order_id", "status"} entry per item, in request order;
+            status is "created" or "duplicate"
+        """
+        batch: Dict[str, OrderSyncItem] = {}
+        for item in items:
+            batch.setdefault(item.client_id, item)
+
+        existing = idempotency_store.lookup(db, batch.keys())
+        new_items = {client_id: item for client_id, item in batch.items() if client_id not in existing}
+
+        created: Dict[str, Order] = {}
+        kitchen_ids: Dict[int, int] = {}
+        if new_items:
+            table_numbers = {n for n in (OrderService.table_number(item) for item in new_items.values()) if n is not None}
+            tables = {}
+            if table_numbers:
+                tables = {
+                    table.table_number: table
+                    for table in db.execute(select(Table).where(Table.table_number.in_(table_numbers))).scalars()
+                }
+
+            seated = {}
+            for client_id, item in new_items.items():
+                table = None if item.table_id else tables.get(OrderService.table_number(item))
+                created[client_id] = OrderService.build_order(item, created_by, table)
+                if table is not None and OrderService.is_dine_in(item):
+                    seated[client_id] = table
+
+            try:
+                # Seats are updated first, with one UPDATE per customer name; the last order for a table wins
+                if seated:
+                    SeatService.occupy(db, {table.id: new_items[client_id].customer_name for client_id, table in seated.items()})
+                for client_id, table in seated.items():
+                    OrderService.occupy_table(table, created[client_id])
+                db.add_all(created.values())
+                db.flush()
+
+                now = datetime.utcnow()
+                # Bulk inserts bypass the session hooks that stamp display versions
+                version = KitchenSyncService.next_version(db.connection())
+                kitchen_rows = db.execute(
+                    insert(KitchenOrder).returning(KitchenOrder.id, KitchenOrder.order_id),
+                    [
+                        {"order_id": db_order.id, "status": KitchenOrderStatus.PENDING.value, "created_at": now,
+                         "updated_at": now, "version": version}
+                        for db_order in created.values()
+                    ]
+                ).all()
+                kitchen_ids = {row.order_id: row.id for row in kitchen_rows}
+                idempotency_store.record(db, {client_id: db_order.id for client_id, db_order in created.items()})
+                OutboxService.record_many(db, [
+                    {"event_type": ORDER_PLACED, "order_id": db_order.id, "payload": OutboxService.order_payload(db_order)}
+                    for db_order in created.values()
+                ])
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                if not _retry:
+                    raise
+                # A concurrent request recorded some of these keys first; dedupe again
+                return OrderService.sync_orders(db, items, created_by, _retry=False)
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Failed to sync orders: {str(e)}")
+                raise
+
+            idempotency_store.remember({client_id: db_order.id for client_id, db_order in created.items()})
+            for db_order in created.values():
+                event_bus.emit(ORDER_PLACED, {
+                    "order_id": db_order.id,
+                    "kitchen_order_id": kitchen_ids.get(db_order.id),
+                    "table_id": db_order.table_id,
+                    "created_by": created_by,
+                    "created_at": db_order.created_at,
+                    "total": db_order.total,
+                    "order_data": db_order.order_data,
+                })
+
+        results = []
+        reported = set()
+        for item in items:
+            client_id = item.client_id
+            if client_id in created and client_id not in reported:
+                results.append({"client_id": client_id, "order_id": created[client_id].id, "status": "created"})
+            else:
+                order_id = created[client_id].id if client_id in created else existing[client_id]
+                results.append({"client_id": client_id, "order_id": order_id, "status": "duplicate"})
+            reported.add(client_id)
+        return results
+
+
+# Create a singleton instance
+order_service = OrderService()
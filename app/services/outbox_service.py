@@ -0,0 +1,151 @@
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+import json
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.order import Order, OrderStatus
+    from app.models.order_event import OrderEvent
+    from app.utils.events import ChangeNotifier
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.order import Order, OrderStatus
+    from models.order_event import OrderEvent
+    from utils.events import ChangeNotifier
+
+# Any constant works; it only has to be the same for every writer of order_events
+OUTBOX_LOCK_KEY = 0x6F726465
+
+_PENDING = "outbox_pending"
+_LOCKED = "outbox_locked"
+
+
+# Wakes change-feed requests in this worker; other workers' commits are picked up by
+# the feed's poll interval
+change_notifier = ChangeNotifier()
+
+
+class OutboxService:
+    """
+    Transactional outbox for order lifecycle events
+
+    Callers add events to the session that carries the change and commit as usual, so
+    an event exists exactly when its change does. On PostgreSQL, writers take a
+    transaction-scoped advisory lock before inserting, which makes seq order match
+    commit order and lets consumers resume from the last seq they saw.
+    """
+
+    @staticmethod
+    def order_payload(order: Order) -> Dict[str, Any]:
+        """Summary of an order carried by order events"""
+        def value(attr):
+            return getattr(attr, "value", attr)
+
+        return {
+            "status": value(order.status or OrderStatus.PENDING),
+            "order_type": value(order.order_type),
+            "table_id": order.table_id,
+            "table_number": order.table_number,
+            "total": order.total,
+            "payment_type": value(order.payment_type),
+            "payment_status": order.payment_status,
+        }
+
+    @staticmethod
+    def record(db: Session, event_type: str, order: Union[Order, int], payload: Optional[Dict[str, Any]] = None) -> OrderEvent:
+        """
+        Add an event to the caller's transaction
+
+        `order` may be an Order that has not been flushed yet; its id is filled in at flush.
+        For an AsyncSession pass `db.sync_session`.
+        """
+        order_event = OrderEvent(
+            event_type=event_type,
+            payload=json.dumps(payload, default=str) if payload is not None else None,
+            created_at=datetime.utcnow()
+        )
+        if isinstance(order, Order):
+            order_event.order = order
+        else:
+            order_event.order_id = order
+        db.add(order_event)
+        db.info[_PENDING] = True
+        return order_event
+
+    @staticmethod
+    def record_many(db: Session, events: Iterable[Dict[str, Any]]):
+        """Insert events for already-flushed orders with one statement; each needs event_type, order_id and payload"""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "event_type": e["event_type"],
+                "order_id": e["order_id"],
+                "payload": json.dumps(e["payload"], default=str) if e.get("payload") is not None else None,
+                "created_at": now,
+            }
+            for e in events
+        ]
+        if not rows:
+            return
+        _lock_outbox(db)
+        db.execute(insert(OrderEvent), rows)
+        db.info[_PENDING] = True
+
+    @staticmethod
+    def fetch(db: Session, after: int = 0, limit: int = 100, event_types: Optional[List[str]] = None) -> List[OrderEvent]:
+        """Events with seq greater than `after`, oldest first"""
+        query = select(OrderEvent).where(OrderEvent.seq > after)
+        if event_types:
+            query = query.where(OrderEvent.event_type.in_(event_types))
+        return list(db.execute(query.order_by(OrderEvent.seq).limit(limit)).scalars())
+
+    @staticmethod
+    def last_seq(db: Session) -> int:
+        return db.execute(select(OrderEvent.seq).order_by(OrderEvent.seq.desc()).limit(1)).scalar() or 0
+
+    @staticmethod
+    def to_dict(order_event: OrderEvent) -> Dict[str, Any]:
+        return {
+            "seq": order_event.seq,
+            "event_type": order_event.event_type,
+            "order_id": order_event.order_id,
+            "payload": json.loads(order_event.payload) if order_event.payload else {},
+            "created_at": order_event.created_at,
+        }
+
+
+def _lock_outbox(session: Session):
+    """Serialize outbox writers until commit so seq values become visible in order"""
+    if session.info.get(_LOCKED):
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": OUTBOX_LOCK_KEY})
+    session.info[_LOCKED] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    if any(isinstance(obj, OrderEvent) for obj in session.new):
+        _lock_outbox(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    session.info.pop(_LOCKED, None)
+    if session.info.pop(_PENDING, False):
+        change_notifier.notify()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_LOCKED, None)
+        session.info.pop(_PENDING, None)
+
+
+# Create a singleton instance
+outbox_service = OutboxService()
@@ -0,0 +1,193 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional
+import asyncio
+import logging
+import uuid
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentGatewayUnavailable(Exception):
+    """The gateway could not be reached, timed out or kept failing; the payment was not confirmed"""
+
+
+class PaymentGateway(ABC):
+    """
+    Interface to a card/QR/e-wallet processor
+
+    Both calls take an idempotency key: repeating a call with the same key (after a
+    timeout, or a client retry) must return the original result instead of charging
+    again. They return {"success": True, "reference", "processed_at"} or
+    {"success": False, "error"} for a decline, and raise PaymentGatewayUnavailable
+    when the outcome is unknown.
+    """
+
+    @abstractmethod
+    async def charge(self, payment_type: str, amount: float, idempotency_key: str,
+                     details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Charge `amount`; declines are results, not exceptions"""
+
+    @abstractmethod
+    async def refund(self, reference: Optional[str], amount: float, idempotency_key: str) -> Dict[str, Any]:
+        """Refund `amount` of the charge `reference`"""
+
+    async def aclose(self):
+        """Release pooled connections"""
+
+
+class SimulatedGateway(PaymentGateway):
+    """Approves everything after `latency` seconds; the default when no gateway is configured"""
+
+    def __init__(self, latency: float = 0.0, max_remembered: int = 10000):
+        self.latency = latency
+        self.max_remembered = max_remembered
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def _respond(self, prefix: str, idempotency_key: str) -> Dict[str, Any]:
+        result = self._results.get(idempotency_key)
+        if result is None:
+            result = self._results[idempotency_key] = {
+                "success": True,
+                "reference": f"{prefix}_{uuid.uuid4().hex[:16]}",
+                "processed_at": datetime.utcnow()
+            }
+            if len(self._results) > self.max_remembered:
+                self._results.popitem(last=False)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return result
+
+    async def charge(self, payment_type, amount, idempotency_key, details=None):
+        return await self._respond("txn", idempotency_key)
+
+    async def refund(self, reference, amount, idempotency_key):
+        return await self._respond("refund", idempotency_key)
+
+
+class HttpPaymentGateway(PaymentGateway):
+    """
+    JSON-over-HTTP gateway client on a pooled httpx.AsyncClient
+
+    POST /charges {"amount", "payment_type", "details"} and POST /refunds {"charge_id",
+    "amount"}, each with an Idempotency-Key header; the response carries "id" and
+    "status" ("succeeded" or "declined", with "decline_reason"). A 402 is a decline.
+
+    Timeouts, transport errors, 429 and 5xx responses are retried with the same
+    idempotency key (so a retry can never charge twice); once retries are exhausted the
+    failure counts towards the circuit breaker and PaymentGatewayUnavailable is raised.
+    While the circuit is open, calls fail immediately without waiting for a timeout.
+    httpx is imported only when this gateway is created.
+    """
+
+    def __init__(self, base_url: str, api_key: str = "", timeout: float = 5.0, max_connections: int = 20,
+                 retries: int = 2, retry_backoff: float = 0.1, breaker: Optional[CircuitBreaker] = None,
+                 transport: Optional["httpx.AsyncBaseTransport"] = None):
+        import httpx
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 2.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport
+        )
+        self._transport_error = httpx.TransportError
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+
+    async def _post(self, path: str, payload: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            raise PaymentGatewayUnavailable(str(e)) from e
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.client.post(path, json=payload, headers={"Idempotency-Key": idempotency_key})
+                    if response.status_code != 429 and response.status_code < 500:
+                        break
+                    problem = f"HTTP {response.status_code}"
+                except self._transport_error as e:  # Timeouts, refused and dropped connections
+                    problem = f"{type(e).__name__}: {str(e)}"
+                logger.warning(f"Payment gateway {path} attempt {attempt + 1}/{self.retries + 1} failed: {problem}")
+                if attempt < self.retries:
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            else:
+                self.breaker.record_failure()
+                raise PaymentGatewayUnavailable(f"Payment gateway unavailable ({problem})")
+        except PaymentGatewayUnavailable:
+            raise
+        except BaseException:
+            # Cancelled or unexpected: the outcome is unknown, do not leave a trial call hanging
+            self.breaker.record_failure()
+            raise
+
+        # The gateway answered; declines and bad requests are not gateway failures
+        self.breaker.record_success()
+        body = response.json() if response.content else {}
+        if response.status_code == 402 or body.get("status") == "declined":
+            return {"success": False, "error": body.get("decline_reason") or "Payment declined"}
+        if response.status_code >= 400:
+            return {"success": False, "error": body.get("detail") or f"Payment gateway rejected the request (HTTP {response.status_code})"}
+        return {"success": True, "reference": body.get("id"), "processed_at": datetime.utcnow()}
+
+    async def charge(self, payment_type, amount, idempotency_key, details=None):
+        return await self._post("/charges", {"amount": amount, "payment_type": payment_type, "details": details or {}}, idempotency_key)
+
+    async def refund(self, reference, amount, idempotency_key):
+        return await self._post("/refunds", {"charge_id": reference, "amount": amount}, idempotency_key)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def create_payment_gateway(config: Config) -> PaymentGateway:
+    """The gateway selected by PAYMENT_GATEWAY ("simulated" or "http")"""
+    if config.PAYMENT_GATEWAY == "http":
+        return HttpPaymentGateway(
+            base_url=config.PAYMENT_GATEWAY_URL,
+            api_key=config.PAYMENT_GATEWAY_API_KEY,
+            timeout=config.PAYMENT_GATEWAY_TIMEOUT_SECONDS,
+            max_connections=config.PAYMENT_GATEWAY_MAX_CONNECTIONS,
+            retries=config.PAYMENT_GATEWAY_RETRIES,
+            breaker=CircuitBreaker(config.PAYMENT_GATEWAY_BREAKER_FAILURES, config.PAYMENT_GATEWAY_BREAKER_RESET_SECONDS)
+        )
+    return SimulatedGateway(latency=config.PAYMENT_GATEWAY_SIMULATED_LATENCY_MS / 1000)
+
+
+_payment_gateway: Optional[PaymentGateway] = None
+
+
+def get_payment_gateway() -> PaymentGateway:
+    """
+    The configured gateway, created on first use; its connection pool is shared by
+    every request in this worker
+    """
+    global _payment_gateway
+    if _payment_gateway is None:
+        _payment_gateway = create_payment_gateway(Config())
+    return _payment_gateway
+
+
+async def close_payment_gateway():
+    """Release the gateway's pooled connections at shutdown, if it was ever used"""
+    if _payment_gateway is not None:
+        await _payment_gateway.aclose()
+
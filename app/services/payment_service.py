@@ -1,6 +1,20 @@
+from sqlalchemy import func, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.order import Order, PaymentType
 from app.models.invoice import Invoice
+from app.models.archive import OrderArchive
+from app.models.payment_attempt import (
+    PaymentAttempt, ATTEMPT_DECLINED, ATTEMPT_PENDING, ATTEMPT_RECORDED, ATTEMPT_UNRECORDED, ATTEMPT_VOIDED
+)
+from app.models.user import User
+from app.services.outbox_service import OutboxService
+from app.services.payment_gateway import PaymentGateway, PaymentGatewayUnavailable, get_payment_gateway
+from app.services.tax_ledger_service import TaxLedgerService
+from app.utils.concurrency import retry_on_conflict
+from app.utils.events import PAYMENT_COMPLETED, PAYMENT_REFUNDED
+from app.utils.time_buckets import time_bucket, bucket_start
 from typing import Dict, Any, Optional
 from datetime import datetime
 import logging
@@ -51,273 +65,550 @@ class PaymentService:
         return PaymentService.PAYMENT_METHODS.get(payment_type, {})
     
     @staticmethod
-    def process_payment(db: Session, order_id: int, payment_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _check_payment(db: Session, order_id: int, payment_type: str, amount: float) -> Dict[str, Any]:
+        """Validate a payment against the order; returns the order version on success"""
+        order = db.get(Order, order_id)
+        if not order:
+            return {
+                "success": False,
+                "error": "Order not found"
+            }
+
+        # Validate payment type
+        if not PaymentService.validate_payment_type(payment_type):
+            return {
+                "success": False,
+                "error": f"Invalid payment type: {payment_type}"
+            }
+
+        # Check if amount matches order total
+        if amount != order.total:
+            return {
+                "success": False,
+                "error": "Payment amount does not match order total"
+            }
+
+        # A paid order must not be charged again under a new attempt key
+        if order.payment_status == "completed":
+            return {
+                "success": False,
+                "error": "Order has already been paid"
+            }
+
+        return {"success": True, "version": order.version}
+
+    @staticmethod
+    def _attempt_key(kind: str, order_id: int, idempotency_key: Optional[str], version: int) -> str:
+        """
+        The gateway idempotency key of a charge or refund attempt
+
+        Always scoped to the order, so a client reusing its Idempotency-Key for another
+        order cannot be handed the first order's result; without a client key, one
+        attempt per order version.
+        """
+        attempt = f"key-{idempotency_key}" if idempotency_key else f"v{version}"
+        return f"{kind}-{order_id}-{attempt}"
+
+    @staticmethod
+    def _recorded_attempt(db: Session, kind: str, order_id: int, idempotency_key: Optional[str]) -> Optional[PaymentAttempt]:
+        """The attempt already recorded under the client's Idempotency-Key, if any"""
+        if not idempotency_key:
+            return None
+        key = PaymentService._attempt_key(kind, order_id, idempotency_key, None)
+        return db.execute(
+            select(PaymentAttempt).where(PaymentAttempt.idempotency_key == key, PaymentAttempt.status == ATTEMPT_RECORDED)
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def _replay_payment(db: Session, order_id: int, idempotency_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The original result of a payment already recorded under this key"""
+        attempt = PaymentService._recorded_attempt(db, "payment", order_id, idempotency_key)
+        if attempt is None:
+            return None
+        invoice = db.query(Invoice).filter(Invoice.order_id == order_id).first()
+        return {
+            "success": True,
+            "order_id": order_id,
+            "payment_type": attempt.payment_type,
+            "amount": attempt.amount,
+            "timestamp": attempt.updated_at,
+            "invoice_id": invoice.id if invoice else None,
+            "reference": attempt.reference
+        }
+
+    @staticmethod
+    def _replay_refund(db: Session, order_id: int, idempotency_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The original result of a refund already recorded under this key"""
+        attempt = PaymentService._recorded_attempt(db, "refund", order_id, idempotency_key)
+        if attempt is None:
+            return None
+        return {
+            "success": True,
+            "order_id": order_id,
+            "payment_type": attempt.payment_type,
+            "refunded_amount": attempt.amount,
+            "timestamp": attempt.updated_at,
+            "reference": attempt.reference
+        }
+
+    @staticmethod
+    def _begin_attempt(db: Session, key: str, order_id: int, payment_type: str, amount: float) -> Dict[str, Any]:
+        """Record a pending charge or refund attempt, and commit, before the gateway is called"""
+        attempt = db.execute(select(PaymentAttempt).where(PaymentAttempt.idempotency_key == key)).scalar_one_or_none()
+        if attempt is None:
+            db.add(PaymentAttempt(idempotency_key=key, order_id=order_id, payment_type=payment_type,
+                                  amount=amount, status=ATTEMPT_PENDING))
+            try:
+                db.commit()
+                return {"success": True}
+            except IntegrityError:
+                # A concurrent request with the same key recorded it first
+                db.rollback()
+                attempt = db.execute(select(PaymentAttempt).where(PaymentAttempt.idempotency_key == key)).scalar_one()
+        error = None
+        if attempt.status == ATTEMPT_VOIDED:
+            # The gateway would replay the charge that was refunded
+            error = "This payment attempt was voided; retry with a new Idempotency-Key"
+        elif attempt.amount != amount:
+            error = "Idempotency-Key was already used for a different amount"
+        db.rollback()
+        return {"success": False, "error": error} if error else {"success": True}
+
+    @staticmethod
+    def _finish_attempt(db: Session, key: str, status: str, reference: Optional[str] = None):
+        """Set an attempt's outcome and commit"""
+        attempt = db.execute(select(PaymentAttempt).where(PaymentAttempt.idempotency_key == key)).scalar_one()
+        attempt.status = status
+        if reference:
+            attempt.reference = reference
+        db.commit()
+
+    @staticmethod
+    async def _void_charge(db: AsyncSession, gateway: PaymentGateway, order_id: int, key: str,
+                           reference: Optional[str], amount: float, error: str) -> Dict[str, Any]:
+        """Refund a charge that could not be recorded on its order"""
+        # Marked first: if the mark fails the charge is not refunded, and a retry with
+        # the same key records it or gets here again
+        await db.run_sync(lambda session: PaymentService._finish_attempt(session, key, ATTEMPT_VOIDED, reference))
+        try:
+            voided = await gateway.refund(reference, amount, f"void-{key}")
+        except PaymentGatewayUnavailable as e:
+            voided = {"success": False, "error": str(e)}
+        if voided["success"]:
+            logger.warning(f"Voided charge {reference} for order {order_id}: {error}")
+            return {"success": False, "error": f"{error}; the charge was voided", "reference": reference, "voided": True}
+
+        logger.error(f"Charge {reference} for order {order_id} could not be recorded ({error}) "
+                     f"or voided ({voided['error']}); attempt {key} needs reconciling")
+        await db.run_sync(lambda session: PaymentService._finish_attempt(session, key, ATTEMPT_UNRECORDED, reference))
+        return {
+            "success": False,
+            "error": f"{error}; the charge could not be voided and was flagged for reconciliation",
+            "reference": reference,
+            "voided": False
+        }
+
+    @staticmethod
+    def _record_payment(db: Session, order_id: int, payment_type: str, amount: float,
+                        reference: Optional[str], terminal_id: Optional[str],
+                        attempt_key: Optional[str] = None) -> Dict[str, Any]:
+        """Mark the order paid, and its charge attempt recorded; run under retry_on_conflict, so it re-reads the order"""
+        order = db.get(Order, order_id)
+        if not order:
+            return {
+                "success": False,
+                "error": "Order not found"
+            }
+        if order.payment_status == "completed":
+            # A concurrent request with the same idempotency key recorded this charge first
+            if reference is not None and order.payment_reference == reference:
+                return {"success": True}
+            return {
+                "success": False,
+                "error": "Order has already been paid"
+            }
+
+        if reference:
+            order.payment_reference = reference
+        order.payment_type = payment_type
+        order.payment_status = "completed"
+        order.paid_at = datetime.utcnow()
+        if terminal_id:
+            order.terminal_id = terminal_id
+        # Tax is fixed now, at the current rate; reports read it back from the ledger
+        TaxLedgerService.record_sale(db, order, recorded_at=order.paid_at)
+        OutboxService.record(db, PAYMENT_COMPLETED, order.id, {
+            "payment_type": payment_type,
+            "amount": amount,
+            "payment_reference": order.payment_reference,
+        })
+        if attempt_key:
+            attempt = db.execute(select(PaymentAttempt).where(PaymentAttempt.idempotency_key == attempt_key)).scalar_one()
+            attempt.status = ATTEMPT_RECORDED
+            attempt.reference = reference
+        return {"success": True}
+
+    @staticmethod
+    def _ensure_invoice(db: Session, order_id: int) -> Optional[Invoice]:
+        """Create the invoice for a paid order if it doesn't exist"""
+        invoice = db.query(Invoice).filter(Invoice.order_id == order_id).first()
+        if not invoice:
+            from app.services.invoice_service import invoice_service
+            try:
+                invoice = invoice_service.create_invoice_from_order(db, order_id)
+            except Exception as e:
+                logger.error(f"Failed to create invoice for order {order_id}: {str(e)}")
+        return invoice
+
+    @staticmethod
+    async def process_payment(db: AsyncSession, order_id: int, payment_data: Dict[str, Any],
+                              idempotency_key: Optional[str] = None,
+                              gateway: Optional[PaymentGateway] = None) -> Dict[str, Any]:
         """
         Process a payment for an order
-        
+
+        The order is validated and the transaction closed before the gateway is called,
+        so no database connection is held while the processor answers. The charge is
+        sent with an idempotency key per payment attempt (the order id with the client's
+        Idempotency-Key header, else with the order version), so retrying after a
+        timeout returns the original charge instead of charging twice.
+
+        The attempt is recorded as pending before the charge. A charge that cannot be
+        recorded because the order was paid or removed meanwhile is voided; one that
+        cannot be recorded because the database failed stays pending, to be recorded by
+        a retry with the same key or reconciled. A retry with the key of a recorded
+        charge returns the original result.
+
         Args:
-            db: Database session
+            db: Async database session
             order_id: ID of the order to process payment for
             payment_data: Payment information (method, amount, etc.)
-            
+            idempotency_key: Key identifying this payment attempt (optional)
+            gateway: Gateway to charge through (defaults to the configured one)
+
         Returns:
             Dict containing payment result information
+
+        Raises:
+            PaymentGatewayUnavailable: the gateway could not confirm the charge
         """
+        payment_type = payment_data.get("payment_type", "cash")
+        amount = payment_data.get("amount", 0)
         try:
-            # Get the order
-            order = db.query(Order).filter(Order.id == order_id).first()
-            if not order:
-                return {
-                    "success": False,
-                    "error": "Order not found"
-                }
-            
-            # Validate payment type
-            payment_type = payment_data.get("payment_type", "cash")
-            if not PaymentService.validate_payment_type(payment_type):
-                return {
-                    "success": False,
-                    "error": f"Invalid payment type: {payment_type}"
-                }
-            
-            # Get payment method info
-            payment_method = PaymentService.PAYMENT_METHODS[payment_type]
-            
-            # Check if amount matches order total
-            amount = payment_data.get("amount", 0)
-            if amount != order.total:
-                return {
-                    "success": False,
-                    "error": "Payment amount does not match order total"
-                }
-            
+            # Before the checks: the order this charge paid now reads as already paid
+            replayed = await db.run_sync(lambda session: PaymentService._replay_payment(session, order_id, idempotency_key))
+            if replayed:
+                await db.rollback()
+                return replayed
+            check = await db.run_sync(lambda session: PaymentService._check_payment(session, order_id, payment_type, amount))
+            if not check["success"]:
+                return check
+            await db.rollback()
+
             # Process payment based on method
-            if payment_method["requires_processing"]:
-                # For methods that require processing (card, QR, e-wallet, gift card)
-                # In a real implementation, this would connect to payment processors
-                processing_result = PaymentService._simulate_payment_processing(payment_data)
+            gateway = gateway or get_payment_gateway()
+            reference = None
+            key = None
+            if PaymentService.PAYMENT_METHODS[payment_type]["requires_processing"]:
+                key = PaymentService._attempt_key("payment", order_id, idempotency_key, check["version"])
+                begun = await db.run_sync(lambda session: PaymentService._begin_attempt(session, key, order_id, payment_type, amount))
+                if not begun["success"]:
+                    return begun
+                processing_result = await gateway.charge(payment_type, amount, key, payment_data.get("details"))
                 if not processing_result["success"]:
+                    await db.run_sync(lambda session: PaymentService._finish_attempt(session, key, ATTEMPT_DECLINED))
                     return processing_result
-                
-                # Update order with payment reference if provided
-                payment_reference = processing_result.get("reference")
-                if payment_reference:
-                    order.payment_reference = payment_reference
-            
-            # Update order payment type and status
-            order.payment_type = payment_type
-            order.payment_status = "completed"
-            order.paid_at = datetime.utcnow()
-            
-            # Commit changes
-            db.commit()
-            db.refresh(order)
-            
-            # Create invoice if it doesn't exist
-            invoice = db.query(Invoice).filter(Invoice.order_id == order_id).first()
-            if not invoice:
-                from app.services.invoice_service import invoice_service
-                try:
-                    invoice = invoice_service.create_invoice_from_order(db, order_id)
-                except Exception as e:
-                    logger.error(f"Failed to create invoice for order {order_id}: {str(e)}")
-            
+                reference = processing_result.get("reference")
+
+            try:
+                recorded = await db.run_sync(lambda session: retry_on_conflict(
+                    session,
+                    lambda s: PaymentService._record_payment(s, order_id, payment_type, amount, reference,
+                                                             payment_data.get("terminal_id"), key)
+                ))
+            except Exception as e:
+                if key is None:
+                    raise
+                # The attempt stays pending: the same key replays this charge, and records it
+                await db.rollback()
+                logger.error(f"Order {order_id} was charged ({reference}) but the payment could not be recorded: {str(e)}")
+                return {
+                    "success": False,
+                    "error": "The payment was charged but could not be recorded; retry with the same Idempotency-Key",
+                    "reference": reference
+                }
+            if not recorded["success"]:
+                if key is not None:
+                    return await PaymentService._void_charge(db, gateway, order_id, key, reference, amount, recorded["error"])
+                return recorded
+            invoice = await db.run_sync(lambda session: PaymentService._ensure_invoice(session, order_id))
+
             return {
                 "success": True,
                 "order_id": order_id,
                 "payment_type": payment_type,
                 "amount": amount,
                 "timestamp": datetime.utcnow(),
-                "invoice_id": invoice.id if invoice else None
+                "invoice_id": invoice.id if invoice else None,
+                "reference": reference
             }
-            
+
+        except PaymentGatewayUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error processing payment for order {order_id}: {str(e)}")
-            db.rollback()
+            await db.rollback()
             return {
                 "success": False,
                 "error": f"Payment processing failed: {str(e)}"
             }
-    
+
     @staticmethod
-    def _simulate_payment_processing(payment_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Simulate payment processing (in a real system, this would connect to payment gateways)
-        
-        Args:
-            payment_data: Payment information
-            
-        Returns:
-            Dict containing processing result
-        """
-        # In a real implementation, this would:
-        # 1. Connect to payment processor API
-        # 2. Send payment details
-        # 3. Wait for response
-        # 4. Handle success/failure
-        
-        # For simulation, we'll just return success
+    def _check_refund(db: Session, order_id: int) -> Dict[str, Any]:
+        """Validate a refund against the order; returns what the gateway call needs"""
+        order = db.get(Order, order_id)
+        if not order:
+            return {
+                "success": False,
+                "error": "Order not found"
+            }
+
+        # Check if order was paid
+        if not order.payment_status or order.payment_status != "completed":
+            return {
+                "success": False,
+                "error": "Order has not been paid"
+            }
+
+        # Check if a refund has already been processed
+        if order.refund_status == "completed":
+            return {
+                "success": False,
+                "error": "Order has already been refunded"
+            }
+
         return {
             "success": True,
-            "reference": f"txn_{int(datetime.utcnow().timestamp())}",
-            "processed_at": datetime.utcnow()
+            "payment_type": getattr(order.payment_type, "value", order.payment_type) or "cash",
+            "payment_reference": order.payment_reference,
+            "amount": order.total,
+            "version": order.version
         }
-    
+
+    @staticmethod
+    def _record_refund(db: Session, order_id: int, attempt_key: Optional[str] = None,
+                       reference: Optional[str] = None) -> Dict[str, Any]:
+        """Mark the order and its invoice refunded, and its refund attempt recorded; run under retry_on_conflict"""
+        order = db.get(Order, order_id)
+        if not order:
+            return {
+                "success": False,
+                "error": "Order not found"
+            }
+        if order.refund_status == "completed":
+            # Recorded by a concurrent retry of the same refund
+            return {"success": True}
+
+        # Update order with refund information
+        order.refund_status = "completed"
+        order.refunded_at = datetime.utcnow()
+        TaxLedgerService.record_refund(db, order.id, recorded_at=order.refunded_at)
+
+        # Optionally update invoice
+        invoice = db.query(Invoice).filter(Invoice.order_id == order_id).first()
+        if invoice:
+            invoice.refund_status = "completed"
+            invoice.refunded_at = datetime.utcnow()
+        OutboxService.record(db, PAYMENT_REFUNDED, order.id, {
+            "payment_type": getattr(order.payment_type, "value", order.payment_type),
+            "refunded_amount": order.total,
+        })
+        if attempt_key:
+            attempt = db.execute(select(PaymentAttempt).where(PaymentAttempt.idempotency_key == attempt_key)).scalar_one()
+            attempt.status = ATTEMPT_RECORDED
+            attempt.reference = reference
+        return {"success": True}
+
     @staticmethod
-    def refund_payment(db: Session, order_id: int, refund_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def refund_payment(db: AsyncSession, order_id: int, refund_data: Dict[str, Any],
+                             idempotency_key: Optional[str] = None,
+                             gateway: Optional[PaymentGateway] = None) -> Dict[str, Any]:
         """
         Process a refund for a paid order
-        
+
+        Like process_payment, the gateway is called outside any transaction with an
+        idempotency key per refund attempt, recorded as pending first. A retry with the
+        key of a recorded refund returns the original result.
+
         Args:
-            db: Database session
+            db: Async database session
             order_id: ID of the order to refund
             refund_data: Refund information
-            
+            idempotency_key: Key identifying this refund attempt (optional)
+            gateway: Gateway to refund through (defaults to the configured one)
+
         Returns:
             Dict containing refund result information
+
+        Raises:
+            PaymentGatewayUnavailable: the gateway could not confirm the refund
         """
         try:
-            # Get the order
-            order = db.query(Order).filter(Order.id == order_id).first()
-            if not order:
-                return {
-                    "success": False,
-                    "error": "Order not found"
-                }
-            
-            # Check if order was paid
-            if not order.payment_status or order.payment_status != "completed":
-                return {
-                    "success": False,
-                    "error": "Order has not been paid"
-                }
-            
-            # Check if a refund has already been processed
-            if hasattr(order, 'refund_status') and order.refund_status == "completed":
-                return {
-                    "success": False,
-                    "error": "Order has already been refunded"
-                }
-            
+            # Before the checks: the order this refund recorded now reads as already refunded
+            replayed = await db.run_sync(lambda session: PaymentService._replay_refund(session, order_id, idempotency_key))
+            if replayed:
+                await db.rollback()
+                return replayed
+            check = await db.run_sync(lambda session: PaymentService._check_refund(session, order_id))
+            if not check["success"]:
+                return check
+            await db.rollback()
+
             # Process refund based on payment method
-            payment_type = order.payment_type
-            payment_method = PaymentService.PAYMENT_METHODS.get(payment_type, {})
-            
-            if payment_method.get("requires_processing", False):
-                # For methods that require processing, simulate refund
-                refund_result = PaymentService._simulate_refund_processing(order, refund_data)
+            payment_type = check["payment_type"]
+            reference = None
+            key = None
+            if PaymentService.PAYMENT_METHODS.get(payment_type, {}).get("requires_processing", False):
+                key = PaymentService._attempt_key("refund", order_id, idempotency_key, check["version"])
+                begun = await db.run_sync(lambda session: PaymentService._begin_attempt(session, key, order_id, payment_type, check["amount"]))
+                if not begun["success"]:
+                    return begun
+                refund_result = await (gateway or get_payment_gateway()).refund(check["payment_reference"], check["amount"], key)
                 if not refund_result["success"]:
+                    await db.run_sync(lambda session: PaymentService._finish_attempt(session, key, ATTEMPT_DECLINED))
                     return refund_result
-            
-            # Update order with refund information
-            order.refund_status = "completed"
-            order.refunded_at = datetime.utcnow()
-            
-            # Optionally update invoice
-            invoice = db.query(Invoice).filter(Invoice.order_id == order_id).first()
-            if invoice:
-                invoice.refund_status = "completed"
-                invoice.refunded_at = datetime.utcnow()
-            
-            # Commit changes
-            db.commit()
-            db.refresh(order)
-            
+                reference = refund_result.get("reference")
+            reference = reference or f"refund_{int(datetime.utcnow().timestamp())}"
+
+            try:
+                recorded = await db.run_sync(lambda session: retry_on_conflict(
+                    session, lambda s: PaymentService._record_refund(s, order_id, key, reference)
+                ))
+            except Exception as e:
+                if key is None:
+                    raise
+                # The attempt stays pending: the same key replays this refund, and records it
+                await db.rollback()
+                logger.error(f"Order {order_id} was refunded ({reference}) but the refund could not be recorded: {str(e)}")
+                return {
+                    "success": False,
+                    "error": "The refund was made but could not be recorded; retry with the same Idempotency-Key",
+                    "reference": reference
+                }
+            if not recorded["success"]:
+                if key is not None:
+                    # A refund cannot be voided; leave it for reconciliation
+                    logger.error(f"Refund {reference} for order {order_id} could not be recorded ({recorded['error']}); "
+                                 f"attempt {key} needs reconciling")
+                    await db.run_sync(lambda session: PaymentService._finish_attempt(session, key, ATTEMPT_UNRECORDED, reference))
+                return recorded
+
             return {
                 "success": True,
                 "order_id": order_id,
                 "payment_type": payment_type,
-                "refunded_amount": order.total,
+                "refunded_amount": check["amount"],
                 "timestamp": datetime.utcnow(),
-                "reference": f"refund_{int(datetime.utcnow().timestamp())}"
+                "reference": reference
             }
-            
+
+        except PaymentGatewayUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error processing refund for order {order_id}: {str(e)}")
-            db.rollback()
+            await db.rollback()
             return {
                 "success": False,
                 "error": f"Refund processing failed: {str(e)}"
             }
-    
-    @staticmethod
-    def _simulate_refund_processing(order: Order, refund_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Simulate refund processing (in a real system, this would connect to payment gateways)
-        
-        Args:
-            order: Order to refund
-            refund_data: Refund information
-            
-        Returns:
-            Dict containing refund processing result
-        """
-        # In a real implementation, this would:
-        # 1. Connect to payment processor API
-        # 2. Send refund request
-        # 3. Wait for response
-        # 4. Handle success/failure
-        
-        # For simulation, we'll just return success
-        return {
-            "success": True,
-            "reference": f"refund_{int(datetime.utcnow().timestamp())}",
-            "processed_at": datetime.utcnow()
-        }
-    
+
     @staticmethod
-    def get_payment_summary(db: Session, start_date: Optional[datetime] = None, 
-                           end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    def get_payment_summary(db: Session, start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None, group_by: Optional[str] = None,
+                           by_terminal: bool = False, by_staff: bool = False) -> Dict[str, Any]:
         """
         Get payment summary statistics
-        
+
+        Every figure is a grouped aggregate computed by the database; no order rows are
+        loaded. The totals and the time breakdown are read from the
+        (payment_status, paid_at, payment_type, total) index alone; the terminal and
+        staff breakdowns also read the matching rows.
+
         Args:
             db: Database session
             start_date: Start date for filtering (optional)
             end_date: End date for filtering (optional)
-            
+            group_by: "hour" or "day" to add a time breakdown (optional)
+            by_terminal: Add a breakdown per payment terminal
+            by_staff: Add a breakdown per staff member who took the order
+
         Returns:
             Dict containing payment summary information
         """
         try:
-            # Build query for orders
-            query = db.query(Order)
-            
-            # Apply date filters if provided
-            if start_date:
-                query = query.filter(Order.paid_at >= start_date)
-            if end_date:
-                query = query.filter(Order.paid_at <= end_date)
-            
-            # Get all paid orders
-            paid_orders = query.filter(Order.payment_status == "completed").all()
-            
-            # Calculate summary statistics
-            total_revenue = sum(order.total for order in paid_orders)
-            
-            # Group by payment type
+            def grouped(key):
+                # Aggregated in each of the hot and archive tables, then combined: grouping
+                # over the order_history() union would materialize every matching row first,
+                # while each half on its own is answered from the summary index
+                parts = []
+                for orders in (Order.__table__, OrderArchive.__table__):
+                    group = key(orders.c).label("group_key")
+                    filters = [orders.c.payment_status == "completed"]
+                    if start_date:
+                        filters.append(orders.c.paid_at >= start_date)
+                    if end_date:
+                        filters.append(orders.c.paid_at <= end_date)
+                    parts.append(
+                        select(group, func.count().label("count"), func.sum(orders.c.total).label("amount"))
+                        .where(*filters)
+                        .group_by(group)
+                    )
+                partial = union_all(*parts).subquery()
+                return db.execute(
+                    select(partial.c.group_key, func.sum(partial.c.count), func.coalesce(func.sum(partial.c.amount), 0.0))
+                    .group_by(partial.c.group_key)
+                    .order_by(partial.c.group_key)
+                ).all()
+
+            # Group by payment type; orders without one were paid in cash
             payment_type_breakdown = {}
-            for order in paid_orders:
-                payment_type = order.payment_type if order.payment_type else "cash"
-                if payment_type not in payment_type_breakdown:
-                    payment_type_breakdown[payment_type] = {
-                        "count": 0,
-                        "amount": 0.0
-                    }
-                payment_type_breakdown[payment_type]["count"] += 1
-                payment_type_breakdown[payment_type]["amount"] += order.total
-            
-            return {
+            for payment_type, count, amount in grouped(lambda orders: orders.payment_type):
+                key = getattr(payment_type, "value", payment_type) or PaymentType.CASH.value
+                entry = payment_type_breakdown.setdefault(key, {"count": 0, "amount": 0.0})
+                entry["count"] += count
+                entry["amount"] += float(amount)
+
+            summary = {
                 "success": True,
-                "total_revenue": total_revenue,
-                "total_transactions": len(paid_orders),
+                "total_revenue": sum(entry["amount"] for entry in payment_type_breakdown.values()),
+                "total_transactions": sum(entry["count"] for entry in payment_type_breakdown.values()),
                 "payment_type_breakdown": payment_type_breakdown,
                 "period": {
                     "start_date": start_date.isoformat() if start_date else None,
                     "end_date": end_date.isoformat() if end_date else None
                 }
             }
-            
+
+            if group_by:
+                summary["time_breakdown"] = [
+                    {"period": bucket_start(period), "count": count, "amount": float(amount)}
+                    for period, count, amount in grouped(lambda orders: time_bucket(db, orders.paid_at, group_by))
+                ]
+            if by_terminal:
+                summary["terminal_breakdown"] = [
+                    {"terminal_id": terminal_id, "count": count, "amount": float(amount)}
+                    for terminal_id, count, amount in grouped(lambda orders: orders.terminal_id)
+                ]
+            if by_staff:
+                rows = grouped(lambda orders: orders.created_by)
+                user_ids = [user_id for user_id, _, _ in rows if user_id is not None]
+                usernames = dict(db.execute(select(User.id, User.username).where(User.id.in_(user_ids))).all()) if user_ids else {}
+                summary["staff_breakdown"] = [
+                    {"user_id": user_id, "username": usernames.get(user_id), "count": count, "amount": float(amount)}
+                    for user_id, count, amount in rows
+                ]
+            return summary
+
         except Exception as e:
             logger.error(f"Error generating payment summary: {str(e)}")
             return {
@@ -0,0 +1,174 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.models.reservation import (
+        Reservation, ACTIVE_RESERVATION_STATUSES, RESERVATION_BOOKED, RESERVATION_CANCELLED,
+        RESERVATION_COMPLETED, RESERVATION_NO_SHOW, RESERVATION_SEATED
+    )
+    from app.models.table import Table
+    from app.schemas.reservation_schema import ReservationCreate, ReservationUpdate
+    from app.services.availability_service import availability_index
+    from app.utils.concurrency import ConflictError
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from models.reservation import (
+        Reservation, ACTIVE_RESERVATION_STATUSES, RESERVATION_BOOKED, RESERVATION_CANCELLED,
+        RESERVATION_COMPLETED, RESERVATION_NO_SHOW, RESERVATION_SEATED
+    )
+    from models.table import Table
+    from schemas.reservation_schema import ReservationCreate, ReservationUpdate
+    from services.availability_service import availability_index
+    from utils.concurrency import ConflictError
+
+config = Config()
+
+RESERVATION_STATUSES = (
+    RESERVATION_BOOKED, RESERVATION_SEATED, RESERVATION_CANCELLED, RESERVATION_COMPLETED, RESERVATION_NO_SHOW
+)
+
+
+class ReservationService:
+    """
+    Reservation writes
+
+    The database is authoritative for overlaps: the availability index is used to pick
+    candidate tables, but every write locks the table row (SELECT ... FOR UPDATE where the
+    database supports it), writes the reservation and then checks the table's other active
+    bookings in SQL. Two hosts booking the same slot are serialized on the table, and the
+    second one gets ConflictError. The index itself is updated by session hooks on commit.
+
+    Methods write and flush but do not commit. Raises LookupError for a missing table or
+    reservation and ValueError for a request that can never succeed.
+    """
+
+    @staticmethod
+    def _lock_table(db: Session, table_id: int) -> Table:
+        table = db.get(Table, table_id, with_for_update=True)
+        if table is None:
+            raise LookupError("Table not found")
+        return table
+
+    @staticmethod
+    def _validate(table: Table, party_size: int, starts_at: datetime, ends_at: datetime):
+        if ends_at <= starts_at:
+            raise ValueError("Reservation must end after it starts")
+        if table.capacity < party_size:
+            raise ValueError(f"Table {table.table_number} seats {table.capacity}, not {party_size}")
+
+    @staticmethod
+    def has_overlap(db: Session, table_id: int, starts_at: datetime, ends_at: datetime,
+                    exclude_id: Optional[int] = None) -> bool:
+        """Whether an active reservation of the table overlaps [starts_at, ends_at)"""
+        query = select(Reservation.id).where(
+            Reservation.table_id == table_id,
+            Reservation.status.in_(ACTIVE_RESERVATION_STATUSES),
+            Reservation.starts_at < ends_at,
+            Reservation.ends_at > starts_at,
+        )
+        if exclude_id is not None:
+            query = query.where(Reservation.id != exclude_id)
+        return db.execute(query.limit(1)).first() is not None
+
+    @staticmethod
+    def _check_free(db: Session, reservation: Reservation):
+        # Runs after the reservation is flushed: a concurrent booking of the same table has
+        # either committed already (and is seen here) or waits for this transaction
+        db.flush()
+        if ReservationService.has_overlap(db, reservation.table_id, reservation.starts_at, reservation.ends_at, reservation.id):
+            raise ConflictError("The table is already reserved for part of that time")
+
+    @staticmethod
+    def create(db: Session, reservation: ReservationCreate) -> Reservation:
+        """Book a table, choosing the best-fitting free one when no table_id is given"""
+        starts_at = reservation.starts_at
+        ends_at = reservation.ends_at or starts_at + timedelta(minutes=config.RESERVATION_DEFAULT_DURATION_MINUTES)
+        if ends_at <= starts_at:
+            raise ValueError("Reservation must end after it starts")
+
+        if reservation.table_id is not None:
+            table = ReservationService._lock_table(db, reservation.table_id)
+            ReservationService._validate(table, reservation.party_size, starts_at, ends_at)
+        else:
+            # The index may lag other workers; take the first candidate the database agrees is free
+            table = None
+            for candidate in availability_index.free_tables(starts_at, ends_at, reservation.party_size):
+                locked = db.get(Table, candidate["table_id"], with_for_update=True)
+                if locked is not None and locked.capacity >= reservation.party_size \
+                        and not ReservationService.has_overlap(db, locked.id, starts_at, ends_at):
+                    table = locked
+                    break
+            if table is None:
+                raise ConflictError(f"No table for {reservation.party_size} is free at that time")
+
+        db_reservation = Reservation(
+            table_id=table.id,
+            customer_name=reservation.customer_name,
+            customer_phone=reservation.customer_phone,
+            party_size=reservation.party_size,
+            starts_at=starts_at,
+            ends_at=ends_at,
+            status=RESERVATION_BOOKED,
+            notes=reservation.notes
+        )
+        db.add(db_reservation)
+        ReservationService._check_free(db, db_reservation)
+        return db_reservation
+
+    @staticmethod
+    def get(db: Session, reservation_id: int) -> Reservation:
+        reservation = db.get(Reservation, reservation_id)
+        if reservation is None:
+            raise LookupError("Reservation not found")
+        return reservation
+
+    @staticmethod
+    def update(db: Session, reservation_id: int, changes: ReservationUpdate) -> Reservation:
+        """Change a reservation; a new table, time or party size is re-checked against the other bookings"""
+        reservation = ReservationService.get(db, reservation_id)
+        data = changes.model_dump(exclude_unset=True, exclude_none=True)
+        if "status" in data and data["status"] not in RESERVATION_STATUSES:
+            raise ValueError(f"Invalid status. Use one of: {', '.join(RESERVATION_STATUSES)}")
+
+        rebook = any(field in data for field in ("table_id", "party_size", "starts_at", "ends_at")) \
+            or data.get("status") in ACTIVE_RESERVATION_STATUSES
+        for field, value in data.items():
+            setattr(reservation, field, value)
+
+        if rebook and reservation.status in ACTIVE_RESERVATION_STATUSES:
+            table = ReservationService._lock_table(db, reservation.table_id)
+            ReservationService._validate(table, reservation.party_size, reservation.starts_at, reservation.ends_at)
+            ReservationService._check_free(db, reservation)
+        return reservation
+
+    @staticmethod
+    def cancel(db: Session, reservation_id: int) -> Reservation:
+        """Cancel a reservation, freeing its table for the booked time"""
+        reservation = ReservationService.get(db, reservation_id)
+        reservation.status = RESERVATION_CANCELLED
+        return reservation
+
+    @staticmethod
+    def list(db: Session, starts_at: Optional[datetime] = None, ends_at: Optional[datetime] = None,
+             table_id: Optional[int] = None, status: Optional[str] = None) -> List[Reservation]:
+        """Reservations overlapping [starts_at, ends_at) (either bound optional), in start order"""
+        query = select(Reservation)
+        if starts_at is not None:
+            query = query.where(Reservation.ends_at > starts_at)
+        if ends_at is not None:
+            query = query.where(Reservation.starts_at < ends_at)
+        if table_id is not None:
+            query = query.where(Reservation.table_id == table_id)
+        if status is not None:
+            query = query.where(Reservation.status == status)
+        return list(db.execute(query.order_by(Reservation.starts_at, Reservation.id)).scalars())
+
+
+# Create a singleton instance
+reservation_service = ReservationService()
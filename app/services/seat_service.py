@@ -0,0 +1,165 @@
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.seat import Seat, SEAT_AVAILABLE, SEAT_OCCUPIED
+    from app.models.table import Table
+    from app.services.floor_plan_service import mark_tables_changed
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.seat import Seat, SEAT_AVAILABLE, SEAT_OCCUPIED
+    from models.table import Table
+    from services.floor_plan_service import mark_tables_changed
+
+# Tables whose free seats cannot be offered to walk-ins
+UNSEATABLE_TABLE_STATUSES = ("reserved", "cleaning")
+
+
+class SeatService:
+    """
+    Seat rows of the seats table
+
+    Occupying or releasing a whole table is one set-based UPDATE over its seats rather
+    than a read-modify-write of every seat, and seat availability is answered in SQL.
+    """
+
+    @staticmethod
+    def resize(table: Table, capacity: int, status: str = SEAT_AVAILABLE):
+        """Add or remove seats at the end so the table has `capacity` seats"""
+        SeatService.replace(table, [
+            {"seat_number": number, "status": status, "customer_name": None}
+            for number in range(1, capacity + 1)
+        ], keep_existing=True)
+
+    @staticmethod
+    def replace(table: Table, seats: List[Dict[str, Any]], keep_existing: bool = False):
+        """
+        Make the table's seats match a list of {"seat_number", "status", "customer_name"}
+
+        Seats are matched by number so surviving rows are updated in place (a delete
+        and re-insert would collide on the (table_id, seat_number) constraint). With
+        keep_existing, surviving seats keep their current status and customer.
+        """
+        current = {seat.seat_number: seat for seat in table.seats}
+        wanted = {int(seat["seat_number"]): seat for seat in seats}
+        for number, seat in current.items():
+            if number not in wanted:
+                table.seats.remove(seat)
+            elif not keep_existing:
+                seat.status = wanted[number].get("status") or SEAT_AVAILABLE
+                seat.customer_name = wanted[number].get("customer_name")
+        for number in sorted(set(wanted) - set(current)):
+            table.seats.append(Seat(
+                seat_number=number,
+                status=wanted[number].get("status") or SEAT_AVAILABLE,
+                customer_name=wanted[number].get("customer_name")
+            ))
+
+    @staticmethod
+    def occupy(db: Session, customers: Dict[int, Optional[str]]) -> int:
+        """
+        Mark every seat of the given tables occupied
+
+        Args:
+            db: Database session
+            customers: Customer name per table id; None keeps the seats' current names
+
+        Returns:
+            Number of seats updated
+        """
+        by_name = defaultdict(list)
+        for table_id, customer_name in customers.items():
+            by_name[customer_name].append(table_id)
+
+        updated = 0
+        for customer_name, table_ids in by_name.items():
+            values = {"status": SEAT_OCCUPIED}
+            if customer_name:
+                values["customer_name"] = customer_name
+            result = db.execute(update(Seat).where(Seat.table_id.in_(table_ids)).values(**values))
+            updated += result.rowcount or 0
+        mark_tables_changed(db, customers.keys())
+        return updated
+
+    @staticmethod
+    def release(db: Session, table_id: int) -> int:
+        """Mark every seat of a table available; returns the number of seats updated"""
+        result = db.execute(
+            update(Seat)
+            .where(Seat.table_id == table_id)
+            .values(status=SEAT_AVAILABLE, customer_name=None)
+        )
+        mark_tables_changed(db, [table_id])
+        return result.rowcount or 0
+
+    @staticmethod
+    def set_status(db: Session, table_id: int, seat_number: int, status: str,
+                   customer_name: Optional[str] = None) -> bool:
+        """Update one seat; returns False when the table has no such seat"""
+        result = db.execute(
+            update(Seat)
+            .where(Seat.table_id == table_id, Seat.seat_number == seat_number)
+            .values(status=status, customer_name=customer_name)
+        )
+        mark_tables_changed(db, [table_id])
+        return bool(result.rowcount)
+
+    @staticmethod
+    def occupied_count(db: Session, table_id: int) -> int:
+        return db.execute(
+            select(func.count()).select_from(Seat).where(Seat.table_id == table_id, Seat.status != SEAT_AVAILABLE)
+        ).scalar_one()
+
+    @staticmethod
+    def find_adjacent_free_seats(db: Session, count: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Tables with at least `count` adjacent free seats, tightest fit first
+
+        Free seats are numbered within their table with ROW_NUMBER(); consecutive seat
+        numbers then share the same seat_number - row_number, so grouping by it yields
+        each run of adjacent free seats (gaps and islands).
+        """
+        free = (
+            select(
+                Seat.table_id,
+                Seat.seat_number,
+                (Seat.seat_number - func.row_number().over(partition_by=Seat.table_id, order_by=Seat.seat_number)).label("run")
+            )
+            .where(Seat.status == SEAT_AVAILABLE)
+            .subquery("free_seats")
+        )
+        runs = (
+            select(
+                free.c.table_id,
+                func.min(free.c.seat_number).label("first_seat"),
+                func.count().label("free_seats")
+            )
+            .group_by(free.c.table_id, free.c.run)
+            .having(func.count() >= count)
+            .subquery("free_runs")
+        )
+        query = (
+            select(Table.id, Table.table_number, runs.c.first_seat, runs.c.free_seats)
+            .join(runs, runs.c.table_id == Table.id)
+            .where(or_(Table.status.is_(None), Table.status.notin_(UNSEATABLE_TABLE_STATUSES)))
+            .order_by(runs.c.free_seats, Table.table_number, runs.c.first_seat)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return [
+            {
+                "table_id": row.id,
+                "table_number": row.table_number,
+                "seat_numbers": list(range(row.first_seat, row.first_seat + count)),
+                "free_seats": row.free_seats,
+            }
+            for row in db.execute(query)
+        ]
+
+
+# Create a singleton instance
+seat_service = SeatService()
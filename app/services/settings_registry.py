@@ -0,0 +1,187 @@
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import timezone, tzinfo
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from weakref import WeakKeyDictionary
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+import threading
+import time
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.config import Config
+    from app.models.settings import Setting, SETTINGS_VERSION_KEY
+    from app.services.floor_plan_service import database_key
+except ImportError:
+    # Try importing directly (Docker container)
+    from config import Config
+    from models.settings import Setting, SETTINGS_VERSION_KEY
+    from services.floor_plan_service import database_key
+
+logger = logging.getLogger(__name__)
+
+_CHANGED = "settings_changed"
+
+
+def time_zone(name: str) -> tzinfo:
+    """An IANA time zone name (e.g. Asia/Yangon) as a tzinfo; ValueError if unknown"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+
+
+# Known settings: type the stored string is parsed as, and the value when missing or invalid
+SETTING_TYPES: Dict[str, Callable[[str], Any]] = {
+    "tax_rate": float,
+    "restaurant_timezone": time_zone,
+}
+SETTING_DEFAULTS: Dict[str, Any] = {
+    "tax_rate": 0.08,
+    "restaurant_timezone": timezone.utc,
+}
+
+
+class _Snapshot(NamedTuple):
+    version: int
+    rows: Dict[str, Dict[str, Any]]  # key -> {"id", "key", "value", "description", "version"}, in id order
+    values: Dict[str, Any]  # key -> typed value
+
+
+class SettingsRegistry:
+    """
+    Typed settings, loaded once per worker and read from a dictionary
+
+    Every settings change bumps the version of the reserved SETTINGS_VERSION_KEY row in
+    the same transaction (see the session hooks below). A worker compares that version
+    with the one it loaded at most every `check_seconds`, one indexed single-row read,
+    and reloads every setting when it differs; changes committed by this worker are
+    seen at once. So a change reaches every worker within `check_seconds`.
+
+    Snapshots are kept per engine, so test and benchmark databases get their own.
+    """
+
+    def __init__(self, check_seconds: float):
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._snapshots: "WeakKeyDictionary[Any, _Snapshot]" = WeakKeyDictionary()
+        self._checked_at: "WeakKeyDictionary[Any, float]" = WeakKeyDictionary()
+
+    @staticmethod
+    def _engine(db: Session):
+        bind = db.get_bind()
+        return getattr(bind, "engine", bind)
+
+    @staticmethod
+    def _parse(key: str, value: Optional[str]) -> Any:
+        parse = SETTING_TYPES.get(key)
+        if parse is None:
+            return value
+        try:
+            return parse(value)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid value {value!r} for setting {key}; using the default")
+            return SETTING_DEFAULTS.get(key)
+
+    def load(self, db: Session) -> _Snapshot:
+        """Read every setting and the version they were read at"""
+        table = Setting.__table__
+        rows = db.execute(
+            select(table.c.id, table.c.key, table.c.value, table.c.description, table.c.version).order_by(table.c.id)
+        ).all()
+        version = 0
+        settings = {}
+        for row in rows:
+            if row.key == SETTINGS_VERSION_KEY:
+                version = row.version
+            else:
+                settings[row.key] = dict(row._mapping)
+        snapshot = _Snapshot(version, settings, {key: self._parse(key, row["value"]) for key, row in settings.items()})
+        engine = self._engine(db)
+        with self._lock:
+            self._snapshots[engine] = snapshot
+            self._checked_at[engine] = time.monotonic()
+        return snapshot
+
+    def _current(self, db: Session) -> _Snapshot:
+        engine = self._engine(db)
+        snapshot = self._snapshots.get(engine)
+        checked_at = self._checked_at.get(engine)
+        if snapshot is not None and checked_at is not None and time.monotonic() - checked_at < self.check_seconds:
+            return snapshot
+
+        table = Setting.__table__
+        version = db.execute(select(table.c.version).where(table.c.key == SETTINGS_VERSION_KEY)).scalar() or 0
+        if snapshot is None or version != snapshot.version:
+            return self.load(db)
+        with self._lock:
+            self._checked_at[engine] = time.monotonic()
+        return snapshot
+
+    def get(self, db: Session, key: str, default: Any = None) -> Any:
+        """The typed value of a setting, its default when unset"""
+        return self._current(db).values.get(key, SETTING_DEFAULTS.get(key, default))
+
+    def row(self, db: Session, key: str) -> Optional[Dict[str, Any]]:
+        """A setting as stored (id, key, value, description, version), or None"""
+        return self._current(db).rows.get(key)
+
+    def rows(self, db: Session) -> List[Dict[str, Any]]:
+        return list(self._current(db).rows.values())
+
+    def version(self, db: Session) -> int:
+        return self._current(db).version
+
+    def invalidate(self, key: Optional[tuple] = None):
+        """Re-check the version on the next read, for one database (a database_key) or all"""
+        with self._lock:
+            for engine in list(self._checked_at.keys()):
+                if key is None or database_key(engine.url) == key:
+                    del self._checked_at[engine]
+
+
+_config = Config()
+
+# Create a singleton instance
+settings_registry = SettingsRegistry(check_seconds=_config.SETTINGS_CHECK_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    changed = [
+        obj for obj in session.new.union(session.dirty).union(session.deleted)
+        if isinstance(obj, Setting) and obj.key != SETTINGS_VERSION_KEY
+    ]
+    if not changed:
+        return
+    # Bump the version in the writing transaction, so it commits or rolls back with the change
+    table = Setting.__table__
+    connection = session.connection()
+    bumped = connection.execute(
+        update(table).where(table.c.key == SETTINGS_VERSION_KEY).values(version=table.c.version + 1)
+    )
+    if bumped.rowcount == 0:
+        connection.execute(insert(table).values(
+            key=SETTINGS_VERSION_KEY, value="", description="Bumped by every settings change", version=1
+        ))
+    version = connection.execute(select(table.c.version).where(table.c.key == SETTINGS_VERSION_KEY)).scalar()
+    for obj in changed:
+        if obj not in session.deleted:
+            connection.execute(update(table).where(table.c.id == obj.id).values(version=version))
+            set_committed_value(obj, "version", version)
+    session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.info.pop(_CHANGED, None):
+        settings_registry.invalidate(database_key(session.get_bind().url))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_CHANGED, None)
@@ -1,13 +1,16 @@
 from sqlalchemy.orm import Session
-from typing import Optional
+from datetime import tzinfo
+from typing import Any, Optional
 
 # Handle imports for both local development and Docker container environments
 try:
     # Try importing from app.module (local development)
     from app.models.settings import Setting
+    from app.services.settings_registry import settings_registry, time_zone
 except ImportError:
     # Try importing directly (Docker container)
     from models.settings import Setting
+    from services.settings_registry import settings_registry, time_zone
 
 class SettingsService:
     """Service class to handle application settings"""
@@ -17,16 +20,15 @@ class SettingsService:
         """Get a setting by key"""
         return db.query(Setting).filter(Setting.key == key).first()
     
+    @staticmethod
+    def get_value(db: Session, key: str, default: Any = None) -> Any:
+        """Get a setting's typed value from the per-worker cache (no query unless it is due a version check)"""
+        return settings_registry.get(db, key, default)
+
     @staticmethod
     def get_tax_rate(db: Session) -> float:
         """Get the current tax rate from settings or return default"""
-        setting = SettingsService.get_setting(db, "tax_rate")
-        if not setting:
-            return 0.08  # Default to 8%
-        try:
-            return float(setting.value)
-        except ValueError:
-            return 0.08  # Default to 8% if invalid value
+        return settings_registry.get(db, "tax_rate")
     
     @staticmethod
     def update_tax_rate(db: Session, tax_rate: float) -> dict:
@@ -53,4 +55,31 @@ class SettingsService:
         if db_setting.id:
             db.refresh(db_setting)
         
-        return {"message": f"Tax rate updated to {tax_rate}%", "tax_rate": tax_rate}
\ No newline at end of file
+        return {"message": f"Tax rate updated to {tax_rate}%", "tax_rate": tax_rate}
+
+    @staticmethod
+    def get_timezone(db: Session) -> tzinfo:
+        """The restaurant's time zone, which reports bucket days and hours in (UTC by default)"""
+        return settings_registry.get(db, "restaurant_timezone")
+
+    @staticmethod
+    def update_timezone(db: Session, name: str) -> dict:
+        """Update the restaurant time zone setting (an IANA name such as Asia/Yangon)"""
+        time_zone(name)  # Raises ValueError for unknown zones
+
+        db_setting = SettingsService.get_setting(db, "restaurant_timezone")
+        if not db_setting:
+            db_setting = Setting(
+                key="restaurant_timezone",
+                value=name,
+                description="Time zone report days and hours are counted in"
+            )
+            db.add(db_setting)
+        else:
+            db_setting.value = name
+
+        db.commit()
+        if db_setting.id:
+            db.refresh(db_setting)
+
+        return {"message": f"Time zone updated to {name}", "timezone": name}
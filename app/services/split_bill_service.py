@@ -0,0 +1,180 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.order import Order
+    from app.models.table import Table
+    from app.services.outbox_service import OutboxService
+    from app.utils.events import ORDER_PLACED
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.order import Order
+    from models.table import Table
+    from services.outbox_service import OutboxService
+    from utils.events import ORDER_PLACED
+
+
+class SplitBillService:
+    """
+    Splits the bill of an occupied table into child orders
+
+    The whole split plan is validated and every part's items and total computed before
+    anything is written; the child orders are then inserted together (one multi-row
+    INSERT ... RETURNING) with parent_order_id pointing at the split order, with an
+    ORDER_PLACED outbox event each, and committed by the caller as one transaction. A
+    bad plan writes nothing.
+
+    Request formats:
+        {"method": "items", "splits": [{"items": [0, 1]}, {"items": [2]}]}
+        {"method": "seats", "seat_assignments": {"1": [0, 1], "2": [2]}}
+        {"method": "equal", "parts": 3}
+    """
+
+    @staticmethod
+    def _indices(value: Any, label: str) -> List[int]:
+        if not isinstance(value, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in value):
+            raise ValueError(f"{label}: item indices must be a list of integers")
+        return value
+
+    @staticmethod
+    def plan(items: List[dict], split_request: Dict[str, Any], seat_numbers: Optional[Iterable[int]] = None,
+             customer_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Validate a split request against the order's items and compute every part
+
+        Args:
+            items: The parent order's items
+            split_request: One of the request formats above
+            seat_numbers: The table's seat numbers, checked for the "seats" method when given
+            customer_name: Customer name for parts split by item
+
+        Returns:
+            One {"items", "total", "customer_name", "customer_count"} dict per part
+
+        Raises:
+            ValueError: unknown method, an index out of range or used twice, an unknown
+                seat, or an empty part
+        """
+        method = split_request.get("method", "items")
+        if method == "items":
+            groups = []
+            for n, split in enumerate(split_request.get("splits", []), start=1):
+                if not isinstance(split, dict):
+                    raise ValueError(f"Split {n}: expected an object with an 'items' list")
+                groups.append((SplitBillService._indices(split.get("items", []), f"Split {n}"), customer_name, None))
+        elif method == "seats":
+            known_seats = set(seat_numbers) if seat_numbers else None
+            groups = []
+            for seat, indices in split_request.get("seat_assignments", {}).items():
+                try:
+                    seat_number = int(seat)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid seat number: {seat}")
+                if known_seats is not None and seat_number not in known_seats:
+                    raise ValueError(f"Seat {seat_number} does not exist at this table")
+                groups.append((SplitBillService._indices(indices, f"Seat {seat_number}"), f"Seat {seat_number}", 1))
+        elif method == "equal":
+            parts = split_request.get("parts", 2)
+            if not isinstance(parts, int) or parts <= 0:
+                raise ValueError("Parts must be greater than 0")
+            if parts > len(items):
+                raise ValueError(f"Cannot split {len(items)} items into {parts} parts")
+            # Distribute items as evenly as possible
+            groups = [(list(range(i, len(items), parts)), f"Part {i + 1}", None) for i in range(parts)]
+        else:
+            raise ValueError("Invalid split method. Use 'items', 'seats', or 'equal'")
+
+        if not groups:
+            raise ValueError("The split plan has no parts")
+
+        assigned = set()
+        plan = []
+        for indices, part_customer, customer_count in groups:
+            if not indices:
+                raise ValueError("Every part of the split needs at least one item")
+            part_items = []
+            total = 0.0
+            for index in indices:
+                if not 0 <= index < len(items):
+                    raise ValueError(f"Item {index} does not exist on the order")
+                if index in assigned:
+                    raise ValueError(f"Item {index} is assigned to more than one part")
+                assigned.add(index)
+                part_items.append(items[index])
+                total += items[index].get("price", 0.0)
+            plan.append({
+                "items": part_items,
+                "total": round(total, 2),
+                "customer_name": part_customer,
+                "customer_count": customer_count if customer_count is not None else len(indices),
+            })
+        return plan
+
+    @staticmethod
+    def split(db: Session, table_id: int, split_request: Dict[str, Any]) -> List[Tuple[Order, List[dict]]]:
+        """
+        Split the current order of a table; writes but does not commit
+
+        Returns:
+            (child order, its items) per part, in plan order, with ids assigned
+
+        Raises:
+            LookupError: no such table, or it has no current order
+            ValueError: the table is free or the plan is invalid
+        """
+        table = db.get(Table, table_id)
+        if table is None:
+            raise LookupError("Table not found")
+        if not table.is_occupied:
+            raise ValueError("Table must be occupied to split bill")
+        parent = db.get(Order, table.current_order_id) if table.current_order_id else None
+        if parent is None:
+            raise LookupError("Order not found")
+
+        items = json.loads(parent.order_data) if parent.order_data else []
+        plan = SplitBillService.plan(items, split_request, [seat.seat_number for seat in table.seats], parent.customer_name)
+
+        # The parent is not changed, but rewriting it makes a concurrent edit of its items
+        # fail the version check (and the split retry) instead of being split stale
+        flag_modified(parent, "order_data")
+
+        # An ORM bulk INSERT: the unit of work would insert self-referencing orders one row
+        # at a time, and sort_by_parameter_order falls back to that on SQLite. Ids follow the
+        # VALUES order of the single statement, so sorting by id restores the plan order.
+        now = datetime.utcnow()
+        children = db.scalars(
+            insert(Order).returning(Order),
+            [
+                {
+                    "parent_order_id": parent.id,
+                    "total": part["total"],
+                    "order_data": json.dumps(part["items"]),
+                    "table_id": table_id,
+                    "customer_count": part["customer_count"],
+                    "special_requests": parent.special_requests,
+                    "created_at": now,
+                    "updated_at": now,
+                    "order_type": parent.order_type,
+                    "table_number": parent.table_number,
+                    "customer_name": part["customer_name"],
+                    "created_by": parent.created_by,
+                }
+                for part in plan
+            ]
+        ).all()
+        children.sort(key=lambda child: child.id)
+        OutboxService.record_many(db, [
+            {"event_type": ORDER_PLACED, "order_id": child.id, "payload": OutboxService.order_payload(child)}
+            for child in children
+        ])
+        return [(child, part["items"]) for child, part in zip(children, plan)]
+
+
+# Create a singleton instance
+split_bill_service = SplitBillService()
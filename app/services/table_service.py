@@ -0,0 +1,125 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from typing import Optional
+import json
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.order import Order
+    from app.models.seat import SEAT_OCCUPIED
+    from app.models.table import Table
+    from app.services.outbox_service import OutboxService
+    from app.services.seat_service import SeatService
+    from app.utils.concurrency import check_version
+    from app.utils.events import ORDER_UPDATED, TABLE_ASSIGNED, TABLE_RELEASED
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.order import Order
+    from models.seat import SEAT_OCCUPIED
+    from models.table import Table
+    from services.outbox_service import OutboxService
+    from services.seat_service import SeatService
+    from utils.concurrency import check_version
+    from utils.events import ORDER_UPDATED, TABLE_ASSIGNED, TABLE_RELEASED
+
+
+class TableService:
+    """
+    Table seating and merges
+
+    Each method reads the rows it needs, validates, and writes without committing, so it
+    can run under retry_on_conflict(): Table and Order are versioned, and a concurrent
+    change makes the flush fail with StaleDataError instead of being overwritten.
+
+    Raises LookupError for a missing table or order, ValueError for a request the current
+    state does not allow and ConflictError when `expected_version` is stale.
+
+    Every change to which order a table seats, or to an order's contents, is recorded
+    in the outbox in the same transaction.
+    """
+
+    @staticmethod
+    def _table_payload(table: Table):
+        return {"table_id": table.id, "table_number": table.table_number}
+
+    @staticmethod
+    def _get_table(db: Session, table_id: int) -> Table:
+        table = db.get(Table, table_id)
+        if table is None:
+            raise LookupError("Table not found")
+        return table
+
+    @staticmethod
+    def assign_order(db: Session, table_id: int, order_id: int, expected_version: Optional[int] = None) -> Table:
+        """Seat an order at a free table, occupying all of its seats"""
+        table = TableService._get_table(db, table_id)
+        check_version(table.version, expected_version, "Table")
+        order = db.get(Order, order_id)
+        if order is None:
+            raise LookupError("Order not found")
+        if table.is_occupied:
+            raise ValueError("Table is already occupied")
+
+        table.is_occupied = True
+        table.current_order_id = order_id
+        table.status = "occupied"
+        # Flushes the versioned table UPDATE first, so a lost race fails before the seats change
+        SeatService.occupy(db, {table_id: order.customer_name})
+        OutboxService.record(db, TABLE_ASSIGNED, order, TableService._table_payload(table))
+        return table
+
+    @staticmethod
+    def release(db: Session, table_id: int, expected_version: Optional[int] = None) -> Table:
+        """Mark a table and its seats available"""
+        table = TableService._get_table(db, table_id)
+        check_version(table.version, expected_version, "Table")
+
+        if table.current_order_id is not None:
+            OutboxService.record(db, TABLE_RELEASED, table.current_order_id, TableService._table_payload(table))
+        table.is_occupied = False
+        table.current_order_id = None
+        table.status = "available"
+        SeatService.release(db, table_id)
+        return table
+
+    @staticmethod
+    def merge(db: Session, table_id_1: int, table_id_2: int) -> Table:
+        """Move the second table's order onto the first table's order and free the second table"""
+        table1 = db.get(Table, table_id_1)
+        table2 = db.get(Table, table_id_2)
+        if table1 is None or table2 is None:
+            raise LookupError("One or both tables not found")
+        if not table1.is_occupied or not table2.is_occupied:
+            raise ValueError("Both tables must be occupied to merge")
+
+        order1 = db.get(Order, table1.current_order_id) if table1.current_order_id else None
+        order2 = db.get(Order, table2.current_order_id) if table2.current_order_id else None
+        if order1 is None or order2 is None:
+            raise LookupError("Orders not found for one or both tables")
+
+        # Combine orders into the first one
+        order1_items = json.loads(order1.order_data) if order1.order_data else []
+        order2_items = json.loads(order2.order_data) if order2.order_data else []
+        order1.order_data = json.dumps(order1_items + order2_items)
+        order1.total = order1.total + order2.total
+        # order2 is copied, not changed; rewriting it makes its version check fail (and the
+        # merge retry) if items were added to it concurrently
+        flag_modified(order2, "order_data")
+        OutboxService.record(db, ORDER_UPDATED, order1, OutboxService.order_payload(order1))
+        OutboxService.record(db, TABLE_RELEASED, order2, TableService._table_payload(table2))
+
+        # Release the second table
+        table2.is_occupied = False
+        table2.current_order_id = None
+        table2.status = "available"
+        SeatService.release(db, table_id_2)
+
+        # The first table now seats both parties; its extra seats start out occupied
+        table1.capacity = table1.capacity + table2.capacity
+        SeatService.resize(table1, table1.capacity, status=SEAT_OCCUPIED)
+        return table1
+
+
+# Create a singleton instance
+table_service = TableService()
@@ -0,0 +1,247 @@
+from sqlalchemy import and_, case, func, insert, literal, select, DateTime
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from datetime import datetime, tzinfo
+import json
+import logging
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.module (local development)
+    from app.models.order import Order
+    from app.models.tax_ledger import TaxLedgerEntry, TAX_ENTRY_SALE, TAX_ENTRY_REFUND
+    from app.services.settings_service import SettingsService
+    from app.utils.time_buckets import time_bucket, bucket_start
+except ImportError:
+    # Try importing directly (Docker container)
+    from models.order import Order
+    from models.tax_ledger import TaxLedgerEntry, TAX_ENTRY_SALE, TAX_ENTRY_REFUND
+    from services.settings_service import SettingsService
+    from utils.time_buckets import time_bucket, bucket_start
+
+logger = logging.getLogger(__name__)
+
+# Category reported for the entries balancing item lines to the order total
+UNALLOCATED_CATEGORY = "Unallocated"
+
+
+class TaxLedgerService:
+    """
+    Service class for the tax ledger
+
+    Tax is computed once, when a payment completes, at the rate in force then; the
+    reports only sum ledger entries by period, category or item.
+    """
+
+    @staticmethod
+    def order_lines(order_data: Any) -> List[Dict[str, Any]]:
+        """The item lines of an order's order_data (a JSON string or a list)"""
+        if isinstance(order_data, str):
+            try:
+                order_data = json.loads(order_data)
+            except ValueError:
+                return []
+        return [item for item in order_data if isinstance(item, dict)] if isinstance(order_data, list) else []
+
+    @staticmethod
+    def record_sale(db: Session, order: Order, recorded_at: Optional[datetime] = None,
+                    tax_rate: Optional[float] = None) -> List[TaxLedgerEntry]:
+        """
+        Add the ledger entries for a paid order to the caller's transaction
+
+        One entry per item line, plus one for any difference between the lines and the
+        order total, so the entries of an order always add up to its total.
+        """
+        rate = SettingsService.get_tax_rate(db) if tax_rate is None else tax_rate
+        recorded_at = recorded_at or datetime.utcnow()
+        entries = []
+        for item in TaxLedgerService.order_lines(order.order_data):
+            quantity = item.get("quantity", 1) or 1
+            unit_price = float(item.get("price", 0) or 0)
+            taxable_amount = unit_price * quantity
+            entries.append(TaxLedgerEntry(
+                order_id=order.id,
+                entry_type=TAX_ENTRY_SALE,
+                recorded_at=recorded_at,
+                item_name=item.get("name", "Unknown Item"),
+                category=item.get("category") or "Unknown",
+                quantity=quantity,
+                unit_price=unit_price,
+                taxable_amount=taxable_amount,
+                tax_rate=rate,
+                tax_amount=taxable_amount * rate
+            ))
+
+        remainder = round(float(order.total or 0) - sum(entry.taxable_amount for entry in entries), 2)
+        if remainder:
+            entries.append(TaxLedgerEntry(
+                order_id=order.id,
+                entry_type=TAX_ENTRY_SALE,
+                recorded_at=recorded_at,
+                quantity=1,
+                unit_price=remainder,
+                taxable_amount=remainder,
+                tax_rate=rate,
+                tax_amount=remainder * rate
+            ))
+        db.add_all(entries)
+        return entries
+
+    @staticmethod
+    def record_refund(db: Session, order_id: int, recorded_at: Optional[datetime] = None) -> int:
+        """Reverse an order's sale entries with negated copies at their original rates; does not commit"""
+        ledger = TaxLedgerEntry.__table__
+        columns = ["order_id", "entry_type", "recorded_at", "item_name", "category",
+                   "quantity", "unit_price", "taxable_amount", "tax_rate", "tax_amount"]
+        reversal = select(
+            ledger.c.order_id,
+            literal(TAX_ENTRY_REFUND),
+            literal(recorded_at or datetime.utcnow(), DateTime),
+            ledger.c.item_name,
+            ledger.c.category,
+            -ledger.c.quantity,
+            ledger.c.unit_price,
+            -ledger.c.taxable_amount,
+            ledger.c.tax_rate,
+            -ledger.c.tax_amount
+        ).where(ledger.c.order_id == order_id, ledger.c.entry_type == TAX_ENTRY_SALE)
+        return db.execute(insert(ledger).from_select(columns, reversal)).rowcount
+
+    @staticmethod
+    def _sums(tax_rate: Optional[float]):
+        """taxable, exempt and tax columns; a tax_rate overrides the recorded rates (what-if reports)"""
+        ledger = TaxLedgerEntry.__table__
+        taxable = func.coalesce(func.sum(case((ledger.c.tax_rate > 0, ledger.c.taxable_amount), else_=0.0)), 0.0)
+        exempt = func.coalesce(func.sum(case((ledger.c.tax_rate > 0, 0.0), else_=ledger.c.taxable_amount)), 0.0)
+        if tax_rate is None:
+            tax = func.coalesce(func.sum(ledger.c.tax_amount), 0.0)
+        else:
+            tax = func.coalesce(func.sum(ledger.c.taxable_amount), 0.0) * tax_rate
+        return taxable.label("taxable_sales"), exempt.label("exempt_sales"), tax.label("tax_collected")
+
+    @staticmethod
+    def _in_range(start_date: datetime, end_date: datetime):
+        ledger = TaxLedgerEntry.__table__
+        return and_(ledger.c.recorded_at >= start_date, ledger.c.recorded_at <= end_date)
+
+    @staticmethod
+    def tax_summary(db: Session, start_date: datetime, end_date: datetime,
+                    tax_rate: Optional[float] = None) -> Dict[str, Any]:
+        """Sales and tax collected in the period, in total and per category and rate"""
+        ledger = TaxLedgerEntry.__table__
+        in_range = TaxLedgerService._in_range(start_date, end_date)
+        taxable, exempt, tax = TaxLedgerService._sums(tax_rate)
+        totals = db.execute(select(taxable, exempt, tax).where(in_range)).one()
+
+        rate_column = ledger.c.tax_rate if tax_rate is None else literal(tax_rate)
+        group = [ledger.c.category] if tax_rate is not None else [ledger.c.category, ledger.c.tax_rate]
+        rows = db.execute(
+            select(ledger.c.category, rate_column.label("tax_rate"),
+                   func.sum(ledger.c.taxable_amount).label("taxable_sales"), tax)
+            .where(in_range)
+            .group_by(*group)
+            .order_by(*group)
+        ).all()
+
+        return {
+            "total_sales": round(totals.taxable_sales + totals.exempt_sales, 2),
+            "taxable_sales": round(totals.taxable_sales, 2),
+            "total_tax_collected": round(totals.tax_collected, 2),
+            "tax_rate": tax_rate if tax_rate is not None else SettingsService.get_tax_rate(db),
+            "tax_by_category": [
+                {
+                    "category": row.category or UNALLOCATED_CATEGORY,
+                    "taxable_sales": round(row.taxable_sales, 2),
+                    "tax_collected": round(row.tax_collected, 2),
+                    "tax_rate": row.tax_rate
+                }
+                for row in rows
+            ]
+        }
+
+    @staticmethod
+    def sales_tax_by_week(db: Session, start_date: datetime, end_date: datetime,
+                          tax_rate: Optional[float] = None, tz: Optional[tzinfo] = None) -> Dict[str, Any]:
+        """Sales and tax collected in the period, in total and per week (local to `tz`, if given)"""
+        ledger = TaxLedgerEntry.__table__
+        in_range = TaxLedgerService._in_range(start_date, end_date)
+        taxable, exempt, tax = TaxLedgerService._sums(tax_rate)
+        week = time_bucket(db, ledger.c.recorded_at, "week", tz, start_date, end_date).label("week")
+        rows = db.execute(
+            select(week, taxable, exempt, tax).where(in_range).group_by(week).order_by(week)
+        ).all()
+
+        tax_by_period = []
+        for row in rows:
+            total_sales = row.taxable_sales + row.exempt_sales
+            tax_by_period.append({
+                "period": f"Week of {bucket_start(row.week).strftime('%Y-%m-%d')}",
+                "total_sales": round(total_sales, 2),
+                "taxable_sales": round(row.taxable_sales, 2),
+                "tax_collected": round(row.tax_collected, 2),
+                # Effective rate: a week can span a rate change
+                "tax_rate": tax_rate if tax_rate is not None else (
+                    round(row.tax_collected / row.taxable_sales, 4) if row.taxable_sales else 0.0
+                )
+            })
+
+        return {
+            "total_sales": round(sum((row.taxable_sales + row.exempt_sales for row in rows), 0.0), 2),
+            "taxable_sales": round(sum((row.taxable_sales for row in rows), 0.0), 2),
+            "exempt_sales": round(sum((row.exempt_sales for row in rows), 0.0), 2),
+            "total_tax_collected": round(sum((row.tax_collected for row in rows), 0.0), 2),
+            "tax_by_period": tax_by_period
+        }
+
+    @staticmethod
+    def itemized_tax(db: Session, start_date: datetime, end_date: datetime,
+                     tax_rate: Optional[float] = None) -> Dict[str, Any]:
+        """Quantity sold, sales and tax collected per item, price and rate"""
+        ledger = TaxLedgerEntry.__table__
+        in_range = and_(TaxLedgerService._in_range(start_date, end_date), ledger.c.item_name.isnot(None))
+        _, _, tax = TaxLedgerService._sums(tax_rate)
+        rate_column = ledger.c.tax_rate if tax_rate is None else literal(tax_rate)
+        group = [ledger.c.item_name, ledger.c.category, ledger.c.unit_price]
+        if tax_rate is None:
+            group.append(ledger.c.tax_rate)
+        rows = db.execute(
+            select(ledger.c.item_name, ledger.c.category, ledger.c.unit_price, rate_column.label("tax_rate"),
+                   func.sum(ledger.c.quantity).label("quantity_sold"),
+                   func.sum(ledger.c.taxable_amount).label("total_sales"), tax)
+            .where(in_range)
+            .group_by(*group)
+            .order_by(*group)
+        ).all()
+
+        return {
+            "total_items": sum(row.quantity_sold for row in rows),
+            "taxable_items": sum(row.quantity_sold for row in rows if row.tax_rate > 0),
+            "total_tax_collected": round(sum((row.tax_collected for row in rows), 0.0), 2),
+            "itemized_tax_data": [
+                {
+                    "item_name": row.item_name,
+                    "category": row.category,
+                    "quantity_sold": row.quantity_sold,
+                    "unit_price": round(row.unit_price, 2),
+                    "total_sales": round(row.total_sales, 2),
+                    "tax_rate": row.tax_rate,
+                    "tax_collected": round(row.tax_collected, 2)
+                }
+                for row in rows
+            ]
+        }
+
+    @staticmethod
+    def orders_missing_entries(db: Session, start_date: datetime, end_date: datetime) -> List[Any]:
+        """Orders paid in the period without tax ledger entries: (id, paid_at, total) rows"""
+        ledger = TaxLedgerEntry.__table__
+        has_entries = select(ledger.c.id).where(ledger.c.order_id == Order.id).exists()
+        return db.execute(
+            select(Order.id, Order.paid_at, Order.total)
+            .where(Order.payment_status == "completed", Order.paid_at >= start_date, Order.paid_at <= end_date, ~has_entries)
+            .order_by(Order.paid_at)
+        ).all()
+
+
+# Create a singleton instance
+tax_ledger_service = TaxLedgerService()
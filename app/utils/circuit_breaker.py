@@ -0,0 +1,67 @@
+"""
+Circuit breaker for calls to external services (payment gateways).
+
+After `failure_threshold` consecutive failures the circuit opens and calls fail
+immediately with CircuitOpenError instead of each waiting for a timeout. Once
+`reset_timeout` seconds have passed, one trial call is let through (half-open): its
+success closes the circuit, its failure opens it again for another `reset_timeout`.
+"""
+import threading
+import time
+from typing import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The service has been failing; the call was not attempted"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = CLOSED
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may be attempted now"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("Service unavailable; circuit is open")
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            # Half-open: a single trial call at a time
+            if self._trial_in_flight:
+                raise CircuitOpenError("Service unavailable; waiting for a trial call")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._state = CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
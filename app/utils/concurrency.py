@@ -0,0 +1,56 @@
+"""
+Optimistic concurrency helpers.
+
+Versioned models (Table, Order) carry a version_id_col, so every ORM UPDATE is a
+compare-and-swap on the version read by the request and raises StaleDataError when
+another request committed first. retry_on_conflict() re-runs the whole read-check-write
+against fresh rows, so the loser of a race sees the winner's state (e.g. "Table is
+already occupied") instead of overwriting it, and nothing holds row locks while a
+request is thinking.
+"""
+import logging
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ConflictError(Exception):
+    """A write was based on a version of a row that another request has since changed"""
+
+
+def check_version(current: int, expected: Optional[int], what: str = "Record"):
+    """Compare a client-supplied version (e.g. from the floor plan) with the row's version"""
+    if expected is not None and current != expected:
+        raise ConflictError(f"{what} was changed by another request (version {current}, expected {expected})")
+
+
+def retry_on_conflict(db: Session, operation: Callable[[Session], T], attempts: int = 3) -> T:
+    """
+    Run operation(db) and commit, retrying from scratch when the commit loses a version check
+
+    The operation must re-read what it depends on each time it is called; the session is
+    rolled back (expiring every loaded object) before a retry. No backoff is applied: a
+    stale write means the competing transaction has already committed, so the retry
+    reads the settled state. Any other exception rolls back and propagates.
+
+    Raises:
+        ConflictError: the last attempt still lost the race, or the operation raised it
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            result = operation(db)
+            db.commit()
+            return result
+        except StaleDataError as e:
+            db.rollback()
+            logger.info(f"Optimistic lock conflict (attempt {attempt}/{attempts}): {str(e)}")
+            if attempt == attempts:
+                raise ConflictError("The record was changed by another request; please retry") from e
+        except Exception:
+            db.rollback()
+            raise
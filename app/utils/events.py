@@ -0,0 +1,110 @@
+"""
+In-process event bus for domain events.
+
+Services emit events only after their transaction commits, so subscribers never see
+state that was rolled back. Handlers run synchronously in the emitting thread; a
+failing handler is logged and does not affect the caller or other handlers.
+
+ChangeNotifier lets async requests (long-poll, server-sent events) wait for such commits.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[Dict[str, Any]], None]
+
+# Event types (also used as order_events.event_type in the outbox)
+ORDER_PLACED = "order.placed"
+ORDER_UPDATED = "order.updated"
+ORDER_DELETED = "order.deleted"
+KITCHEN_TICKET_CREATED = "kitchen.ticket_created"
+KITCHEN_STATUS_CHANGED = "kitchen.status_changed"
+KITCHEN_TICKET_REMOVED = "kitchen.ticket_removed"
+PAYMENT_COMPLETED = "payment.completed"
+PAYMENT_REFUNDED = "payment.refunded"
+TABLE_ASSIGNED = "table.assigned"
+TABLE_RELEASED = "table.released"
+
+
+class EventBus:
+    """Publish/subscribe registry keyed by event type"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+
+    def subscribe(self, event_type: str, handler: EventHandler):
+        with self._lock:
+            if handler not in self._handlers[event_type]:
+                self._handlers[event_type].append(handler)
+
+    def unsubscribe(self, event_type: str, handler: EventHandler):
+        with self._lock:
+            if handler in self._handlers[event_type]:
+                self._handlers[event_type].remove(handler)
+
+    def emit(self, event_type: str, payload: Dict[str, Any]):
+        with self._lock:
+            handlers = list(self._handlers[event_type])
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"Event handler {getattr(handler, '__name__', handler)} failed for {event_type}: {str(e)}")
+
+
+class ChangeNotifier:
+    """
+    Wakes async waiters (long-poll and streaming requests) in this process
+
+    notify() may be called from any thread, e.g. after a commit on a threadpool thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = set()
+        self._version = 0  # Bumped on every notify
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def notify(self):
+        with self._lock:
+            self._version += 1
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            try:
+                # Commits may happen on a threadpool thread, so hand over to the waiter's loop
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    async def wait(self, timeout: float, seen_version: int) -> bool:
+        """
+        Wait until notified or the timeout elapses; returns True if notified
+
+        Returns at once if a notify happened after `seen_version` was read, so a commit
+        between a caller's query and its wait is not missed.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._version != seen_version:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+# Shared bus for the application
+event_bus = EventBus()
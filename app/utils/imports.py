@@ -0,0 +1,60 @@
+from types import ModuleType
+from typing import Dict, List
+import asyncio
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def import_app_module(name: str) -> ModuleType:
+    """
+    Import an application module on demand.
+
+    Tries `app.<name>` first (local development) and falls back to `<name>`
+    (Docker container), mirroring the try/except imports used across the app.
+    """
+    try:
+        return importlib.import_module(f"app.{name}")
+    except ImportError:
+        return importlib.import_module(name)
+
+
+class LazyRouters:
+    """
+    ASGI middleware including optional routers in the app on first use
+
+    `routers` maps a path prefix to the module whose `router` serves it. The module is
+    imported, and its router included, when a request first reaches that prefix (or
+    the OpenAPI schema, which then lists every router), so workers boot without them.
+    """
+
+    def __init__(self, app, target, routers: Dict[str, str]):
+        self.app = app
+        self.target = target  # The FastAPI app the routers are included in
+        self.pending = dict(routers)
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.pending:
+            path = scope["path"]
+            if path == self.target.openapi_url:
+                wanted = list(self.pending)
+            else:
+                wanted = [prefix for prefix in self.pending if path == prefix or path.startswith(prefix + "/")]
+            if wanted:
+                await self.load(wanted)
+        await self.app(scope, receive, send)
+
+    async def load(self, prefixes: List[str]):
+        async with self._lock:
+            for prefix in prefixes:
+                module_name = self.pending.get(prefix)
+                if module_name is None:
+                    continue  # Loaded by a concurrent request
+                module = await asyncio.to_thread(import_app_module, module_name)
+                self.target.include_router(module.router)
+                del self.pending[prefix]
+                logger.info(f"Loaded {module_name} on first use")
+            # Rebuilt with the new routes on the next request for it
+            self.target.openapi_schema = None
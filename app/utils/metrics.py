@@ -0,0 +1,266 @@
+"""
+Request latency and database query instrumentation.
+
+MetricsMiddleware times every HTTP request and attaches a RequestStats object to a
+ContextVar. SQLAlchemy cursor events registered by instrument_engine add each
+statement's count and duration to the current request's stats, so per-route SQL
+counts, DB time and N+1 patterns can be reported without touching the routes.
+Metrics are kept per worker process and exposed in Prometheus text format.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Handle imports for both local development and Docker container environments
+try:
+    # Try importing from app.config (local development)
+    from app.config import Config
+except ImportError:
+    # Try importing from config directly (Docker container)
+    from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) for the request latency histogram
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """SQL activity recorded while serving a single request"""
+
+    __slots__ = ("query_count", "db_time", "statements")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.statements: Dict[str, int] = defaultdict(int)
+
+    def record_query(self, statement: str, duration: float):
+        self.query_count += 1
+        self.db_time += duration
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times, most frequent first"""
+        repeated = [(sql, count) for sql, count in self.statements.items() if count >= threshold]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def get_request_stats() -> Optional[RequestStats]:
+    """Stats for the request being served, or None outside a request"""
+    return _request_stats.get()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the shape Prometheus expects"""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative_counts(self) -> List[int]:
+        running = 0
+        cumulative = []
+        for count in self.counts:
+            running += count
+            cumulative.append(running)
+        return cumulative
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide request and database metrics"""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS, n_plus_one_threshold: int = 10):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.request_latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.db_queries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.db_time: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.n_plus_one_warnings: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.cache_requests: Dict[Tuple[str, str, str], int] = defaultdict(int)
+
+    def record_request(self, method: str, route: str, status: int, duration: float, stats: RequestStats):
+        repeated = stats.repeated_statements(self.n_plus_one_threshold) if self.n_plus_one_threshold > 0 else []
+        with self._lock:
+            key = (method, route, str(status))
+            histogram = self.request_latency.get(key)
+            if histogram is None:
+                histogram = self.request_latency[key] = Histogram(self.buckets)
+            histogram.observe(duration)
+            self.db_queries[(method, route)] += stats.query_count
+            self.db_time[(method, route)] += stats.db_time
+            if repeated:
+                self.n_plus_one_warnings[(method, route)] += 1
+
+        if repeated:
+            statement, count = repeated[0]
+            logger.warning(
+                f"Possible N+1 query on {method} {route}: statement executed {count} times "
+                f"({stats.query_count} queries total): {statement[:200]}"
+            )
+
+    def record_cache(self, cache: str, name: str, hit: bool):
+        """Count a lookup in an application cache (hit or miss)"""
+        with self._lock:
+            self.cache_requests[(cache, name, "hit" if hit else "miss")] += 1
+
+    def reset(self):
+        with self._lock:
+            self.request_latency.clear()
+            self.db_queries.clear()
+            self.db_time.clear()
+            self.n_plus_one_warnings.clear()
+            self.cache_requests.clear()
+
+    def render_prometheus(self, pool_metrics: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP http_request_duration_seconds HTTP request latency by route")
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for (method, route, status), histogram in sorted(self.request_latency.items()):
+                for bound, cumulative in zip(histogram.buckets, histogram.cumulative_counts()):
+                    lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, status=status, le=bound)} {cumulative}")
+                lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, status=status, le='+Inf')} {histogram.count}")
+                lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route, status=status)} {histogram.sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route, status=status)} {histogram.count}")
+
+            lines.append("# HELP db_queries_total SQL statements executed while serving each route")
+            lines.append("# TYPE db_queries_total counter")
+            for (method, route), count in sorted(self.db_queries.items()):
+                lines.append(f"db_queries_total{_labels(method=method, route=route)} {count}")
+
+            lines.append("# HELP db_query_duration_seconds_total Time spent executing SQL for each route")
+            lines.append("# TYPE db_query_duration_seconds_total counter")
+            for (method, route), seconds in sorted(self.db_time.items()):
+                lines.append(f"db_query_duration_seconds_total{_labels(method=method, route=route)} {seconds:.6f}")
+
+            lines.append("# HELP db_n_plus_one_warnings_total Requests that repeated one statement past the N+1 threshold")
+            lines.append("# TYPE db_n_plus_one_warnings_total counter")
+            for (method, route), count in sorted(self.n_plus_one_warnings.items()):
+                lines.append(f"db_n_plus_one_warnings_total{_labels(method=method, route=route)} {count}")
+
+            lines.append("# HELP cache_requests_total Application cache lookups by cache, entry kind and result")
+            lines.append("# TYPE cache_requests_total counter")
+            for (cache, name, result), count in sorted(self.cache_requests.items()):
+                lines.append(f"cache_requests_total{_labels(cache=cache, name=name, result=result)} {count}")
+
+        if pool_metrics:
+            gauges = (
+                ("db_pool_in_use", "in_use", "gauge", "Connections currently checked out"),
+                ("db_pool_saturation", "saturation", "gauge", "Checked-out connections as a fraction of pool capacity"),
+                ("db_pool_checkouts_total", "checkouts", "counter", "Connections handed out by the pool"),
+                ("db_pool_checkout_timeouts_total", "checkout_timeouts", "counter", "Checkouts that timed out waiting for a connection"),
+                ("db_pool_checkout_wait_max_ms", "checkout_wait_max_ms", "gauge", "Longest wait for a connection in milliseconds"),
+            )
+            for metric_name, field, metric_type, help_text in gauges:
+                lines.append(f"# HELP {metric_name} {help_text}")
+                lines.append(f"# TYPE {metric_name} {metric_type}")
+                for pool in pool_metrics:
+                    lines.append(f"{metric_name}{_labels(pool=pool['name'])} {pool[field]}")
+
+        return "\n".join(lines) + "\n"
+
+
+# The start time lives on the statement's execution context rather than the
+# connection, so a statement that raises leaves nothing behind on pooled connections
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._query_start_time
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record_query(statement, time.perf_counter() - started)
+
+
+def instrument_engine(sync_engine):
+    """Record every statement run on the engine against the current request's stats"""
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_template(scope) -> str:
+    # FastAPI stores the matched route on the scope; fall back to a fixed label so
+    # unknown paths (404s, scanners) cannot blow up label cardinality
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing requests and adding a Server-Timing header"""
+
+    def __init__(self, app, registry: MetricsRegistry, server_timing: bool = True):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    header = (
+                        f'app;dur={elapsed_ms:.1f}, '
+                        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries"'
+                    )
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            self.registry.record_request(
+                scope.get("method", ""),
+                _route_template(scope),
+                status_code,
+                time.perf_counter() - started,
+                stats,
+            )
+
+
+# Shared registry for the application
+metrics_registry = MetricsRegistry(n_plus_one_threshold=Config().METRICS_N_PLUS_ONE_THRESHOLD)
@@ -0,0 +1,159 @@
+"""
+Small streaming summaries for analytics counters.
+
+Sketches are updated in O(1) per event (amortized), merge with each other, and
+round-trip through plain lists so they can be persisted as JSON.
+"""
+import heapq
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters (Metwally et al.)
+
+    Tracks at most `capacity` keys. A new key arriving when full replaces the key with
+    the lowest count and inherits that count as its error, so every reported count is
+    an upper bound and count - error a lower bound; any key occurring more than
+    total / capacity times is always tracked. With fewer distinct keys than the
+    capacity (a restaurant menu, typically) the counts are exact.
+
+    Each key also carries a summed weight (revenue) and the label it was last added
+    with (category).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counters: Dict[Hashable, List[Any]] = {}  # key -> [count, error, weight, label]
+
+    def __len__(self) -> int:
+        return len(self.counters)
+
+    def add(self, key: Hashable, count: int = 1, weight: float = 0.0, label: Any = None):
+        entry = self.counters.get(key)
+        if entry is None:
+            floor = 0
+            if len(self.counters) >= self.capacity:
+                victim = min(self.counters, key=lambda k: self.counters[k][0])
+                floor = self.counters.pop(victim)[0]
+            entry = self.counters[key] = [floor, floor, 0.0, label]
+        entry[0] += count
+        entry[2] += weight
+        if label is not None:
+            entry[3] = label
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """Add another sketch's counts into this one, keeping the `capacity` largest"""
+        for key, (count, error, weight, label) in other.counters.items():
+            entry = self.counters.get(key)
+            if entry is None:
+                self.counters[key] = [count, error, weight, label]
+            else:
+                entry[0] += count
+                entry[1] += error
+                entry[2] += weight
+                if label is not None:
+                    entry[3] = label
+        if len(self.counters) > self.capacity:
+            kept = heapq.nlargest(self.capacity, self.counters.items(), key=lambda item: item[1][0])
+            self.counters = dict(kept)
+        return self
+
+    def top(self, n: int) -> List[Tuple[Hashable, int, int, float, Any]]:
+        """The n keys with the highest counts: (key, count, error, weight, label), highest first"""
+        return [
+            (key, count, error, weight, label)
+            for key, (count, error, weight, label) in heapq.nlargest(n, self.counters.items(), key=lambda item: item[1][0])
+        ]
+
+    def to_list(self) -> List[List[Any]]:
+        return [[key] + entry for key, entry in self.counters.items()]
+
+    @classmethod
+    def from_list(cls, capacity: int, entries: Optional[Iterable[List[Any]]]) -> "SpaceSaving":
+        sketch = cls(capacity)
+        for key, count, error, weight, label in entries or ():
+            sketch.counters[key] = [count, error, weight, label]
+        if len(sketch.counters) > capacity:
+            sketch.merge(cls(capacity))
+        return sketch
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch for durations (DDSketch, Masson et al.)
+
+    Values are counted in logarithmic bins: bin k holds (gamma^(k-1), gamma^k], with
+    gamma = (1 + a) / (1 - a) for relative accuracy a, so any quantile is reported
+    within a * value of a value actually added. Values up to `min_value` share one
+    bin, reported as 0. A day of ticket times, from seconds to hours, fits in a few
+    hundred bins at 1% accuracy. Merging adds bin counts, so sketches merged in any
+    order give the same quantiles as one sketch of all the values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-3):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float, count: int = 1):
+        if value <= self.min_value:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.count += count
+        self.sum += max(value, 0.0) * count
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add another sketch's values into this one (same relative accuracy)"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge quantile sketches with different accuracies")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The value at quantile q (0 to 1), None when empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                # The midpoint, in relative terms, of the bin
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_list(self) -> List[Any]:
+        return [self.relative_accuracy, self.zero_count, self.sum, sorted(self.bins.items())]
+
+    @classmethod
+    def from_list(cls, entries: Optional[List[Any]]) -> "QuantileSketch":
+        if not entries:
+            return cls()
+        relative_accuracy, zero_count, total, bins = entries
+        sketch = cls(relative_accuracy)
+        sketch.bins = {int(key): count for key, count in bins}
+        sketch.zero_count = zero_count
+        sketch.count = zero_count + sum(sketch.bins.values())
+        sketch.sum = total
+        return sketch
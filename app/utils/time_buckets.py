@@ -0,0 +1,134 @@
+"""
+Truncating timestamps to hour/day/week/month buckets inside SQL.
+
+Reports group by these expressions so the database returns one row per bucket instead
+of every row in the range. PostgreSQL uses date_trunc, which returns a timestamp;
+SQLite has no timestamp type and returns the bucket start as text, which
+bucket_start() turns back into a datetime. Weeks start on Monday in both.
+
+Timestamps are stored as naive UTC. Given a time zone, buckets are the zone's local
+hours, days, weeks or months, and bucket starts are local times: PostgreSQL converts
+with AT TIME ZONE; SQLite, which only knows UTC and the server's zone, shifts each
+timestamp by the zone's UTC offset, picked from the offsets in force over the queried
+range (one per daylight saving period).
+"""
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import Integer, case, cast, extract, func
+from sqlalchemy.orm import Session
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+_SQLITE_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+    "week": "%Y-%m-%d 00:00:00",
+    "month": "%Y-%m-01 00:00:00",
+}
+# Back six days, then forward to the next Monday: the Monday on or before the date
+_SQLITE_MODIFIERS = {"week": ("-6 days", "weekday 1")}
+
+
+def to_utc(local: datetime, tz: Optional[tzinfo]) -> datetime:
+    """A naive local time in `tz` as naive UTC"""
+    if tz is None:
+        return local
+    return local.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_local(utc: datetime, tz: Optional[tzinfo]) -> datetime:
+    """A naive UTC time as naive local time in `tz`"""
+    if tz is None:
+        return utc
+    return utc.replace(tzinfo=timezone.utc).astimezone(tz).replace(tzinfo=None)
+
+
+def local_now(tz: Optional[tzinfo]) -> datetime:
+    return to_local(datetime.utcnow(), tz)
+
+
+def _utc_offset(tz: tzinfo, utc: datetime) -> timedelta:
+    return utc.replace(tzinfo=timezone.utc).astimezone(tz).utcoffset()
+
+
+def utc_offsets(tz: tzinfo, start: datetime, end: datetime) -> List[Tuple[datetime, timedelta]]:
+    """
+    (from, offset) for each period of constant UTC offset between naive UTC start and
+    end; the first period starts at `start`. Transitions are found to the minute.
+    """
+    periods = [(start, _utc_offset(tz, start))]
+    day = start
+    while day < end:
+        following = min(day + timedelta(days=1), end)
+        if _utc_offset(tz, following) != periods[-1][1]:
+            low, high = day, following
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if _utc_offset(tz, middle) == periods[-1][1]:
+                    low = middle
+                else:
+                    high = middle
+            high = high.replace(second=0, microsecond=0)
+            periods.append((high, _utc_offset(tz, high)))
+        day = following
+    return periods
+
+
+def _sqlite_offset(column, tz: tzinfo, start: datetime, end: datetime):
+    """strftime modifier shifting `column` from UTC to local time"""
+    def modifier(offset: timedelta) -> str:
+        return f"{int(offset.total_seconds() // 60):+d} minutes"
+
+    periods = utc_offsets(tz, start, end)
+    if len(periods) == 1:
+        return modifier(periods[0][1])
+    return case(
+        *[(column < periods[n + 1][0], modifier(offset)) for n, (_, offset) in enumerate(periods[:-1])],
+        else_=modifier(periods[-1][1])
+    )
+
+
+def _check_zone(db: Session, tz: Optional[tzinfo], start: Optional[datetime], end: Optional[datetime]) -> bool:
+    """Whether local time differs from UTC; SQLite then needs the queried range"""
+    if tz is None or tz in (timezone.utc,) or getattr(tz, "key", None) == "UTC":
+        return False
+    if db.get_bind().dialect.name == "sqlite" and (start is None or end is None):
+        raise ValueError("SQLite needs the queried UTC range to bucket in a time zone")
+    return True
+
+
+def time_bucket(db: Session, column, granularity: str, tz: Optional[tzinfo] = None,
+                start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    SQL expression for the start of the hour, day, week or month containing `column`
+
+    With `tz`, buckets are local to it; on SQLite, start and end (naive UTC) must then
+    bound the rows queried.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid time grouping: {granularity}. Use 'hour', 'day', 'week' or 'month'")
+    local = _check_zone(db, tz, start, end)
+    if db.get_bind().dialect.name == "sqlite":
+        offset = (_sqlite_offset(column, tz, start, end),) if local else ()
+        return func.strftime(_SQLITE_FORMATS[granularity], column, *offset, *_SQLITE_MODIFIERS.get(granularity, ()))
+    if local:
+        column = func.timezone(tz.key, func.timezone("UTC", column))
+    return func.date_trunc(granularity, column)
+
+
+def hour_of_day(db: Session, column, tz: Optional[tzinfo] = None,
+                start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """SQL expression for the (local) hour of `column`, 0-23"""
+    local = _check_zone(db, tz, start, end)
+    if db.get_bind().dialect.name == "sqlite":
+        offset = (_sqlite_offset(column, tz, start, end),) if local else ()
+        return cast(func.strftime("%H", column, *offset), Integer)
+    if local:
+        column = func.timezone(tz.key, func.timezone("UTC", column))
+    return cast(extract("hour", column), Integer)
+
+
+def bucket_start(value: Union[datetime, str]) -> datetime:
+    """A bucket value as returned by the database, as a datetime"""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
@@ -0,0 +1,121 @@
+"""
+Sales report benchmark.
+
+Builds a synthetic year of orders (one million by default, one to five lines each)
+and times the daily, weekly, monthly, peak-hour and top-item reports over a week, a
+month and the whole year: first with the columnar snapshots still to load (cold),
+then served from them (warm), and finally from the result cache (cached). The
+period and peak-hour reports group in SQL, so cold and warm only differ for top
+items; for ranges small enough to load, the per-order loop top items falls back to
+without numpy is timed too.
+
+Usage:
+    python benchmarks/analytics_engine.py [--orders 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base, create_db_engine
+from app.models.order import Order, OrderType, PaymentType
+from app.routes import analytics_routes
+from app.services.analytics_cache import analytics_cache
+from app.services.analytics_engine import AnalyticsEngine
+
+YEAR_START = datetime(2025, 1, 1)
+RANGES = {"week": timedelta(days=7), "month": timedelta(days=30), "year": timedelta(days=365)}
+LEGACY_MAX_DAYS = 30  # Loading more than a month of orders takes minutes
+MENU = [(f"Item {n}", f"Category {n % 7}", round(2 + n * 0.37, 2)) for n in range(120)]
+REPORTS = {
+    "daily": analytics_routes.get_daily_sales_report,
+    "weekly": analytics_routes.get_weekly_sales_report,
+    "monthly": analytics_routes.get_monthly_sales_report,
+    "peak-hours": analytics_routes.get_peak_hours,
+    "top-items": lambda start, end, db: analytics_routes.get_top_selling_items(start, end, 10, db),
+}
+
+
+def _prepare(database_url: str, orders: int):
+    engine = create_db_engine(database_url, name="bench-analytics")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    seconds = int(timedelta(days=365).total_seconds())
+    # Inserted in time order, as real orders are
+    offsets = sorted(rng.randrange(seconds) for _ in range(orders))
+    with engine.begin() as conn:
+        for chunk in range(0, orders, 50_000):
+            rows = []
+            for offset in offsets[chunk:chunk + 50_000]:
+                lines = [{"name": name, "category": category, "price": price}
+                         for name, category, price in rng.choices(MENU, k=rng.randint(1, 5))]
+                rows.append({
+                    "created_at": YEAR_START + timedelta(seconds=offset),
+                    "total": round(sum(line["price"] for line in lines), 2),
+                    "order_data": json.dumps(lines),
+                    "payment_type": rng.choice(list(PaymentType)),
+                    "order_type": rng.choice(list(OrderType)),
+                    "created_by": rng.randrange(1, 40),
+                    "version": 1,
+                })
+            conn.execute(Order.__table__.insert(), rows)
+    return engine, sessionmaker(bind=engine)
+
+
+def _time(function, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def benchmark(database_url: str, orders: int):
+    started = time.perf_counter()
+    engine, Session = _prepare(database_url, orders)
+    print(f"{orders} orders loaded in {time.perf_counter() - started:.0f} s")
+    with Session() as db:
+        for name, length in RANGES.items():
+            begin = YEAR_START + timedelta(days=180) if name != "year" else YEAR_START
+            end = begin + length
+            for report_name, report in REPORTS.items():
+                analytics_routes.analytics_engine = AnalyticsEngine(cache_days=400)
+                analytics_cache.max_entries = 0
+                cold_ms = _time(lambda: report(begin, end, db), repeat=1)
+                warm_ms = _time(lambda: report(begin, end, db))
+                analytics_cache.max_entries = 256
+                report(begin, end, db)
+                cached_ms = _time(lambda: report(begin, end, db))
+                analytics_cache.max_entries = 0
+                if report_name == "top-items" and length.days <= LEGACY_MAX_DAYS:
+                    analytics_routes.analytics_engine = None
+                    legacy = f"{_time(lambda: report(begin, end, db), repeat=1):9.1f} ms"
+                else:
+                    legacy = "        -"
+                print(f"  {name:<5} {report_name:<10} cold {cold_ms:8.1f} ms   warm {warm_ms:7.1f} ms   "
+                      f"cached {cached_ms:6.3f} ms   legacy {legacy}")
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure sales report latency")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="synthetic orders spread over one year")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        benchmark(f"sqlite:///{os.path.join(tmp, 'analytics.db')}", args.orders)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Concurrent payments per worker benchmark.
+
+Starts the stub gateway on a local port with a fixed latency (1 s by default, like a
+card terminal round trip) and pushes a burst of payments through one worker:
+
+  blocking  one synchronous HTTP call per payment on a thread pool the size of the
+            default FastAPI threadpool (40), the way process_payment used to run
+  async     HttpPaymentGateway.charge on one event loop, sharing a pooled client
+
+Reports wall time and payments per second for each.
+
+Usage:
+    python benchmarks/payment_gateway.py [--payments 200] [--latency-ms 1000]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+import uvicorn
+
+from app.services.payment_gateway import HttpPaymentGateway
+from benchmarks.stub_gateway import create_stub_gateway
+
+THREADPOOL_SIZE = 40  # Starlette's default limit for sync endpoints
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_stub(latency: float) -> str:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_stub_gateway(latency), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def blocking(base_url: str, payments: int) -> float:
+    def pay(i):
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            response = client.post("/charges", json={"amount": 10.0, "payment_type": "card"},
+                                   headers={"Idempotency-Key": f"blocking-{i}"})
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        list(pool.map(pay, range(payments)))
+    return time.perf_counter() - started
+
+
+async def concurrent(base_url: str, payments: int, max_connections: int) -> float:
+    gateway = HttpPaymentGateway(base_url, timeout=30, max_connections=max_connections)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(gateway.charge("card", 10.0, f"async-{i}") for i in range(payments)))
+    elapsed = time.perf_counter() - started
+    await gateway.aclose()
+    assert all(result["success"] for result in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure concurrent payments per worker")
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=1000)
+    parser.add_argument("--max-connections", type=int, default=200, help="gateway client pool size")
+    args = parser.parse_args()
+
+    base_url = _start_stub(args.latency_ms / 1000)
+    print(f"{args.payments} payments, gateway latency {args.latency_ms} ms")
+    elapsed = blocking(base_url, args.payments)
+    print(f"  blocking ({THREADPOOL_SIZE} threads)   {elapsed:6.2f} s   {args.payments / elapsed:7.1f} payments/s")
+    elapsed = asyncio.run(concurrent(base_url, args.payments, args.max_connections))
+    print(f"  async ({args.max_connections} connections) {elapsed:6.2f} s   {args.payments / elapsed:7.1f} payments/s")
+
+
+if __name__ == "__main__":
+    main()
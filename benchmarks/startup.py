@@ -0,0 +1,63 @@
+"""
+Startup-time benchmark.
+
+Boots the application in fresh interpreters, the way each gunicorn worker does,
+and reports how long importing app.main and running the lifespan startup take.
+
+Usage:
+    python benchmarks/startup.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside a fresh interpreter so every measurement is a cold worker boot
+WORKER_BOOT = """
+import json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app):
+    ready = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "lifespan_ms": (ready - imported) * 1000}))
+"""
+
+
+def boot_once() -> dict:
+    env = {**os.environ}
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER_BOOT],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(label: str, values):
+    print(f"{label:<12} min {min(values):8.1f} ms   median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure application startup time")
+    parser.add_argument("--runs", type=int, default=10, help="number of cold boots to measure")
+    args = parser.parse_args()
+
+    samples = [boot_once() for _ in range(args.runs)]
+    print(f"Startup over {args.runs} cold boots")
+    summarize("import", [s["import_ms"] for s in samples])
+    summarize("lifespan", [s["lifespan_ms"] for s in samples])
+    summarize("total", [s["import_ms"] + s["lifespan_ms"] for s in samples])
+
+
+if __name__ == "__main__":
+    main()
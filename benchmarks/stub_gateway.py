@@ -0,0 +1,80 @@
+"""
+Local stand-in for a payment gateway, speaking the protocol HttpPaymentGateway expects.
+
+Used by the tests (in-process through httpx.ASGITransport) and the payment benchmark,
+and handy for exercising PAYMENT_GATEWAY=http locally:
+
+    python benchmarks/stub_gateway.py --port 8081 --latency-ms 1500
+    PAYMENT_GATEWAY=http PAYMENT_GATEWAY_URL=http://127.0.0.1:8081 uvicorn app.main:app
+
+Charges are remembered per Idempotency-Key, so a retried request gets the original
+response. Latency, a failure rate (503s) and amounts to decline can be set on
+`app.state` while it runs.
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from typing import Any, Dict, Iterable
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_gateway(latency: float = 0.0, failure_rate: float = 0.0,
+                        decline_amounts: Iterable[float] = (), seed: int = 0) -> FastAPI:
+    app = FastAPI(title="Stub payment gateway")
+    app.state.latency = latency
+    app.state.failure_rate = failure_rate
+    app.state.decline_amounts = set(decline_amounts)
+    app.state.calls = 0
+    app.state.charges = {}  # idempotency key -> (status code, body)
+    app.state.refunds = {}
+    rng = random.Random(seed)
+
+    async def handle(results: Dict[str, Dict[str, Any]], idempotency_key: str, create):
+        app.state.calls += 1
+        if app.state.latency:
+            await asyncio.sleep(app.state.latency)
+        if rng.random() < app.state.failure_rate:
+            return JSONResponse(status_code=503, content={"detail": "Gateway overloaded"})
+        if idempotency_key not in results:
+            results[idempotency_key] = create()
+        status_code, body = results[idempotency_key]
+        return JSONResponse(status_code=status_code, content=body)
+
+    @app.post("/charges")
+    async def charge(request: Request, idempotency_key: str = Header(..., alias="Idempotency-Key")):
+        payload = await request.json()
+
+        def create():
+            if payload.get("amount", 0) <= 0 or payload.get("amount") in app.state.decline_amounts:
+                return 402, {"status": "declined", "decline_reason": "Card declined"}
+            return 200, {"id": f"ch_{uuid.uuid4().hex[:16]}", "status": "succeeded", "amount": payload["amount"]}
+
+        return await handle(app.state.charges, idempotency_key, create)
+
+    @app.post("/refunds")
+    async def refund(request: Request, idempotency_key: str = Header(..., alias="Idempotency-Key")):
+        payload = await request.json()
+        charged = {body.get("id") for status_code, body in app.state.charges.values() if status_code == 200}
+
+        def create():
+            if payload.get("charge_id") not in charged:
+                return 404, {"detail": "Charge not found"}
+            return 200, {"id": f"re_{uuid.uuid4().hex[:16]}", "status": "succeeded", "amount": payload.get("amount")}
+
+        return await handle(app.state.refunds, idempotency_key, create)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local stub payment gateway")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=int, default=1000)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_gateway(args.latency_ms / 1000, args.failure_rate), host="127.0.0.1", port=args.port)
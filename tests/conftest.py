@@ -3,6 +3,7 @@ import os
 import sys
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Add app directory to path for consistent imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
@@ -10,8 +11,20 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
 # Import from app package
 from database import Base
 
+# The application leaves schema creation to Alembic. Modules that call the app against its
+# configured database request app_schema; in-memory tests never connect to it.
+import app.models  # noqa: F401  (registers every model with the app metadata)
+from app.models.settings import Setting  # noqa: F401
+from app.database import Base as AppBase, engine as app_engine
+
 # This file contains pytest fixtures that can be shared across multiple test files
 
+@pytest.fixture(scope="session")
+def app_schema():
+    """Create the application schema on the configured test database (opt-in per module)"""
+    AppBase.metadata.create_all(bind=app_engine)
+    yield
+
 @pytest.fixture(scope="session")
 def sqlite_test_db():
     """Create a SQLite in-memory database for testing"""
@@ -52,4 +65,16 @@ def postgres_session(postgres_test_db):
         finally:
             db.close()
     else:
-        yield None
\ No newline at end of file
+        yield None
+
+@pytest.fixture(scope="function")
+def db():
+    """Create a session on a fresh in-memory SQLite database with the application schema"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    AppBase.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
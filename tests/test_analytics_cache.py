@@ -0,0 +1,115 @@
+"""
+Tests for the analytics report result cache and its write-watermark invalidation
+"""
+import json
+from datetime import datetime, timedelta
+
+from app.models.order import Order
+from app.routes import analytics_routes
+from app.services.analytics_cache import AnalyticsCache, analytics_cache
+from app.services.analytics_service import AnalyticsService
+from app.services.outbox_service import OutboxService
+from app.utils.events import ORDER_DELETED, ORDER_PLACED, ORDER_UPDATED, PAYMENT_COMPLETED
+from app.utils.metrics import metrics_registry
+
+
+def _report(cache, db, end_date):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"orders": db.query(Order).count()}
+    return lambda: cache.get_or_compute(db, "daily", {"start_date": None, "end_date": end_date}, compute), calls
+
+
+def test_writes_recompute_only_the_windows_that_read_their_days(db):
+    cache = AnalyticsCache(max_entries=10)
+    past_day = datetime.utcnow() - timedelta(days=5)
+    past, past_calls = _report(cache, db, past_day)
+    open_, open_calls = _report(cache, db, None)
+    assert past() == open_() == {"orders": 0}
+
+    db.add(Order(total=5.0, order_data="[]"))
+    db.commit()
+    assert open_() == past() == {"orders": 0}  # No outbox event, so the watermark has not moved
+
+    # Today's order: the open window is recomputed, the closed one carried forward
+    OutboxService.record(db, ORDER_PLACED, 1)
+    db.commit()
+    assert open_() == {"orders": 1}
+    assert past() == {"orders": 0}
+    assert (len(past_calls), len(open_calls)) == (1, 2)
+
+    # An order of the closed window's days changes it
+    old = Order(total=1.0, created_at=past_day - timedelta(days=1), order_data="[]")
+    db.add(old)
+    db.commit()
+    OutboxService.record(db, ORDER_UPDATED, old)
+    db.commit()
+    assert past() == {"orders": 2}
+    assert (len(past_calls), len(open_calls)) == (2, 2)
+    assert cache.stats() == {"entries": 2, "max_entries": 10, "hits": 3, "misses": 4, "hit_rate": 0.4286}
+
+
+def test_edits_and_deletions_in_past_windows_are_reported(db):
+    analytics_cache.clear()
+    day = datetime.utcnow() - timedelta(days=3)
+    start, end = day.replace(hour=0, minute=0), day.replace(hour=23, minute=59)
+    order = Order(total=10.0, created_at=day, order_data="[]")
+    db.add(order)
+    db.commit()
+    daily = lambda: analytics_routes.get_daily_sales_report(start, end, db)["total_sales"]
+    assert daily() == 10.0
+
+    # As PUT and DELETE /api/orders/{id} do
+    order.total = 99.0
+    OutboxService.record(db, ORDER_UPDATED, order)
+    db.commit()
+    assert daily() == 99.0
+    OutboxService.record(db, ORDER_DELETED, order.id)
+    db.delete(order)
+    db.commit()
+    assert daily() == 0.0
+
+
+def test_least_recently_used_results_are_evicted(db):
+    cache = AnalyticsCache(max_entries=2)
+    ends = [datetime(2030, 1, day) for day in (1, 2, 3)]
+    reports = [_report(cache, db, end) for end in ends]
+    reports[0][0]()
+    reports[1][0]()
+    reports[0][0]()
+    reports[2][0]()  # Evicts the second window
+    reports[0][0]()
+    reports[1][0]()
+    assert [len(calls) for _, calls in reports] == [1, 2, 1]
+
+
+def test_service_reports_are_cached_with_hit_metrics(db):
+    analytics_cache.clear()
+    metrics_registry.reset()
+    start, end = datetime(2020, 1, 1), datetime(2020, 1, 31)
+    db.add(Order(total=10.0, created_at=datetime(2020, 1, 5), order_data=json.dumps([])))
+    db.commit()
+    first = AnalyticsService.get_daily_sales_report(db, start, end)
+    assert AnalyticsService.get_daily_sales_report(db, start_date=start, end_date=end) is first
+    assert first.total_orders == 1
+    assert metrics_registry.cache_requests[("analytics", "service-daily", "hit")] == 1
+    assert 'cache_requests_total{cache="analytics",name="service-daily",result="miss"} 1' in metrics_registry.render_prometheus()
+
+
+def test_payments_recompute_windows_of_the_day_they_are_taken(db):
+    # Tax reports read ledger rows posted when the payment is taken, not when the order was placed
+    cache = AnalyticsCache(max_entries=10)
+    order = Order(total=4.0, created_at=datetime.utcnow() - timedelta(days=10), order_data="[]")
+    db.add(order)
+    db.commit()
+    calls = []
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    report = lambda: cache.get_or_compute(db, "sales-tax", {"start_date": today, "end_date": today + timedelta(hours=23)},
+                                          lambda: calls.append(1))
+    report()
+    OutboxService.record(db, PAYMENT_COMPLETED, order.id, {"amount": 4.0})
+    db.commit()
+    report()
+    assert len(calls) == 2
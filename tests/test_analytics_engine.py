@@ -0,0 +1,129 @@
+"""
+Tests for the columnar analytics engine behind the top-items report
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.order import Order
+from app.routes import analytics_routes
+from app.services.analytics_cache import analytics_cache
+from app.services.analytics_engine import AnalyticsEngine, np
+from app.services.outbox_service import OutboxService
+from app.utils.events import ORDER_DELETED, ORDER_PLACED, ORDER_UPDATED
+
+pytestmark = pytest.mark.skipif(np is None, reason="numpy not installed")
+
+START = datetime(2030, 1, 27, 15, 30)
+END = datetime(2030, 3, 3, 11, 0)
+MENU = [("Burger", "Food", 10.0), ("Fries", "Food", 3.5), ("Beer", "Drinks", 5.0),
+        ("Cola", "Drinks", 2.25), ("Cake", "Dessert", 6.1), ("Soup", None, 4.95)]
+
+
+@pytest.fixture
+def db(db):
+    rng = random.Random(7)
+    orders = []
+    for _ in range(600):
+        created_at = START - timedelta(days=3) + timedelta(seconds=rng.randrange(40 * 86400))
+        lines = [{"name": name, "category": category, "price": price}
+                 for name, category, price in rng.choices(MENU, k=rng.randint(1, 4))]
+        orders.append(Order(created_at=created_at, total=round(sum(line["price"] for line in lines), 2),
+                            order_data=json.dumps(lines)))
+    # Rows the per-order loops skip in part or whole
+    orders += [
+        Order(created_at=START + timedelta(days=1), total=None, order_data=json.dumps([{"name": "Burger", "price": 10}])),
+        Order(created_at=START + timedelta(days=2), total=7.0, order_data="not json"),
+        Order(created_at=START + timedelta(days=3), total=9.0,
+              order_data=json.dumps([{"name": "Tea", "price": 2}, "junk", {"name": "Burger", "price": 10}])),
+        Order(created_at=START + timedelta(days=4), total=3.0, order_data=json.dumps([{"name": "Tea", "price": "n/a"}])),
+        Order(created_at=START + timedelta(days=5), total=4.0, order_data=json.dumps({"name": "Tea"})),
+    ]
+    db.add_all(orders)
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = AnalyticsEngine(cache_days=400)
+    monkeypatch.setattr(analytics_routes, "analytics_engine", engine)
+    # Compare fresh results, not cached ones
+    monkeypatch.setattr(analytics_cache, "max_entries", 0)
+    return engine
+
+
+def _legacy(monkeypatch, report, *args):
+    with monkeypatch.context() as patch:
+        patch.setattr(analytics_routes, "analytics_engine", None)
+        return report(*args)
+
+
+@pytest.mark.parametrize("limit", [4, 100])
+def test_top_items_match_the_per_order_loop(db, engine, monkeypatch, limit):
+    report = analytics_routes.get_top_selling_items
+    args = [START, END, limit, db]
+    assert report(*args) == _legacy(monkeypatch, report, *args)
+    # Served again from the cached snapshots, over a range that starts and ends mid-day
+    args[0] += timedelta(days=2, hours=5)
+    assert report(*args) == _legacy(monkeypatch, report, *args)
+
+
+def test_top_items_for_a_window_without_sold_lines(db, engine, monkeypatch):
+    report = analytics_routes.get_top_selling_items
+    # Item names seen on earlier days must not be read from the empty window
+    report(START, END, 10, db)
+    quiet = START + timedelta(days=60)
+    db.add(Order(created_at=quiet + timedelta(hours=1), total=0.0, order_data="[]"))
+    db.commit()
+    args = [quiet, quiet + timedelta(hours=23), 10, db]
+    assert report(*args) == {"items": []}
+    assert report(*args) == _legacy(monkeypatch, report, *args)
+
+def test_days_reload_when_their_orders_change(db, engine):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    yesterday = today - timedelta(days=1)
+    report = lambda: engine.columns(db, yesterday, today + timedelta(hours=23)).total.tolist()
+    old = Order(created_at=yesterday, total=5.0, order_data="[]")
+    db.add(old)
+    db.commit()
+    assert report() == [5.0]
+    loads = []
+    real_load = engine._load_days
+    engine._load_days = lambda db, first, last: loads.append((first, last)) or real_load(db, first, last)
+
+    # Not seen until the write watermark moves
+    new = Order(created_at=today + timedelta(seconds=1), total=6.0, order_data="[]")
+    db.add(new)
+    db.commit()
+    assert report() == [5.0]
+
+    # A new order reloads its day only
+    OutboxService.record(db, ORDER_PLACED, new)
+    db.commit()
+    assert report() == [5.0, 6.0]
+    assert loads == [(today.date(), today.date())]
+
+    # An edit to a past day's order reloads that day
+    old.total = 7.0
+    OutboxService.record(db, ORDER_UPDATED, old)
+    db.commit()
+    assert report() == [7.0, 6.0]
+    assert loads[1:] == [(yesterday.date(), yesterday.date())]
+
+    # A deleted order's day is not known: every day reloads
+    OutboxService.record(db, ORDER_DELETED, old.id)
+    db.delete(old)
+    db.commit()
+    assert report() == [6.0]
+    assert loads[2:] == [(yesterday.date(), today.date())]
+    engine.invalidate()
+    assert report() == [6.0]
+
+
+def test_cache_keeps_at_most_cache_days(db, engine):
+    engine.cache_days = 5
+    engine.columns(db, START, END)
+    assert len(engine._days[engine._engine(db)]) == 5
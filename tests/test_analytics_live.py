@@ -0,0 +1,68 @@
+"""
+Tests for the streaming top-items and orders-per-hour counters
+"""
+import json
+from datetime import datetime, timedelta
+
+from app.models.analytics_snapshot import AnalyticsSnapshot
+from app.schemas.order_schema import OrderCreate
+from app.services.live_analytics import LiveAnalytics
+from app.services.order_service import OrderService
+from app.utils.events import event_bus, ORDER_PLACED
+from app.utils.sketches import SpaceSaving
+
+
+def _lines(*names):
+    return [{"name": name, "category": "Food", "price": 4.0} for name in names]
+
+
+def test_space_saving_always_keeps_heavy_hitters():
+    sketch = SpaceSaving(capacity=5)
+    for n in range(1000):
+        sketch.add("Burger" if n % 3 == 0 else f"Rare {n}", weight=1.0)
+    (name, count, error, _, _), = sketch.top(1)
+    assert name == "Burger"
+    assert count - error <= 334 <= count  # True count within the reported bounds
+
+    exact = SpaceSaving(capacity=10)
+    for name in ["Tea", "Tea", "Cake"]:
+        exact.add(name, weight=2.5, label="Menu")
+    merged = SpaceSaving.from_list(10, json.loads(json.dumps(exact.to_list()))).merge(exact)
+    assert merged.top(2) == [("Tea", 4, 0, 10.0, "Menu"), ("Cake", 2, 0, 5.0, "Menu")]
+
+
+def test_placed_orders_are_counted_per_hour(db):
+    counters = LiveAnalytics(capacity=50, persist_seconds=60, worker_id="a")
+    event_bus.subscribe(ORDER_PLACED, counters.on_order_placed)
+    try:
+        OrderService.place_order(db, OrderCreate(order=_lines("Tea", "Cake"), total=8.0, order_type="takeaway"), created_by=1)
+        OrderService.place_order(db, OrderCreate(order=_lines("Tea"), total=4.0, order_type="takeaway"), created_by=1)
+    finally:
+        event_bus.unsubscribe(ORDER_PLACED, counters.on_order_placed)
+
+    top = counters.top_items(db, "hour", limit=1)["items"]
+    assert top == [{"name": "Tea", "category": "Food", "quantity": 2, "revenue": 8.0, "average_price": 4.0, "error": 0}]
+    hours = counters.orders_per_hour(db)["hours"]
+    assert hours[datetime.utcnow().hour] == {"hour": datetime.utcnow().hour, "order_count": 2,
+                                             "total_revenue": 12.0, "average_order_value": 6.0}
+    assert sum(hour["order_count"] for hour in hours) == 2
+
+
+def test_saved_counters_survive_a_restart_and_add_up_across_workers(db):
+    now = datetime.utcnow()
+    first = LiveAnalytics(capacity=50, persist_seconds=0, worker_id="first")
+    first.record_order(now, 8.0, _lines("Tea", "Cake"))
+    first.record_order(now - timedelta(days=3), 4.0, _lines("Tea"))  # Past the retention
+    assert first.persist(db) == 1
+    assert first.persist(db) == 0  # Nothing changed since
+
+    # The first process restarted; the new one and another worker see its saved hour
+    restarted = LiveAnalytics(capacity=50, persist_seconds=0, worker_id="restarted")
+    restarted.record_order(now, 4.0, _lines("Cake"))
+    other = LiveAnalytics(capacity=50, persist_seconds=0, worker_id="other")
+    assert [(item["name"], item["quantity"]) for item in restarted.top_items(db)["items"]] == [("Cake", 2), ("Tea", 1)]
+    assert sorted((item["name"], item["quantity"]) for item in other.top_items(db)["items"]) == [("Cake", 1), ("Tea", 1)]
+
+    restarted.persist(db)
+    assert sum(hour["order_count"] for hour in other.orders_per_hour(db)["hours"]) == 2
+    assert db.query(AnalyticsSnapshot).count() == 2
@@ -8,6 +8,9 @@ from datetime import datetime, timedelta
 
 client = TestClient(app)
 
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
 def test_get_top_selling_items():
     """Test the get_top_selling_items endpoint"""
     response = client.get("/api/analytics/reports/top-items")
@@ -0,0 +1,137 @@
+"""
+Tests for the restaurant time zone and the sales reports bucketed by it in SQL
+"""
+import json
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import select
+
+from app.models.order import Order
+from app.routes import analytics_routes
+from app.services.analytics_cache import analytics_cache
+from app.services.live_analytics import LiveAnalytics
+from app.services.settings_service import SettingsService
+from app.utils.time_buckets import bucket_start, hour_of_day, time_bucket, to_local, utc_offsets
+
+NEW_YORK = ZoneInfo("America/New_York")
+# Around the start of daylight saving time in New York, 2030-03-10
+START = datetime(2030, 2, 25)
+END = datetime(2030, 3, 20, 12)
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    monkeypatch.setattr(analytics_cache, "max_entries", 0)
+    return db
+
+
+@pytest.fixture
+def orders(db):
+    rng = random.Random(11)
+    orders = []
+    for _ in range(400):
+        created_at = START - timedelta(days=2) + timedelta(seconds=rng.randrange(26 * 86400))
+        lines = [{"name": "Tea", "price": 2.5}] * rng.randint(1, 3)
+        orders.append(Order(created_at=created_at, total=round(sum(line["price"] for line in lines), 2),
+                            order_data=json.dumps(lines)))
+    orders += [
+        Order(created_at=START + timedelta(days=1), total=None, order_data=json.dumps([{"name": "Tea"}])),
+        Order(created_at=START + timedelta(days=2), total=7.0, order_data="not json"),
+        Order(created_at=START + timedelta(days=3), total=4.0, order_data=json.dumps({"name": "Tea"})),
+        Order(created_at=START + timedelta(days=4), total=3.0, order_data=[{"name": "Tea"}, {"name": "Cake"}]),
+    ]
+    db.add_all(orders)
+    db.commit()
+    SettingsService.update_timezone(db, "America/New_York")
+    return orders
+
+
+def _expected(orders, period_of):
+    """The reports' numbers, computed per order in Python"""
+    start, end = START.replace(tzinfo=NEW_YORK), END.replace(tzinfo=NEW_YORK)
+    periods = defaultdict(lambda: [0.0, 0, 0])
+    for order in orders:
+        local = order.created_at.replace(tzinfo=timezone.utc).astimezone(NEW_YORK)
+        if order.total is None or not start <= local <= end:
+            continue
+        items = order.order_data
+        try:
+            items = json.loads(items) if isinstance(items, str) else items
+        except ValueError:
+            items = None
+        period = periods[period_of(local)]
+        period[0] += order.total
+        period[1] += 1
+        period[2] += len(items) if isinstance(items, list) else 0
+    return {key: (round(sales, 2), count, items) for key, (sales, count, items) in periods.items()}
+
+
+def _reported(entries, key):
+    return {entry[key]: (entry["total_sales"], entry["order_count"], entry["total_items"])
+            for entry in entries if entry["order_count"]}
+
+
+def test_timezone_setting(db):
+    assert SettingsService.get_timezone(db) == timezone.utc
+    with pytest.raises(ValueError):
+        SettingsService.update_timezone(db, "Mars/Olympus_Mons")
+    SettingsService.update_timezone(db, "Asia/Yangon")
+    assert SettingsService.get_timezone(db) == ZoneInfo("Asia/Yangon")
+
+
+def test_offsets_change_with_daylight_saving_time():
+    assert utc_offsets(NEW_YORK, START, END) == [
+        (START, timedelta(hours=-5)),
+        (datetime(2030, 3, 10, 7), timedelta(hours=-4)),
+    ]
+    assert len(utc_offsets(ZoneInfo("Asia/Yangon"), START, END)) == 1
+
+
+@pytest.mark.parametrize("granularity, local_start", [
+    ("hour", lambda local: local.replace(minute=0, second=0)),
+    ("day", lambda local: local.replace(hour=0, minute=0, second=0)),
+    ("week", lambda local: (local - timedelta(days=local.weekday())).replace(hour=0, minute=0, second=0)),
+    ("month", lambda local: local.replace(day=1, hour=0, minute=0, second=0)),
+])
+def test_buckets_are_local(db, orders, granularity, local_start):
+    start, end = START, END + timedelta(days=1)
+    bucket = time_bucket(db, Order.created_at, granularity, NEW_YORK, start, end)
+    hour = hour_of_day(db, Order.created_at, NEW_YORK, start, end)
+    rows = db.execute(select(Order.created_at, bucket, hour).where(Order.created_at.between(start, end))).all()
+    assert rows
+    for created_at, value, local_hour in rows:
+        local = to_local(created_at, NEW_YORK).replace(microsecond=0)
+        assert bucket_start(value) == local_start(local)
+        assert local_hour == local.hour
+
+
+def test_reports_bucket_in_restaurant_time(db, orders):
+    daily = analytics_routes.get_daily_sales_report(START, END, db)
+    assert [entry["date"] for entry in daily["sales_data"]][::23] == ["2030-02-25", "2030-03-20"]
+    assert _reported(daily["sales_data"], "date") == _expected(orders, lambda local: local.date().isoformat())
+
+    weekly = analytics_routes.get_weekly_sales_report(START, END, db)["sales_data"]
+    monday = lambda local: (local.date() - timedelta(days=local.weekday())).isoformat()
+    assert _reported(weekly, "date") == _expected(orders, monday)
+
+    monthly = analytics_routes.get_monthly_sales_report(START, END, db)["sales_data"]
+    assert _reported(monthly, "date") == _expected(orders, lambda local: local.date().replace(day=1).isoformat())
+
+    hours = analytics_routes.get_peak_hours(START, END, db)["hours"]
+    assert {hour["hour"]: (hour["total_revenue"], hour["order_count"]) for hour in hours if hour["order_count"]} == {
+        hour: values[:2] for hour, values in _expected(orders, lambda local: local.hour).items()
+    }
+
+
+def test_live_day_follows_daylight_saving_time():
+    spring_forward = LiveAnalytics.window("day", datetime(2030, 3, 10, 15), NEW_YORK)
+    assert spring_forward == (datetime(2030, 3, 10, 5), datetime(2030, 3, 11, 4))
+    # Half-hour offset: the hours starting in the day, 00:30 to 23:30
+    assert LiveAnalytics.window("day", datetime(2030, 3, 10, 15), ZoneInfo("Asia/Yangon")) == (
+        datetime(2030, 3, 9, 18), datetime(2030, 3, 10, 18)
+    )
+    assert to_local(datetime(2030, 3, 9, 18), ZoneInfo("Asia/Yangon")).date() == date(2030, 3, 10)
@@ -0,0 +1,153 @@
+"""
+Tests for archiving closed orders and reading reports across hot and archive tables
+"""
+import json
+from datetime import datetime, timedelta
+
+from app.models.archive import InvoiceArchive, KitchenOrderArchive, OrderArchive
+from app.models.idempotency import IdempotencyKey
+from app.models.invoice import Invoice
+from app.models.kitchen import KitchenOrder
+from app.models.order import Order, OrderStatus
+from app.models.table import Table
+from app.routes import analytics_routes
+from app.services.analytics_cache import analytics_cache
+from app.services.analytics_engine import AnalyticsEngine
+from app.services.analytics_service import AnalyticsService
+from app.services.archive_service import ArchiveService
+from app.services.kitchen_sync_service import KitchenSyncService
+from app.services.payment_service import PaymentService
+
+
+def _order(db, days_ago, paid=True, **fields):
+    created_at = datetime.utcnow() - timedelta(days=days_ago)
+    order = Order(
+        total=10.0,
+        created_at=created_at,
+        payment_status="completed" if paid else "pending",
+        paid_at=created_at if paid else None,
+        **fields
+    )
+    order.kitchen_order = KitchenOrder(status="served", created_at=created_at)
+    db.add(order)
+    db.flush()
+    db.add(Invoice(invoice_number=f"INV-{order.id}", order_id=order.id, total=10.0, created_at=created_at))
+    db.commit()
+    return order
+
+
+def test_only_closed_old_unreferenced_orders_are_archivable(db):
+    old_paid = _order(db, 120)
+    old_cancelled = _order(db, 120, paid=False, status=OrderStatus.CANCELLED)
+    _order(db, 120, paid=False)  # still open
+    _order(db, 5)  # too recent
+    seated = _order(db, 120)
+    db.add(Table(table_number=1, capacity=2, current_order_id=seated.id))
+    db.commit()
+
+    cutoff = datetime.utcnow() - timedelta(days=90)
+    assert ArchiveService.archivable_order_ids(db, cutoff, 100) == [old_paid.id, old_cancelled.id]
+
+
+def test_run_moves_orders_with_their_tickets_and_invoices(db):
+    old = [_order(db, 100 + n) for n in range(5)]
+    recent = _order(db, 1)
+    db.add(IdempotencyKey(key="k-old", order_id=old[0].id))
+    db.commit()
+
+    totals = ArchiveService.run(db, older_than_days=90, batch_size=2)
+
+    assert totals == {"orders": 5, "kitchen_orders": 5, "invoices": 5, "batches": 3}
+    assert [o.id for o in db.query(Order)] == [recent.id]
+    assert db.query(KitchenOrder).count() == 1
+    assert db.query(Invoice).count() == 1
+    assert db.query(IdempotencyKey).count() == 0
+    assert sorted(o.id for o in db.query(OrderArchive)) == sorted(o.id for o in old)
+    assert db.query(KitchenOrderArchive).count() == 5
+    assert {i.invoice_number for i in db.query(InvoiceArchive)} == {f"INV-{o.id}" for o in old}
+    assert all(o.archived_at is not None for o in db.query(OrderArchive))
+
+    # Nothing left to do on the next run
+    assert ArchiveService.run(db, older_than_days=90, batch_size=2)["batches"] == 0
+
+
+def test_archived_open_tickets_leave_the_displays(db):
+    served = _order(db, 120)
+    cancelled = _order(db, 120, paid=False, status=OrderStatus.CANCELLED)
+    cancelled.kitchen_order.status = "pending"
+    db.commit()
+    cursor = KitchenSyncService.changes_since(db, 0)["version"]
+
+    ArchiveService.run(db, older_than_days=90, batch_size=10)
+
+    changes = KitchenSyncService.changes_since(db, cursor)
+    # Served tickets are already off the displays
+    assert changes["removed"] == [cancelled.id]
+    assert changes["version"] > cursor
+    assert served.id not in changes["removed"]
+
+def test_reports_include_archived_orders(db):
+    for days_ago in (100, 100, 2):
+        _order(db, days_ago)
+    start, end = datetime.utcnow() - timedelta(days=120), datetime.utcnow()
+
+    before_daily = AnalyticsService.get_daily_sales_report(db, start, end)
+    before_summary = PaymentService.get_payment_summary(db, start, end)
+    ArchiveService.run(db, older_than_days=90, batch_size=100)
+    db.expunge_all()
+    after_daily = AnalyticsService.get_daily_sales_report(db, start, end)
+    after_summary = PaymentService.get_payment_summary(db, start, end)
+
+    assert db.query(OrderArchive).count() == 2
+    assert after_daily.total_orders == before_daily.total_orders == 3
+    assert after_daily.total_sales == before_daily.total_sales == 30.0
+    assert after_summary["total_transactions"] == before_summary["total_transactions"] == 3
+    assert after_summary["total_revenue"] == 30.0
+
+
+def test_sales_reports_are_unchanged_by_archival(db, monkeypatch):
+    for days_ago, lines in ((100, [("Soup", 4.0)]), (100, [("Soup", 4.0), ("Tea", 2.0)]), (2, [("Tea", 2.0)])):
+        order = _order(db, days_ago, order_data=json.dumps([{"name": name, "price": price} for name, price in lines]))
+        order.total = sum(price for _, price in lines)
+    db.commit()
+    start, end = datetime.utcnow() - timedelta(days=120), datetime.utcnow()
+    # Compare fresh results, not cached ones
+    monkeypatch.setattr(analytics_cache, "max_entries", 0)
+
+    def reports():
+        monkeypatch.setattr(analytics_routes, "analytics_engine", AnalyticsEngine(cache_days=400))
+        results = {
+            report.__name__: report(start, end, db)
+            for report in (analytics_routes.get_daily_sales_report, analytics_routes.get_weekly_sales_report,
+                           analytics_routes.get_monthly_sales_report, analytics_routes.get_peak_hours)
+        }
+        results["top_items"] = analytics_routes.get_top_selling_items(start, end, 10, db)
+        with monkeypatch.context() as patch:
+            # The per-order loop used without numpy
+            patch.setattr(analytics_routes, "analytics_engine", None)
+            results["top_items_loop"] = analytics_routes.get_top_selling_items(start, end, 10, db)
+        results["compliance"] = analytics_routes.get_compliance_reports(start, end, db)["total_transactions"]
+        return results
+
+    before = reports()
+    ArchiveService.run(db, older_than_days=90, batch_size=100)
+    db.expunge_all()
+    after = reports()
+
+    assert db.query(OrderArchive).count() == 2
+    assert after == before
+    assert before["get_daily_sales_report"]["total_sales"] == 12.0
+    assert before["get_monthly_sales_report"]["total_orders"] == 3
+    assert sum(hour["order_count"] for hour in before["get_peak_hours"]["hours"]) == 3
+    assert {item["name"]: item["quantity"] for item in before["top_items"]["items"]} == {"Soup": 2, "Tea": 2}
+    assert before["top_items_loop"] == before["top_items"]
+
+
+def test_split_parent_is_archived_after_its_children(db):
+    parent = _order(db, 120)
+    child = _order(db, 120, parent_order_id=parent.id)
+
+    assert ArchiveService.run(db, older_than_days=90, batch_size=100)["orders"] == 1
+    assert [o.id for o in db.query(OrderArchive)] == [child.id]
+    ArchiveService.run(db, older_than_days=90, batch_size=100)
+    assert db.query(Order).count() == 0
@@ -0,0 +1,130 @@
+"""
+Tests for the in-memory floor plan and its snapshot, delta and stream endpoints
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.seat import Seat
+from app.models.table import Table
+from app.routes.table_routes import floor_plan_events
+from app.services.floor_plan_service import FloorPlanService, floor_plan
+
+client = TestClient(app)
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+def _state(table_id, status="available"):
+    return {"id": table_id, "table_number": table_id, "capacity": 2, "is_occupied": status != "available",
+            "current_order_id": None, "status": status, "seats": []}
+
+
+@pytest.fixture
+def fresh_floor_plan():
+    floor_plan.reset()
+    yield floor_plan
+    floor_plan.reset()
+
+
+@pytest.fixture
+def table():
+    with SessionLocal() as db:
+        db_table = Table(table_number=9001, capacity=2, is_occupied=False, status="available",
+                         seats=[Seat(seat_number=1), Seat(seat_number=2)])
+        db.add(db_table)
+        db.commit()
+        table_id = db_table.id
+    yield table_id
+    with SessionLocal() as db:
+        db_table = db.get(Table, table_id)
+        if db_table is not None:
+            db.delete(db_table)
+            db.commit()
+
+
+def test_changes_since_returns_only_changed_and_removed_tables():
+    plan = FloorPlanService("sqlite://", refresh_seconds=60, history_size=100)
+    plan.apply({1: _state(1), 2: _state(2), 3: _state(3)})
+    version = plan.version
+
+    assert plan.apply({1: _state(1), 2: _state(2, "occupied"), 3: None}) == 2
+
+    delta = plan.changes_since(version, plan.epoch)
+    assert delta["full"] is False
+    assert [t["id"] for t in delta["tables"]] == [2]
+    assert delta["removed"] == [3]
+    assert plan.changes_since(plan.version, plan.epoch)["tables"] == []
+
+
+def test_stale_or_foreign_versions_get_a_full_snapshot():
+    plan = FloorPlanService("sqlite://", refresh_seconds=60, history_size=2)
+    plan.apply({n: _state(n) for n in range(1, 5)})
+
+    assert plan.changes_since(0, plan.epoch)["full"] is True  # older than the change log
+    assert plan.changes_since(plan.version, "another-process")["full"] is True
+    assert len(plan.changes_since(0)["tables"]) == 4
+
+
+def test_committed_table_changes_update_the_floor_plan_without_a_reload(fresh_floor_plan, table):
+    with SessionLocal() as db:
+        fresh_floor_plan.load(db)
+    version = fresh_floor_plan.version
+
+    with SessionLocal() as db:
+        db_table = db.get(Table, table)
+        db_table.status = "reserved"
+        db.flush()
+        db.rollback()  # rolled back changes are not applied
+        db_table = db.get(Table, table)
+        db_table.is_occupied = True
+        db_table.status = "occupied"
+        db.commit()
+
+    delta = fresh_floor_plan.changes_since(version, fresh_floor_plan.epoch)
+    assert [(t["id"], t["status"]) for t in delta["tables"]] == [(table, "occupied")]
+
+
+def test_routes_serve_the_floor_plan(fresh_floor_plan, table):
+    snapshot = client.get("/api/tables/floor-plan").json()
+    assert table in [t["id"] for t in snapshot["tables"]]
+    assert table in [t["id"] for t in client.get("/api/tables/available/").json()]
+
+    assert client.post(f"/api/tables/{table}/assign-seat/1", data={"customer_name": "Ana"}).status_code == 200
+
+    delta = client.get(f"/api/tables/floor-plan/changes?since={snapshot['version']}&epoch={snapshot['epoch']}").json()
+    assert delta["full"] is False
+    [changed] = delta["tables"]
+    assert changed["id"] == table and changed["is_occupied"]
+    assert changed["seats"][0] == {"seat_number": 1, "status": "occupied", "customer_name": "Ana"}
+    assert table in [t["id"] for t in client.get("/api/tables/occupied/").json()]
+
+    # The seat change was persisted, not just applied in memory
+    with SessionLocal() as db:
+        assert db.get(Table, table).seats[0].status == "occupied"
+
+
+def test_stream_sends_snapshot_then_deltas(fresh_floor_plan, table):
+    async def run():
+        async def connected():
+            return False
+
+        events = floor_plan_events(connected)
+        snapshot = await asyncio.wait_for(events.__anext__(), 5)
+
+        with SessionLocal() as db:
+            db.get(Table, table).status = "cleaning"
+            db.commit()
+
+        delta = await asyncio.wait_for(events.__anext__(), 5)
+        await events.aclose()
+        return snapshot, delta
+
+    snapshot, delta = asyncio.run(run())
+    assert snapshot.startswith("event: snapshot\n")
+    assert delta.startswith("event: delta\n")
+    assert '"status": "cleaning"' in delta
@@ -13,6 +13,9 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
 def override_get_db():
     try:
         db = TestingSessionLocal()
@@ -0,0 +1,137 @@
+"""
+Tests for the kitchen station queues and their ready-time estimates
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.kitchen import KitchenOrderTransition
+from app.models.order import Order
+from app.schemas.order_schema import OrderCreate
+from app.services.floor_plan_service import database_key
+from app.services.kitchen_scheduler import KitchenScheduler, _StationQueue, kitchen_scheduler, order_lines
+from app.services.kitchen_timing_service import KitchenTimingService
+from app.services.order_service import OrderService
+
+NOW = datetime(2030, 5, 1, 12)
+
+
+def test_station_queue_sums_work_ahead():
+    rng = random.Random(7)
+    queue = _StationQueue(size=8)
+    live = {}
+    for ticket_id in range(300):
+        work = rng.uniform(60, 600)
+        queue.push(ticket_id, work, work)
+        live[ticket_id] = work
+        if rng.random() < 0.4:
+            removed = rng.choice(list(live))
+            queue.remove(removed)
+            del live[removed]
+
+    order = list(live)
+    assert [entry[0] for entry in queue.entries()] == order
+    for i, ticket_id in enumerate(order):
+        ahead, work, _ = queue.entry(ticket_id)
+        assert ahead == pytest.approx(sum(live[other] for other in order[:i]))
+        assert work == live[ticket_id]
+
+
+def _scheduler(**overrides):
+    settings = {"refresh_seconds": 60, "station_capacity": 1, "default_prep_seconds": 600}
+    settings.update(overrides)
+    return KitchenScheduler("sqlite://", **settings)
+
+
+def _ticket(order_id, lines, status="pending", created_at=NOW, updated_at=None):
+    return order_id, status, created_at, updated_at or created_at, lines
+
+
+def test_estimates_follow_queue_and_learned_prep_times():
+    scheduler = _scheduler()
+    soup, tea = ("Soup", "main_kitchen"), ("Tea", "beverage_station")
+    scheduler.apply({1: _ticket(101, [soup])}, [])
+    # Nothing learnt yet: the default prep time
+    assert scheduler.ready_at(101, NOW) == NOW + timedelta(seconds=600)
+
+    # Soup took 300s; the next soup queues behind the first
+    scheduler.apply({1: _ticket(101, [soup], "ready")}, [(1, 300.0)])
+    scheduler.apply({2: _ticket(102, [soup, tea]), 3: _ticket(103, [soup])}, [])
+    assert scheduler.prep_seconds("Soup", "main_kitchen") == 300
+    # Tea has no history at a station with none either: the default is the slowest item
+    assert scheduler.ready_at(102, NOW) == NOW + timedelta(seconds=600)
+    assert scheduler.ready_at(103, NOW) == NOW + timedelta(seconds=600)
+
+    # Two minutes into preparing the first ticket, the second waits for the rest of it
+    scheduler.apply({2: _ticket(102, [soup, tea], "preparing", updated_at=NOW)}, [])
+    later = NOW + timedelta(seconds=120)
+    assert scheduler.ready_at(103, later) == later + timedelta(seconds=480)
+
+    queue = {station["station"]: station for station in scheduler.queue(later)["stations"]}
+    assert [ticket["order_id"] for ticket in queue["main_kitchen"]["tickets"]] == [102, 103]
+    assert queue["main_kitchen"]["backlog_seconds"] == 480
+    assert queue["beverage_station"]["tickets"][0]["items"] == ["Tea"]
+
+    # Served and deleted tickets leave the queues
+    scheduler.apply({2: _ticket(102, [soup, tea], "served"), 3: None}, [])
+    assert scheduler.ready_at(102) is None and scheduler.ready_at(103) is None
+    assert all(not station["tickets"] for station in scheduler.queue()["stations"])
+
+
+def test_slowest_item_learns_from_shared_tickets():
+    scheduler = _scheduler()
+    steak, salad = ("Steak", "grill_station"), ("Salad", "main_kitchen")
+    scheduler.apply({1: _ticket(1, [steak])}, [])
+    scheduler.apply({}, [(1, 900.0)])
+    scheduler.apply({2: _ticket(2, [steak, salad])}, [])
+    scheduler.apply({}, [(2, 1000.0)])
+    assert scheduler.prep_seconds("Steak", "grill_station") == pytest.approx(920)
+    # The salad was not the slowest item, so it is not learnt from this ticket
+    assert scheduler.prep_seconds("Salad", "main_kitchen") == 600
+
+
+def test_order_lines_route_by_category():
+    lines = order_lines('"[{\\"name\\": \\"Cola\\", \\"category\\": \\"Drinks\\"}, {\\"name\\": \\"Burger\\"}]"')
+    assert lines == [("Cola", "beverage_station"), ("Burger", "main_kitchen")]
+    assert order_lines("not json") == [] and order_lines({"name": "Tea"}) == []
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    # Track this database instead of the application's
+    monkeypatch.setattr(kitchen_scheduler, "database_key", database_key(db.get_bind().url))
+    monkeypatch.setattr(kitchen_scheduler, "station_capacity", 1)
+    return db
+
+
+def test_committed_orders_and_status_changes_update_the_queues(db):
+    history = Order(total=4.0, order_data='[{"name": "Pho", "category": "Soup"}]')
+    db.add(history)
+    db.flush()
+    db.add(KitchenOrderTransition(order_id=history.id, station="kitchen", from_status="preparing",
+                                  to_status="ready", ticket_seconds=500, step_seconds=420))
+    db.commit()
+    kitchen_scheduler.load(db)
+    assert kitchen_scheduler.prep_seconds("Pho", "main_kitchen") == 420
+
+    placed = [
+        OrderService.place_order(db, OrderCreate(order=[{"name": "Pho", "price": 4.0, "category": "Soup"}], total=4.0), 1)
+        for _ in range(3)
+    ]
+    etas = [kitchen_scheduler.ready_at(order.id) for order in placed]
+    assert etas == sorted(etas)
+    assert (etas[2] - etas[0]).total_seconds() == pytest.approx(840, abs=5)
+
+    first = placed[0].kitchen_order
+    KitchenTimingService.change_status(db, first, "preparing", "kitchen")
+    db.commit()
+    KitchenTimingService.change_status(db, first, "ready", "kitchen")
+    db.commit()
+    assert kitchen_scheduler.ready_at(placed[0].id) is None
+    assert kitchen_scheduler.ready_at(placed[1].id) < etas[1]
+
+    # A reload rebuilds the same queues
+    before = [ticket["order_id"] for station in kitchen_scheduler.queue()["stations"] for ticket in station["tickets"]]
+    kitchen_scheduler.load(db)
+    assert [ticket["order_id"] for station in kitchen_scheduler.queue()["stations"] for ticket in station["tickets"]] == before
@@ -0,0 +1,123 @@
+"""
+Tests for the version stamps behind the kitchen and bar delta-sync polls
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models.kitchen import KitchenOrder, KitchenOrderTombstone
+from app.models.order import Order
+from app.routes import bar_routes, kitchen_routes_db
+from app.schemas.order_schema import OrderCreate, OrderSyncItem
+from app.services.kitchen_sync_service import KitchenSyncService
+from app.services.kitchen_timing_service import KitchenTimingService
+from app.services.order_service import OrderService
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "sync.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _place(db, *items):
+    order = [{"name": name, "price": 2.0, "category": category} for name, category in items]
+    return OrderService.place_order(db, OrderCreate(order=order, total=2.0 * len(order)), 1)
+
+
+def _ids(changes):
+    return [kitchen_order.order_id for kitchen_order, _ in changes["tickets"]]
+
+
+def test_changes_since_returns_changed_tickets_and_removals(db):
+    first, second, third = _place(db, ("Soup", "Main")), _place(db, ("Rice", "Main")), _place(db, ("Tea", "Drinks"))
+    versions = [order.kitchen_order.version for order in (first, second, third)]
+    assert versions == sorted(set(versions)) and versions[0] > 0
+
+    start = KitchenSyncService.changes_since(db, 0)
+    assert _ids(start) == [first.id, second.id, third.id] and start["removed"] == [] and not start["full"]
+    cursor = start["version"]
+    assert KitchenSyncService.changes_since(db, cursor)["tickets"] == []
+
+    # A status change re-sends only that ticket
+    KitchenTimingService.change_status(db, second.kitchen_order, "preparing", "kitchen")
+    db.commit()
+    changes = KitchenSyncService.changes_since(db, cursor)
+    assert _ids(changes) == [second.id] and changes["version"] > cursor
+    cursor = changes["version"]
+
+    # Editing what the display shows re-sends the ticket, other order fields do not
+    first.customer_name = "Aye"
+    db.commit()
+    assert _ids(KitchenSyncService.changes_since(db, cursor)) == [first.id]
+    cursor = KitchenSyncService.changes_since(db, cursor)["version"]
+    third.special_requests = "no sugar"
+    db.commit()
+    assert KitchenSyncService.changes_since(db, cursor)["version"] == cursor
+
+    # Served and deleted tickets come back as removed order ids
+    KitchenTimingService.change_status(db, second.kitchen_order, "served", "kitchen")
+    db.delete(third.kitchen_order)
+    db.commit()
+    changes = KitchenSyncService.changes_since(db, cursor)
+    assert changes["tickets"] == [] and sorted(changes["removed"]) == [second.id, third.id]
+    tombstone = db.execute(select(KitchenOrderTombstone).where(KitchenOrderTombstone.order_id == third.id)).scalar_one()
+    assert tombstone.version == changes["version"]
+
+    # A fresh display never sees removals, and a cursor from elsewhere gets everything open
+    assert _ids(KitchenSyncService.changes_since(db, 0)) == [first.id]
+    assert KitchenSyncService.changes_since(db, 0)["removed"] == [second.id]
+    resync = KitchenSyncService.changes_since(db, changes["version"] + 100)
+    assert resync["full"] and _ids(resync) == [first.id] and resync["removed"] == []
+
+
+def test_synced_orders_are_stamped(db):
+    before = KitchenSyncService.current_version(db)
+    items = [OrderSyncItem(client_id=f"c{i}", order=[{"name": "Pho", "price": 4.0, "category": "Soup"}], total=4.0)
+             for i in range(3)]
+    OrderService.sync_orders(db, items, 1)
+    versions = db.execute(select(KitchenOrder.version)).scalars().all()
+    assert len(versions) == 3 and all(version > before for version in versions)
+    assert len(KitchenSyncService.changes_since(db, before)["tickets"]) == 3
+
+
+def test_delta_routes(db_path, db):
+    food, drink = _place(db, ("Soup", "Main")), _place(db, ("Cola", "Drinks"), ("Soup", "Main"))
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            full = await kitchen_routes_db.get_kitchen_orders(None, session)
+            kitchen = await kitchen_routes_db.get_kitchen_orders(0, session)
+            bar = await bar_routes.get_bar_orders(0, session)
+            # Dropping the drink takes the ticket off the bar display
+            order = await session.get(Order, drink.id)
+            order.order_data = json.dumps([{"name": "Soup", "price": 2.0, "category": "Main"}])
+            await session.commit()
+            bar_after = await bar_routes.get_bar_orders(bar.version, session)
+        await engine.dispose()
+        return full, kitchen, bar, bar_after
+
+    full, kitchen, bar, bar_after = asyncio.run(run())
+    assert [order.order_id for order in full] == [food.id, drink.id]
+    assert [order.order_id for order in kitchen.orders] == [food.id, drink.id] and kitchen.version > 0
+    assert [order.order_id for order in bar.orders] == [drink.id]
+    assert bar_after.orders == [] and bar_after.removed == [drink.id] and bar_after.version > bar.version
@@ -0,0 +1,156 @@
+"""
+Tests for the kitchen status log and the speed-of-service sketches folded from it
+"""
+import asyncio
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models.kitchen import KitchenOrder, KitchenOrderTransition
+from app.models.order import Order
+from app.models.service_time import ServiceTimeSketch, FOLDED_METRIC
+from app.models.user import User, UserRole
+from app.routes import bar_routes, kitchen_routes_db
+from app.schemas import KitchenOrderUpdate
+from app.services.analytics_service import AnalyticsService
+from app.services import kitchen_timing_service
+from app.services.kitchen_timing_service import KitchenTimingService
+from app.utils.sketches import QuantileSketch
+
+LATER = datetime.utcnow() + timedelta(minutes=1)  # Past the fold lag
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "timing.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _exact(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def test_quantile_sketch_accuracy_and_merge():
+    rng = random.Random(5)
+    values = [rng.lognormvariate(6, 1) for _ in range(5000)]
+    whole = QuantileSketch()
+    parts = [QuantileSketch() for _ in range(4)]
+    for i, value in enumerate(values):
+        whole.add(value)
+        parts[i % 4].add(value)
+    merged = QuantileSketch.from_list(parts[0].to_list())
+    for part in parts[1:]:
+        merged.merge(QuantileSketch.from_list(part.to_list()))
+
+    for q in (0.5, 0.95, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+        assert abs(whole.quantile(q) - _exact(values, q)) <= 0.01 * _exact(values, q)
+    assert merged.count == 5000 and merged.mean() == pytest.approx(sum(values) / 5000)
+    assert QuantileSketch().quantile(0.5) is None
+    with pytest.raises(ValueError):
+        whole.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_routes_log_transitions(db_path, db):
+    waiter = User(username="waiter1", email="w1@example.com", hashed_password="x", role=UserRole.WAITER)
+    db.add(waiter)
+    db.flush()
+    db.add_all([Order(id=1, total=10.0, created_by=waiter.id), Order(id=2, total=5.0, created_by=waiter.id)])
+    db.add_all([KitchenOrder(order_id=1, status="pending"), KitchenOrder(order_id=2, status="pending")])
+    db.commit()
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            for status in ("preparing", "preparing", "ready"):
+                await kitchen_routes_db.update_kitchen_order_status(1, KitchenOrderUpdate(status=status), session)
+            await kitchen_routes_db.mark_order_as_served(1, session)
+            await bar_routes.update_bar_order_status(2, KitchenOrderUpdate(status="ready"), session)
+            await kitchen_routes_db.remove_kitchen_order(2, session)
+        await engine.dispose()
+
+    asyncio.run(run())
+    rows = db.execute(select(KitchenOrderTransition).order_by(KitchenOrderTransition.id)).scalars().all()
+    # The repeated "preparing" is not a change
+    assert [(row.order_id, row.station, row.from_status, row.to_status) for row in rows] == [
+        (1, "kitchen", "pending", "preparing"),
+        (1, "kitchen", "preparing", "ready"),
+        (1, "kitchen", "ready", "served"),
+        (2, "bar", "pending", "ready"),
+        (2, "kitchen", "ready", "removed"),
+    ]
+    assert all(row.ticket_seconds >= row.step_seconds >= 0 for row in rows)
+
+    assert KitchenTimingService.fold(db, now=LATER) == 5
+    report = KitchenTimingService.service_times(db, date.today() - timedelta(days=1), date.today() + timedelta(days=1), "employee")
+    (entry,) = report["employees"]
+    assert entry["username"] == "waiter1"
+    assert {metric: entry[metric]["count"] for metric in ("wait", "prep", "serve", "ticket")} == {
+        "wait": 1, "prep": 2, "serve": 1, "ticket": 1
+    }
+    summary = AnalyticsService.get_employee_performance_summary(db, waiter.id)
+    assert summary.ticket_time_p50 is not None
+
+
+def _transitions(db, count, rng):
+    changed_at = datetime(2025, 5, 1, 12)
+    for i in range(count):
+        db.add(KitchenOrderTransition(
+            order_id=i, station=rng.choice(["kitchen", "bar"]), from_status="ready", to_status="served",
+            changed_at=changed_at + timedelta(minutes=i), ticket_seconds=rng.uniform(60, 3600),
+            step_seconds=rng.uniform(5, 300)
+        ))
+    db.commit()
+
+
+def test_fold_is_incremental_and_exactly_once(db, monkeypatch):
+    rng = random.Random(3)
+    _transitions(db, 300, rng)
+    assert KitchenTimingService.fold(db, limit=100, now=LATER) == 100
+    assert KitchenTimingService.fold(db, limit=100, now=LATER) == 100
+
+    # Another worker moves the watermark between this fold's read and its claim: the
+    # fold adds nothing (rolling back, here, the competing write too)
+    real_update = kitchen_timing_service.update
+
+    def competing_update(table):
+        monkeypatch.setattr(kitchen_timing_service, "update", real_update)
+        db.execute(real_update(table).where(table.c.metric == FOLDED_METRIC).values(count=300))
+        return real_update(table)
+
+    monkeypatch.setattr(kitchen_timing_service, "update", competing_update)
+    assert KitchenTimingService.fold(db, now=LATER) == 0
+    assert KitchenTimingService.fold(db, now=LATER) == 100
+    assert KitchenTimingService.fold(db, now=LATER) == 0
+    _transitions(db, 50, rng)
+    assert KitchenTimingService.fold(db, now=LATER) == 50
+
+    ticket = KitchenTimingService.merged_sketches(db, date(2025, 5, 1), date(2025, 5, 1)).get(None)["ticket"]
+    assert ticket.count == 350
+    values = db.execute(select(KitchenOrderTransition.ticket_seconds)).scalars().all()
+    for q in (0.5, 0.95):
+        assert abs(ticket.quantile(q) - _exact(values, q)) <= 0.01 * _exact(values, q)
+
+    report = KitchenTimingService.service_times(db, date(2025, 5, 1), date(2025, 5, 1))
+    assert [entry["station"] for entry in report["stations"]] == ["bar", "kitchen"]
+    assert sum(entry["serve"]["count"] for entry in report["stations"]) == 350
+    assert db.execute(select(func.count()).select_from(ServiceTimeSketch)).scalar() == 5
@@ -0,0 +1,112 @@
+"""
+Tests for request latency and database query instrumentation
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.main import app
+from app.utils.metrics import MetricsMiddleware, MetricsRegistry, instrument_engine
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+def _instrumented_app(registry):
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    test_app = FastAPI()
+    test_app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @test_app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    @test_app.get("/loop")
+    def loop():
+        with engine.connect() as conn:
+            for value in range(5):
+                conn.execute(text("SELECT :value"), {"value": value})
+        return {"ok": True}
+
+    return test_app
+
+
+def test_queries_are_counted_per_route_template():
+    """SQL statements should be attributed to the route template, not the raw path"""
+    registry = MetricsRegistry(n_plus_one_threshold=0)
+    client = TestClient(_instrumented_app(registry))
+    client.get("/items/1")
+    client.get("/items/2")
+
+    assert registry.db_queries[("GET", "/items/{item_id}")] == 4
+    assert registry.request_latency[("GET", "/items/{item_id}", "200")].count == 2
+
+
+def test_server_timing_header():
+    """Responses should carry app and db timings"""
+    client = TestClient(_instrumented_app(MetricsRegistry()))
+    response = client.get("/items/1")
+    header = response.headers["server-timing"]
+    assert header.startswith("app;dur=")
+    assert 'db;dur=' in header and 'desc="2 queries"' in header
+
+
+def test_repeated_statement_flags_n_plus_one(caplog):
+    """A statement repeated past the threshold should be logged and counted"""
+    registry = MetricsRegistry(n_plus_one_threshold=5)
+    client = TestClient(_instrumented_app(registry))
+    with caplog.at_level("WARNING"):
+        client.get("/loop")
+        client.get("/items/1")
+
+    assert registry.n_plus_one_warnings[("GET", "/loop")] == 1
+    assert ("GET", "/items/{item_id}") not in registry.n_plus_one_warnings
+    assert "Possible N+1 query on GET /loop" in caplog.text
+
+
+def test_failing_statement_leaves_no_timing_behind():
+    """A statement that raises should not leave its start time on the connection"""
+    registry = MetricsRegistry()
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    test_app = FastAPI()
+    test_app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @test_app.get("/broken")
+    def broken():
+        with engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            return {"leftover": len(conn.info.get("query_start_time", []))}
+
+    response = TestClient(test_app).get("/broken")
+
+    assert response.json() == {"leftover": 0}
+    assert registry.db_queries[("GET", "/broken")] == 1
+
+def test_unmatched_paths_share_one_label():
+    """404s must not create a label per requested path"""
+    registry = MetricsRegistry()
+    client = TestClient(_instrumented_app(registry))
+    client.get("/no-such-path-1")
+    client.get("/no-such-path-2")
+    assert registry.request_latency[("GET", "unmatched", "404")].count == 2
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    """The application /metrics endpoint should include request and pool metrics"""
+    client = TestClient(app)
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert 'db_pool_in_use{pool="primary"}' in body
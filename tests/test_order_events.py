@@ -0,0 +1,149 @@
+"""
+Tests for the order_events outbox and the /api/events change feed
+"""
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.dependencies import get_current_user
+from app.main import app
+from app.models.order import Order
+from app.models.order_event import OrderEvent
+from app.models.table import Table
+from app.schemas.order_schema import OrderCreate, OrderSyncItem
+from app.services.idempotency_store import idempotency_store
+from app.services.order_service import OrderService
+from app.services.outbox_service import OutboxService
+from app.services.table_service import TableService
+from app.utils.events import ORDER_PLACED, ORDER_UPDATED, TABLE_ASSIGNED, TABLE_RELEASED
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+@pytest.fixture
+def db(db):
+    idempotency_store.clear_cache()
+    yield db
+    idempotency_store.clear_cache()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def _order(**overrides):
+    payload = {
+        "order": [{"name": "Tea", "price": 2.5, "category": "drink"}],
+        "total": 2.5,
+        "order_type": "takeaway",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_place_order_writes_event_in_the_same_flush(db):
+    flushes = []
+    event.listen(db, "after_flush", lambda *args: flushes.append(1))
+
+    placed = OrderService.place_order(db, OrderCreate(**_order()), created_by=1)
+
+    assert len(flushes) == 1
+    order_event = db.query(OrderEvent).one()
+    assert order_event.event_type == ORDER_PLACED
+    assert order_event.order_id == placed.id
+    assert OutboxService.to_dict(order_event)["payload"]["total"] == 2.5
+
+
+def test_rolled_back_change_leaves_no_event(db):
+    placed = OrderService.place_order(db, OrderCreate(**_order()), created_by=1)
+    OutboxService.record(db, ORDER_UPDATED, placed, {"total": 99})
+    db.rollback()
+    assert [e.event_type for e in db.query(OrderEvent)] == [ORDER_PLACED]
+
+
+def test_sync_writes_events_with_one_statement(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    OrderService.sync_orders(db, [OrderSyncItem(client_id=f"c{n}", **_order()) for n in range(5)], created_by=1)
+
+    assert len([s for s in statements if s.startswith("INSERT INTO order_events")]) == 1
+    events = OutboxService.fetch(db, after=0)
+    assert [e.order_id for e in events] == [o.id for o in db.query(Order).order_by(Order.id)]
+    assert [e.seq for e in events] == sorted(e.seq for e in events)
+
+
+def test_fetch_pages_by_seq_and_filters_types(db):
+    first = OrderService.place_order(db, OrderCreate(**_order()), created_by=1)
+    OutboxService.record(db, ORDER_UPDATED, first.id, {"total": 3.0})
+    db.commit()
+    OrderService.place_order(db, OrderCreate(**_order()), created_by=1)
+
+    page = OutboxService.fetch(db, after=0, limit=2)
+    assert [e.event_type for e in page] == [ORDER_PLACED, ORDER_UPDATED]
+    rest = OutboxService.fetch(db, after=page[-1].seq)
+    assert [e.event_type for e in rest] == [ORDER_PLACED]
+    assert [e.event_type for e in OutboxService.fetch(db, after=0, event_types=[ORDER_UPDATED])] == [ORDER_UPDATED]
+
+
+def test_table_changes_write_events(db):
+    tables = [Table(table_number=n, capacity=2, status="available", is_occupied=False) for n in (1, 2)]
+    db.add_all(tables)
+    first, second = (OrderService.place_order(db, OrderCreate(**_order()), created_by=1) for _ in range(2))
+    after = OutboxService.last_seq(db)
+
+    TableService.assign_order(db, tables[0].id, first.id)
+    TableService.assign_order(db, tables[1].id, second.id)
+    TableService.merge(db, tables[0].id, tables[1].id)
+    db.commit()
+    TableService.release(db, tables[0].id)
+    db.commit()
+
+    events = [OutboxService.to_dict(e) for e in OutboxService.fetch(db, after=after)]
+    assert [(e["event_type"], e["order_id"]) for e in events] == [
+        (TABLE_ASSIGNED, first.id), (TABLE_ASSIGNED, second.id),
+        (ORDER_UPDATED, first.id), (TABLE_RELEASED, second.id), (TABLE_RELEASED, first.id),
+    ]
+    # The merged total moves the write watermark with the change
+    assert events[2]["payload"]["total"] == 5.0
+    assert events[3]["payload"] == {"table_id": tables[1].id, "table_number": 2}
+
+def test_feed_returns_empty_page_after_wait(client):
+    with SessionLocal() as session:
+        last_seq = OutboxService.last_seq(session)
+    response = client.get(f"/api/events?after={last_seq}&wait=0")
+    assert response.status_code == 200
+    assert response.json() == {"events": [], "last_seq": last_seq}
+
+
+def test_feed_long_poll_wakes_on_commit(client):
+    with SessionLocal() as session:
+        last_seq = OutboxService.last_seq(session)
+
+    result = {}
+
+    def poll():
+        started = time.monotonic()
+        result["response"] = client.get(f"/api/events?after={last_seq}&wait=10")
+        result["elapsed"] = time.monotonic() - started
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.3)
+    with SessionLocal() as session:
+        placed = OrderService.place_order(session, OrderCreate(**_order()), created_by=1)
+        order_id = placed.id
+    poller.join(timeout=10)
+
+    body = result["response"].json()
+    assert result["elapsed"] < 5
+    assert [(e["event_type"], e["order_id"]) for e in body["events"]] == [(ORDER_PLACED, order_id)]
+    assert body["last_seq"] == body["events"][0]["seq"]
@@ -0,0 +1,95 @@
+"""
+Tests for single-transaction order placement
+"""
+import pytest
+from sqlalchemy import event
+
+from app.models.kitchen import KitchenOrder
+from app.models.order import Order
+from app.models.seat import Seat
+from app.models.table import Table
+from app.schemas.order_schema import OrderCreate
+from app.services.order_service import OrderService
+from app.utils.events import event_bus, ORDER_PLACED
+
+
+@pytest.fixture
+def db(db):
+    db.add(Table(table_number=5, capacity=2, status="available", is_occupied=False,
+                 seats=[Seat(seat_number=1), Seat(seat_number=2)]))
+    db.commit()
+    return db
+
+
+def _order(**overrides):
+    payload = {
+        "order": [{"name": "Tea", "price": 2.5, "category": "drink"}],
+        "total": 2.5,
+        "table_number": "5",
+        "order_type": "dine_in",
+        "customer_name": "Ana",
+    }
+    payload.update(overrides)
+    return OrderCreate(**payload)
+
+
+def test_place_order_uses_one_flush_and_one_commit(db):
+    """Order, kitchen ticket and table occupancy should be written together"""
+    counts = {"flush": 0, "commit": 0}
+    event.listen(db, "after_flush", lambda *args: counts.__setitem__("flush", counts["flush"] + 1))
+    event.listen(db, "after_commit", lambda *args: counts.__setitem__("commit", counts["commit"] + 1))
+
+    placed = OrderService.place_order(db, _order(), created_by=1)
+
+    assert counts == {"flush": 1, "commit": 1}
+    assert placed.kitchen_order.order_id == placed.id
+    table = db.query(Table).filter(Table.table_number == 5).one()
+    assert table.is_occupied and table.status == "occupied"
+    assert table.current_order_id == placed.id
+    assert placed.table_id == table.id
+    assert [seat.status for seat in table.seats] == ["occupied", "occupied"]
+    assert all(seat.customer_name == "Ana" for seat in table.seats)
+
+
+def test_takeaway_order_does_not_occupy_table(db):
+    placed = OrderService.place_order(db, _order(order_type="takeaway"), created_by=1)
+    table = db.query(Table).filter(Table.table_number == 5).one()
+    assert not table.is_occupied
+    assert db.query(KitchenOrder).filter(KitchenOrder.order_id == placed.id).count() == 1
+
+
+def test_order_placed_event_emitted_after_commit(db):
+    received = []
+
+    def handler(payload):
+        # The order must already be committed when subscribers run
+        received.append((payload, db.query(Order).count()))
+
+    event_bus.subscribe(ORDER_PLACED, handler)
+    try:
+        placed = OrderService.place_order(db, _order(), created_by=7)
+    finally:
+        event_bus.unsubscribe(ORDER_PLACED, handler)
+
+    payload, committed_orders = received[0]
+    assert payload["order_id"] == placed.id
+    assert payload["kitchen_order_id"] == placed.kitchen_order.id
+    assert payload["created_by"] == 7
+    assert committed_orders == 1
+
+
+def test_failed_commit_leaves_nothing_behind(db):
+    """If the transaction fails, neither the order nor the kitchen ticket is kept"""
+    def fail_on_kitchen_insert(session, flush_context, instances):
+        if any(isinstance(obj, KitchenOrder) for obj in session.new):
+            raise RuntimeError("kitchen insert failed")
+
+    event.listen(db, "before_flush", fail_on_kitchen_insert)
+    with pytest.raises(RuntimeError):
+        OrderService.place_order(db, _order(), created_by=1)
+    db.rollback()
+    event.remove(db, "before_flush", fail_on_kitchen_insert)
+
+    assert db.query(Order).count() == 0
+    assert db.query(KitchenOrder).count() == 0
+    assert not db.query(Table).filter(Table.table_number == 5).one().is_occupied
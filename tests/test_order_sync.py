@@ -0,0 +1,125 @@
+"""
+Tests for idempotent order creation and bulk order sync
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models.idempotency import IdempotencyKey
+from app.models.kitchen import KitchenOrder
+from app.models.order import Order
+from app.models.table import Table
+from app.schemas.order_schema import OrderCreate, OrderSyncItem
+from app.services.idempotency_store import IdempotencyStore, idempotency_store, run_idempotency_purge_periodically
+from app.services.order_service import OrderService
+
+
+@pytest.fixture
+def db(db):
+    # Each test gets a fresh database that reuses order ids, so start with an empty cache
+    idempotency_store.clear_cache()
+    db.add_all([Table(table_number=n, capacity=4, status="available", is_occupied=False, seats=[]) for n in (1, 2)])
+    db.commit()
+    yield db
+    idempotency_store.clear_cache()
+
+
+def _payload(**overrides):
+    payload = {
+        "order": [{"name": "Tea", "price": 2.5, "category": "drink"}],
+        "total": 2.5,
+        "table_number": "1",
+        "order_type": "dine_in",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_place_order_replays_idempotency_key(db):
+    first = OrderService.place_order(db, OrderCreate(**_payload()), created_by=1, idempotency_key="tab-1")
+    idempotency_store.clear_cache()  # force the lookup to hit the table
+    second = OrderService.place_order(db, OrderCreate(**_payload()), created_by=1, idempotency_key="tab-1")
+
+    assert second.id == first.id
+    assert db.query(Order).count() == 1
+    assert db.query(KitchenOrder).count() == 1
+
+
+def test_sync_dedupes_within_batch_and_against_previous_requests(db):
+    OrderService.place_order(db, OrderCreate(**_payload()), created_by=1, idempotency_key="a")
+
+    items = [
+        OrderSyncItem(client_id="a", **_payload()),
+        OrderSyncItem(client_id="b", **_payload(table_number="2")),
+        OrderSyncItem(client_id="c", **_payload(order_type="takeaway", table_number=None)),
+        OrderSyncItem(client_id="b", **_payload(table_number="2")),
+    ]
+    results = OrderService.sync_orders(db, items, created_by=1)
+
+    assert [(r["client_id"], r["status"]) for r in results] == [
+        ("a", "duplicate"), ("b", "created"), ("c", "created"), ("b", "duplicate"),
+    ]
+    assert results[1]["order_id"] == results[3]["order_id"]
+    assert db.query(Order).count() == 3
+    assert db.query(KitchenOrder).count() == 3
+    assert db.query(IdempotencyKey).count() == 3
+    assert db.query(Table).filter(Table.table_number == 2).one().is_occupied
+
+    # Replaying the whole batch creates nothing
+    replay = OrderService.sync_orders(db, items, created_by=1)
+    assert all(r["status"] == "duplicate" for r in replay)
+    assert db.query(Order).count() == 3
+
+
+def test_sync_inserts_kitchen_tickets_with_one_statement(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    items = [OrderSyncItem(client_id=f"k{n}", **_payload(order_type="takeaway", table_number=None)) for n in range(20)]
+    OrderService.sync_orders(db, items, created_by=1)
+
+    kitchen_inserts = [s for s in statements if s.startswith("INSERT INTO kitchen_orders")]
+    key_inserts = [s for s in statements if s.startswith("INSERT INTO idempotency_keys")]
+    assert len(kitchen_inserts) == 1
+    assert len(key_inserts) == 1
+    assert db.query(KitchenOrder).count() == 20
+
+
+def test_expired_keys_are_forgotten(db):
+    first = OrderService.place_order(db, OrderCreate(**_payload()), created_by=1, idempotency_key="old")
+    db.execute(update(IdempotencyKey).values(created_at=datetime.utcnow() - timedelta(days=2)))
+    db.commit()
+    idempotency_store.clear_cache()
+
+    second = OrderService.place_order(db, OrderCreate(**_payload(table_number="2")), created_by=1, idempotency_key="old")
+    assert second.id != first.id
+    assert db.query(IdempotencyKey).one().order_id == second.id
+
+
+def test_expired_keys_are_purged_in_the_background(db):
+    for key in ("old", "new"):
+        OrderService.place_order(db, OrderCreate(**_payload()), created_by=1, idempotency_key=key)
+    db.execute(update(IdempotencyKey).where(IdempotencyKey.key == "old")
+               .values(created_at=datetime.utcnow() - timedelta(days=2)))
+    db.commit()
+
+    async def purge_for_a_moment():
+        task = asyncio.create_task(run_idempotency_purge_periodically(sessionmaker(bind=db.get_bind()), 0.01))
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+    asyncio.run(purge_for_a_moment())
+    # Removed without the key being looked up again
+    assert [row.key for row in db.query(IdempotencyKey)] == ["new"]
+
+def test_cache_is_bounded():
+    store = IdempotencyStore(ttl_seconds=60, max_entries=2)
+    store.remember({"a": 1, "b": 2})
+    store._cache_get("a")  # touch "a" so "b" is least recently used
+    store.remember({"c": 3})
+    assert store._cache_get("b") is None
+    assert store._cache_get("a") == 1
+    assert store._cache_get("c") == 3
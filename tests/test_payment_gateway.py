@@ -0,0 +1,323 @@
+"""
+Tests for the payment gateway client, the circuit breaker and gateway-backed payments
+
+The HTTP gateway talks to the stub gateway in-process through httpx.ASGITransport.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models.order import Order
+from app.models.payment_attempt import PaymentAttempt
+from app.services.payment_gateway import HttpPaymentGateway, PaymentGatewayUnavailable, SimulatedGateway
+from app.services.payment_service import PaymentService
+from benchmarks.stub_gateway import create_stub_gateway
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _gateway(stub, **options):
+    options.setdefault("retry_backoff", 0)
+    return HttpPaymentGateway("http://gateway", transport=httpx.ASGITransport(app=stub), **options)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    url = f"sqlite:///{tmp_path / 'payments.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Order.__table__.insert(), [{"id": 1, "total": 25.0, "payment_status": "pending", "version": 1}])
+    engine.dispose()
+    return url
+
+
+def _run_with_session(url, work):
+    async def run():
+        engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+        try:
+            async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as db:
+                return await work(db)
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def test_retried_charge_with_the_same_key_is_not_charged_twice():
+    stub = create_stub_gateway(decline_amounts=[13.0])
+
+    async def run():
+        gateway = _gateway(stub)
+        first = await gateway.charge("card", 20.0, "attempt-1")
+        again = await gateway.charge("card", 20.0, "attempt-1")
+        other = await gateway.charge("card", 20.0, "attempt-2")
+        declined = await gateway.charge("card", 13.0, "attempt-3")
+        refund = await gateway.refund(first["reference"], 20.0, "refund-1")
+        await gateway.aclose()
+        return first, again, other, declined, refund
+
+    first, again, other, declined, refund = asyncio.run(run())
+    assert first["success"] and first["reference"] == again["reference"]
+    assert other["reference"] != first["reference"]
+    assert declined == {"success": False, "error": "Card declined"}
+    assert refund["success"] and refund["reference"].startswith("re_")
+    assert len(stub.state.charges) == 3
+
+
+def test_failures_are_retried_then_open_the_circuit():
+    stub = create_stub_gateway(failure_rate=1.0)
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    async def run():
+        gateway = _gateway(stub, retries=2, breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(PaymentGatewayUnavailable):
+                await gateway.charge("card", 20.0, "attempt-1")
+        assert stub.state.calls == 6  # Each charge tried three times
+        assert breaker.state == OPEN
+
+        # While open, nothing is sent
+        with pytest.raises(PaymentGatewayUnavailable):
+            await gateway.charge("card", 20.0, "attempt-1")
+        assert stub.state.calls == 6
+
+        # After the reset timeout one trial call goes through and closes the circuit
+        clock.now = 31
+        assert breaker.state == HALF_OPEN
+        stub.state.failure_rate = 0.0
+        result = await gateway.charge("card", 20.0, "attempt-1")
+        await gateway.aclose()
+        return result
+
+    assert asyncio.run(run())["success"]
+    assert breaker.state == CLOSED
+
+
+def test_half_open_circuit_allows_a_single_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 10
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # The trial is still in flight
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 15
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_concurrent_charges_overlap_on_one_worker():
+    stub = create_stub_gateway(latency=0.2)
+
+    async def run():
+        gateway = _gateway(stub, max_connections=20)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(gateway.charge("card", 10.0, f"attempt-{i}") for i in range(20)))
+        elapsed = time.perf_counter() - started
+        await gateway.aclose()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    assert all(result["success"] for result in results)
+    assert elapsed < 2.0  # Serially this would take 4 s
+
+
+def test_process_payment_charges_once_and_records_the_reference(session_factory):
+    stub = create_stub_gateway()
+
+    async def work(db):
+        gateway = _gateway(stub)
+        payment = {"payment_type": "card", "amount": 25.0, "terminal_id": "till-1"}
+        result = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap-1", gateway=gateway)
+        repeat = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap-2", gateway=gateway)
+        order = await db.get(Order, 1)
+        refund = await PaymentService.refund_payment(db, 1, {}, gateway=gateway)
+        await db.refresh(order)
+        await gateway.aclose()
+        return result, repeat, order, refund
+
+    result, repeat, order, refund = _run_with_session(session_factory, work)
+    assert result["success"] and result["reference"].startswith("ch_")
+    assert repeat == {"success": False, "error": "Order has already been paid"}
+    assert len(stub.state.charges) == 1
+    assert order.payment_status == "completed"
+    assert order.payment_reference == result["reference"]
+    assert order.terminal_id == "till-1"
+    assert refund["success"] and refund["reference"].startswith("re_")
+    assert order.refund_status == "completed"
+
+
+def test_declined_or_unconfirmed_payment_leaves_the_order_unpaid(session_factory):
+    stub = create_stub_gateway(decline_amounts=[25.0])
+
+    async def work(db):
+        gateway = _gateway(stub, retries=0)
+        declined = await PaymentService.process_payment(db, 1, {"payment_type": "card", "amount": 25.0}, gateway=gateway)
+        stub.state.failure_rate = 1.0
+        with pytest.raises(PaymentGatewayUnavailable):
+            await PaymentService.process_payment(db, 1, {"payment_type": "qr", "amount": 25.0}, gateway=gateway)
+        order = await db.get(Order, 1)
+        await gateway.aclose()
+        return declined, order
+
+    declined, order = _run_with_session(session_factory, work)
+    assert declined == {"success": False, "error": "Card declined"}
+    assert order.payment_status == "pending"
+    assert order.payment_reference is None
+
+
+class RecordingGateway(SimulatedGateway):
+    """Simulated gateway that remembers the keys it was called with, and can run a hook on each charge"""
+
+    def __init__(self, on_charge=None):
+        super().__init__()
+        self.charges, self.refunds = [], []
+        self.on_charge = on_charge
+
+    async def charge(self, payment_type, amount, idempotency_key, details=None):
+        self.charges.append(idempotency_key)
+        if self.on_charge:
+            self.on_charge()
+        return await super().charge(payment_type, amount, idempotency_key, details)
+
+    async def refund(self, reference, amount, idempotency_key):
+        self.refunds.append((reference, idempotency_key))
+        return await super().refund(reference, amount, idempotency_key)
+
+
+def _attempts(url):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        rows = conn.execute(select(PaymentAttempt.idempotency_key, PaymentAttempt.status, PaymentAttempt.reference)
+                            .order_by(PaymentAttempt.id)).all()
+    engine.dispose()
+    return [tuple(row) for row in rows]
+
+
+def test_reused_key_is_scoped_to_the_order(session_factory):
+    engine = create_engine(session_factory)
+    with engine.begin() as conn:
+        conn.execute(Order.__table__.insert(), [{"id": 2, "total": 25.0, "payment_status": "pending", "version": 1}])
+    engine.dispose()
+    gateway = RecordingGateway()
+
+    async def work(db):
+        payment = {"payment_type": "card", "amount": 25.0}
+        first = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap", gateway=gateway)
+        second = await PaymentService.process_payment(db, 2, payment, idempotency_key="tap", gateway=gateway)
+        return first, second
+
+    first, second = _run_with_session(session_factory, work)
+    assert first["success"] and second["success"]
+    assert first["reference"] != second["reference"]
+    assert gateway.charges == ["payment-1-key-tap", "payment-2-key-tap"]
+    assert _attempts(session_factory) == [
+        ("payment-1-key-tap", "recorded", first["reference"]),
+        ("payment-2-key-tap", "recorded", second["reference"]),
+    ]
+
+
+def test_charge_is_voided_when_the_order_was_paid_meanwhile(session_factory):
+    engine = create_engine(session_factory)
+
+    def paid_elsewhere():
+        with engine.begin() as conn:
+            conn.execute(Order.__table__.update().where(Order.id == 1).values(
+                payment_status="completed", payment_reference="txn_other", version=Order.version + 1))
+
+    gateway = RecordingGateway(on_charge=paid_elsewhere)
+
+    async def work(db):
+        payment = {"payment_type": "card", "amount": 25.0}
+        result = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap", gateway=gateway)
+        gateway.on_charge = None
+        retry = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap", gateway=gateway)
+        return result, retry
+
+    result, retry = _run_with_session(session_factory, work)
+    engine.dispose()
+    assert result["success"] is False and result["voided"] is True
+    assert result["error"] == "Order has already been paid; the charge was voided"
+    assert gateway.refunds == [(result["reference"], "void-payment-1-key-tap")]
+    assert _attempts(session_factory) == [("payment-1-key-tap", "voided", result["reference"])]
+    # Already paid, so the voided key is never replayed; nor would it be for an unpaid order
+    assert retry == {"success": False, "error": "Order has already been paid"}
+    assert gateway.charges == ["payment-1-key-tap"]
+    engine = create_engine(session_factory)
+    with Session(engine) as db:
+        assert PaymentService._begin_attempt(db, "payment-1-key-tap", 1, "card", 25.0) == {
+            "success": False, "error": "This payment attempt was voided; retry with a new Idempotency-Key"
+        }
+    engine.dispose()
+
+
+def test_charge_left_pending_when_recording_fails_is_recorded_by_a_retry(session_factory, monkeypatch):
+    gateway = RecordingGateway()
+
+    def broken(*args):
+        raise RuntimeError("database went away")
+
+    async def work(db):
+        payment = {"payment_type": "card", "amount": 25.0}
+        with monkeypatch.context() as patch:
+            patch.setattr(PaymentService, "_record_payment", staticmethod(broken))
+            failed = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap", gateway=gateway)
+        pending = _attempts(session_factory)
+        retry = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap", gateway=gateway)
+        order = await db.get(Order, 1)
+        return failed, pending, retry, order
+
+    failed, pending, retry, order = _run_with_session(session_factory, work)
+    assert failed["success"] is False and "retry with the same Idempotency-Key" in failed["error"]
+    assert pending == [("payment-1-key-tap", "pending", None)]
+    assert retry["success"] and retry["reference"] == failed["reference"]
+    assert order.payment_reference == failed["reference"]
+    assert gateway.refunds == []
+    assert _attempts(session_factory) == [("payment-1-key-tap", "recorded", failed["reference"])]
+
+
+def test_retry_of_a_recorded_charge_or_refund_returns_the_original_result(session_factory):
+    gateway = RecordingGateway()
+
+    async def work(db):
+        payment = {"payment_type": "card", "amount": 25.0}
+        paid = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap", gateway=gateway)
+        paid_again = await PaymentService.process_payment(db, 1, payment, idempotency_key="tap", gateway=gateway)
+        refunded = await PaymentService.refund_payment(db, 1, {}, idempotency_key="undo", gateway=gateway)
+        refunded_again = await PaymentService.refund_payment(db, 1, {}, idempotency_key="undo", gateway=gateway)
+        other_key = await PaymentService.refund_payment(db, 1, {}, idempotency_key="undo-2", gateway=gateway)
+        return paid, paid_again, refunded, refunded_again, other_key
+
+    paid, paid_again, refunded, refunded_again, other_key = _run_with_session(session_factory, work)
+    assert paid["success"] and paid_again["success"]
+    assert paid_again["reference"] == paid["reference"] and paid_again["amount"] == 25.0
+    assert refunded["success"] and refunded_again["success"]
+    assert refunded_again["reference"] == refunded["reference"] and refunded_again["refunded_amount"] == 25.0
+    # Replays never reach the gateway; a new key is still checked against the order
+    assert gateway.charges == ["payment-1-key-tap"]
+    assert gateway.refunds == [(paid["reference"], "refund-1-key-undo")]
+    assert other_key == {"success": False, "error": "Order has already been refunded"}
+    assert _attempts(session_factory) == [
+        ("payment-1-key-tap", "recorded", paid["reference"]),
+        ("refund-1-key-undo", "recorded", refunded["reference"]),
+    ]
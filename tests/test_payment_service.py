@@ -12,6 +12,9 @@ app.dependency_overrides[get_db] = override_get_db
 
 client = TestClient(app)
 
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
 def test_validate_payment_type():
     """Test payment type validation"""
     # Valid payment types
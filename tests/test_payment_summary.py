@@ -0,0 +1,86 @@
+"""
+Tests for the SQL-aggregated payment summary and its breakdowns
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.archive import OrderArchive
+from app.models.order import Order, PaymentType
+from app.models.user import User
+from app.services.payment_service import PaymentService
+
+DAY = datetime(2030, 3, 4)
+
+
+@pytest.fixture
+def orders(db):
+    ana = User(username="ana", email="ana@example.com", hashed_password="x")
+    db.add(ana)
+    db.flush()
+    paid = [
+        # (hour, total, payment type, terminal, created_by)
+        (12, 10.0, PaymentType.CASH, "till-1", ana.id),
+        (12, 20.0, PaymentType.CARD, "till-1", ana.id),
+        (13, 5.5, PaymentType.CARD, "till-2", None),
+        (13, 4.5, None, None, ana.id),
+    ]
+    for hour, total, payment_type, terminal_id, created_by in paid:
+        db.add(Order(total=total, payment_type=payment_type, payment_status="completed", paid_at=DAY + timedelta(hours=hour),
+                     terminal_id=terminal_id, created_by=created_by))
+    db.add(Order(total=99.0, payment_status="pending"))
+    db.add(Order(total=50.0, payment_type=PaymentType.QR, payment_status="completed", paid_at=DAY - timedelta(days=2)))
+    # Archived payments are included
+    db.add(OrderArchive(id=1000, created_at=DAY, total=7.0, payment_type=PaymentType.QR, payment_status="completed",
+                        paid_at=DAY + timedelta(hours=18), terminal_id="till-2"))
+    db.commit()
+    return ana
+
+
+def test_summary_is_aggregated_in_sql(db, orders):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    summary = PaymentService.get_payment_summary(db, DAY, DAY + timedelta(days=1))
+
+    assert summary["success"]
+    assert summary["total_transactions"] == 5
+    assert summary["total_revenue"] == pytest.approx(47.0)
+    assert summary["payment_type_breakdown"] == {
+        "cash": {"count": 2, "amount": 14.5},
+        "card": {"count": 2, "amount": 25.5},
+        "qr": {"count": 1, "amount": 7.0},
+    }
+    assert len(statements) == 1 and "GROUP BY" in statements[0]
+    assert "time_breakdown" not in summary
+
+
+def test_hourly_terminal_and_staff_breakdowns(db, orders):
+    summary = PaymentService.get_payment_summary(db, DAY, DAY + timedelta(days=1), group_by="hour", by_terminal=True, by_staff=True)
+
+    assert [(row["period"], row["count"], row["amount"]) for row in summary["time_breakdown"]] == [
+        (DAY + timedelta(hours=12), 2, 30.0), (DAY + timedelta(hours=13), 2, 10.0), (DAY + timedelta(hours=18), 1, 7.0)
+    ]
+    assert [(row["terminal_id"], row["count"], row["amount"]) for row in summary["terminal_breakdown"]] == [
+        (None, 1, 4.5), ("till-1", 2, 30.0), ("till-2", 2, 12.5)
+    ]
+    assert [(row["username"], row["count"], row["amount"]) for row in summary["staff_breakdown"]] == [
+        (None, 2, 12.5), ("ana", 3, 34.5)
+    ]
+
+    daily = PaymentService.get_payment_summary(db, group_by="day")
+    assert [(row["period"], row["count"]) for row in daily["time_breakdown"]] == [(DAY - timedelta(days=2), 1), (DAY, 5)]
+
+
+def test_invalid_grouping_is_reported(db, orders):
+    summary = PaymentService.get_payment_summary(db, group_by="fortnight")
+    assert not summary["success"] and "Invalid time grouping" in summary["error"]
+
+
+def test_summary_filter_uses_the_payment_index(db):
+    plan = db.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN SELECT payment_type, count(*), sum(total) FROM orders "
+        "WHERE payment_status = 'completed' AND paid_at >= '2030-03-04' GROUP BY payment_type"
+    ).all()
+    assert any("ix_orders_payment_summary" in row[-1] for row in plan)
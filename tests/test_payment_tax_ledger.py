@@ -0,0 +1,103 @@
+"""
+Tests for the tax ledger written at payment time and the tax reports summed from it
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.order import Order
+from app.models.tax_ledger import TaxLedgerEntry
+from app.services.payment_service import PaymentService
+from app.services.settings_service import SettingsService
+from app.services.tax_ledger_service import TaxLedgerService
+from app.utils.time_buckets import bucket_start, time_bucket
+
+MONDAY = datetime(2030, 3, 4)
+
+
+def _paid_order(db, items, total, paid_at):
+    order = Order(total=total, order_data=json.dumps(items), payment_status="pending")
+    db.add(order)
+    db.commit()
+    assert PaymentService._record_payment(db, order.id, "card", total, "ch_1", None)["success"]
+    order.paid_at = paid_at
+    db.query(TaxLedgerEntry).filter(TaxLedgerEntry.order_id == order.id).update({"recorded_at": paid_at})
+    db.commit()
+    return order
+
+
+BURGER = {"name": "Burger", "category": "Food", "price": 10.0}
+BEER = {"name": "Beer", "category": "Drinks", "price": 5.0, "quantity": 2}
+
+
+def test_payment_records_one_entry_per_line_balanced_to_the_total(db):
+    order = _paid_order(db, [BURGER, BEER], 21.5, MONDAY)
+
+    entries = db.execute(select(TaxLedgerEntry).where(TaxLedgerEntry.order_id == order.id)).scalars().all()
+    assert [(e.item_name, e.taxable_amount) for e in entries] == [("Burger", 10.0), ("Beer", 10.0), (None, 1.5)]
+    assert sum(e.taxable_amount for e in entries) == order.total
+    assert all(e.tax_rate == 0.08 for e in entries)
+
+
+def test_reports_keep_the_rate_in_force_at_payment_time(db):
+    _paid_order(db, [BURGER], 10.0, MONDAY)
+    SettingsService.update_tax_rate(db, 0.1)
+    _paid_order(db, [BURGER, BEER], 20.0, MONDAY + timedelta(days=8))
+
+    summary = TaxLedgerService.tax_summary(db, MONDAY, MONDAY + timedelta(days=14))
+    assert summary["total_sales"] == 30.0
+    assert summary["total_tax_collected"] == pytest.approx(0.8 + 2.0)
+    assert summary["tax_rate"] == 0.1
+    assert [(c["category"], c["tax_rate"], c["taxable_sales"]) for c in summary["tax_by_category"]] == [
+        ("Drinks", 0.1, 10.0), ("Food", 0.08, 10.0), ("Food", 0.1, 10.0)
+    ]
+
+    weekly = TaxLedgerService.sales_tax_by_week(db, MONDAY, MONDAY + timedelta(days=14))
+    assert [(p["period"], p["tax_collected"], p["tax_rate"]) for p in weekly["tax_by_period"]] == [
+        ("Week of 2030-03-04", 0.8, 0.08), ("Week of 2030-03-11", 2.0, 0.1)
+    ]
+
+    itemized = TaxLedgerService.itemized_tax(db, MONDAY, MONDAY + timedelta(days=14))
+    assert itemized["total_items"] == 4
+    assert [(i["item_name"], i["quantity_sold"], i["tax_rate"]) for i in itemized["itemized_tax_data"]] == [
+        ("Beer", 2, 0.1), ("Burger", 1, 0.08), ("Burger", 1, 0.1)
+    ]
+
+    # A custom rate recomputes the tax as a what-if
+    assert TaxLedgerService.tax_summary(db, MONDAY, MONDAY + timedelta(days=14), tax_rate=0.2)["total_tax_collected"] == 6.0
+
+
+def test_refund_reverses_the_sale_entries(db):
+    order = _paid_order(db, [BURGER, BEER], 20.0, MONDAY)
+    SettingsService.update_tax_rate(db, 0.1)
+    assert PaymentService._record_refund(db, order.id)["success"]
+    db.commit()
+
+    summary = TaxLedgerService.tax_summary(db, MONDAY, datetime.utcnow() + timedelta(days=1))
+    assert summary["total_sales"] == 0.0
+    assert summary["total_tax_collected"] == 0.0
+    itemized = TaxLedgerService.itemized_tax(db, MONDAY, datetime.utcnow() + timedelta(days=1))
+    assert all(item["quantity_sold"] == 0 for item in itemized["itemized_tax_data"])
+
+
+def test_paid_orders_without_entries_are_reported(db):
+    recorded = _paid_order(db, [BURGER], 10.0, MONDAY)
+    legacy = Order(total=12.0, payment_status="completed", paid_at=MONDAY)
+    db.add(legacy)
+    db.commit()
+
+    missing = TaxLedgerService.orders_missing_entries(db, MONDAY, MONDAY + timedelta(days=1))
+    assert [row.id for row in missing] == [legacy.id]
+    assert recorded.id not in [row.id for row in missing]
+
+
+def test_week_buckets_start_on_monday(db):
+    days = [MONDAY + timedelta(days=n, hours=13) for n in (0, 6, 7)]
+    db.add_all([Order(total=1.0, created_at=day) for day in days])
+    db.commit()
+
+    week = time_bucket(db, Order.created_at, "week")
+    buckets = [bucket_start(value) for value in db.execute(select(week).order_by(Order.id)).scalars()]
+    assert buckets == [MONDAY, MONDAY, MONDAY + timedelta(days=7)]
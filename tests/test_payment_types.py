@@ -11,6 +11,9 @@ app.dependency_overrides[get_db] = override_get_db
 
 client = TestClient(app)
 
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
 def test_create_order_with_payment_type():
     """Test creating an order with different payment types"""
     # Test with cash payment
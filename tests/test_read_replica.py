@@ -0,0 +1,82 @@
+"""
+Tests for read-replica routing of reporting queries.
+
+Uses two SQLite files as primary and replica. Set TEST_POSTGRES_URL and
+TEST_POSTGRES_REPLICA_URL to run the same checks against two Postgres instances.
+"""
+import os
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+from app.database import Base, create_db_engine, create_read_engine
+from app.main import app
+from app.models.order import Order
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+def _database_urls(tmp_path):
+    postgres_primary = os.getenv("TEST_POSTGRES_URL")
+    postgres_replica = os.getenv("TEST_POSTGRES_REPLICA_URL")
+    if postgres_primary and postgres_replica:
+        return postgres_primary, postgres_replica
+    return f"sqlite:///{tmp_path / 'primary.db'}", f"sqlite:///{tmp_path / 'replica.db'}"
+
+
+@pytest.fixture
+def primary_and_replica(tmp_path, monkeypatch):
+    """Separate primary and replica databases, with the read session bound to the replica"""
+    primary_url, replica_url = _database_urls(tmp_path)
+    primary_engine = create_db_engine(primary_url, name="test-primary")
+    replica_engine = create_read_engine(replica_url, primary_engine)
+    for db_engine in (primary_engine, replica_engine):
+        Base.metadata.drop_all(bind=db_engine)
+        Base.metadata.create_all(bind=db_engine)
+
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+    yield primary_engine, replica_engine
+
+    primary_engine.dispose()
+    replica_engine.dispose()
+
+
+def test_read_engine_falls_back_to_primary():
+    """Without a replica URL the read engine is the primary engine"""
+    assert create_read_engine("", database.engine) is database.engine
+    assert create_read_engine(None, database.engine) is database.engine
+
+
+def test_read_engine_uses_replica_url(tmp_path):
+    """A configured replica URL gets its own engine and pool"""
+    primary_engine = create_db_engine(f"sqlite:///{tmp_path / 'primary.db'}", name="test-primary")
+    replica_engine = create_read_engine(f"sqlite:///{tmp_path / 'replica.db'}", primary_engine)
+    assert replica_engine is not primary_engine
+    assert str(replica_engine.url).endswith("replica.db")
+    primary_engine.dispose()
+    replica_engine.dispose()
+
+
+def test_reports_read_from_replica(primary_and_replica):
+    """Analytics reports should see rows that only exist on the replica"""
+    primary_engine, replica_engine = primary_and_replica
+    with sessionmaker(bind=replica_engine)() as replica_session:
+        replica_session.add(Order(total=12.5, order_data=[{"name": "Tea", "price": 12.5}], created_at=datetime(2024, 3, 1, 12, 0)))
+        replica_session.commit()
+
+    client = TestClient(app)
+    response = client.get("/api/analytics/reports/daily", params={
+        "start_date": "2024-03-01T00:00:00",
+        "end_date": "2024-03-01T23:59:59",
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_orders"] == 1
+    assert data["total_sales"] == 12.5
+
+    with sessionmaker(bind=primary_engine)() as primary_session:
+        assert primary_session.query(Order).count() == 0
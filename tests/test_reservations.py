@@ -0,0 +1,165 @@
+"""
+Tests for reservations and the in-memory table availability index
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.schemas.reservation_schema import ReservationCreate, ReservationUpdate
+from app.services.availability_service import AvailabilityIndex, availability_index
+from app.services.reservation_service import ReservationService
+from app.utils.concurrency import ConflictError
+
+client = TestClient(app)
+
+EVENING = datetime(2030, 5, 17, 18, 0)
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+def _at(hours: float) -> datetime:
+    return EVENING + timedelta(hours=hours)
+
+
+def _tables(db, *capacities):
+    tables = [Table(table_number=n, capacity=c, status="available", is_occupied=False) for n, c in enumerate(capacities, start=1)]
+    db.add_all(tables)
+    db.commit()
+    return tables
+
+
+def test_index_overlaps_are_half_open_and_best_fit_comes_first():
+    index = AvailabilityIndex("sqlite://", refresh_seconds=60)
+    index.apply({1: (2, 1), 2: (4, 2), 3: (6, 3), 4: (4, 4)}, {
+        10: (2, _at(0), _at(2)),
+        11: (1, _at(0), _at(1)),
+        12: (3, _at(-6), _at(3)),  # A long booking that starts well before the window
+    })
+
+    free = index.free_tables(_at(1), _at(2), party_size=3)
+    assert [t["table_id"] for t in free] == [4]
+    # 18:00-19:00 ends exactly when 19:00 starts
+    assert index.is_free(1, _at(1), _at(2))
+    assert not index.is_free(1, _at(0.5), _at(1.5))
+    assert index.suggest(_at(2), _at(4), party_size=3) == {"table_id": 2, "table_number": 2, "capacity": 4}
+    assert index.suggest(_at(1), _at(2), party_size=7) is None
+
+    # Cancelling and moving bookings, and removing a table
+    index.apply({4: None}, {10: None, 12: (3, _at(5), _at(6))})
+    assert [t["table_id"] for t in index.free_tables(_at(1), _at(2), party_size=3)] == [2, 3]
+    assert not index.is_free(4, _at(8), _at(9))
+
+
+def test_load_rebuilds_from_active_future_reservations(db):
+    small, large = _tables(db, 2, 6)
+    db.add_all([
+        Reservation(table_id=small.id, customer_name="Ana", party_size=2, starts_at=_at(0), ends_at=_at(2)),
+        Reservation(table_id=large.id, customer_name="Bo", party_size=4, starts_at=_at(0), ends_at=_at(2), status="cancelled"),
+        Reservation(table_id=large.id, customer_name="Cy", party_size=4, starts_at=datetime(2001, 1, 1), ends_at=datetime(2001, 1, 1, 2)),
+    ])
+    db.commit()
+
+    index = AvailabilityIndex("sqlite://", refresh_seconds=60)
+    assert index.is_stale()
+    index.load(db)
+    assert not index.is_stale()
+    assert [t["table_id"] for t in index.free_tables(_at(1), _at(3), party_size=2)] == [large.id]
+
+
+def test_service_rejects_double_bookings(db):
+    (table,) = _tables(db, 4)
+    booking = ReservationService.create(db, ReservationCreate(
+        table_id=table.id, customer_name="Ana", party_size=3, starts_at=_at(0), ends_at=_at(2)
+    ))
+    db.commit()
+
+    with pytest.raises(ConflictError):
+        ReservationService.create(db, ReservationCreate(table_id=table.id, customer_name="Bo", party_size=2, starts_at=_at(1)))
+    db.rollback()
+    with pytest.raises(ValueError, match="seats 4"):
+        ReservationService.create(db, ReservationCreate(table_id=table.id, customer_name="Cy", party_size=5, starts_at=_at(4)))
+    db.rollback()
+
+    later = ReservationService.create(db, ReservationCreate(table_id=table.id, customer_name="Di", party_size=2, starts_at=_at(2)))
+    db.commit()
+    assert later.ends_at == _at(3.5)
+
+    with pytest.raises(ConflictError):
+        ReservationService.update(db, later.id, ReservationUpdate(starts_at=_at(1.5)))
+    db.rollback()
+    ReservationService.cancel(db, booking.id)
+    db.commit()
+    ReservationService.update(db, later.id, ReservationUpdate(starts_at=_at(1.5)))
+    db.commit()
+    assert [r.customer_name for r in ReservationService.list(db, _at(0), _at(2), status="booked")] == ["Di"]
+
+
+def test_free_table_search_is_sub_millisecond():
+    rng = random.Random(7)
+    tables = {table_id: (rng.choice((2, 2, 4, 4, 6, 8)), table_id) for table_id in range(1, 401)}
+    bookings = {}
+    for reservation_id in range(5000):
+        start = _at(rng.randrange(0, 24 * 14) / 2)
+        bookings[reservation_id] = (rng.randrange(1, 401), start, start + timedelta(minutes=rng.choice((60, 90, 120))))
+    index = AvailabilityIndex("sqlite://", refresh_seconds=60)
+    index.apply(tables, bookings)
+
+    windows = [(_at(h / 2), _at(h / 2 + 1.5), rng.choice((2, 4, 6))) for h in range(200)]
+    started = time.perf_counter()
+    for starts_at, ends_at, party_size in windows:
+        index.free_tables(starts_at, ends_at, party_size, limit=10)
+    mean = (time.perf_counter() - started) / len(windows)
+    assert mean < 0.001
+
+    # The index agrees with a brute-force scan
+    starts_at, ends_at, party_size = windows[17]
+    busy = {t for t, s, e in bookings.values() if s < ends_at and e > starts_at}
+    expected = sorted((c, n, t) for t, (c, n) in tables.items() if c >= party_size and t not in busy)
+    assert [t["table_id"] for t in index.free_tables(starts_at, ends_at, party_size)] == [t for _, _, t in expected]
+
+
+@pytest.fixture
+def table_ids():
+    ids = []
+    for number, capacity in ((9101, 2), (9102, 4)):
+        response = client.post("/api/tables/", json={"table_number": number, "capacity": capacity})
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    yield ids
+    with SessionLocal() as session:
+        for table_id in ids:
+            session.query(Reservation).filter(Reservation.table_id == table_id).delete()
+            session.delete(session.get(Table, table_id))
+        session.commit()
+
+
+def test_reservation_routes_keep_the_index_in_sync(table_ids):
+    small, large = table_ids
+    window = {"starts_at": _at(0).isoformat(), "ends_at": _at(2).isoformat()}
+
+    suggestion = client.get("/api/reservations/suggest", params={**window, "party_size": 2}).json()
+    assert suggestion["capacity"] == 2
+
+    booked = client.post("/api/reservations/", json={**window, "customer_name": "Ana", "party_size": 2, "table_id": small})
+    assert booked.status_code == 200
+    assert client.post("/api/reservations/", json={**window, "customer_name": "Bo", "party_size": 2, "table_id": small}).status_code == 409
+
+    # Without a table the best fit still free is chosen
+    auto = client.post("/api/reservations/", json={**window, "customer_name": "Cy", "party_size": 2})
+    assert auto.status_code == 200
+    free = {t["table_id"] for t in client.get("/api/reservations/availability", params={**window, "party_size": 1}).json()}
+    assert small not in free and auto.json()["table_id"] not in free
+
+    cancelled = client.delete(f"/api/reservations/{booked.json()['id']}")
+    assert cancelled.json()["status"] == "cancelled"
+    assert availability_index.is_free(small, _at(0), _at(2))
+    assert client.get("/api/reservations/999999").status_code == 404
+    assert client.get("/api/reservations/availability", params={"starts_at": _at(2).isoformat(), "ends_at": _at(1).isoformat()}).status_code == 400
@@ -0,0 +1,110 @@
+"""
+Tests for relational table seats, set-based seat updates and free seat queries
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.seat import Seat
+from app.models.table import Table
+from app.services.floor_plan_service import floor_plan
+from app.services.seat_service import SeatService
+
+client = TestClient(app)
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+def _table(db, number, occupied=(), capacity=6, status="available"):
+    table = Table(table_number=number, capacity=capacity, status=status, is_occupied=False)
+    SeatService.resize(table, capacity)
+    for seat in table.seats:
+        if seat.seat_number in occupied:
+            seat.status = "occupied"
+    db.add(table)
+    db.commit()
+    return table
+
+
+def test_occupy_and_release_are_single_updates(db):
+    table = _table(db, 1)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    assert SeatService.occupy(db, {table.id: "Ana"}) == 6
+    assert [s for s in statements if s.startswith("UPDATE seats")] == [statements[-1]]
+    # Seats already loaded in the session see the update
+    assert {(seat.status, seat.customer_name) for seat in table.seats} == {("occupied", "Ana")}
+
+    assert SeatService.release(db, table.id) == 6
+    db.commit()
+    assert db.query(Seat).filter(Seat.status == "occupied").count() == 0
+    assert len([s for s in statements if s.startswith("UPDATE seats")]) == 2
+
+
+def test_resize_keeps_existing_seats(db):
+    table = _table(db, 1, occupied={1}, capacity=2)
+    SeatService.resize(table, 4)
+    db.commit()
+    assert [(seat.seat_number, seat.status) for seat in table.seats] == [
+        (1, "occupied"), (2, "available"), (3, "available"), (4, "available")
+    ]
+    SeatService.resize(table, 1)
+    db.commit()
+    assert db.query(Seat).count() == 1
+
+
+def test_adjacent_free_seats_are_found_in_sql(db):
+    first = _table(db, 1, occupied={3})  # free runs 1-2 and 4-6
+    second = _table(db, 2, occupied={1, 2, 3, 4})  # free run 5-6
+    _table(db, 3, status="cleaning")  # all free, but not seatable
+
+    blocks = SeatService.find_adjacent_free_seats(db, 3)
+    assert blocks == [{"table_id": first.id, "table_number": 1, "seat_numbers": [4, 5, 6], "free_seats": 3}]
+
+    pairs = SeatService.find_adjacent_free_seats(db, 2)
+    assert [(b["table_number"], b["seat_numbers"]) for b in pairs] == [(1, [1, 2]), (2, [5, 6]), (1, [4, 5])]
+    assert SeatService.find_adjacent_free_seats(db, 7) == []
+    assert second.id in [b["table_id"] for b in SeatService.find_adjacent_free_seats(db, 2, limit=2)]
+
+
+@pytest.fixture
+def table():
+    floor_plan.reset()
+    response = client.post("/api/tables/", json={"table_number": 9002, "capacity": 4})
+    assert response.status_code == 200
+    table_id = response.json()["id"]
+    yield table_id
+    with SessionLocal() as session:
+        db_table = session.get(Table, table_id)
+        if db_table is not None:
+            session.delete(db_table)
+            session.commit()
+    floor_plan.reset()
+
+
+def test_seat_routes_update_rows_and_floor_plan(table):
+    assert client.post(f"/api/tables/{table}/assign-seat/2", data={"customer_name": "Ana"}).status_code == 200
+    assert client.post(f"/api/tables/{table}/assign-seat/9").status_code == 404
+
+    blocks = client.get("/api/tables/free-seats?count=2").json()
+    assert {"table_id": table, "table_number": 9002, "seat_numbers": [3, 4], "free_seats": 2} in blocks
+
+    snapshot = client.get("/api/tables/floor-plan").json()
+    assert client.post(f"/api/tables/{table}/release").status_code == 200
+    delta = client.get(f"/api/tables/floor-plan/changes?since={snapshot['version']}&epoch={snapshot['epoch']}").json()
+    [changed] = delta["tables"]
+    assert not changed["is_occupied"]
+    assert {seat["status"] for seat in changed["seats"]} == {"available"}
+
+    response = client.put(f"/api/tables/{table}", json={"capacity": 2})
+    assert [seat["seat_number"] for seat in response.json()["seats"]] == [1, 2]
+    with SessionLocal() as session:
+        assert session.query(Seat).filter(Seat.table_id == table).count() == 2
+
+    assert client.delete(f"/api/tables/{table}").status_code == 200
+    with SessionLocal() as session:
+        assert session.query(Seat).filter(Seat.table_id == table).count() == 0
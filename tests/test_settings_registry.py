@@ -0,0 +1,82 @@
+"""
+Tests for the per-worker settings cache and its version-stamp invalidation
+"""
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models.settings import Setting, SETTINGS_VERSION_KEY
+from app.services.settings_registry import SettingsRegistry, settings_registry
+from app.services.settings_service import SettingsService
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'settings.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_reads_are_served_from_the_cache(engine):
+    db = sessionmaker(bind=engine)()
+    assert SettingsService.get_tax_rate(db) == 0.08  # Default when unset
+    SettingsService.update_tax_rate(db, 0.1)
+
+    statements = _count_queries(engine)
+    assert SettingsService.get_tax_rate(db) == 0.1  # Seen at once by the worker that wrote it
+    for _ in range(100):
+        SettingsService.get_tax_rate(db)
+    assert len(statements) == 2  # One version check, one reload
+    db.close()
+
+
+def test_every_change_bumps_the_version_in_the_same_transaction(engine):
+    db = sessionmaker(bind=engine)()
+    db.add(Setting(key="receipt_footer", value="Thanks!"))
+    db.commit()
+    SettingsService.update_tax_rate(db, 0.07)
+    stamp = db.query(Setting).filter(Setting.key == SETTINGS_VERSION_KEY).one()
+    assert stamp.version == 2
+    assert SettingsService.get_setting(db, "tax_rate").version == 2
+
+    setting = SettingsService.get_setting(db, "receipt_footer")
+    setting.value = "Come again"
+    db.flush()
+    db.rollback()
+    db.expire_all()
+    assert db.query(Setting).filter(Setting.key == SETTINGS_VERSION_KEY).one().version == 2
+    assert settings_registry.row(db, "receipt_footer")["value"] == "Thanks!"
+    assert [row["key"] for row in settings_registry.rows(db)] == ["receipt_footer", "tax_rate"]
+    db.close()
+
+
+def test_other_workers_see_a_change_within_the_check_interval(engine):
+    other_worker = SettingsRegistry(check_seconds=0.2)
+    db = sessionmaker(bind=engine)()
+    SettingsService.update_tax_rate(db, 0.05)
+    assert other_worker.get(db, "tax_rate") == 0.05
+
+    SettingsService.update_tax_rate(db, 0.06)
+    assert other_worker.get(db, "tax_rate") == 0.05  # Not checked again yet
+    time.sleep(0.25)
+    assert other_worker.get(db, "tax_rate") == 0.06
+    db.close()
+
+
+def test_invalid_values_fall_back_to_the_default(engine):
+    db = sessionmaker(bind=engine)()
+    db.add(Setting(key="tax_rate", value="eight percent"))
+    db.commit()
+    assert SettingsService.get_tax_rate(db) == 0.08
+    db.close()
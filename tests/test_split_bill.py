@@ -0,0 +1,110 @@
+"""
+Tests for splitting a table's bill into child orders in one transaction
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.order import Order
+from app.models.table import Table
+from app.services.seat_service import SeatService
+from app.services.split_bill_service import SplitBillService
+
+client = TestClient(app)
+
+ITEMS = [
+    {"name": "Burger", "price": 8.99, "category": "Main Course"},
+    {"name": "Fries", "price": 3.99, "category": "Sides"},
+    {"name": "Soda", "price": 2.99, "category": "Drinks"},
+    {"name": "Pie", "price": 4.50, "category": "Dessert"},
+]
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+def _seated_table(db, items=ITEMS):
+    order = Order(total=sum(item["price"] for item in items), order_data=json.dumps(items), customer_name="Ana", table_number=7)
+    table = Table(table_number=7, capacity=4, is_occupied=True, status="occupied", current_order=order)
+    SeatService.resize(table, 4)
+    db.add(table)
+    db.commit()
+    return table, order
+
+
+def test_plan_computes_every_part_up_front():
+    plan = SplitBillService.plan(ITEMS, {"method": "seats", "seat_assignments": {"1": [0, 2], "2": [1]}}, [1, 2, 3])
+    assert [(p["customer_name"], p["total"], p["customer_count"]) for p in plan] == [("Seat 1", 11.98, 1), ("Seat 2", 3.99, 1)]
+
+    equal = SplitBillService.plan(ITEMS, {"method": "equal", "parts": 3})
+    assert [[item["name"] for item in p["items"]] for p in equal] == [["Burger", "Pie"], ["Fries"], ["Soda"]]
+
+
+@pytest.mark.parametrize("split_request, message", [
+    ({"method": "items", "splits": [{"items": [0, 1]}, {"items": [1]}]}, "more than one part"),
+    ({"method": "items", "splits": [{"items": [0]}, {"items": [9]}]}, "does not exist"),
+    ({"method": "items", "splits": [{"items": []}]}, "at least one item"),
+    ({"method": "seats", "seat_assignments": {"5": [0]}}, "Seat 5 does not exist"),
+    ({"method": "equal", "parts": 5}, "into 5 parts"),
+    ({"method": "equal", "parts": 0}, "greater than 0"),
+    ({"method": "coins"}, "Invalid split method"),
+])
+def test_plan_rejects_invalid_requests(split_request, message):
+    with pytest.raises(ValueError, match=message):
+        SplitBillService.plan(ITEMS, split_request, [1, 2, 3, 4])
+
+
+def test_split_inserts_all_children_with_one_statement(db):
+    table, parent = _seated_table(db)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    splits = SplitBillService.split(db, table.id, {"method": "equal", "parts": 4})
+    db.commit()
+
+    assert len([s for s in statements if s.startswith("INSERT INTO orders")]) == 1
+    children = [order for order, _ in splits]
+    assert all(child.id is not None and child.parent_order_id == parent.id for child in children)
+    assert sorted(child.id for child in parent.split_orders) == sorted(child.id for child in children)
+    assert sum(child.total for child in children) == pytest.approx(parent.total)
+    assert children[0].parent_order is parent
+
+
+def test_invalid_split_writes_nothing(db):
+    table, parent = _seated_table(db)
+    with pytest.raises(ValueError):
+        SplitBillService.split(db, table.id, {"method": "items", "splits": [{"items": [0]}, {"items": [0]}]})
+    db.rollback()
+    assert db.query(Order).count() == 1
+
+
+def test_split_bill_route_returns_children_in_one_transaction():
+    with SessionLocal() as session:
+        table, parent = _seated_table(session, ITEMS[:3])
+        table.table_number = 9004
+        session.commit()
+        table_id, parent_id = table.id, parent.id
+
+    try:
+        response = client.post(f"/api/tables/{table_id}/split-bill", json={
+            "method": "items", "splits": [{"items": [0]}, {"items": [1, 2]}]
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert [(o["total"], [i["name"] for i in o["order"]]) for o in data] == [(8.99, ["Burger"]), (6.98, ["Fries", "Soda"])]
+        assert {o["parent_order_id"] for o in data} == {parent_id}
+
+        bad = client.post(f"/api/tables/{table_id}/split-bill", json={"method": "items", "splits": [{"items": [7]}]})
+        assert bad.status_code == 400
+    finally:
+        with SessionLocal() as session:
+            for order in session.query(Order).filter(Order.parent_order_id == parent_id):
+                session.delete(order)
+            session.flush()
+            session.delete(session.get(Table, table_id))
+            session.delete(session.get(Order, parent_id))
+            session.commit()
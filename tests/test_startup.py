@@ -0,0 +1,74 @@
+"""
+Tests for application startup: lifespan handling and lazily imported subsystems
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.imports import import_app_module
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+def test_lifespan_starts_and_stops():
+    """Startup warms the pools and shutdown disposes them without errors"""
+    with TestClient(app) as client:
+        response = client.get("/health")
+        assert response.status_code == 200
+
+
+def test_import_does_not_load_printing():
+    """Importing the app should not pull in the KOT/printer services"""
+    code = (
+        "import sys, app.main; "
+        "loaded = [m for m in sys.modules if 'kot_service' in m or m.startswith('escpos')]; "
+        "print(','.join(loaded))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "SECRET_KEY": os.environ.get("SECRET_KEY", "test-secret")},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_optional_routers_load_on_first_request():
+    """Analytics (with numpy) and the HTTP payment client are not imported until used"""
+    code = (
+        "import sys, app.main; "
+        "deferred = ('app.routes.analytics_routes', 'app.routes.stock_routes', 'app.services.archive_service', 'numpy', 'httpx'); "
+        "print(','.join(m for m in deferred if m in sys.modules)); "
+        "from fastapi.testclient import TestClient; "
+        "client = TestClient(app.main.app); "
+        "print(client.get('/api/analytics/cache').status_code, 'app.routes.analytics_routes' in sys.modules, "
+        "'app.routes.stock_routes' in sys.modules); "
+        "print('/api/stock/ingredients' in client.get('/openapi.json').json()['paths'])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "SECRET_KEY": os.environ.get("SECRET_KEY", "test-secret")},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-3:] == ["", "200 True False", "True"]
+
+
+def test_import_app_module_resolves_package_path():
+    """Lazy imports should resolve the app package the same way as the static imports"""
+    module = import_app_module("routes.analytics_routes")
+    assert module.__name__ == "app.routes.analytics_routes"
+    assert module.router.prefix == "/api/analytics"
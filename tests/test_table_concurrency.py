@@ -0,0 +1,172 @@
+"""
+Tests for optimistic concurrency on table seating and merges
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+
+import app.models  # noqa: F401
+from app.database import Base, SessionLocal
+from app.main import app
+from app.models.order import Order
+from app.models.table import Table
+from app.services.seat_service import SeatService
+from app.services.table_service import TableService
+from app.utils.concurrency import ConflictError, retry_on_conflict
+
+client = TestClient(app)
+
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A file database so that every thread gets its own connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'seating.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+def _setup(session_factory, tables, orders):
+    with session_factory() as db:
+        for number in range(1, tables + 1):
+            table = Table(table_number=number, capacity=4, status="available", is_occupied=False)
+            SeatService.resize(table, 4)
+            db.add(table)
+        db.add_all([Order(total=10.0, customer_name=f"Guest {n}") for n in range(orders)])
+        db.commit()
+        return [t.id for t in db.query(Table).order_by(Table.id)], [o.id for o in db.query(Order).order_by(Order.id)]
+
+
+def _seat(session_factory, table_id, order_id, start=None):
+    if start is not None:
+        start.wait()
+    with session_factory() as db:
+        try:
+            retry_on_conflict(db, lambda session: TableService.assign_order(session, table_id, order_id))
+            return order_id
+        except ValueError:
+            return None
+
+
+def test_stale_write_is_detected_and_retry_sees_the_winner(session_factory):
+    (table_id,), (first, second) = _setup(session_factory, tables=1, orders=2)
+    winner, loser = session_factory(), session_factory()
+    stale_table = loser.get(Table, table_id)  # read before the winner commits
+    assert not stale_table.is_occupied
+
+    TableService.assign_order(winner, table_id, first)
+    winner.commit()
+
+    with pytest.raises(StaleDataError):
+        TableService.assign_order(loser, table_id, second)
+        loser.flush()
+    loser.rollback()
+
+    with pytest.raises(ValueError, match="already occupied"):
+        retry_on_conflict(loser, lambda session: TableService.assign_order(session, table_id, second))
+    table = loser.get(Table, table_id)
+    assert table.current_order_id == first and table.version == 2
+    winner.close()
+    loser.close()
+
+
+def test_retries_give_up_with_conflict_error(session_factory):
+    attempts = []
+
+    def always_stale(session):
+        attempts.append(1)
+        raise StaleDataError("simulated")
+
+    with session_factory() as db, pytest.raises(ConflictError):
+        retry_on_conflict(db, always_stale, attempts=3)
+    assert len(attempts) == 3
+
+
+def test_merge_conflicts_with_a_concurrent_order_change(session_factory):
+    (table1, table2), (order1, order2) = _setup(session_factory, tables=2, orders=2)
+    with session_factory() as db:
+        for table_id, order_id in ((table1, order1), (table2, order2)):
+            retry_on_conflict(db, lambda session: TableService.assign_order(session, table_id, order_id))
+
+    editor = session_factory()
+    edited = editor.get(Order, order2)
+    with session_factory() as db:
+        retry_on_conflict(db, lambda session: TableService.merge(session, table1, table2))
+
+    # The merge copied order2, so an edit based on the pre-merge version is rejected
+    edited.total = 99.0
+    with pytest.raises(StaleDataError):
+        editor.commit()
+    editor.close()
+    with session_factory() as db:
+        assert db.get(Order, order1).total == 20.0
+        assert db.get(Table, table1).capacity == 8
+
+
+def test_concurrent_seating_has_exactly_one_winner(session_factory):
+    (table_id,), order_ids = _setup(session_factory, tables=1, orders=24)
+    start = threading.Barrier(len(order_ids))
+
+    with ThreadPoolExecutor(max_workers=len(order_ids)) as pool:
+        results = list(pool.map(lambda order_id: _seat(session_factory, table_id, order_id, start), order_ids))
+
+    winners = [r for r in results if r is not None]
+    assert len(winners) == 1
+    with session_factory() as db:
+        table = db.get(Table, table_id)
+        assert table.current_order_id == winners[0]
+        assert table.version == 2
+        assert {seat.customer_name for seat in table.seats} == {f"Guest {order_ids.index(winners[0])}"}
+
+
+def test_contention_does_not_collapse_throughput(session_factory):
+    table_ids, order_ids = _setup(session_factory, tables=80, orders=80)
+
+    def run(assignments):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda pair: _seat(session_factory, *pair), assignments))
+        return results, time.perf_counter() - started
+
+    # Uncontended: 40 tables, one order each
+    results, uncontended = run(list(zip(table_ids[:40], order_ids[:40])))
+    assert all(r is not None for r in results)
+
+    # Contended: 10 tables, four hosts racing for each
+    contended_pairs = [(table_ids[40 + n % 10], order_ids[40 + n]) for n in range(40)]
+    results, contended = run(contended_pairs)
+    assert len([r for r in results if r is not None]) == 10
+    # Losers fail fast on a fresh read instead of queueing behind locks
+    assert contended < max(5 * uncontended, 2.0)
+
+
+def test_assign_route_rejects_a_stale_version():
+    with SessionLocal() as db:
+        order = Order(total=5.0, customer_name="Ana")
+        db.add(order)
+        db.commit()
+        order_id = order.id
+    table = client.post("/api/tables/", json={"table_number": 9003, "capacity": 2}).json()
+    try:
+        stale = client.post(f"/api/tables/{table['id']}/assign/{order_id}?version={table['version'] + 1}")
+        assert stale.status_code == 409
+
+        response = client.post(f"/api/tables/{table['id']}/assign/{order_id}?version={table['version']}")
+        assert response.status_code == 200
+        assert response.json()["version"] == table["version"] + 1
+        assert client.post(f"/api/tables/{table['id']}/assign/{order_id}").status_code == 400
+    finally:
+        client.post(f"/api/tables/{table['id']}/release")
+        client.delete(f"/api/tables/{table['id']}")
+        with SessionLocal() as db:
+            db.delete(db.get(Order, order_id))
+            db.commit()
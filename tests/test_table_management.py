@@ -7,22 +7,13 @@ import copy
 os.environ["ENVIRONMENT"] = "testing"
 os.environ["TEST_DATABASE_URL"] = "sqlite:///./test.db"
 
-# Mock the database dependency to avoid connection issues
-import sys
-from unittest.mock import MagicMock
-
-# Mock the database module
-sys.modules['app.database'] = MagicMock()
-
-# Now import the app and other modules
+# The session-wide app_schema fixture in conftest.py creates the schema on the test
+# database, so the app is imported with its real database module
 from app.main import app
 from app.data import shared_data
 from app.models.table import TableResponse
 from datetime import datetime
 
-# Override the database dependency
-app.dependency_overrides = {}
-
 # Create a test client
 client = TestClient(app)
 
@@ -40,9 +31,15 @@ test_order_data = {
     "total": 12.98
 }
 
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
 @pytest.fixture(autouse=True)
-def setup_and_teardown():
+def setup_and_teardown(monkeypatch):
     """Setup and teardown for each test"""
+    # Run against the real database dependency without dropping other modules' overrides
+    monkeypatch.setattr(app, "dependency_overrides", {})
+
     # Store original data (deep copy to avoid reference issues)
     original_tables = copy.deepcopy(shared_data.sample_tables)
     original_orders = copy.deepcopy(shared_data.sample_orders)
@@ -14,6 +14,9 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 # Create tables in the test database
 Base.metadata.create_all(bind=engine)
 
+# Routes run against the application's database, so it needs the schema
+pytestmark = pytest.mark.usefixtures("app_schema")
+
 # Override the get_db dependency to use the test database
 def override_get_db():
     db = TestingSessionLocal()